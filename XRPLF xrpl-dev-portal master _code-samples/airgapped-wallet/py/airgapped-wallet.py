@@ -1,9 +1,13 @@
 import os
+import csv
+import json
 import shutil
 import base64
 import qrcode
 import platform
+from decimal import Decimal
 from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path, PureWindowsPath, PurePath
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
@@ -33,9 +37,10 @@ def create_wallet():
     return address, seed
 
 
-def sign_transaction(_xrp_amount, _destination, _ledger_seq, _wallet_seq, password):
+def unlock_wallet(password):
     """
-    Signs transaction and returns signed transaction blob in QR code
+    Decrypts the stored seed and returns the wallet. Deriving the key takes
+    100,000 PBKDF2 iterations, so unlock once per session and reuse the wallet.
     """
 
     with open(get_path("/Wallet/private.txt"), "r") as f:
@@ -45,7 +50,7 @@ def sign_transaction(_xrp_amount, _destination, _ledger_seq, _wallet_seq, passwo
     with open(get_path("/Wallet/salt.txt"), "rb") as f:
         salt = f.read()
 
-    # Line 49-58: initialize key
+    # Initialize key
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
         length=32,
@@ -58,7 +63,15 @@ def sign_transaction(_xrp_amount, _destination, _ledger_seq, _wallet_seq, passwo
 
     # Decrypts the wallet's private key
     _seed = crypt.decrypt(_seed)
-    _wallet = Wallet.from_seed(seed=_seed.decode())
+    return Wallet.from_seed(seed=_seed.decode())
+
+
+def sign_transaction(_xrp_amount, _destination, _ledger_seq, _wallet_seq, password):
+    """
+    Signs transaction and returns signed transaction blob in QR code
+    """
+
+    _wallet = unlock_wallet(password)
 
     validated_seq = _ledger_seq
 
@@ -85,6 +98,110 @@ def sign_transaction(_xrp_amount, _destination, _ledger_seq, _wallet_seq, passwo
     image.show()
 
 
+def load_payouts(payouts_file):
+    """
+    Reads payouts from a CSV file (with a header row) or a JSONL file, one
+    payout per row: destination, amount (in XRP) and optional destination_tag
+    """
+
+    with open(payouts_file, "r", newline="") as f:
+        if payouts_file.endswith(".jsonl"):
+            # Decimal keeps amounts like 0.1 exact, where float would round them
+            rows = [json.loads(line, parse_float=Decimal) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    payouts = []
+    for row in rows:
+        payout = {
+            "destination": row["destination"].strip(),
+            "amount": str(row["amount"]).strip(),
+        }
+        if row.get("destination_tag") not in (None, ""):
+            payout["destination_tag"] = int(row["destination_tag"])
+        payouts.append(payout)
+    return payouts
+
+
+def _init_signer(seed):
+    """
+    Runs once in each worker process, so the wallet isn't rebuilt per payout
+    """
+
+    global _batch_wallet
+    _batch_wallet = Wallet.from_seed(seed=seed)
+
+
+def _sign_payout(job):
+    payout, sequence, ticket, last_ledger = job
+    payment = Payment(
+        account=_batch_wallet.address,
+        amount=xrp_to_drops(xrp=Decimal(payout["amount"])),
+        destination=payout["destination"],
+        destination_tag=payout.get("destination_tag"),
+        last_ledger_sequence=last_ledger,
+        sequence=sequence,
+        ticket_sequence=ticket,
+        fee="10"
+    )
+    signed = sign(transaction=payment, wallet=_batch_wallet)
+    return {
+        "destination": payout["destination"],
+        "amount": payout["amount"],
+        "sequence": ticket if ticket is not None else sequence,
+        "hash": signed.get_hash(),
+        "blob": signed.blob(),
+    }
+
+
+def sign_batch(wallet, payouts, _ledger_seq, _wallet_seq=None, tickets=None, workers=None):
+    """
+    Signs every payout in a worker pool. Each payout gets the next consecutive
+    sequence starting from _wallet_seq, or one of the given tickets if any.
+    """
+
+    if tickets is not None and len(tickets) < len(payouts):
+        raise ValueError(f"{len(payouts)} payouts but only {len(tickets)} tickets")
+
+    # Batches take longer to relay than a single payment, so give them more
+    # time than sign_transaction's 100 ledgers before they expire.
+    last_ledger = _ledger_seq + 300
+
+    jobs = []
+    for i, payout in enumerate(payouts):
+        if tickets is not None:
+            jobs.append((payout, 0, tickets[i], last_ledger))
+        else:
+            jobs.append((payout, _wallet_seq + i, None, last_ledger))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_signer,
+                             initargs=(wallet.seed,)) as pool:
+        return list(pool.map(_sign_payout, jobs, chunksize=16))
+
+
+def write_bundle(wallet, signed_txs, qr_chunk_size=None):
+    """
+    Writes all signed blobs to one bundle file. If qr_chunk_size is set, the
+    bundle is also split into numbered QR frames ("1/5:...", "2/5:...", ...)
+    which relay-transaction.py can reassemble.
+    """
+
+    bundle = json.dumps({"account": wallet.address, "transactions": signed_txs})
+    bundle_path = get_path("/Wallet/signed-bundle.json")
+    with open(bundle_path, "w") as f:
+        f.write(bundle)
+
+    frame_paths = []
+    if qr_chunk_size:
+        chunks = [bundle[i:i + qr_chunk_size] for i in range(0, len(bundle), qr_chunk_size)]
+        for i, chunk in enumerate(chunks):
+            frame_path = get_path(f"/Wallet/signed-bundle-{i + 1}.png")
+            qrcode.make(f"{i + 1}/{len(chunks)}:{chunk}").save(frame_path)
+            frame_paths.append(frame_path)
+
+    return bundle_path, frame_paths
+
+
 def get_path(file):
     """
     Get path (filesystem management)
@@ -125,7 +242,8 @@ def main():
                 ask = int(input("\n 1. Transact XRP"
                             "\n 2. Generate an XRP wallet (read only)"
                             "\n 3. Showcase XRP Wallet Address (QR Code)"
-                            "\n 4. Exit"
+                            "\n 4. Sign a batch of XRP payouts"
+                            "\n 5. Exit"
                             "\n\n Enter Index: "
                             ))
             except ValueError:
@@ -162,6 +280,29 @@ def main():
                 image.show()
 
             if ask == 4:
+                password = str(input("             Enter Password: "))
+                payouts_file = input("  Enter Payouts File (.csv or .jsonl): ")
+                first_sequence = int(input("Look up the 'Next Sequence' for the account using test.bithomp.com and enter it below!"
+                                           "\n    Enter First Wallet Sequence: "))
+                ledger_sequence = int(input("Look up the latest ledger sequence on testnet.xrpl.org and enter it below!"
+                                            "\n    Enter Ledger Sequence: "))
+                chunk_size = input("  QR frame size in characters (blank for no QR codes): ")
+
+                wallet = unlock_wallet(password)
+                payouts = load_payouts(payouts_file)
+                signed_txs = sign_batch(wallet, payouts, _ledger_seq=ledger_sequence,
+                                        _wallet_seq=first_sequence)
+                bundle_path, frame_paths = write_bundle(
+                    wallet, signed_txs, qr_chunk_size=int(chunk_size) if chunk_size else None
+                )
+                print(f"\nSigned {len(signed_txs)} payouts into {bundle_path}")
+                if frame_paths:
+                    print(f"Wrote {len(frame_paths)} QR frames next to the bundle.")
+                print("This batch is expected to expire in ~20 minutes.")
+
+                del wallet, payouts, signed_txs
+
+            if ask == 5:
                 return 0
     else:
         # If the Wallet's folder does not exist, create one and store wallet data (encrypted private key, encrypted seed, account address)
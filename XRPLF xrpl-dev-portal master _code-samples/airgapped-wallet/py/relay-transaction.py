@@ -1,8 +1,13 @@
+from xrpl.asyncio.clients import AsyncJsonRpcClient
+from xrpl.asyncio.transaction import submit_and_wait as async_submit_and_wait
 from xrpl.clients import JsonRpcClient
 from xrpl.models.transactions import Payment
 from xrpl.transaction import submit_and_wait
+from xrpl.transaction import XRPLReliableSubmissionException
 from xrpl.utils import drops_to_xrp
 import argparse
+import asyncio
+import json
 
 def connect_node(_node):
     """
@@ -45,9 +50,73 @@ def send_transaction(tx_blob):
          )
 
 
+def read_bundle(bundle_file):
+    """
+    Reads a bundle written by airgapped-wallet.py. The file can be the bundle
+    JSON itself, or the text of its scanned QR frames, one frame per line.
+    """
+
+    with open(bundle_file, "r") as f:
+        text = f.read().strip()
+
+    if not text:
+        raise ValueError(f"{bundle_file} is empty")
+    if not text.startswith("{"):
+        # Frames look like "2/5:<part of the bundle>" and may be scanned in any order
+        frames = {}
+        for line in text.splitlines():
+            header, chunk = line.split(":", 1)
+            index, total = (int(n) for n in header.split("/"))
+            frames[index] = chunk
+        if len(frames) != total:
+            missing = sorted(set(range(1, total + 1)) - set(frames))
+            raise ValueError(f"Missing QR frames: {missing}")
+        text = "".join(frames[i] for i in range(1, total + 1))
+
+    return json.loads(text)
+
+
+async def send_bundle(bundle, concurrency=20):
+    """
+    Submits every signed blob in a bundle concurrently and waits for each one
+    to be validated. Transactions with later sequences than one still in
+    flight are held by the server until the earlier ones apply.
+    """
+
+    client = AsyncJsonRpcClient("https://s.altnet.rippletest.net:51234/")
+    # TESTNET: "https://s.altnet.rippletest.net:51234/"
+    # MAINNET: "https://s2.ripple.com:51234/"
+    limit = asyncio.Semaphore(concurrency)
+
+    async def submit_one(tx):
+        async with limit:
+            try:
+                response = await async_submit_and_wait(transaction=tx["blob"], client=client)
+                return response.result["meta"]["TransactionResult"]
+            except XRPLReliableSubmissionException as e:
+                return f"Submit failed: {e}"
+
+    # Submit in sequence order so as few transactions as possible are held
+    transactions = sorted(bundle["transactions"], key=lambda tx: tx["sequence"])
+    results = await asyncio.gather(*[submit_one(tx) for tx in transactions])
+
+    print(f"\n   ---   Relayed {len(transactions)} transactions for {bundle['account']}")
+    for tx, result in zip(transactions, results):
+        print(f"  {tx['sequence']:>10}  {tx['amount']:>12} XRP -> {tx['destination']}  {result}"
+              f"\n              https://testnet.xrpl.org/transactions/{tx['hash']}")
+    return results
+
+
 if __name__ == '__main__':
     p = argparse.ArgumentParser(description='Submit a signed transaction blob')
-    p.add_argument('blob', type=str, 
+    p.add_argument('blob', type=str, nargs='?',
         help='Transaction blob (in hexadecimal) to submit')
-    tx_blob = p.parse_args().blob
-    send_transaction(tx_blob)
+    p.add_argument('--bundle', type=str,
+        help='Bundle file (or scanned QR frames) from airgapped-wallet.py to submit')
+    args = p.parse_args()
+    if args.bundle:
+        asyncio.run(send_bundle(read_bundle(args.bundle)))
+    elif args.blob:
+        send_transaction(args.blob)
+    else:
+        p.error('provide a transaction blob or --bundle')
@@ -0,0 +1,307 @@
+# This resolves the DIDs of many accounts and keeps them in a cache
+import argparse
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.asyncio.clients.exceptions import XRPLWebsocketException
+from xrpl.core.addresscodec import is_valid_classic_address
+from xrpl.models import LedgerEntry, StreamParameter, Subscribe
+
+# account_did.py looks up one DID with ledger_entry and exits. This resolver
+# answers many lookups at once from a cache of DID entries, so a login only
+# reaches the ledger the first time an account is seen. Accounts without a
+# DID are cached too, as a "not found" entry.
+#
+# An entry stays good until a validated transaction changes that account's DID
+# ledger entry. The resolver follows the transaction stream and drops the
+# entry as soon as a DIDSet or DIDDelete (or anything else that touches a DID
+# entry, like AccountDelete) shows up in the metadata. While the stream is
+# down nothing is answered from the cache, and the cache is emptied when it
+# comes back, since changes may have been missed in between.
+#
+# Use it from Python with resolve() and resolve_many(), or run this file for a
+# small local HTTP API:
+#   GET  /did/<account>                    one DID
+#   POST /resolve {"accounts": [...]}      many DIDs at once
+#   GET  /metrics                          cache and latency numbers
+
+WS_URL = "wss://s.altnet.rippletest.net:51233"
+# Seconds to wait before reconnecting a dropped transaction stream
+RECONNECT_DELAY = 2
+# Seconds a lookup waits for the connection before giving up
+CONNECT_TIMEOUT = 10
+# Errors meaning the server is overloaded, rather than broken
+BUSY_ERRORS = {"tooBusy", "slowDown"}
+
+
+def hex_to_text(value):
+    """DID fields are hex. Returns the text they hold, or the hex if it isn't UTF-8."""
+    if value is None:
+        return None
+    try:
+        return bytes.fromhex(value).decode("utf-8")
+    except ValueError:
+        return value
+
+
+def did_record(account, node, ledger_index):
+    if node is None:
+        return {"account": account, "found": False, "ledger_index": ledger_index}
+    return {
+        "account": account,
+        "found": True,
+        "did": f"did:xrpl:1:{account}",
+        "document": hex_to_text(node.get("DIDDocument")),
+        "data": hex_to_text(node.get("Data")),
+        "uri": hex_to_text(node.get("URI")),
+        "ledger_index": ledger_index,
+    }
+
+
+def changed_dids(meta):
+    """Accounts whose DID entry a transaction created, changed or deleted"""
+    accounts = set()
+    for node in meta.get("AffectedNodes", []):
+        kind, entry = next(iter(node.items()))
+        if entry["LedgerEntryType"] == "DID":
+            fields = entry.get("FinalFields") or entry.get("NewFields", {})
+            accounts.add(fields["Account"])
+    return accounts
+
+
+class UpstreamError(Exception):
+    """The ledger server failed to answer a lookup that was itself fine"""
+
+    def __init__(self, message, busy=False):
+        super().__init__(message)
+        self.busy = busy
+
+
+class Latency:
+    """The last few thousand timings of one kind of lookup, in milliseconds"""
+
+    def __init__(self, size=5000):
+        self.samples = deque(maxlen=size)
+
+    def add(self, started):
+        self.samples.append((time.perf_counter() - started) * 1000)
+
+    def summary(self):
+        if not self.samples:
+            return {"count": 0}
+        ordered = sorted(self.samples)
+        pick = lambda fraction: round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+        return {"count": len(ordered), "p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+class DIDResolver:
+    def __init__(self, url, max_entries=100000, max_in_flight=64):
+        self.url = url
+        self.client = None
+        self.cache = OrderedDict()
+        self.max_entries = max_entries
+        self.limit = asyncio.Semaphore(max_in_flight)
+        # account -> future, so concurrent lookups of one account share a request
+        self.fetching = {}
+        # account -> ledger its DID last changed in, to drop fetches that
+        # raced with a change. Only kept while a fetch for the account is in
+        # flight, so it doesn't grow with every DID on the network.
+        self.changed = {}
+        self.streaming = False
+        self.ready = asyncio.Event()
+        self.counts = {"hits": 0, "negative_hits": 0, "misses": 0, "invalidations": 0, "errors": 0}
+        self.latency = {"hit": Latency(), "miss": Latency()}
+
+    # Following the ledger ----------------------------------------------------
+
+    async def run(self):
+        while True:
+            try:
+                async with AsyncWebsocketClient(self.url) as client:
+                    await client.request(Subscribe(streams=[StreamParameter.TRANSACTIONS]))
+                    # Changes may have been missed while the stream was down
+                    self.cache.clear()
+                    self.changed.clear()
+                    self.client = client
+                    self.streaming = True
+                    self.ready.set()
+                    async for message in client:
+                        if message.get("type") == "transaction" and message.get("validated"):
+                            for account in changed_dids(message["meta"]):
+                                self.invalidate(account, message["ledger_index"])
+            except Exception as e:
+                print(f"transaction stream lost: {e!r}")
+            self.streaming = False
+            self.client = None
+            self.ready.clear()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    def invalidate(self, account, ledger_index):
+        if account in self.fetching:
+            self.changed[account] = ledger_index
+        if self.cache.pop(account, None) is not None:
+            self.counts["invalidations"] += 1
+
+    # Resolving ---------------------------------------------------------------
+
+    async def fetch(self, account):
+        try:
+            async with self.limit:
+                response = await self.client.request(LedgerEntry(did=account, ledger_index="validated"))
+        except XRPLWebsocketException as e:
+            raise UpstreamError(f"{account}: {e}") from e
+        result = response.result
+        if response.is_successful():
+            record = did_record(account, result["node"], result["ledger_index"])
+        elif result.get("error") == "entryNotFound":
+            record = did_record(account, None, result.get("ledger_index"))
+        else:
+            error = result.get("error")
+            raise UpstreamError(f"{account}: {error}", busy=error in BUSY_ERRORS)
+        # Only cache it if no newer change to this DID has been seen since
+        if self.streaming and self.changed.get(account, 0) <= (record["ledger_index"] or 0):
+            self.cache[account] = record
+            if len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+        return record
+
+    async def resolve(self, account):
+        started = time.perf_counter()
+        if not is_valid_classic_address(account):
+            raise ValueError(f"{account}: not a valid address")
+        record = self.cache.get(account) if self.streaming else None
+        if record is not None:
+            self.cache.move_to_end(account)
+            self.counts["hits" if record["found"] else "negative_hits"] += 1
+            self.latency["hit"].add(started)
+            return record
+
+        self.counts["misses"] += 1
+        if self.client is None:
+            # Give a dropped connection a moment to come back
+            try:
+                await asyncio.wait_for(self.ready.wait(), CONNECT_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise ConnectionError("not connected to the ledger")
+        future = self.fetching.get(account)
+        if future is None:
+            future = asyncio.ensure_future(self.fetch(account))
+            self.fetching[account] = future
+            future.add_done_callback(lambda _: self.forget_fetch(account))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # The client cancels requests that are in flight when it disconnects
+            self.counts["errors"] += 1
+            raise UpstreamError(f"{account}: connection to the ledger was lost")
+        except Exception:
+            self.counts["errors"] += 1
+            raise
+        finally:
+            self.latency["miss"].add(started)
+
+    def forget_fetch(self, account):
+        self.fetching.pop(account, None)
+        self.changed.pop(account, None)
+
+    async def resolve_many(self, accounts):
+        """account -> DID record, or an error message for accounts that couldn't be resolved"""
+        accounts = list(dict.fromkeys(accounts))
+        results = await asyncio.gather(*[self.resolve(account) for account in accounts], return_exceptions=True)
+        return {
+            account: {"account": account, "error": str(result)} if isinstance(result, Exception) else result
+            for account, result in zip(accounts, results)
+        }
+
+    def metrics(self):
+        lookups = self.counts["hits"] + self.counts["negative_hits"] + self.counts["misses"]
+        hits = self.counts["hits"] + self.counts["negative_hits"]
+        return {
+            **self.counts,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "cached": len(self.cache),
+            "streaming": self.streaming,
+            "latency_ms": {kind: latency.summary() for kind, latency in self.latency.items()},
+        }
+
+
+# Local HTTP API ----------------------------------------------------------------
+
+class DIDServer:
+    def __init__(self, resolver):
+        self.resolver = resolver
+
+    async def respond(self, method, path, body):
+        if method == "GET" and path.startswith("/did/"):
+            try:
+                return "200 OK", await self.resolver.resolve(path[len("/did/"):])
+            except ValueError as e:
+                return "400 Bad Request", {"error": str(e)}
+            except UpstreamError as e:
+                return "503 Service Unavailable" if e.busy else "502 Bad Gateway", {"error": str(e)}
+            except ConnectionError as e:
+                return "503 Service Unavailable", {"error": str(e)}
+        if method == "POST" and path == "/resolve":
+            try:
+                accounts = json.loads(body or b"{}")["accounts"]
+            except (ValueError, KeyError, TypeError):
+                return "400 Bad Request", {"error": 'Send {"accounts": [...]}'}
+            return "200 OK", await self.resolver.resolve_many(accounts)
+        if method == "GET" and path == "/metrics":
+            return "200 OK", self.resolver.metrics()
+        return "404 Not Found", {"error": "not found"}
+
+    async def handle_http(self, reader, writer):
+        # A minimal HTTP/1.1 server with keep-alive
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = await self.respond(method, path.rstrip("/"), body)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def main(args):
+    resolver = DIDResolver(args.url, args.max_entries, args.in_flight)
+    stream = asyncio.ensure_future(resolver.run())
+    server = await asyncio.start_server(DIDServer(resolver).handle_http, args.host, args.port)
+    async with server:
+        print(f"DID resolver listening on http://{args.host}:{args.port}")
+        await stream
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cached DID resolver with a local HTTP API")
+    parser.add_argument("--url", default=WS_URL)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-entries", type=int, default=100000)
+    parser.add_argument("--in-flight", type=int, default=64, help="Most ledger_entry requests at once")
+    args = parser.parse_args()
+    asyncio.run(main(args))
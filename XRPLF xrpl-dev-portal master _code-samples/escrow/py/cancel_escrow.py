@@ -86,7 +86,7 @@ while True:
         break
     
     if "marker" in response.result.keys():
-        marker=marker
+        marker=response.result["marker"]
     else:
         # This is the last page of results
         break
@@ -0,0 +1,245 @@
+import base64
+import hashlib
+import os
+import sqlite3
+import time
+from collections import deque
+
+from cryptoconditions import PreimageSha256
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+# Pre-generate PREIMAGE-SHA-256 crypto-conditions for conditional escrows.
+#
+# send_conditional_escrow.py makes one condition per escrow and prints its
+# fulfillment. This vault makes them in bulk ahead of time and keeps each
+# fulfillment encrypted in SQLite, keyed by its condition. Handing out a fresh
+# condition is a pop from an in-memory queue of unused ones, and fulfillments
+# are decrypted only when an escrow is about to be finished.
+#
+# Several processes can share one vault file. Each keeps its own queue, but a
+# condition is only handed out if it's still free in the database when it is
+# claimed, so no two escrows ever get the same condition (and one escrow's
+# revealed fulfillment can't finish another).
+#
+# verify_fulfillments() checks fulfillments against their conditions locally,
+# so a wrong preimage is caught before an EscrowFinish is sent and its fee is
+# burned on tecCRYPTOCONDITION_ERROR.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conditions (
+    condition TEXT PRIMARY KEY,
+    fulfillment BLOB NOT NULL,
+    state TEXT NOT NULL DEFAULT 'free' CHECK (state IN ('free', 'issued', 'used')),
+    label TEXT,
+    created INTEGER NOT NULL,
+    issued INTEGER
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS conditions_by_state ON conditions (state);
+CREATE INDEX IF NOT EXISTS conditions_by_label ON conditions (label);
+"""
+
+PREIMAGE_SIZE = 32
+# Encrypted with the vault's key when it's created, so a wrong password is
+# caught on opening instead of adding pairs nobody can decrypt.
+VERIFIER = b"condition vault"
+
+
+def der_length(length):
+    if length < 0x80:
+        return bytes([length])
+    encoded = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes([0x80 | len(encoded)]) + encoded
+
+
+def condition_for(preimage):
+    """The binary PREIMAGE-SHA-256 condition for a preimage, built with hashlib
+
+    Same bytes as PreimageSha256(preimage=...).condition_binary: a DER sequence
+    of the SHA-256 fingerprint and the cost, which is the preimage length.
+    """
+    cost = len(preimage).to_bytes(max(1, (len(preimage).bit_length() + 7) // 8), "big")
+    body = b"\x80\x20" + hashlib.sha256(preimage).digest() + b"\x81" + der_length(len(cost)) + cost
+    return b"\xa0" + der_length(len(body)) + body
+
+
+def read_length(data, position):
+    """A DER length at position, and the position just after it"""
+    first = data[position]
+    if first < 0x80:
+        return first, position + 1
+    size = first & 0x7F
+    return int.from_bytes(data[position + 1:position + 1 + size], "big"), position + 1 + size
+
+
+def preimage_of(fulfillment):
+    """The preimage inside a binary PREIMAGE-SHA-256 fulfillment, or None if it isn't one"""
+    # A0 <length> 80 <length> <preimage>
+    if len(fulfillment) < 4 or fulfillment[0] != 0xA0:
+        return None
+    length, position = read_length(fulfillment, 1)
+    if position + length != len(fulfillment) or fulfillment[position] != 0x80:
+        return None
+    length, position = read_length(fulfillment, position + 1)
+    if position + length != len(fulfillment):
+        return None
+    return fulfillment[position:]
+
+
+def verify_fulfillments(pairs):
+    """verify_fulfillments
+
+    Checks (condition hex, fulfillment hex) pairs, such as the EscrowFinish
+    transactions about to be sent. Returns a list of booleans in the same order.
+    Only hashing is involved, so thousands of pairs take milliseconds.
+    """
+    results = []
+    for condition_hex, fulfillment_hex in pairs:
+        try:
+            preimage = preimage_of(bytes.fromhex(fulfillment_hex))
+        except (ValueError, IndexError):
+            preimage = None
+        results.append(preimage is not None and condition_for(preimage).hex().upper() == condition_hex.upper())
+    return results
+
+
+class ConditionVault:
+    def __init__(self, path, password):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self.crypt = Fernet(self.derive_key(password))
+        self.check_password()
+        # Unused conditions, so take() never has to search for one. Another
+        # process may claim some of them first.
+        self.free = deque()
+        self.load_free()
+
+    def load_free(self):
+        self.free = deque(row[0] for row in self.db.execute(
+            "SELECT condition FROM conditions WHERE state = 'free'"))
+
+    def derive_key(self, password):
+        # Same key derivation as the airgapped wallet. It takes 100,000 PBKDF2
+        # iterations, so open the vault once and keep it.
+        row = self.db.execute("SELECT value FROM settings WHERE name = 'salt'").fetchone()
+        if row is None:
+            salt = os.urandom(16)
+            with self.db:
+                self.db.execute("INSERT INTO settings VALUES ('salt', ?)", (salt,))
+        else:
+            salt = row[0]
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,
+            iterations=100000,
+            salt=salt
+        )
+        return base64.urlsafe_b64encode(kdf.derive(bytes(password.encode())))
+
+    def check_password(self):
+        row = self.db.execute("SELECT value FROM settings WHERE name = 'verifier'").fetchone()
+        if row is None:
+            # A new vault, or one made before verifiers were stored: check the
+            # key against a stored fulfillment if there is one.
+            row = self.db.execute("SELECT fulfillment FROM conditions LIMIT 1").fetchone()
+        try:
+            if row is not None:
+                self.crypt.decrypt(row[0])
+        except InvalidToken:
+            raise ValueError("Wrong password for this condition vault") from None
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO settings VALUES ('verifier', ?)",
+                            (self.crypt.encrypt(VERIFIER),))
+
+    def generate(self, count):
+        """Adds count new condition/fulfillment pairs to the vault"""
+        now = int(time.time())
+        rows = []
+        for _ in range(count):
+            fulfillment = PreimageSha256(preimage=os.urandom(PREIMAGE_SIZE))
+            condition_hex = fulfillment.condition_binary.hex().upper()
+            rows.append((condition_hex, self.crypt.encrypt(fulfillment.serialize_binary()), now))
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO conditions (condition, fulfillment, created) VALUES (?, ?, ?)", rows)
+        self.free.extend(row[0] for row in rows)
+        return len(rows)
+
+    def available(self):
+        return self.db.execute("SELECT COUNT(*) FROM conditions WHERE state = 'free'").fetchone()[0]
+
+    def take(self, label=None, refill=1000):
+        """take
+
+        Hands out an unused condition for a new escrow. label can record what
+        it is for, such as the escrow owner and sequence, to look it up later.
+        The vault refills itself with refill new pairs when it runs dry.
+        """
+        while True:
+            if not self.free:
+                # Pick up pairs other processes generated before making more
+                self.load_free()
+                if not self.free:
+                    self.generate(refill)
+            condition_hex = self.free.popleft()
+            with self.db:
+                claimed = self.db.execute(
+                    "UPDATE conditions SET state = 'issued', label = ?, issued = ? "
+                    "WHERE condition = ? AND state = 'free'",
+                    (label, int(time.time()), condition_hex)).rowcount
+            if claimed:
+                return condition_hex
+
+    def label(self, condition_hex, label):
+        with self.db:
+            self.db.execute("UPDATE conditions SET label = ? WHERE condition = ?", (label, condition_hex))
+
+    def fulfillment(self, condition_hex):
+        """The fulfillment hex for a condition, checked against it before it's returned"""
+        row = self.db.execute(
+            "SELECT fulfillment FROM conditions WHERE condition = ?", (condition_hex.upper(),)).fetchone()
+        if row is None:
+            raise KeyError(f"Condition {condition_hex} is not in this vault")
+        fulfillment_hex = self.crypt.decrypt(row[0]).hex().upper()
+        if not verify_fulfillments([(condition_hex, fulfillment_hex)])[0]:
+            raise ValueError(f"Stored fulfillment for {condition_hex} does not match it")
+        return fulfillment_hex
+
+    def fulfillments(self, condition_hexes):
+        """Fulfillments for many conditions at once, by condition"""
+        return {condition_hex: self.fulfillment(condition_hex) for condition_hex in condition_hexes}
+
+    def find(self, label):
+        row = self.db.execute("SELECT condition FROM conditions WHERE label = ?", (label,)).fetchone()
+        return row[0] if row else None
+
+    def mark_used(self, condition_hexes):
+        """Marks conditions whose escrows have been finished or cancelled"""
+        with self.db:
+            self.db.executemany("UPDATE conditions SET state = 'used' WHERE condition = ?",
+                                [(condition_hex,) for condition_hex in condition_hexes])
+
+
+if __name__ == "__main__":
+    vault = ConditionVault("conditions.sqlite", input("Vault password: "))
+    started = time.perf_counter()
+    vault.generate(10000)
+    print(f"Generated 10000 conditions in {time.perf_counter() - started:.2f}s, "
+          f"{vault.available()} unused in the vault.")
+
+    # Hand out a condition for each new escrow, and label it with the escrow
+    # once the EscrowCreate has a sequence number.
+    condition = vault.take(label="rEXAMPLE:1234")
+    print("Condition for the EscrowCreate:", condition)
+
+    # Before sending EscrowFinish transactions, look up and check every
+    # fulfillment in one pass.
+    pairs = [(condition, vault.fulfillment(condition)), (condition, "A0228020" + "00" * 32)]
+    started = time.perf_counter()
+    print("Fulfillments valid:", verify_fulfillments(pairs),
+          f"in {(time.perf_counter() - started) * 1000:.3f} ms")
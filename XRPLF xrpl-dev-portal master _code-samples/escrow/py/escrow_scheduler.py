@@ -0,0 +1,263 @@
+import asyncio
+import heapq
+import itertools
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.clients import JsonRpcClient
+from xrpl.asyncio.ledger import get_fee
+from xrpl.asyncio.transaction import submit
+from xrpl.models import EscrowCancel, EscrowFinish
+from xrpl.models.requests import AccountInfo, AccountObjects, Ledger, Subscribe, Tx
+from xrpl.transaction import sign
+from xrpl.utils import ripple_time_to_datetime
+from xrpl.wallet import generate_faucet_wallet
+
+# Finish and cancel time-locked escrows as soon as they become eligible.
+#
+# All escrows of the watched accounts are kept in a min-heap ordered by the time
+# at which something can be done with them: FinishAfter for time-based escrows
+# and CancelAfter for expiring ones. Each closed ledger pops only the escrows
+# that became due, so a tick costs O(k log n) for k due escrows out of n.
+#
+# An EscrowFinish or EscrowCancel can only succeed once the close time of the
+# *previous* ledger is past FinishAfter or CancelAfter, which is exactly the
+# close time reported by the ledger stream for the ledger that just closed.
+#
+# Each transaction expires a few ledgers after it's sent. If it hasn't been
+# validated by then, the escrow goes back on the heap to be tried again.
+
+FINISH = "finish"
+CANCEL = "cancel"
+# Ledgers a finish or cancel has to get validated before it's tried again
+LEDGER_WINDOW = 4
+
+
+class EscrowScheduler:
+    def __init__(self, url, wallet, accounts, max_batch=200):
+        self.url = url
+        self.wallet = wallet
+        self.accounts = accounts
+        self.max_batch = max_batch
+        self.heap = []
+        # Tie-breaker so the heap never has to compare escrow dicts
+        self.counter = itertools.count()
+        # Escrows still on ledger, by ledger entry ID. Heap items whose escrow
+        # is no longer here are stale and skipped when popped.
+        self.live = {}
+        # (escrow ID, action, last ledger) of finishes and cancels in flight,
+        # by transaction hash
+        self.submitted = {}
+        self.in_flight = set()
+        self.next_sequence = None
+
+    # Loading ------------------------------------------------------------------
+
+    async def load(self, client):
+        validated_ledger = await client.request(Ledger(ledger_index="validated"))
+        ledger_hash = validated_ledger.result["ledger"]["ledger_hash"]
+        pages = await asyncio.gather(*[
+            self.load_account(client, account, ledger_hash)
+            for account in self.accounts
+        ])
+        for escrows in pages:
+            for escrow in escrows:
+                self.add(escrow)
+        print(f"Loaded {len(self.live)} escrow(s).")
+        return validated_ledger.result["ledger_index"], validated_ledger.result["ledger"]["close_time"]
+
+    async def load_account(self, client, account, ledger_hash):
+        escrows = []
+        marker = None
+        while True:
+            response = await client.request(AccountObjects(
+                account=account,
+                ledger_hash=ledger_hash,
+                type="escrow",
+                marker=marker
+            ))
+            escrows += response.result["account_objects"]
+            if "marker" in response.result:
+                marker = response.result["marker"]
+            else:
+                return escrows
+
+    def add(self, escrow, escrow_seq=None):
+        escrow_id = escrow["index"]
+        if escrow_id in self.live:
+            return
+        self.live[escrow_id] = {"escrow": escrow, "sequence": escrow_seq}
+        # Escrows with a Condition can only be finished with the fulfillment,
+        # so the scheduler only ever cancels them.
+        if "FinishAfter" in escrow and "Condition" not in escrow:
+            heapq.heappush(self.heap, (escrow["FinishAfter"], next(self.counter), FINISH, escrow_id))
+        if "CancelAfter" in escrow:
+            heapq.heappush(self.heap, (escrow["CancelAfter"], next(self.counter), CANCEL, escrow_id))
+
+    def remove(self, escrow_id):
+        self.live.pop(escrow_id, None)
+
+    def retry(self, escrow_id, action):
+        """Put an escrow back on the heap so it's tried again next ledger"""
+        escrow = self.live.get(escrow_id)
+        if escrow is None:
+            return
+        due_time = escrow["escrow"]["FinishAfter" if action == FINISH else "CancelAfter"]
+        heapq.heappush(self.heap, (due_time, next(self.counter), action, escrow_id))
+
+    # Ticking ------------------------------------------------------------------
+
+    def pop_due(self, close_time):
+        due = []
+        busy = []
+        while self.heap and self.heap[0][0] < close_time and len(due) < self.max_batch:
+            item = heapq.heappop(self.heap)
+            _, _, action, escrow_id = item
+            entry = self.live.get(escrow_id)
+            if entry is None:
+                continue
+            if escrow_id in self.in_flight:
+                # Keep it for the next ledger in case the transaction in
+                # flight fails (e.g. a cancel that's due while a finish is
+                # pending).
+                busy.append(item)
+                continue
+            cancel_after = entry["escrow"].get("CancelAfter")
+            if action == FINISH and cancel_after is not None and cancel_after < close_time:
+                # Too late to finish; the cancel item for this escrow is also due.
+                continue
+            due.append((action, escrow_id))
+        for item in busy:
+            heapq.heappush(self.heap, item)
+        return due
+
+    async def escrow_sequence(self, client, escrow_id):
+        entry = self.live[escrow_id]
+        if entry["sequence"] is None:
+            response = await client.request(Tx(transaction=entry["escrow"]["PreviousTxnID"]))
+            if not response.is_successful():
+                # e.g. txnNotFound from a server without full history
+                print(f"  Can't look up the EscrowCreate of {escrow_id}: "
+                      f"{response.result.get('error')}")
+                return None
+            tx_json = response.result["tx_json"]
+            # Escrows can't be modified, so the previous transaction is always
+            # the EscrowCreate. It may have used a Ticket instead of a Sequence.
+            entry["sequence"] = tx_json["Sequence"] or tx_json["TicketSequence"]
+        return entry["sequence"]
+
+    def expire(self, ledger_index):
+        """Retries escrows whose transaction can no longer be validated"""
+        for tx_hash, (escrow_id, action, last_ledger) in list(self.submitted.items()):
+            if last_ledger < ledger_index:
+                del self.submitted[tx_hash]
+                self.in_flight.discard(escrow_id)
+                self.retry(escrow_id, action)
+                # Its sequence was never used
+                self.next_sequence = None
+
+    async def tick(self, client, ledger_index, close_time):
+        due = self.pop_due(close_time)
+        if not due:
+            return
+        print(f"Ledger closed at {ripple_time_to_datetime(close_time)}: "
+              f"{len(due)} escrow(s) due.")
+
+        sequences = await asyncio.gather(*[
+            self.escrow_sequence(client, escrow_id) for _, escrow_id in due
+        ])
+        ready = []
+        for (action, escrow_id), escrow_seq in zip(due, sequences):
+            if escrow_seq is None:
+                self.retry(escrow_id, action)
+            else:
+                ready.append((action, escrow_id, escrow_seq))
+        if not ready:
+            return
+        if self.next_sequence is None:
+            account_info = await client.request(AccountInfo(
+                account=self.wallet.address, ledger_index="current"
+            ))
+            self.next_sequence = account_info.result["account_data"]["Sequence"]
+        fee = await get_fee(client)
+
+        signed = []
+        for action, escrow_id, escrow_seq in ready:
+            escrow = self.live[escrow_id]["escrow"]
+            model = EscrowFinish if action == FINISH else EscrowCancel
+            tx = model(
+                account=self.wallet.address,
+                owner=escrow["Account"],
+                offer_sequence=escrow_seq,
+                sequence=self.next_sequence,
+                fee=fee,
+                last_ledger_sequence=ledger_index + LEDGER_WINDOW,
+            )
+            self.next_sequence += 1
+            signed_tx = sign(tx, self.wallet)
+            signed.append((action, escrow_id, signed_tx))
+            self.submitted[signed_tx.get_hash()] = (escrow_id, action, tx.last_ledger_sequence)
+            self.in_flight.add(escrow_id)
+
+        responses = await asyncio.gather(*[
+            submit(tx, client) for _, _, tx in signed
+        ], return_exceptions=True)
+        for (action, escrow_id, tx), response in zip(signed, responses):
+            result = response if isinstance(response, Exception) else response.result.get("engine_result")
+            print(f"  {tx.transaction_type} {escrow_id}: {result}")
+            # tec results use up the sequence and still show up in the stream
+            if result not in ("tesSUCCESS", "terQUEUED") and not str(result).startswith("tec"):
+                # Retry on the next ledger, and resync the sequence since this
+                # one was never consumed.
+                del self.submitted[tx.get_hash()]
+                self.in_flight.discard(escrow_id)
+                self.retry(escrow_id, action)
+                self.next_sequence = None
+
+    # Streaming ----------------------------------------------------------------
+
+    def apply_transaction(self, message):
+        tx_json = message.get("tx_json") or message.get("transaction", {})
+        tx_hash = message.get("hash") or tx_json.get("hash")
+        escrow_id, action, _ = self.submitted.pop(tx_hash, (None, None, None))
+        self.in_flight.discard(escrow_id)
+        if escrow_id is not None and message["meta"]["TransactionResult"] != "tesSUCCESS":
+            print(f"  {tx_json['TransactionType']} {escrow_id} failed: "
+                  f"{message['meta']['TransactionResult']}")
+            self.retry(escrow_id, action)
+        for node in message["meta"].get("AffectedNodes", []):
+            if "CreatedNode" in node and node["CreatedNode"]["LedgerEntryType"] == "Escrow":
+                created = node["CreatedNode"]
+                escrow = dict(created["NewFields"], index=created["LedgerIndex"])
+                self.add(escrow, tx_json.get("Sequence") or tx_json.get("TicketSequence"))
+            elif "DeletedNode" in node and node["DeletedNode"]["LedgerEntryType"] == "Escrow":
+                self.remove(node["DeletedNode"]["LedgerIndex"])
+
+    async def run(self):
+        async with AsyncWebsocketClient(self.url) as client:
+            # Subscribe before loading so no escrow created in between is missed
+            await client.request(Subscribe(
+                streams=["ledger"],
+                accounts=list({*self.accounts, self.wallet.address})
+            ))
+            ledger_index, close_time = await self.load(client)
+            await self.tick(client, ledger_index, close_time)
+            async for message in client:
+                if message.get("type") == "transaction" and message.get("validated"):
+                    self.apply_transaction(message)
+                elif message.get("type") == "ledgerClosed":
+                    self.expire(message["ledger_index"])
+                    await self.tick(client, message["ledger_index"], message["ledger_time"])
+
+
+if __name__ == "__main__":
+    # Anyone can finish or cancel an escrow once it's eligible, so the wallet
+    # that pays the fees doesn't need to own any of the escrows.
+    print("Funding new wallet from faucet...")
+    client = JsonRpcClient("https://s.altnet.rippletest.net:51234")
+    wallet = generate_faucet_wallet(client, debug=True)
+    accounts = [
+        "rf1BiGeXwwQoi8Z2ueFYTEXSwuJYfV2Jpn",
+        wallet.address,
+    ]
+    scheduler = EscrowScheduler("wss://s.altnet.rippletest.net:51233", wallet, accounts)
+    asyncio.run(scheduler.run())
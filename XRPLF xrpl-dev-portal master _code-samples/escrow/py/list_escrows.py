@@ -36,7 +36,7 @@ while True:
 
     # If there's a marker, loop and fetch the next page of results
     if "marker" in response.result.keys():
-        marker=marker
+        marker=response.result["marker"]
     else:
         break
 
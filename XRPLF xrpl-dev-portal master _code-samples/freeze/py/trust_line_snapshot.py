@@ -0,0 +1,232 @@
+"""Snapshot every trust line of an issuer, indexed by holder and currency, and keep it current"""
+import argparse
+import asyncio
+from collections import defaultdict
+from decimal import Decimal
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.models import AccountInfo, AccountObjects, Ledger, Subscribe
+from xrpl.models.requests import AccountObjectType
+
+# References
+# - https://xrpl.org/ripplestate.html#ripplestate-flags
+# - https://xrpl.org/account_objects.html#account_objects
+# - https://xrpl.org/freezes.html
+
+# check_freeze_status.py reads one page of account_lines and searches it for a
+# single holder. This sample loads every RippleState entry of one or more
+# issuers from one validated ledger into a dict keyed by (holder, currency),
+# then applies the RippleState and AccountRoot changes in the metadata of each
+# of the issuers' transactions. A lookup is one dict access, and per-currency
+# totals such as the frozen balance are updated as lines change, so reading
+# them never walks the lines.
+#
+# account_objects pages have to be read one after another, so the speedup
+# comes from loading every issuer at once and asking for the next page before
+# the current one is indexed.
+
+WS_URL = "wss://s.altnet.rippletest.net:51233"
+
+ACCOUNT_ROOT_GLOBAL_FREEZE = 0x00400000
+
+# (low side, high side) of each RippleState flag
+RIPPLE_STATE_LEDGER_FLAGS: dict[str, tuple[int, int]] = {
+    "authorized": (0x00040000, 0x00080000),
+    "no_ripple": (0x00100000, 0x00200000),
+    "freeze": (0x00400000, 0x00800000),
+    "deep_freeze": (0x02000000, 0x04000000),
+}
+
+
+def parse_line(fields: dict, issuer: str) -> tuple[str, str, dict] | None:
+    """
+    (holder, currency, line) from a RippleState entry's fields. The flags are
+    the issuer's, like account_lines for the issuer shows them (freeze is the
+    issuer's freeze, freeze_peer the holder's). The amounts are named for whose
+    they are: holder_balance is what the holder holds, so it's positive where
+    the issuer's account_lines would show it negative. None if the issuer isn't
+    one side of the line.
+    """
+    low, high = fields["LowLimit"], fields["HighLimit"]
+    if low["issuer"] == issuer:
+        ours, theirs, holder, holder_limit, issuer_limit = 0, 1, high["issuer"], high, low
+    elif high["issuer"] == issuer:
+        ours, theirs, holder, holder_limit, issuer_limit = 1, 0, low["issuer"], low, high
+    else:
+        return None
+    flags = fields.get("Flags", 0)
+    # Balance is positive when the low side holds tokens
+    balance = Decimal(fields["Balance"]["value"])
+    line = {
+        "holder_balance": balance if ours == 1 else -balance,
+        "holder_limit": Decimal(holder_limit["value"]),
+        "issuer_limit": Decimal(issuer_limit["value"]),
+    }
+    for name, sides in RIPPLE_STATE_LEDGER_FLAGS.items():
+        line[name] = bool(flags & sides[ours])
+        line[f"{name}_peer"] = bool(flags & sides[theirs])
+    return holder, low["currency"], line
+
+
+class TrustLineSnapshot:
+    def __init__(self, issuer: str):
+        self.issuer = issuer
+        self.ledger_index = None
+        self.global_freeze = False
+        # (holder, currency) -> line
+        self.lines = {}
+        # currency -> running totals, kept in step with self.lines
+        self.totals = defaultdict(lambda: defaultdict(Decimal))
+
+    def count(self, currency: str, line: dict, sign: int):
+        totals = self.totals[currency]
+        totals["holders"] += sign
+        totals["balance"] += sign * line["holder_balance"]
+        if line["freeze"] or line["deep_freeze"]:
+            totals["frozen_holders"] += sign
+            totals["frozen_balance"] += sign * line["holder_balance"]
+        if line["freeze_peer"]:
+            totals["peer_frozen_holders"] += sign
+        if line["authorized"]:
+            totals["authorized_holders"] += sign
+        if line["no_ripple"]:
+            totals["no_ripple_holders"] += sign
+
+    def put(self, fields: dict):
+        parsed = parse_line(fields, self.issuer)
+        if parsed is None:
+            return
+        holder, currency, line = parsed
+        self.delete(holder, currency)
+        self.lines[(holder, currency)] = line
+        self.count(currency, line, 1)
+
+    def delete(self, holder: str, currency: str):
+        line = self.lines.pop((holder, currency), None)
+        if line is not None:
+            self.count(currency, line, -1)
+
+    # Loading -----------------------------------------------------------------
+
+    async def fetch_page(self, client, marker):
+        response = await client.request(AccountObjects(
+            account=self.issuer,
+            type=AccountObjectType.STATE,
+            ledger_index=self.ledger_index,
+            limit=400,
+            marker=marker,
+        ))
+        if not response.is_successful():
+            raise RuntimeError(f"account_objects {self.issuer}: {response.result.get('error')}")
+        return response.result
+
+    async def load(self, client, ledger_index: int):
+        """Loads every trust line of the issuer as of one ledger"""
+        self.ledger_index = ledger_index
+        response = await client.request(AccountInfo(account=self.issuer, ledger_index=ledger_index))
+        self.global_freeze = bool(response.result["account_data"].get("Flags", 0) & ACCOUNT_ROOT_GLOBAL_FREEZE)
+        page = asyncio.ensure_future(self.fetch_page(client, None))
+        while page is not None:
+            result = await page
+            marker = result.get("marker")
+            # Ask for the next page while this one is indexed
+            page = asyncio.ensure_future(self.fetch_page(client, marker)) if marker else None
+            for entry in result["account_objects"]:
+                self.put(entry)
+
+    def apply(self, meta: dict):
+        """Applies the RippleState and AccountRoot changes of one validated transaction"""
+        for node in meta.get("AffectedNodes", []):
+            kind, entry = next(iter(node.items()))
+            if entry["LedgerEntryType"] == "RippleState":
+                if kind == "DeletedNode":
+                    parsed = parse_line(entry["FinalFields"], self.issuer)
+                    if parsed is not None:
+                        self.delete(parsed[0], parsed[1])
+                else:
+                    self.put(entry.get("NewFields") or entry["FinalFields"])
+            elif entry["LedgerEntryType"] == "AccountRoot" and kind == "ModifiedNode":
+                if entry["FinalFields"]["Account"] == self.issuer:
+                    self.global_freeze = bool(entry["FinalFields"].get("Flags", 0) & ACCOUNT_ROOT_GLOBAL_FREEZE)
+
+    # Queries -----------------------------------------------------------------
+
+    def lookup(self, holder: str, currency: str) -> dict | None:
+        line = self.lines.get((holder, currency))
+        if line is None:
+            return None
+        # A global freeze freezes every line of the issuer
+        return {**line, "frozen": self.global_freeze or line["freeze"] or line["deep_freeze"]}
+
+    def stats(self, currency: str) -> dict:
+        totals = dict(self.totals.get(currency, {}))
+        if self.global_freeze:
+            totals["frozen_holders"] = totals.get("holders", 0)
+            totals["frozen_balance"] = totals.get("balance", Decimal(0))
+        return totals
+
+
+async def follow(url: str, issuers: list[str], on_ready, on_ledger=None):
+    """
+    Loads a snapshot of each issuer and passes them to on_ready. With on_ledger,
+    keeps them current and calls it after every ledger until cancelled.
+    """
+    snapshots = {issuer: TrustLineSnapshot(issuer) for issuer in issuers}
+    async with AsyncWebsocketClient(url) as client:
+        # Subscribe first so no change made while loading is missed
+        await client.request(Subscribe(streams=["ledger"], accounts=issuers))
+        response = await client.request(Ledger(ledger_index="validated"))
+        ledger_index = int(response.result["ledger_index"])
+        await asyncio.gather(*[snapshot.load(client, ledger_index) for snapshot in snapshots.values()])
+        on_ready(snapshots)
+        if on_ledger is None:
+            return
+
+        async for message in client:
+            if message.get("type") == "transaction" and message.get("validated"):
+                if message["ledger_index"] <= ledger_index:
+                    continue
+                for snapshot in snapshots.values():
+                    snapshot.apply(message["meta"])
+            elif message.get("type") == "ledgerClosed" and message["ledger_index"] > ledger_index:
+                # The ledger stream reports a ledger before its transactions,
+                # so the one before it is complete.
+                for snapshot in snapshots.values():
+                    snapshot.ledger_index = message["ledger_index"] - 1
+                on_ledger(snapshots)
+
+
+def print_stats(snapshots: dict):
+    for issuer, snapshot in snapshots.items():
+        print(f"{issuer} at ledger {snapshot.ledger_index}"
+              f"{' (global freeze)' if snapshot.global_freeze else ''}:")
+        for currency in sorted(snapshot.totals):
+            stats = snapshot.stats(currency)
+            print(f"  {currency}: {stats.get('holders', 0)} line(s), balance {stats.get('balance', 0)}, "
+                  f"{stats.get('frozen_holders', 0)} frozen holding {stats.get('frozen_balance', 0)}, "
+                  f"{stats.get('authorized_holders', 0)} authorized")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("issuers", nargs="+")
+    parser.add_argument("--holders", help="File of 'holder currency' lines to look up once loaded")
+    parser.add_argument("--follow", action="store_true", help="Keep the snapshot current and print totals every ledger")
+    parser.add_argument("--url", default=WS_URL)
+    args = parser.parse_args()
+
+    def ready(snapshots):
+        print_stats(snapshots)
+        if args.holders:
+            with open(args.holders) as holders_file:
+                for holder, currency in (line.split() for line in holders_file if line.strip()):
+                    for issuer, snapshot in snapshots.items():
+                        line = snapshot.lookup(holder, currency)
+                        if line is None:
+                            print(f"{holder} {currency}.{issuer}: no trust line")
+                        else:
+                            print(f"{holder} {currency}.{issuer}: balance {line['holder_balance']}, "
+                                  f"frozen {line['frozen']}, authorized {line['authorized']}, "
+                                  f"no_ripple {line['no_ripple']}")
+
+    asyncio.run(follow(args.url, args.issuers, ready, print_stats if args.follow else None))
@@ -0,0 +1,460 @@
+# Measures transaction submission throughput and latency.
+#
+# Sends a weighted mix of Payment, OfferCreate, TrustSet, NFTokenMint and
+# EscrowCreate transactions from many accounts at a fixed target rate, then
+# reports the time from submit to validation (p50/p95/p99), the TPS actually
+# achieved, and every result code that came back. Results are saved as JSON so
+# runs can be compared over time.
+#
+# Against the local stand-in (start it first with `python3 stand_in.py`):
+#   python3 benchmark.py --rate 200 --duration 30
+# Against another server:
+#   python3 benchmark.py --url wss://s.altnet.rippletest.net:51233 --faucet-host "" --accounts 10 --rate 5
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.asyncio.ledger import get_fee
+from xrpl.asyncio.transaction import submit
+from xrpl.asyncio.wallet import generate_faucet_wallet
+from xrpl.constants import CryptoAlgorithm
+from xrpl.models import (
+    AccountInfo,
+    EscrowCreate,
+    GenericRequest,
+    IssuedCurrencyAmount,
+    Ledger,
+    NFTokenMint,
+    NFTokenMintFlag,
+    OfferCreate,
+    Payment,
+    ServerInfo,
+    StreamParameter,
+    Subscribe,
+    SubmitOnly,
+    TrustSet,
+)
+from xrpl.transaction import sign
+from xrpl.utils import posix_to_ripple_time, xrp_to_drops
+from xrpl.wallet import Wallet
+
+GENESIS_SEED = "snoPBrXtMeMyMHUVTgbuqAfg1SUTb"
+
+# Submit results that mean the transaction may still be validated
+PENDING_RESULTS = {"tesSUCCESS", "terQUEUED", "terPRE_SEQ"}
+
+DEFAULT_MIX = "Payment=5,OfferCreate=2,TrustSet=1,NFTokenMint=1,EscrowCreate=1"
+
+
+# Transactions ----------------------
+def build_payment(account, issuer, others, rng, **fields):
+    return Payment(account=account, destination=rng.choice(others), amount="1000", **fields)
+
+
+def build_offer_create(account, issuer, others, rng, **fields):
+    # Every offer sells XRP, so offers from the benchmark never cross each other
+    return OfferCreate(
+        account=account,
+        taker_gets=xrp_to_drops(1),
+        taker_pays=IssuedCurrencyAmount(currency="USD", issuer=issuer, value=str(rng.randint(1, 100))),
+        **fields,
+    )
+
+
+def build_trust_set(account, issuer, others, rng, **fields):
+    return TrustSet(
+        account=account,
+        limit_amount=IssuedCurrencyAmount(currency="USD", issuer=issuer, value=str(rng.randint(1000, 100000))),
+        **fields,
+    )
+
+
+def build_nftoken_mint(account, issuer, others, rng, **fields):
+    return NFTokenMint(account=account, nftoken_taxon=0, flags=NFTokenMintFlag.TF_TRANSFERABLE, **fields)
+
+
+def build_escrow_create(account, issuer, others, rng, **fields):
+    return EscrowCreate(
+        account=account,
+        destination=rng.choice(others),
+        amount="1000",
+        finish_after=posix_to_ripple_time(int(time.time())) + 3600,
+        cancel_after=posix_to_ripple_time(int(time.time())) + 7200,
+        **fields,
+    )
+
+
+BUILDERS = {
+    "Payment": build_payment,
+    "OfferCreate": build_offer_create,
+    "TrustSet": build_trust_set,
+    "NFTokenMint": build_nftoken_mint,
+    "EscrowCreate": build_escrow_create,
+}
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in BUILDERS:
+            raise SystemExit(f"Unknown transaction type in --mix: {name} (choose from {', '.join(BUILDERS)})")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def sign_all(seed, txs):
+    wallet = Wallet.from_seed(seed)
+    signed = [sign(tx, wallet) for tx in txs]
+    return [(tx.blob(), tx.get_hash()) for tx in signed]
+
+
+# Statistics ----------------------
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))]
+
+
+def summarize(latencies):
+    latencies = sorted(latencies)
+    if not latencies:
+        return {"count": 0}
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+class Benchmark:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.mix = parse_mix(args.mix)
+        self.clients = []
+        self.listener = None
+        self.wallets = []
+        self.others = []
+        self.issuer = None
+        self.stalled = set()
+        self.skipped = 0
+        self.fee = None
+        self.validated_index = 0
+        # hash -> (transaction type, submit time, LastLedgerSequence)
+        self.pending = {}
+        self.submitted = Counter()
+        self.submit_results = Counter()
+        self.final_results = Counter()
+        self.latencies = defaultdict(list)
+        self.sign_seconds = 0
+        self.errors = Counter()
+        self.validated_times = []
+        self.draining = False
+        self.done = asyncio.Event()
+        self.started_at = datetime.now(timezone.utc).isoformat()
+
+    def client_for(self, index):
+        # One account always uses the same connection, so its transactions
+        # reach the server in Sequence order
+        return self.clients[index % len(self.clients)]
+
+    # Accounts ----------------------
+    async def fund_accounts(self, count):
+        client = self.clients[0]
+        if self.args.standalone:
+            wallets = [Wallet.create() for _ in range(count)]
+            genesis = Wallet.from_seed(GENESIS_SEED, algorithm=CryptoAlgorithm.SECP256K1)
+            info = await client.request(AccountInfo(account=genesis.address, ledger_index="current"))
+            sequence = info.result["account_data"]["Sequence"]
+            await asyncio.gather(*[
+                submit(sign(Payment(
+                    account=genesis.address,
+                    destination=wallet.address,
+                    amount=xrp_to_drops(self.args.fund_xrp),
+                    sequence=sequence + i,
+                    fee=self.fee,
+                ), genesis), client)
+                for i, wallet in enumerate(wallets)
+            ])
+            await client.request(GenericRequest(method="ledger_accept"))
+            return wallets
+
+        # Ask the faucet in batches so a public faucet isn't flooded
+        faucet_host = self.args.faucet_host or None
+        wallets = []
+        for start in range(0, count, 50):
+            wallets += await asyncio.gather(*[
+                generate_faucet_wallet(client, faucet_host=faucet_host)
+                for _ in range(min(50, count - start))
+            ])
+        return wallets
+
+    async def first_sequences(self):
+        responses = await asyncio.gather(*[
+            self.client_for(i).request(AccountInfo(account=wallet.address, ledger_index="current"))
+            for i, wallet in enumerate(self.wallets)
+        ])
+        return [response.result["account_data"]["Sequence"] for response in responses]
+
+    # Listening for validations ----------------------
+    async def listen(self):
+        async for message in self.listener:
+            if message.get("type") == "ledgerClosed":
+                self.validated_index = message["ledger_index"]
+                self.expire(message["ledger_index"])
+            elif message.get("type") == "transaction" and message.get("validated"):
+                tx_hash = message.get("hash") or message["transaction"]["hash"]
+                if tx_hash not in self.pending:
+                    continue
+                tx_type, started, _ = self.pending.pop(tx_hash)
+                result = message["meta"]["TransactionResult"]
+                self.final_results[result] += 1
+                if result == "tesSUCCESS":
+                    self.latencies[tx_type].append(time.perf_counter() - started)
+                    self.validated_times.append(time.perf_counter())
+            if self.draining and not self.pending:
+                self.done.set()
+
+    def expire(self, ledger_index):
+        # A transaction can't be validated after its LastLedgerSequence
+        for tx_hash, (_, _, last_ledger) in list(self.pending.items()):
+            if last_ledger < ledger_index:
+                del self.pending[tx_hash]
+                self.final_results["expired"] += 1
+
+    # Preparing ----------------------
+    def plan(self, sequences):
+        """
+        Picks the account and type of every transaction up front. Accounts take
+        turns, and each account's transactions use consecutive Sequences.
+        """
+        types, weights = list(self.mix), list(self.mix.values())
+        total = int(self.args.rate * self.args.duration)
+        # Ledgers close at most once a second, so this leaves every
+        # transaction at least ledger_window ledgers to be validated in, after
+        # however long signing everything takes
+        started = time.perf_counter()
+        sign(BUILDERS["Payment"](self.wallets[0].address, None, self.others[0], self.rng,
+                                 sequence=1, fee=self.fee), self.wallets[0])
+        signing = (time.perf_counter() - started) * total / (self.args.sign_workers or os.cpu_count() or 1)
+        last_ledger = self.validated_index + int(signing + self.args.duration) + 1 + self.args.ledger_window
+        planned = []
+        for i in range(total):
+            index = i % len(self.wallets)
+            tx_type = self.rng.choices(types, weights)[0]
+            tx = BUILDERS[tx_type](
+                self.wallets[index].address, self.issuer.address, self.others[index], self.rng,
+                sequence=sequences[index],
+                fee=self.fee,
+                last_ledger_sequence=last_ledger,
+            )
+            sequences[index] += 1
+            planned.append((index, tx_type, tx))
+        return planned
+
+    async def presign(self, planned):
+        """
+        Signs everything before the clock starts, spread over every CPU core.
+        Signing in pure Python takes milliseconds per transaction, which would
+        otherwise cap the rate this process can submit at.
+        """
+        by_account = defaultdict(list)
+        for position, (index, _, tx) in enumerate(planned):
+            by_account[index].append((position, tx))
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        with ProcessPoolExecutor(self.args.sign_workers) as pool:
+            signed_groups = await asyncio.gather(*[
+                loop.run_in_executor(pool, sign_all, self.wallets[index].seed, [tx for _, tx in group])
+                for index, group in by_account.items()
+            ])
+        self.sign_seconds = time.perf_counter() - started
+        blobs = [None] * len(planned)
+        for group, signed in zip(by_account.values(), signed_groups):
+            for (position, _), blob_and_hash in zip(group, signed):
+                blobs[position] = blob_and_hash
+        return blobs
+
+    # Sending ----------------------
+    async def send_one(self, index, tx_type, tx_blob, tx_hash, last_ledger):
+        self.submitted[tx_type] += 1
+        self.pending[tx_hash] = (tx_type, time.perf_counter(), last_ledger)
+        try:
+            response = await self.client_for(index).request(SubmitOnly(tx_blob=tx_blob))
+        except Exception as e:
+            self.pending.pop(tx_hash, None)
+            self.errors[type(e).__name__] += 1
+            self.stalled.add(index)
+            return
+        result = response.result.get("engine_result", response.result.get("error", "unknown"))
+        self.submit_results[result] += 1
+        if result not in PENDING_RESULTS:
+            # A rejected transaction never uses its Sequence, so none of the
+            # account's later transactions could apply either
+            self.pending.pop(tx_hash, None)
+            self.stalled.add(index)
+
+    async def drive(self, planned, blobs):
+        """Submits transactions at the target rate, whether or not earlier ones are done"""
+        interval = 1 / self.args.rate
+        tasks = set()
+        start = time.perf_counter()
+        for i, ((index, tx_type, tx), (tx_blob, tx_hash)) in enumerate(zip(planned, blobs)):
+            delay = start + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if index in self.stalled:
+                self.skipped += 1
+                continue
+            task = asyncio.create_task(self.send_one(index, tx_type, tx_blob, tx_hash, tx.last_ledger_sequence))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+    async def run(self):
+        args = self.args
+        self.clients = [AsyncWebsocketClient(args.url) for _ in range(args.connections)]
+        self.listener = AsyncWebsocketClient(args.url)
+        await asyncio.gather(*[client.open() for client in self.clients + [self.listener]])
+        ledger_closer = None
+        try:
+            server = (await self.clients[0].request(ServerInfo())).result["info"]
+            self.fee = await get_fee(self.clients[0])
+            print(f"Funding {args.accounts} accounts and an issuer...")
+            ledger_closer = asyncio.create_task(self.close_ledgers()) if args.standalone else None
+            *self.wallets, self.issuer = await self.fund_accounts(args.accounts + 1)
+            addresses = [wallet.address for wallet in self.wallets]
+            self.others = [addresses[:i] + addresses[i + 1:] for i in range(len(addresses))]
+            sequences = await self.first_sequences()
+
+            validated = await self.listener.request(Ledger(ledger_index="validated"))
+            self.validated_index = validated.result["ledger_index"]
+            planned = self.plan(sequences)
+            print(f"Signing {len(planned)} transactions...")
+            blobs = await self.presign(planned)
+            await self.listener.send(Subscribe(
+                streams=[StreamParameter.LEDGER],
+                accounts=[wallet.address for wallet in self.wallets],
+            ))
+            listener = asyncio.create_task(self.listen())
+
+            print(f"Submitting {args.rate} tx/s for {args.duration}s...")
+            submit_time = await self.drive(planned, blobs)
+            self.draining = True
+            if self.pending:
+                try:
+                    await asyncio.wait_for(self.done.wait(), timeout=args.drain_timeout)
+                except asyncio.TimeoutError:
+                    pass
+            listener.cancel()
+        finally:
+            if ledger_closer:
+                ledger_closer.cancel()
+            await asyncio.gather(*[client.close() for client in self.clients + [self.listener]])
+        return self.report(server, submit_time)
+
+    async def close_ledgers(self):
+        # A standalone server only closes a ledger when asked to
+        while True:
+            await asyncio.sleep(self.args.close_interval)
+            await self.clients[0].request(GenericRequest(method="ledger_accept"))
+
+    def report(self, server, submit_time):
+        all_latencies = [latency for latencies in self.latencies.values() for latency in latencies]
+        validated = len(all_latencies)
+        # Achieved TPS counts validated transactions over the time they took to
+        # validate, from the first submit to the last validation
+        elapsed = max(self.validated_times[-1] - self.validated_times[0], submit_time) if validated else submit_time
+        submitted = sum(self.submitted.values())
+        return {
+            "started_at": self.started_at,
+            "server": {"url": self.args.url, "build_version": server.get("build_version")},
+            "config": {
+                "accounts": self.args.accounts,
+                "connections": self.args.connections,
+                "target_tps": self.args.rate,
+                "duration_s": self.args.duration,
+                "mix": self.mix,
+                "seed": self.args.seed,
+            },
+            "submitted": submitted,
+            "validated": validated,
+            "submit_tps": round(submitted / submit_time, 2),
+            "achieved_tps": round(validated / elapsed, 2) if elapsed else 0,
+            "latency": summarize(all_latencies),
+            "latency_by_type": {tx_type: summarize(latencies) for tx_type, latencies in self.latencies.items()},
+            "sign_ms_per_tx": round(self.sign_seconds / max(submitted + self.skipped, 1) * 1000, 3),
+            "submit_results": dict(self.submit_results.most_common()),
+            "final_results": dict(self.final_results.most_common()),
+            "unresolved": len(self.pending),
+            "skipped": self.skipped,
+            "errors": dict(self.errors),
+        }
+
+
+def print_report(report):
+    latency = report["latency"]
+    print(f"\nSubmitted {report['submitted']} at {report['submit_tps']} tx/s "
+          f"(target {report['config']['target_tps']})")
+    print(f"Validated {report['validated']} at {report['achieved_tps']} tx/s")
+    if latency["count"]:
+        print(f"Submit to validation: p50 {latency['p50_ms']} ms, p95 {latency['p95_ms']} ms, "
+              f"p99 {latency['p99_ms']} ms")
+    for tx_type, summary in report["latency_by_type"].items():
+        print(f"  {tx_type:>13}: {summary['count']:>6} validated, p50 {summary['p50_ms']} ms, p99 {summary['p99_ms']} ms")
+    print(f"Signing (before the run): {report['sign_ms_per_tx']} ms per transaction")
+    print(f"Submit results: {report['submit_results']}")
+    print(f"Final results: {report['final_results']}")
+    if report["unresolved"] or report["skipped"] or report["errors"]:
+        print(f"Unresolved: {report['unresolved']}, skipped after a rejection: {report['skipped']}, "
+              f"errors: {report['errors']}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Transaction submission throughput and latency benchmark.")
+    parser.add_argument("--url", default="ws://localhost:6006", help="WebSocket URL of the server to test")
+    parser.add_argument("--faucet-host", default="http://localhost:5005",
+                        help="Faucet to fund accounts from; pass an empty string for the network's default")
+    parser.add_argument("--standalone", action="store_true",
+                        help="Fund accounts from the genesis account and close ledgers with ledger_accept")
+    parser.add_argument("--close-interval", type=float, default=1.0,
+                        help="Seconds between ledger_accept calls with --standalone")
+    parser.add_argument("--fund-xrp", type=int, default=1000, help="XRP per account with --standalone")
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--connections", type=int, default=4, help="WebSocket connections to submit over")
+    parser.add_argument("--rate", type=float, default=100, help="Target transactions per second")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to keep submitting")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Transaction types and their relative weights")
+    parser.add_argument("--ledger-window", type=int, default=10,
+                        help="How many ledgers each transaction has to be validated in")
+    parser.add_argument("--drain-timeout", type=float, default=60,
+                        help="Seconds to wait for outstanding transactions after submitting stops")
+    parser.add_argument("--sign-workers", type=int, default=None,
+                        help="Processes to sign transactions with (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    report = await Benchmark(args).run()
+    print_report(report)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
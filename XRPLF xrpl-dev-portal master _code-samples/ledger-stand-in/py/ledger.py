@@ -0,0 +1,1310 @@
+# In-memory ledger for the stand-in server.
+#
+# Transactions are applied to an open ledger as soon as they're submitted, the
+# way rippled does, and each one records exactly which ledger entries it
+# created, modified, or deleted so the metadata matches what a real server
+# returns. Closing the ledger folds the open changes into the closed state and
+# keeps an undo log, so recent ledgers can still be read by index.
+#
+# Only the transaction types the code samples use are implemented, and only
+# their common cases: offers are placed in the book but never cross, payments
+# only ripple through the issuer (no paths), and there are no transfer fees.
+
+import hashlib
+import time
+from collections import defaultdict, deque
+from copy import deepcopy
+from decimal import Decimal
+
+from xrpl.core import keypairs
+from xrpl.core.addresscodec import decode_classic_address, encode_classic_address
+from xrpl.core.binarycodec import decode, encode_for_multisigning, encode_for_signing
+
+GENESIS_ADDRESS = "rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh"
+ACCOUNT_ONE = "rrrrrrrrrrrrrrrrrrrrBZbvji"
+TOTAL_COINS = 100_000_000_000_000_000
+RIPPLE_EPOCH = 946684800
+
+BASE_FEE = 10
+RESERVE_BASE = 1_000_000
+RESERVE_INC = 200_000
+MAX_TICKETS = 250
+NFTOKENS_PER_PAGE = 32
+
+# AccountRoot flags, by the AccountSet asf value that sets them
+ACCOUNT_FLAGS = {
+    1: 0x00020000,  # asfRequireDest -> lsfRequireDestTag
+    2: 0x00040000,  # asfRequireAuth
+    3: 0x00080000,  # asfDisallowXRP
+    4: 0x00100000,  # asfDisableMaster
+    6: 0x00200000,  # asfNoFreeze
+    7: 0x00400000,  # asfGlobalFreeze
+    8: 0x00800000,  # asfDefaultRipple
+    9: 0x01000000,  # asfDepositAuth
+}
+LSF_REQUIRE_DEST_TAG = 0x00020000
+LSF_DISABLE_MASTER = 0x00100000
+LSF_GLOBAL_FREEZE = 0x00400000
+LSF_DEFAULT_RIPPLE = 0x00800000
+LSF_DEPOSIT_AUTH = 0x01000000
+
+# RippleState flags, as (low side, high side)
+LSF_RESERVE = (0x00010000, 0x00020000)
+LSF_AUTH = (0x00040000, 0x00080000)
+LSF_NO_RIPPLE = (0x00100000, 0x00200000)
+LSF_FREEZE = (0x00400000, 0x00800000)
+
+TF_SET_AUTH = 0x00010000
+TF_SET_NO_RIPPLE = 0x00020000
+TF_CLEAR_NO_RIPPLE = 0x00040000
+TF_SET_FREEZE = 0x00100000
+TF_CLEAR_FREEZE = 0x00200000
+TF_PARTIAL_PAYMENT = 0x00020000
+TF_PASSIVE = 0x00010000
+TF_IMMEDIATE_OR_CANCEL = 0x00020000
+TF_FILL_OR_KILL = 0x00040000
+TF_SELL = 0x00080000
+
+RESULT_CODES = {
+    "tesSUCCESS": (0, "The transaction was applied. Only final in a validated ledger."),
+    "tecPATH_PARTIAL": (101, "Path could not send full amount."),
+    "tecUNFUNDED_OFFER": (103, "Insufficient balance to fund created offer."),
+    "tecUNFUNDED_PAYMENT": (104, "Insufficient XRP balance to send."),
+    "tecDIR_FULL": (121, "Can not add entry to full directory."),
+    "tecINSUF_RESERVE_LINE": (122, "Insufficient reserve to add trust line."),
+    "tecINSUF_RESERVE_OFFER": (123, "Insufficient reserve to create offer."),
+    "tecNO_DST": (124, "Destination does not exist. Send XRP to create it."),
+    "tecNO_DST_INSUF_XRP": (125, "Destination does not exist. Too little XRP sent to create it."),
+    "tecPATH_DRY": (128, "Path could not send partial amount."),
+    "tecUNFUNDED": (129, "Not enough XRP to satisfy the reserve requirement."),
+    "tecNO_ISSUER": (133, "Issuer account does not exist."),
+    "tecNO_LINE": (135, "No such line."),
+    "tecNO_TARGET": (138, "Target account does not exist."),
+    "tecNO_PERMISSION": (139, "No permission to perform requested operation."),
+    "tecNO_ENTRY": (140, "No matching entry found."),
+    "tecINSUFFICIENT_RESERVE": (141, "Insufficient reserve to complete requested operation."),
+    "tecDST_TAG_NEEDED": (143, "A destination tag is required."),
+    "tecCRYPTOCONDITION_ERROR": (146, "Malformed, invalid, or mismatched conditional or fulfillment."),
+    "tecEXPIRED": (148, "Expiration time is passed."),
+    "tecKILLED": (150, "No funds transferred and no offer created."),
+    "tefALREADY": (-198, "The exact transaction was already in this ledger."),
+    "tefBAD_AUTH": (-196, "Transaction's public key is not authorized."),
+    "tefPAST_SEQ": (-190, "This sequence number has already passed."),
+    "tefMASTER_DISABLED": (-188, "Master key is disabled."),
+    "tefMAX_LEDGER": (-187, "Ledger sequence too high."),
+    "tefBAD_SIGNATURE": (-186, "A signature is provided for a non-signer."),
+    "tefBAD_QUORUM": (-185, "Signatures provided do not meet the quorum."),
+    "tefNOT_MULTI_SIGNING": (-184, "Account has no appropriate list of multi-signers."),
+    "tefNO_TICKET": (-180, "Ticket is not in ledger."),
+    "terINSUF_FEE_B": (-97, "Account balance can't pay fee."),
+    "terNO_ACCOUNT": (-96, "The source account does not exist."),
+    "terPRE_SEQ": (-92, "Missing/inapplicable prior transaction."),
+    "terPRE_TICKET": (-88, "Ticket is not yet in ledger."),
+    "temMALFORMED": (-299, "Malformed transaction."),
+    "temBAD_AMOUNT": (-298, "Malformed: Bad amount."),
+    "temBAD_EXPIRATION": (-296, "Malformed: Bad expiration."),
+    "temBAD_FEE": (-295, "Invalid fee, negative or not XRP."),
+    "temBAD_LIMIT": (-293, "Limits must be non-negative."),
+    "temBAD_OFFER": (-292, "Malformed: Bad offer."),
+    "temBAD_REGKEY": (-289, "Malformed: Regular key cannot be same as master key."),
+    "temBAD_SEQUENCE": (-283, "Malformed: Sequence is not in the past."),
+    "temDST_IS_SRC": (-279, "Destination may not be source."),
+    "temDST_NEEDED": (-278, "Destination not specified."),
+    "temREDUNDANT": (-275, "The transaction is redundant."),
+    "temDISABLED": (-273, "The transaction type is not supported by this stand-in."),
+    "temBAD_QUORUM": (-271, "Quorum is unreachable."),
+    "temINVALID_COUNT": (-266, "Malformed: Count field outside valid range."),
+    "telINSUF_FEE_P": (-394, "Fee insufficient."),
+}
+
+
+class TecError(Exception):
+    """Raised by a transaction handler to fail with a tec code"""
+
+
+# Hashes and ledger entry IDs ----------------------
+def sha512half(hex_data):
+    return hashlib.sha512(bytes.fromhex(hex_data)).hexdigest()[:64].upper()
+
+
+def transaction_hash(tx_blob):
+    return sha512half("54584E00" + tx_blob)
+
+
+def account_id(address):
+    return decode_classic_address(address).hex().upper()
+
+
+def currency_hex(currency):
+    if currency == "XRP":
+        return "0" * 40
+    if len(currency) == 40:
+        return currency.upper()
+    return "00" * 12 + currency.encode("ascii").hex().upper() + "00" * 5
+
+
+def account_index(address):
+    return sha512half("0061" + account_id(address))
+
+
+def sequenced_index(space, address, sequence):
+    # Offers ("o"), Tickets ("T"), Escrows ("u") and Checks ("C")
+    return sha512half(space + account_id(address) + f"{sequence:08X}")
+
+
+def line_index(account_a, account_b, currency):
+    low, high = sorted([account_id(account_a), account_id(account_b)])
+    return sha512half("0072" + low + high + currency_hex(currency))
+
+
+def signer_list_index(address):
+    return sha512half("0053" + account_id(address) + "00000000")
+
+
+def ripple_time(posix_time):
+    return int(posix_time) - RIPPLE_EPOCH
+
+
+def ripple_time_iso(close_time):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(close_time + RIPPLE_EPOCH))
+
+
+# Amounts ----------------------
+def is_xrp(amount):
+    return isinstance(amount, str)
+
+
+def amount_value(amount):
+    return Decimal(amount) if is_xrp(amount) else Decimal(amount["value"])
+
+
+def format_value(value):
+    text = format(value.normalize(), "f")
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+
+def with_value(amount, value):
+    if is_xrp(amount):
+        return str(int(value))
+    return {**amount, "value": format_value(value)}
+
+
+def book_key(amount):
+    return "XRP" if is_xrp(amount) else f"{amount['currency']}/{amount['issuer']}"
+
+
+def quality_hex(pays, gets):
+    """Encodes an exchange rate the way rippled sorts its order books"""
+    rate = amount_value(pays) / amount_value(gets)
+    if rate <= 0:
+        return "0" * 16
+    exponent = rate.adjusted() - 15
+    mantissa = int(rate.scaleb(-exponent))
+    return f"{((exponent + 100) << 56) | mantissa:016X}"
+
+
+def book_directory(pays, gets):
+    def issuer(amount):
+        return "0" * 40 if is_xrp(amount) else account_id(amount["issuer"])
+
+    def currency(amount):
+        return currency_hex("XRP" if is_xrp(amount) else amount["currency"])
+
+    base = sha512half("0042" + currency(pays) + currency(gets) + issuer(pays) + issuer(gets))
+    return base[:48] + quality_hex(pays, gets)
+
+
+# Which accounts own a ledger entry, for account_objects ----------------------
+def owners(index, entry):
+    entry_type = entry["LedgerEntryType"]
+    if entry_type == "AccountRoot":
+        return []
+    if entry_type == "RippleState":
+        return [entry["LowLimit"]["issuer"], entry["HighLimit"]["issuer"]]
+    if entry_type == "NFTokenPage":
+        return [encode_classic_address(bytes.fromhex(index[:40]))]
+    if entry_type in ("Escrow", "Check") and entry["Destination"] != entry["Account"]:
+        return [entry["Account"], entry["Destination"]]
+    return [entry.get("Account") or entry["Owner"]]
+
+
+class Directories:
+    """Owner and order book indexes over a ledger state"""
+
+    def __init__(self):
+        self.owned = defaultdict(set)
+        self.books = defaultdict(set)
+
+    @classmethod
+    def from_state(cls, state):
+        directories = cls()
+        for index, entry in state.items():
+            directories.update(index, None, entry)
+        return directories
+
+    def update(self, index, before, after):
+        for entry, add in ((before, False), (after, True)):
+            if entry is None:
+                continue
+            for owner in owners(index, entry):
+                (self.owned[owner].add if add else self.owned[owner].discard)(index)
+            if entry["LedgerEntryType"] == "Offer":
+                book = (book_key(entry["TakerGets"]), book_key(entry["TakerPays"]))
+                (self.books[book].add if add else self.books[book].discard)(index)
+
+
+class StateView:
+    """Read access to one ledger's state: a closed state, plus open changes if any"""
+
+    def __init__(self, state, directories, changes=None):
+        self.state = state
+        self.directories = directories
+        self.changes = changes
+
+    def get(self, index):
+        if self.changes is not None and index in self.changes:
+            return self.changes[index]
+        return self.state.get(index)
+
+    def owned(self, account):
+        return self.directories.owned.get(account, ())
+
+    def book(self, gets, pays):
+        return self.directories.books.get((gets, pays), ())
+
+    def indexes(self):
+        if not self.changes:
+            return sorted(self.state)
+        return sorted(
+            index for index in set(self.state) | set(self.changes)
+            if self.get(index) is not None
+        )
+
+
+class Sandbox:
+    """
+    Collects one transaction's changes to a view. Entries in the view are never
+    changed in place; modify() hands out a copy and remembers the original, which
+    is what the transaction's metadata is built from.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.touched = {}
+        self.extra_meta = {}
+
+    def get(self, index):
+        if index in self.touched:
+            return self.touched[index][1]
+        return self.view.get(index)
+
+    def modify(self, index):
+        if index not in self.touched:
+            before = self.view.get(index)
+            self.touched[index] = (before, deepcopy(before))
+        return self.touched[index][1]
+
+    def create(self, index, entry):
+        before = self.touched[index][0] if index in self.touched else self.view.get(index)
+        self.touched[index] = (before, entry)
+        return entry
+
+    def delete(self, index):
+        self.modify(index)
+        self.touched[index] = (self.touched[index][0], None)
+
+    def owned(self, account):
+        indexes = set(self.view.owned(account))
+        for index, (before, after) in self.touched.items():
+            if after is not None and account in owners(index, after):
+                indexes.add(index)
+            elif after is None:
+                indexes.discard(index)
+        return indexes
+
+    def metadata(self, tx_hash, ledger_index):
+        nodes = []
+        for index in sorted(self.touched):
+            before, after = self.touched[index]
+            if before is None and after is None:
+                continue
+            if before is None:
+                after["PreviousTxnID"] = tx_hash
+                after["PreviousTxnLgrSeq"] = ledger_index
+                nodes.append({"CreatedNode": {
+                    "LedgerEntryType": after["LedgerEntryType"],
+                    "LedgerIndex": index,
+                    "NewFields": strip(after, "LedgerEntryType", "PreviousTxnID", "PreviousTxnLgrSeq"),
+                }})
+            elif after is None:
+                nodes.append({"DeletedNode": {
+                    "LedgerEntryType": before["LedgerEntryType"],
+                    "LedgerIndex": index,
+                    "FinalFields": strip(before, "LedgerEntryType", "PreviousTxnID", "PreviousTxnLgrSeq"),
+                }})
+            elif before != after:
+                previous = {
+                    field: value for field, value in before.items()
+                    if after.get(field) != value and field not in ("PreviousTxnID", "PreviousTxnLgrSeq")
+                }
+                node = {
+                    "LedgerEntryType": after["LedgerEntryType"],
+                    "LedgerIndex": index,
+                    "FinalFields": strip(after, "LedgerEntryType", "PreviousTxnID", "PreviousTxnLgrSeq"),
+                    "PreviousFields": previous,
+                }
+                if "PreviousTxnID" in before:
+                    node["PreviousTxnID"] = before["PreviousTxnID"]
+                    node["PreviousTxnLgrSeq"] = before["PreviousTxnLgrSeq"]
+                after["PreviousTxnID"] = tx_hash
+                after["PreviousTxnLgrSeq"] = ledger_index
+                nodes.append({"ModifiedNode": node})
+        return nodes
+
+
+def strip(entry, *fields):
+    return {field: value for field, value in entry.items() if field not in fields}
+
+
+class Ledger:
+    def __init__(self, history=256, close_time=None):
+        self.history = history
+        self.state = {}
+        self.directories = Directories()
+        self.open_directories = Directories()
+        self.open_changes = {}
+        self.open_transactions = []
+        self.open_hashes = set()
+        self.held = defaultdict(dict)
+        self.transactions = {}
+        self.account_transactions = defaultdict(deque)
+        self.ledgers = {}
+        self.historical = None
+        self.total_coins = TOTAL_COINS
+
+        genesis = {
+            "LedgerEntryType": "AccountRoot",
+            "Account": GENESIS_ADDRESS,
+            "Balance": str(TOTAL_COINS),
+            "Flags": 0,
+            "OwnerCount": 0,
+            "Sequence": 1,
+        }
+        self.state[account_index(GENESIS_ADDRESS)] = genesis
+        self.closed = {
+            "ledger_index": 1,
+            "ledger_hash": sha512half("00" * 32),
+            "parent_hash": "0" * 64,
+            "close_time": close_time or ripple_time(time.time()),
+            "total_coins": str(TOTAL_COINS),
+            "transactions": [],
+        }
+        self.closed["close_time_iso"] = ripple_time_iso(self.closed["close_time"])
+        self.ledgers[1] = {"header": self.closed, "undo": {}}
+        self.open_seq = 2
+
+    # Views ----------------------
+    def open_view(self):
+        return StateView(self.state, self.open_directories, self.open_changes)
+
+    def closed_view(self):
+        return StateView(self.state, self.directories)
+
+    def view_at(self, ledger_index):
+        if ledger_index == self.open_seq:
+            return self.open_view()
+        if ledger_index == self.closed["ledger_index"]:
+            return self.closed_view()
+        if ledger_index not in self.ledgers:
+            return None
+        if self.historical and self.historical[0] == ledger_index:
+            return self.historical[1]
+        # Roll the closed state back through each later ledger's undo log
+        state = dict(self.state)
+        for seq in range(self.closed["ledger_index"], ledger_index, -1):
+            for index, before in self.ledgers[seq]["undo"].items():
+                if before is None:
+                    state.pop(index, None)
+                else:
+                    state[index] = before
+        view = StateView(state, Directories.from_state(state))
+        self.historical = (ledger_index, view)
+        return view
+
+    def reserve(self, owner_count):
+        return RESERVE_BASE + RESERVE_INC * owner_count
+
+    # Submission ----------------------
+    def submit(self, tx_blob, verify=True):
+        """
+        Applies a signed transaction to the open ledger. Returns the engine
+        result, the decoded transaction, and its hash.
+        """
+        tx = decode(tx_blob)
+        tx_hash = transaction_hash(tx_blob)
+        if tx_hash in self.transactions or tx_hash in self.open_hashes:
+            return "tefALREADY", tx, tx_hash
+        if verify and not signature_is_valid(tx):
+            raise ValueError("Invalid signature.")
+        result = self.apply(tx, tx_blob, tx_hash)
+        if result == "terPRE_SEQ":
+            # Like rippled, hold it until the transactions before it arrive
+            self.held[tx["Account"]][tx["Sequence"]] = (tx, tx_blob, tx_hash)
+        return result, tx, tx_hash
+
+    def apply(self, tx, tx_blob, tx_hash):
+        view = self.open_view()
+        account = tx["Account"]
+        root = view.get(account_index(account))
+        if root is None:
+            return "terNO_ACCOUNT"
+        if tx.get("LastLedgerSequence", self.open_seq) < self.open_seq:
+            return "tefMAX_LEDGER"
+        if not str(tx.get("Fee", "")).isdigit():
+            return "temBAD_FEE"
+        fee = int(tx["Fee"])
+        if fee < BASE_FEE * (1 + len(tx.get("Signers", []))):
+            return "telINSUF_FEE_P"
+
+        ticket = tx.get("TicketSequence")
+        if ticket is not None and not tx.get("Sequence"):
+            if view.get(sequenced_index("0054", account, ticket)) is None:
+                return "terPRE_TICKET" if ticket >= root["Sequence"] else "tefNO_TICKET"
+        elif tx["Sequence"] < root["Sequence"]:
+            return "tefPAST_SEQ"
+        elif tx["Sequence"] > root["Sequence"]:
+            return "terPRE_SEQ"
+
+        auth = self.check_authorization(view, tx, root)
+        if auth != "tesSUCCESS":
+            return auth
+        if int(root["Balance"]) < fee:
+            return "terINSUF_FEE_B"
+        handler = HANDLERS.get(tx["TransactionType"])
+        if handler is None:
+            return "temDISABLED"
+
+        sandbox = Sandbox(view)
+        charge_fee(sandbox, tx)
+        try:
+            result = handler(self, sandbox, tx)
+        except TecError as e:
+            result = str(e)
+        if result.startswith("tec"):
+            # A tec result still claims the fee and uses up the Sequence
+            sandbox = Sandbox(view)
+            charge_fee(sandbox, tx)
+        elif result != "tesSUCCESS":
+            return result
+
+        meta = {
+            "AffectedNodes": sandbox.metadata(tx_hash, self.open_seq),
+            "TransactionIndex": len(self.open_transactions),
+            "TransactionResult": result,
+            **(sandbox.extra_meta if result == "tesSUCCESS" else {}),
+        }
+        for index, (before, after) in sandbox.touched.items():
+            if before is None and after is None:
+                continue
+            self.open_directories.update(index, before, after)
+            self.open_changes[index] = after
+        self.total_coins -= fee
+        self.open_hashes.add(tx_hash)
+        self.open_transactions.append({
+            "hash": tx_hash,
+            "tx_json": tx,
+            "tx_blob": tx_blob,
+            "meta": meta,
+        })
+
+        # A gap may have just been filled for transactions waiting on it
+        if account in self.held:
+            next_sequence = self.open_view().get(account_index(account))["Sequence"]
+            waiting = self.held[account].pop(next_sequence, None)
+            if not self.held[account]:
+                del self.held[account]
+            if waiting:
+                self.apply(*waiting)
+        return result
+
+    def check_authorization(self, view, tx, root):
+        if "Signers" not in tx and not tx.get("SigningPubKey"):
+            return "tefBAD_AUTH"
+        if "Signers" in tx:
+            signer_list = view.get(signer_list_index(tx["Account"]))
+            if signer_list is None:
+                return "tefNOT_MULTI_SIGNING"
+            weights = {
+                entry["SignerEntry"]["Account"]: entry["SignerEntry"]["SignerWeight"]
+                for entry in signer_list["SignerEntries"]
+            }
+            weight = 0
+            for signer in tx["Signers"]:
+                account = signer["Signer"]["Account"]
+                if account not in weights:
+                    return "tefBAD_SIGNATURE"
+                weight += weights[account]
+            return "tesSUCCESS" if weight >= signer_list["SignerQuorum"] else "tefBAD_QUORUM"
+
+        signing_account = keypairs.derive_classic_address(tx["SigningPubKey"])
+        if signing_account == tx["Account"]:
+            return "tefMASTER_DISABLED" if root["Flags"] & LSF_DISABLE_MASTER else "tesSUCCESS"
+        if signing_account == root.get("RegularKey"):
+            return "tesSUCCESS"
+        return "tefBAD_AUTH"
+
+    # Closing ----------------------
+    def close(self, close_time=None):
+        """Closes (and, on a stand-in, validates) the open ledger"""
+        seq = self.open_seq
+        close_time = max(close_time or ripple_time(time.time()), self.closed["close_time"] + 1)
+
+        undo = {}
+        for index, entry in self.open_changes.items():
+            before = self.state.get(index)
+            undo[index] = before
+            self.directories.update(index, before, entry)
+            if entry is None:
+                self.state.pop(index, None)
+            else:
+                self.state[index] = entry
+
+        tx_hashes = [record["hash"] for record in self.open_transactions]
+        header = {
+            "ledger_index": seq,
+            "parent_hash": self.closed["ledger_hash"],
+            "close_time": close_time,
+            "close_time_iso": ripple_time_iso(close_time),
+            "parent_close_time": self.closed["close_time"],
+            "total_coins": str(self.total_coins),
+            "account_hash": sha512half(hashlib.sha512(repr(sorted(undo)).encode()).hexdigest()),
+            "transaction_hash": sha512half("".join(tx_hashes) or "00"),
+            "transactions": tx_hashes,
+        }
+        header["ledger_hash"] = sha512half(
+            f"{seq:08X}" + header["parent_hash"] + header["account_hash"] + header["transaction_hash"]
+            + f"{close_time:08X}"
+        )
+
+        records = self.open_transactions
+        for record in records:
+            record.update(ledger_index=seq, ledger_hash=header["ledger_hash"],
+                          close_time_iso=header["close_time_iso"], date=close_time,
+                          accounts=affected_accounts(record["tx_json"], record["meta"]))
+            self.transactions[record["hash"]] = record
+            for account in record["accounts"]:
+                self.account_transactions[account].append(record["hash"])
+
+        self.ledgers[seq] = {"header": header, "undo": undo}
+        self.closed = header
+        self.open_seq = seq + 1
+        self.open_changes = {}
+        self.open_transactions = []
+        self.open_hashes = set()
+        self.historical = None
+        self.prune()
+
+        # Retry held transactions; drop the ones that can no longer succeed
+        for account, waiting in list(self.held.items()):
+            root = self.state.get(account_index(account))
+            for sequence, (tx, tx_blob, tx_hash) in list(waiting.items()):
+                expired = tx.get("LastLedgerSequence", self.open_seq) < self.open_seq
+                if expired or root is None or sequence < root["Sequence"]:
+                    del waiting[sequence]
+            if not waiting:
+                del self.held[account]
+                continue
+            first = waiting.pop(root["Sequence"], None)
+            if first:
+                self.apply(*first)
+        return header, records
+
+    def prune(self):
+        oldest = self.open_seq - self.history
+        for seq in [seq for seq in self.ledgers if seq < oldest]:
+            for tx_hash in self.ledgers.pop(seq)["header"]["transactions"]:
+                record = self.transactions.pop(tx_hash)
+                for account in record["accounts"]:
+                    history = self.account_transactions[account]
+                    if history and history[0] == tx_hash:
+                        history.popleft()
+                    if not history:
+                        del self.account_transactions[account]
+
+    def oldest_ledger(self):
+        return min(self.ledgers)
+
+
+def signature_is_valid(tx):
+    try:
+        if "Signers" in tx:
+            return all(
+                keypairs.is_valid_message(
+                    bytes.fromhex(encode_for_multisigning(tx, signer["Signer"]["Account"])),
+                    bytes.fromhex(signer["Signer"]["TxnSignature"]),
+                    signer["Signer"]["SigningPubKey"],
+                )
+                for signer in tx["Signers"]
+            )
+        return keypairs.is_valid_message(
+            bytes.fromhex(encode_for_signing(tx)),
+            bytes.fromhex(tx["TxnSignature"]),
+            tx["SigningPubKey"],
+        )
+    except (KeyError, ValueError):
+        return False
+
+
+def affected_accounts(tx, meta):
+    accounts = {tx["Account"]}
+    for field in ("Destination", "Owner", "Issuer"):
+        if field in tx:
+            accounts.add(tx[field])
+    for node in meta["AffectedNodes"]:
+        entry = next(iter(node.values()))
+        fields = entry.get("FinalFields") or entry.get("NewFields") or {}
+        for field in ("Account", "Destination", "Owner"):
+            if field in fields:
+                accounts.add(fields[field])
+        for field in ("LowLimit", "HighLimit"):
+            if field in fields:
+                accounts.add(fields[field]["issuer"])
+        if entry["LedgerEntryType"] == "NFTokenPage":
+            accounts.add(encode_classic_address(bytes.fromhex(entry["LedgerIndex"][:40])))
+    return sorted(accounts)
+
+
+# Transaction handlers ----------------------
+def charge_fee(sandbox, tx):
+    root = sandbox.modify(account_index(tx["Account"]))
+    root["Balance"] = str(int(root["Balance"]) - int(tx["Fee"]))
+    if tx.get("Sequence"):
+        root["Sequence"] += 1
+    else:
+        sandbox.delete(sequenced_index("0054", tx["Account"], tx["TicketSequence"]))
+        root["OwnerCount"] -= 1
+        root["TicketCount"] -= 1
+        if not root["TicketCount"]:
+            del root["TicketCount"]
+
+
+def tx_sequence(tx):
+    return tx.get("Sequence") or tx["TicketSequence"]
+
+
+def add_owned(ledger, sandbox, account, count=1, result="tecINSUFFICIENT_RESERVE"):
+    root = sandbox.modify(account_index(account))
+    if int(root["Balance"]) < ledger.reserve(root["OwnerCount"] + count):
+        raise TecError(result)
+    root["OwnerCount"] += count
+
+
+def remove_owned(sandbox, account, count=1):
+    root = sandbox.modify(account_index(account))
+    root["OwnerCount"] -= count
+
+
+def send_xrp(ledger, sandbox, source, destination, drops, tx=None):
+    source_root = sandbox.modify(account_index(source))
+    if int(source_root["Balance"]) - drops < ledger.reserve(source_root["OwnerCount"]):
+        raise TecError("tecUNFUNDED_PAYMENT")
+    destination_root = sandbox.get(account_index(destination))
+    if destination_root is None:
+        if drops < RESERVE_BASE:
+            raise TecError("tecNO_DST_INSUF_XRP")
+        destination_root = sandbox.create(account_index(destination), {
+            "LedgerEntryType": "AccountRoot",
+            "Account": destination,
+            "Balance": "0",
+            "Flags": 0,
+            "OwnerCount": 0,
+            "Sequence": ledger.open_seq,
+        })
+    else:
+        destination_root = sandbox.modify(account_index(destination))
+    if tx is not None:
+        check_destination(destination_root, tx)
+    source_root["Balance"] = str(int(source_root["Balance"]) - drops)
+    destination_root["Balance"] = str(int(destination_root["Balance"]) + drops)
+
+
+def check_destination(destination_root, tx):
+    if destination_root["Flags"] & LSF_REQUIRE_DEST_TAG and "DestinationTag" not in tx:
+        raise TecError("tecDST_TAG_NEEDED")
+    if destination_root["Flags"] & LSF_DEPOSIT_AUTH and tx["Account"] != destination_root["Account"]:
+        raise TecError("tecNO_PERMISSION")
+
+
+def line_side(line, account):
+    """0 if the account is the low side of the trust line, 1 if high"""
+    return 0 if line["LowLimit"]["issuer"] == account else 1
+
+
+def line_balance(line, account):
+    balance = Decimal(line["Balance"]["value"])
+    return balance if line_side(line, account) == 0 else -balance
+
+
+def set_line_balance(line, account, balance):
+    line["Balance"]["value"] = format_value(balance if line_side(line, account) == 0 else -balance)
+
+
+def line_limit(line, account):
+    return Decimal((line["LowLimit"] if line_side(line, account) == 0 else line["HighLimit"])["value"])
+
+
+def send_issued(sandbox, source, destination, amount, partial=False):
+    """
+    Moves an issued currency from source to destination, rippling through the
+    issuer when neither of them is the issuer. Returns the value delivered.
+    """
+    currency, issuer = amount["currency"], amount["issuer"]
+    value = Decimal(amount["value"])
+    issuer_root = sandbox.get(account_index(issuer))
+    if issuer_root is None:
+        raise TecError("tecNO_DST")
+
+    available = value
+    source_line = destination_line = None
+    if source != issuer:
+        source_line = sandbox.get(line_index(source, issuer, currency))
+        if source_line is None:
+            raise TecError("tecPATH_DRY")
+        side = line_side(source_line, source)
+        frozen = source_line["Flags"] & LSF_FREEZE[1 - side] or issuer_root["Flags"] & LSF_GLOBAL_FREEZE
+        if frozen and destination != issuer:
+            raise TecError("tecPATH_DRY")
+        available = min(available, line_balance(source_line, source))
+    if destination != issuer:
+        destination_line = sandbox.get(line_index(destination, issuer, currency))
+        if destination_line is None:
+            raise TecError("tecNO_LINE" if source == issuer else "tecPATH_DRY")
+        side = line_side(destination_line, destination)
+        if issuer_root["Flags"] & LSF_GLOBAL_FREEZE and source != issuer:
+            raise TecError("tecPATH_DRY")
+        room = line_limit(destination_line, destination) - line_balance(destination_line, destination)
+        available = min(available, room)
+    if source_line and destination_line:
+        # Rippling between two holders needs the issuer to allow it
+        for line in (source_line, destination_line):
+            if line["Flags"] & LSF_NO_RIPPLE[line_side(line, issuer)]:
+                raise TecError("tecPATH_DRY")
+
+    if available <= 0:
+        raise TecError("tecPATH_DRY")
+    if available < value and not partial:
+        raise TecError("tecPATH_PARTIAL")
+
+    if source_line:
+        line = sandbox.modify(line_index(source, issuer, currency))
+        set_line_balance(line, source, line_balance(line, source) - available)
+    if destination_line:
+        line = sandbox.modify(line_index(destination, issuer, currency))
+        set_line_balance(line, destination, line_balance(line, destination) + available)
+    return available
+
+
+def apply_payment(ledger, sandbox, tx):
+    amount = tx.get("Amount")
+    if "Destination" not in tx:
+        return "temDST_NEEDED"
+    if amount is None or amount_value(amount) <= 0:
+        return "temBAD_AMOUNT"
+    if tx["Destination"] == tx["Account"] and is_xrp(amount):
+        return "temREDUNDANT"
+    send_max = tx.get("SendMax")
+    if send_max is not None and book_key(send_max) != book_key(amount):
+        # Cross-currency payments need path finding, which this stand-in doesn't do
+        raise TecError("tecPATH_DRY")
+    partial = bool(tx.get("Flags", 0) & TF_PARTIAL_PAYMENT)
+
+    if is_xrp(amount):
+        send_xrp(ledger, sandbox, tx["Account"], tx["Destination"], int(amount), tx)
+        delivered = amount
+    else:
+        destination_root = sandbox.get(account_index(tx["Destination"]))
+        if destination_root is None:
+            raise TecError("tecNO_DST")
+        check_destination(destination_root, tx)
+        limit = amount if send_max is None else {**amount, "value": min(amount["value"], send_max["value"], key=Decimal)}
+        value = send_issued(sandbox, tx["Account"], tx["Destination"], limit, partial)
+        delivered = with_value(amount, value)
+        if value < amount_value(amount) and not partial:
+            raise TecError("tecPATH_PARTIAL")
+        if "DeliverMin" in tx and value < amount_value(tx["DeliverMin"]):
+            raise TecError("tecPATH_PARTIAL")
+    if partial:
+        sandbox.extra_meta["DeliveredAmount"] = delivered
+    sandbox.extra_meta["delivered_amount"] = delivered
+    return "tesSUCCESS"
+
+
+def apply_trust_set(ledger, sandbox, tx):
+    limit = tx.get("LimitAmount")
+    if limit is None or is_xrp(limit):
+        return "temBAD_LIMIT"
+    if Decimal(limit["value"]) < 0:
+        return "temBAD_LIMIT"
+    account, issuer, currency = tx["Account"], limit["issuer"], limit["currency"]
+    if account == issuer:
+        return "temDST_IS_SRC"
+    if sandbox.get(account_index(issuer)) is None:
+        raise TecError("tecNO_DST")
+
+    index = line_index(account, issuer, currency)
+    line = sandbox.get(index)
+    if line is None:
+        low, high = sorted([account, issuer], key=account_id)
+        line = sandbox.create(index, {
+            "LedgerEntryType": "RippleState",
+            "Balance": {"currency": currency, "issuer": ACCOUNT_ONE, "value": "0"},
+            "Flags": 0,
+            "LowLimit": {"currency": currency, "issuer": low, "value": "0"},
+            "HighLimit": {"currency": currency, "issuer": high, "value": "0"},
+            "LowNode": "0",
+            "HighNode": "0",
+        })
+        # The new line starts with rippling off unless the peer allows it
+        issuer_root = sandbox.get(account_index(issuer))
+        if not issuer_root["Flags"] & LSF_DEFAULT_RIPPLE:
+            line["Flags"] |= LSF_NO_RIPPLE[line_side(line, issuer)]
+    else:
+        line = sandbox.modify(index)
+
+    side = line_side(line, account)
+    (line["LowLimit"] if side == 0 else line["HighLimit"])["value"] = format_value(Decimal(limit["value"]))
+    flags = tx.get("Flags", 0)
+    for set_flag, clear_flag, line_flag in (
+        (TF_SET_NO_RIPPLE, TF_CLEAR_NO_RIPPLE, LSF_NO_RIPPLE),
+        (TF_SET_FREEZE, TF_CLEAR_FREEZE, LSF_FREEZE),
+    ):
+        if flags & set_flag:
+            line["Flags"] |= line_flag[side]
+        elif flags & clear_flag:
+            line["Flags"] &= ~line_flag[side]
+    if flags & TF_SET_AUTH:
+        line["Flags"] |= LSF_AUTH[side]
+
+    # A side owns the line (and pays its reserve) while it has a limit or a
+    # positive balance; the line goes away when neither side does.
+    for owner in (account, issuer):
+        owner_side = line_side(line, owner)
+        needs_reserve = line_limit(line, owner) != 0 or line_balance(line, owner) > 0
+        has_reserve = bool(line["Flags"] & LSF_RESERVE[owner_side])
+        if needs_reserve and not has_reserve:
+            add_owned(ledger, sandbox, owner, result="tecINSUF_RESERVE_LINE")
+            line["Flags"] |= LSF_RESERVE[owner_side]
+        elif has_reserve and not needs_reserve:
+            remove_owned(sandbox, owner)
+            line["Flags"] &= ~LSF_RESERVE[owner_side]
+    if not line["Flags"] & (LSF_RESERVE[0] | LSF_RESERVE[1]) and Decimal(line["Balance"]["value"]) == 0:
+        sandbox.delete(index)
+    return "tesSUCCESS"
+
+
+def apply_offer_create(ledger, sandbox, tx):
+    pays, gets = tx.get("TakerPays"), tx.get("TakerGets")
+    if pays is None or gets is None or amount_value(pays) <= 0 or amount_value(gets) <= 0:
+        return "temBAD_OFFER"
+    if book_key(pays) == book_key(gets):
+        return "temREDUNDANT"
+    account = tx["Account"]
+    if "OfferSequence" in tx:
+        cancel_offer(sandbox, account, tx["OfferSequence"])
+    if "Expiration" in tx and tx["Expiration"] <= ledger.closed["close_time"]:
+        raise TecError("tecEXPIRED")
+
+    flags = tx.get("Flags", 0)
+    if flags & (TF_IMMEDIATE_OR_CANCEL | TF_FILL_OR_KILL):
+        # Nothing ever crosses on the stand-in
+        raise TecError("tecKILLED")
+
+    # The offer has to be funded by something
+    if is_xrp(gets):
+        root = sandbox.get(account_index(account))
+        funded = int(root["Balance"]) > ledger.reserve(root["OwnerCount"])
+    elif gets["issuer"] == account:
+        funded = True
+    else:
+        line = sandbox.get(line_index(account, gets["issuer"], gets["currency"]))
+        funded = line is not None and line_balance(line, account) > 0
+    if not funded:
+        raise TecError("tecUNFUNDED_OFFER")
+
+    add_owned(ledger, sandbox, account, result="tecINSUF_RESERVE_OFFER")
+    offer = {
+        "LedgerEntryType": "Offer",
+        "Account": account,
+        "Sequence": tx_sequence(tx),
+        "TakerPays": pays,
+        "TakerGets": gets,
+        "BookDirectory": book_directory(pays, gets),
+        "BookNode": "0",
+        "OwnerNode": "0",
+        "Flags": (0x00010000 if flags & TF_PASSIVE else 0) | (0x00020000 if flags & TF_SELL else 0),
+    }
+    if "Expiration" in tx:
+        offer["Expiration"] = tx["Expiration"]
+    sandbox.create(sequenced_index("006F", account, tx_sequence(tx)), offer)
+    return "tesSUCCESS"
+
+
+def cancel_offer(sandbox, account, sequence):
+    index = sequenced_index("006F", account, sequence)
+    if sandbox.get(index) is not None:
+        sandbox.delete(index)
+        remove_owned(sandbox, account)
+
+
+def apply_offer_cancel(ledger, sandbox, tx):
+    if not tx.get("OfferSequence"):
+        return "temBAD_SEQUENCE" if "OfferSequence" in tx else "temMALFORMED"
+    cancel_offer(sandbox, tx["Account"], tx["OfferSequence"])
+    return "tesSUCCESS"
+
+
+def apply_ticket_create(ledger, sandbox, tx):
+    count = tx.get("TicketCount", 0)
+    if not 1 <= count <= MAX_TICKETS:
+        return "temINVALID_COUNT"
+    account = tx["Account"]
+    root = sandbox.modify(account_index(account))
+    if root.get("TicketCount", 0) + count > MAX_TICKETS:
+        raise TecError("tecDIR_FULL")
+    add_owned(ledger, sandbox, account, count)
+    first = root["Sequence"]
+    for ticket in range(first, first + count):
+        sandbox.create(sequenced_index("0054", account, ticket), {
+            "LedgerEntryType": "Ticket",
+            "Account": account,
+            "Flags": 0,
+            "OwnerNode": "0",
+            "TicketSequence": ticket,
+        })
+    root["Sequence"] = first + count
+    root["TicketCount"] = root.get("TicketCount", 0) + count
+    return "tesSUCCESS"
+
+
+def apply_account_set(ledger, sandbox, tx):
+    if tx.get("SetFlag") and tx.get("SetFlag") == tx.get("ClearFlag"):
+        return "temMALFORMED"
+    root = sandbox.modify(account_index(tx["Account"]))
+    if tx.get("SetFlag") in ACCOUNT_FLAGS:
+        root["Flags"] |= ACCOUNT_FLAGS[tx["SetFlag"]]
+    if tx.get("ClearFlag") in ACCOUNT_FLAGS:
+        root["Flags"] &= ~ACCOUNT_FLAGS[tx["ClearFlag"]]
+    for field in ("Domain", "EmailHash", "MessageKey", "TransferRate", "TickSize"):
+        if field in tx:
+            # An empty value or zero clears the field
+            if tx[field] in ("", 0) or (field == "EmailHash" and not tx[field].strip("0")):
+                root.pop(field, None)
+            else:
+                root[field] = tx[field]
+    return "tesSUCCESS"
+
+
+def apply_set_regular_key(ledger, sandbox, tx):
+    root = sandbox.modify(account_index(tx["Account"]))
+    if "RegularKey" in tx:
+        if tx["RegularKey"] == tx["Account"]:
+            return "temBAD_REGKEY"
+        root["RegularKey"] = tx["RegularKey"]
+    else:
+        root.pop("RegularKey", None)
+    return "tesSUCCESS"
+
+
+def apply_signer_list_set(ledger, sandbox, tx):
+    account = tx["Account"]
+    index = signer_list_index(account)
+    if tx.get("SignerQuorum", 0) == 0:
+        if sandbox.get(index) is not None:
+            sandbox.delete(index)
+            remove_owned(sandbox, account)
+        return "tesSUCCESS"
+    entries = tx.get("SignerEntries", [])
+    if sum(entry["SignerEntry"]["SignerWeight"] for entry in entries) < tx["SignerQuorum"]:
+        return "temBAD_QUORUM"
+    if sandbox.get(index) is None:
+        add_owned(ledger, sandbox, account)
+        sandbox.create(index, {"LedgerEntryType": "SignerList", "Account": account})
+    signer_list = sandbox.modify(index)
+    signer_list.update(
+        Flags=0x00010000,  # lsfOneOwnerCount
+        OwnerNode="0",
+        SignerListID=0,
+        SignerQuorum=tx["SignerQuorum"],
+        SignerEntries=entries,
+    )
+    return "tesSUCCESS"
+
+
+def nftoken_id(flags, transfer_fee, issuer, taxon, sequence):
+    scrambled = taxon ^ ((384160001 * sequence + 2459) % 2**32)
+    return f"{flags & 0xFFFF:04X}{transfer_fee:04X}{account_id(issuer)}{scrambled:08X}{sequence:08X}"
+
+
+def nft_page_for(sandbox, owner, token_id):
+    """The index of the NFTokenPage a token belongs in, and that page if it exists"""
+    key = account_id(owner) + token_id[-24:]
+    pages = sorted(
+        index for index in sandbox.owned(owner)
+        if index >= key and sandbox.get(index)["LedgerEntryType"] == "NFTokenPage"
+    )
+    if pages:
+        return pages[0], sandbox.get(pages[0])
+    return account_id(owner) + "F" * 24, None
+
+
+def add_nftoken(ledger, sandbox, owner, token):
+    token_id = token["NFToken"]["NFTokenID"]
+    index, page = nft_page_for(sandbox, owner, token_id)
+    if page is None:
+        add_owned(ledger, sandbox, owner)
+        page = sandbox.create(index, {"LedgerEntryType": "NFTokenPage", "Flags": 0, "NFTokens": []})
+    else:
+        page = sandbox.modify(index)
+    page["NFTokens"].append(token)
+    page["NFTokens"].sort(key=lambda t: (t["NFToken"]["NFTokenID"][-24:], t["NFToken"]["NFTokenID"]))
+
+    if len(page["NFTokens"]) > NFTOKENS_PER_PAGE:
+        # Move the lower half to a new page keyed by its highest token
+        lower = page["NFTokens"][:NFTOKENS_PER_PAGE // 2]
+        lower_index = account_id(owner) + lower[-1]["NFToken"]["NFTokenID"][-24:]
+        if sandbox.get(lower_index) is None and lower_index != index:
+            add_owned(ledger, sandbox, owner)
+            page["NFTokens"] = page["NFTokens"][NFTOKENS_PER_PAGE // 2:]
+            sandbox.create(lower_index, {"LedgerEntryType": "NFTokenPage", "Flags": 0, "NFTokens": lower})
+
+
+def remove_nftoken(sandbox, owner, token_id):
+    index, page = nft_page_for(sandbox, owner, token_id)
+    if page is None or not any(t["NFToken"]["NFTokenID"] == token_id for t in page["NFTokens"]):
+        raise TecError("tecNO_ENTRY")
+    page = sandbox.modify(index)
+    page["NFTokens"] = [t for t in page["NFTokens"] if t["NFToken"]["NFTokenID"] != token_id]
+    if not page["NFTokens"]:
+        sandbox.delete(index)
+        remove_owned(sandbox, owner)
+
+
+def apply_nftoken_mint(ledger, sandbox, tx):
+    if "NFTokenTaxon" not in tx:
+        return "temMALFORMED"
+    account = tx["Account"]
+    issuer = tx.get("Issuer", account)
+    issuer_root = sandbox.modify(account_index(issuer))
+    if issuer_root is None:
+        raise TecError("tecNO_ISSUER")
+    if issuer != account and issuer_root.get("NFTokenMinter") != account:
+        raise TecError("tecNO_PERMISSION")
+    first = issuer_root.setdefault("FirstNFTokenSequence", issuer_root["Sequence"])
+    minted = issuer_root.get("MintedNFTokens", 0)
+    issuer_root["MintedNFTokens"] = minted + 1
+
+    token_id = nftoken_id(tx.get("Flags", 0), tx.get("TransferFee", 0), issuer,
+                          tx["NFTokenTaxon"], first + minted)
+    token = {"NFToken": {"NFTokenID": token_id}}
+    if "URI" in tx:
+        token["NFToken"]["URI"] = tx["URI"]
+    add_nftoken(ledger, sandbox, account, token)
+    sandbox.extra_meta["nftoken_id"] = token_id
+    return "tesSUCCESS"
+
+
+def apply_nftoken_burn(ledger, sandbox, tx):
+    token_id = tx.get("NFTokenID")
+    if token_id is None:
+        return "temMALFORMED"
+    owner = tx.get("Owner", tx["Account"])
+    issuer = encode_classic_address(bytes.fromhex(token_id[8:48]))
+    burnable = int(token_id[:4], 16) & 0x0001
+    if tx["Account"] != owner and not (tx["Account"] == issuer and burnable):
+        raise TecError("tecNO_PERMISSION")
+    remove_nftoken(sandbox, owner, token_id)
+    issuer_root = sandbox.modify(account_index(issuer))
+    issuer_root["BurnedNFTokens"] = issuer_root.get("BurnedNFTokens", 0) + 1
+    return "tesSUCCESS"
+
+
+def apply_escrow_create(ledger, sandbox, tx):
+    amount = tx.get("Amount")
+    if amount is None or not is_xrp(amount) or int(amount) <= 0:
+        return "temBAD_AMOUNT"
+    if "FinishAfter" not in tx and "CancelAfter" not in tx:
+        return "temBAD_EXPIRATION"
+    if "FinishAfter" in tx and "CancelAfter" in tx and tx["FinishAfter"] >= tx["CancelAfter"]:
+        return "temBAD_EXPIRATION"
+    if "CancelAfter" not in tx and "Condition" not in tx:
+        return "temMALFORMED"
+    close_time = ledger.closed["close_time"]
+    if tx.get("CancelAfter", close_time + 1) <= close_time or tx.get("FinishAfter", close_time + 1) <= close_time:
+        raise TecError("tecNO_PERMISSION")
+
+    account = tx["Account"]
+    destination_root = sandbox.get(account_index(tx["Destination"]))
+    if destination_root is None:
+        raise TecError("tecNO_DST")
+    check_destination(destination_root, tx)
+    add_owned(ledger, sandbox, account)
+    root = sandbox.modify(account_index(account))
+    if int(root["Balance"]) - int(amount) < ledger.reserve(root["OwnerCount"]):
+        raise TecError("tecUNFUNDED")
+    root["Balance"] = str(int(root["Balance"]) - int(amount))
+
+    escrow = {
+        "LedgerEntryType": "Escrow",
+        "Account": account,
+        "Destination": tx["Destination"],
+        "Amount": amount,
+        "Flags": 0,
+        "OwnerNode": "0",
+    }
+    for field in ("Condition", "CancelAfter", "FinishAfter", "SourceTag", "DestinationTag"):
+        if field in tx:
+            escrow[field] = tx[field]
+    sandbox.create(sequenced_index("0075", account, tx_sequence(tx)), escrow)
+    return "tesSUCCESS"
+
+
+def fulfillment_matches(fulfillment, condition):
+    # PREIMAGE-SHA-256 only: A0 <len> 80 <len> <preimage>
+    data = bytes.fromhex(fulfillment)
+    if len(data) < 4 or data[0] != 0xA0 or data[2] != 0x80 or data[3] > 127:
+        return False
+    preimage = data[4:4 + data[3]]
+    digest = hashlib.sha256(preimage).hexdigest().upper()
+    expected = f"A0258020{digest}8101{len(preimage):02X}"
+    return expected == condition.upper()
+
+
+def finish_or_cancel_escrow(ledger, sandbox, tx, finish):
+    owner = tx.get("Owner")
+    if owner is None or "OfferSequence" not in tx:
+        return "temMALFORMED"
+    index = sequenced_index("0075", owner, tx["OfferSequence"])
+    escrow = sandbox.get(index)
+    if escrow is None:
+        raise TecError("tecNO_TARGET")
+
+    # Escrow times are compared with the parent ledger's close time
+    close_time = ledger.closed["close_time"]
+    if finish:
+        if "FinishAfter" in escrow and close_time <= escrow["FinishAfter"]:
+            raise TecError("tecNO_PERMISSION")
+        if "CancelAfter" in escrow and close_time > escrow["CancelAfter"]:
+            raise TecError("tecNO_PERMISSION")
+        if "Condition" in escrow:
+            if "Fulfillment" not in tx or not fulfillment_matches(tx["Fulfillment"], escrow["Condition"]):
+                raise TecError("tecCRYPTOCONDITION_ERROR")
+        recipient = escrow["Destination"]
+    else:
+        if "CancelAfter" not in escrow or close_time <= escrow["CancelAfter"]:
+            raise TecError("tecNO_PERMISSION")
+        recipient = owner
+
+    root = sandbox.modify(account_index(recipient))
+    root["Balance"] = str(int(root["Balance"]) + int(escrow["Amount"]))
+    sandbox.delete(index)
+    remove_owned(sandbox, owner)
+    return "tesSUCCESS"
+
+
+def apply_escrow_finish(ledger, sandbox, tx):
+    return finish_or_cancel_escrow(ledger, sandbox, tx, finish=True)
+
+
+def apply_escrow_cancel(ledger, sandbox, tx):
+    return finish_or_cancel_escrow(ledger, sandbox, tx, finish=False)
+
+
+def apply_check_create(ledger, sandbox, tx):
+    if "Destination" not in tx or "SendMax" not in tx:
+        return "temMALFORMED"
+    if tx["Destination"] == tx["Account"]:
+        return "temREDUNDANT"
+    destination_root = sandbox.get(account_index(tx["Destination"]))
+    if destination_root is None:
+        raise TecError("tecNO_DST")
+    check_destination(destination_root, tx)
+    if "Expiration" in tx and tx["Expiration"] <= ledger.closed["close_time"]:
+        raise TecError("tecEXPIRED")
+    add_owned(ledger, sandbox, tx["Account"])
+    check = {
+        "LedgerEntryType": "Check",
+        "Account": tx["Account"],
+        "Destination": tx["Destination"],
+        "SendMax": tx["SendMax"],
+        "Sequence": tx_sequence(tx),
+        "Flags": 0,
+        "OwnerNode": "0",
+        "DestinationNode": "0",
+    }
+    for field in ("Expiration", "InvoiceID", "SourceTag", "DestinationTag"):
+        if field in tx:
+            check[field] = tx[field]
+    sandbox.create(sequenced_index("0043", tx["Account"], tx_sequence(tx)), check)
+    return "tesSUCCESS"
+
+
+def apply_check_cash(ledger, sandbox, tx):
+    check = sandbox.get(tx.get("CheckID", ""))
+    if check is None:
+        raise TecError("tecNO_ENTRY")
+    if check["Destination"] != tx["Account"]:
+        raise TecError("tecNO_PERMISSION")
+    if "Expiration" in check and check["Expiration"] <= ledger.closed["close_time"]:
+        raise TecError("tecEXPIRED")
+    requested = tx.get("Amount") or tx.get("DeliverMin")
+    if requested is None or book_key(requested) != book_key(check["SendMax"]):
+        return "temMALFORMED"
+    if amount_value(requested) > amount_value(check["SendMax"]):
+        raise TecError("tecPATH_PARTIAL")
+
+    if is_xrp(requested):
+        # DeliverMin takes as much as the check allows, up to SendMax
+        drops = int(requested) if "Amount" in tx else int(check["SendMax"])
+        send_xrp(ledger, sandbox, check["Account"], tx["Account"], drops)
+    else:
+        amount = requested if "Amount" in tx else check["SendMax"]
+        delivered = send_issued(sandbox, check["Account"], tx["Account"], amount, partial="DeliverMin" in tx)
+        if delivered < amount_value(requested):
+            raise TecError("tecPATH_PARTIAL")
+    sandbox.delete(tx["CheckID"])
+    remove_owned(sandbox, check["Account"])
+    return "tesSUCCESS"
+
+
+def apply_check_cancel(ledger, sandbox, tx):
+    check = sandbox.get(tx.get("CheckID", ""))
+    if check is None:
+        raise TecError("tecNO_ENTRY")
+    expired = "Expiration" in check and check["Expiration"] <= ledger.closed["close_time"]
+    if tx["Account"] not in (check["Account"], check["Destination"]) and not expired:
+        raise TecError("tecNO_PERMISSION")
+    sandbox.delete(tx["CheckID"])
+    remove_owned(sandbox, check["Account"])
+    return "tesSUCCESS"
+
+
+HANDLERS = {
+    "AccountSet": apply_account_set,
+    "CheckCancel": apply_check_cancel,
+    "CheckCash": apply_check_cash,
+    "CheckCreate": apply_check_create,
+    "EscrowCancel": apply_escrow_cancel,
+    "EscrowCreate": apply_escrow_create,
+    "EscrowFinish": apply_escrow_finish,
+    "NFTokenBurn": apply_nftoken_burn,
+    "NFTokenMint": apply_nftoken_mint,
+    "OfferCancel": apply_offer_cancel,
+    "OfferCreate": apply_offer_create,
+    "Payment": apply_payment,
+    "SetRegularKey": apply_set_regular_key,
+    "SignerListSet": apply_signer_list_set,
+    "TicketCreate": apply_ticket_create,
+    "TrustSet": apply_trust_set,
+}
@@ -0,0 +1,853 @@
+# Local stand-in for a rippled server, for running the Python code samples and
+# load tests without a network connection.
+#
+# It serves JSON-RPC (and a testnet-style faucet at /accounts) on one port and
+# the WebSocket API on another, backed by the in-memory ledger in ledger.py.
+# The open ledger closes on a timer, and every closed ledger counts as
+# validated. Responses can also be replayed from recorded fixtures.
+#
+# Start it with:
+#   python stand_in.py
+# then point a sample at it, e.g.:
+#   JsonRpcClient("http://localhost:5005")
+#   AsyncWebsocketClient("ws://localhost:6006")
+#   generate_faucet_wallet(client, faucet_host="http://localhost:5005")
+
+import argparse
+import asyncio
+import json
+import time
+from bisect import bisect_right
+from collections import defaultdict, deque
+from copy import deepcopy
+
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import broadcast, serve
+from websockets.exceptions import ConnectionClosed
+from xrpl.constants import CryptoAlgorithm
+from xrpl.core.addresscodec import encode_classic_address, is_valid_classic_address
+from xrpl.core.binarycodec import encode
+from xrpl.models import Payment
+from xrpl.transaction import sign
+from xrpl.utils import xrp_to_drops
+from xrpl.wallet import Wallet
+
+from ledger import (
+    BASE_FEE,
+    GENESIS_ADDRESS,
+    LSF_FREEZE,
+    LSF_NO_RIPPLE,
+    RESERVE_BASE,
+    RESERVE_INC,
+    RESULT_CODES,
+    Ledger,
+    account_index,
+    amount_value,
+    format_value,
+    line_balance,
+    line_index,
+    line_limit,
+    line_side,
+    ripple_time,
+    sequenced_index,
+    signer_list_index,
+)
+
+GENESIS_SEED = "snoPBrXtMeMyMHUVTgbuqAfg1SUTb"
+
+ERROR_CODES = {
+    "actNotFound": 19,
+    "lgrNotFound": 21,
+    "txnNotFound": 29,
+    "invalidParams": 31,
+    "unknownCmd": 32,
+    "actMalformed": 35,
+    "malformedStream": 39,
+    "notSupported": 75,
+    "internal": 73,
+    "invalidTransaction": 80,
+    "entryNotFound": 92,
+}
+
+ACCOUNT_OBJECT_TYPES = {
+    "check": "Check",
+    "escrow": "Escrow",
+    "nft_page": "NFTokenPage",
+    "offer": "Offer",
+    "signer_list": "SignerList",
+    "state": "RippleState",
+    "ticket": "Ticket",
+}
+
+
+class RpcError(Exception):
+    def __init__(self, error, message=None, **fields):
+        super().__init__(message or error)
+        self.fields = {"error": error, "error_code": ERROR_CODES.get(error), "error_message": message, **fields}
+        self.fields = {key: value for key, value in self.fields.items() if value is not None}
+
+
+# Fixtures ----------------------
+def fixture_key(request):
+    command = request.get("command") or request.get("method")
+    params = {key: value for key, value in request.items() if key not in ("id", "api_version", "command", "method")}
+    return command, json.dumps(params, sort_keys=True)
+
+
+def load_fixtures(path):
+    """
+    Reads [{"request": {...}, "response": {...}}, ...]. Requests that match a
+    fixture get its recorded response; when the same request was recorded more
+    than once, the responses are played back in order and the last one repeats.
+    """
+    with open(path) as f:
+        entries = json.load(f)
+    fixtures = defaultdict(deque)
+    for entry in entries:
+        fixtures[fixture_key(entry["request"])].append(entry["response"])
+    return fixtures
+
+
+async def record_fixtures(url, requests_path, fixtures_path):
+    """Sends each request in a file to a real server and saves what comes back"""
+    with open(requests_path) as f:
+        requests = json.load(f)
+    fixtures = []
+    async with connect(url, max_size=None) as websocket:
+        for request_id, request in enumerate(requests):
+            await websocket.send(json.dumps({**request, "id": request_id}))
+            while True:
+                response = json.loads(await websocket.recv())
+                if response.get("id") == request_id:
+                    break
+            if response["status"] == "success":
+                recorded = response["result"]
+            else:
+                recorded = {key: value for key, value in response.items()
+                            if key.startswith("error") or key not in ("id", "request", "status", "type")}
+            fixtures.append({"request": request, "response": recorded})
+    with open(fixtures_path, "w") as f:
+        json.dump(fixtures, f, indent=2)
+    print(f"Recorded {len(fixtures)} response(s) to {fixtures_path}")
+
+
+# Response formatting ----------------------
+def format_transaction(record, api_version, validated=True):
+    if api_version >= 2:
+        formatted = {"hash": record["hash"], "meta": record["meta"], "tx_json": record["tx_json"], "validated": validated}
+        if validated:
+            formatted.update(ledger_index=record["ledger_index"], ledger_hash=record["ledger_hash"],
+                             close_time_iso=record["close_time_iso"])
+        return formatted
+    formatted = {**record["tx_json"], "hash": record["hash"], "meta": record["meta"], "validated": validated}
+    if validated:
+        formatted.update(ledger_index=record["ledger_index"], date=record["date"])
+    return formatted
+
+
+def stream_message(record, api_version):
+    code, message = RESULT_CODES[record["meta"]["TransactionResult"]]
+    formatted = {
+        "type": "transaction",
+        "status": "closed",
+        "engine_result": record["meta"]["TransactionResult"],
+        "engine_result_code": code,
+        "engine_result_message": message,
+        "ledger_hash": record["ledger_hash"],
+        "ledger_index": record["ledger_index"],
+        "meta": record["meta"],
+        "validated": True,
+    }
+    if api_version >= 2:
+        formatted.update(hash=record["hash"], tx_json=record["tx_json"], close_time_iso=record["close_time_iso"])
+    else:
+        formatted["transaction"] = {**record["tx_json"], "hash": record["hash"], "date": record["date"]}
+    return formatted
+
+
+def decode_nftoken_id(token_id):
+    serial = int(token_id[56:64], 16)
+    return {
+        "Flags": int(token_id[:4], 16),
+        "TransferFee": int(token_id[4:8], 16),
+        "Issuer": encode_classic_address(bytes.fromhex(token_id[8:48])),
+        "NFTokenTaxon": int(token_id[48:56], 16) ^ ((384160001 * serial + 2459) % 2**32),
+        "nft_serial": serial,
+        "NFTokenID": token_id,
+    }
+
+
+def page(items, request, default_limit, maximum, key=lambda item: item):
+    """Returns one page of sorted items after the request's marker, and the next marker"""
+    limit = min(max(int(request.get("limit", default_limit)), 1), maximum)
+    start = 0
+    if request.get("marker") is not None:
+        start = bisect_right([key(item) for item in items], request["marker"])
+    chunk = items[start:start + limit]
+    marker = key(chunk[-1]) if chunk and start + limit < len(items) else None
+    return chunk, limit, marker
+
+
+class StandIn:
+    def __init__(self, ledger, faucet_xrp=1000, verify=True, fixtures=None, network_id=None):
+        self.ledger = ledger
+        self.faucet_xrp = faucet_xrp
+        self.verify = verify
+        self.fixtures = fixtures or {}
+        self.network_id = network_id
+        self.genesis = Wallet.from_seed(GENESIS_SEED, algorithm=CryptoAlgorithm.SECP256K1)
+        self.started = time.time()
+        self.stream_subscribers = {"ledger": set(), "transactions": set()}
+        self.account_subscribers = defaultdict(set)
+        self.api_versions = {}
+        self.commands = {
+            "account_info": self.account_info,
+            "account_lines": self.account_lines,
+            "account_nfts": self.account_nfts,
+            "account_objects": self.account_objects,
+            "account_tx": self.account_tx,
+            "book_offers": self.book_offers,
+            "fee": self.fee,
+            "ledger": self.ledger_command,
+            "ledger_accept": self.ledger_accept,
+            "ledger_closed": self.ledger_closed,
+            "ledger_current": self.ledger_current,
+            "ledger_data": self.ledger_data,
+            "ledger_entry": self.ledger_entry,
+            "ping": lambda request, connection: {},
+            "server_info": self.server_info,
+            "server_state": self.server_state,
+            "submit": self.submit,
+            "submit_multisigned": self.submit_multisigned,
+            "subscribe": self.subscribe,
+            "tx": self.tx,
+            "unsubscribe": self.unsubscribe,
+        }
+
+    def handle(self, request, connection=None):
+        command = request.get("command") or request.get("method")
+        queue = self.fixtures.get(fixture_key(request))
+        if queue:
+            response = deepcopy(queue.popleft() if len(queue) > 1 else queue[0])
+            if "error" in response:
+                raise RpcError(response.pop("error"), response.pop("error_message", None),
+                               **{key: value for key, value in response.items() if key != "error_code"})
+            return response
+        if command not in self.commands:
+            raise RpcError("unknownCmd", "Unknown method.")
+        try:
+            return self.commands[command](request, connection)
+        except (KeyError, TypeError, ValueError) as e:
+            raise RpcError("invalidParams", f"Invalid parameters: {e}")
+
+    # Request helpers ----------------------
+    def account_param(self, request, field="account"):
+        account = request.get(field)
+        if not isinstance(account, str) or not is_valid_classic_address(account):
+            raise RpcError("actMalformed", "Account malformed.")
+        return account
+
+    def select_ledger(self, request, default="current"):
+        """Returns the view of the ledger a request asks for, and the fields that describe it"""
+        ledger = self.ledger
+        ledger_index = request.get("ledger_index", default)
+        if "ledger_hash" in request:
+            matches = [seq for seq, closed in ledger.ledgers.items()
+                       if closed["header"]["ledger_hash"] == request["ledger_hash"]]
+            if not matches:
+                raise RpcError("lgrNotFound", "ledgerNotFound")
+            ledger_index = matches[0]
+        if ledger_index in ("current", "open"):
+            ledger_index = ledger.open_seq
+        elif ledger_index in ("validated", "closed"):
+            ledger_index = ledger.closed["ledger_index"]
+        ledger_index = int(ledger_index)
+
+        if ledger_index == ledger.open_seq:
+            return ledger.open_view(), {"ledger_current_index": ledger_index, "validated": False}
+        view = ledger.view_at(ledger_index)
+        if view is None:
+            raise RpcError("lgrNotFound", "ledgerNotFound")
+        return view, {
+            "ledger_index": ledger_index,
+            "ledger_hash": ledger.ledgers[ledger_index]["header"]["ledger_hash"],
+            "validated": True,
+        }
+
+    def account_root(self, view, account, info):
+        root = view.get(account_index(account))
+        if root is None:
+            raise RpcError("actNotFound", "Account not found.", account=account, **info)
+        return root
+
+    # Accounts ----------------------
+    def account_info(self, request, connection):
+        account = self.account_param(request)
+        view, info = self.select_ledger(request)
+        root = self.account_root(view, account, info)
+        result = {"account_data": {**root, "index": account_index(account)}, **info}
+        if request.get("signer_lists"):
+            signer_list = view.get(signer_list_index(account))
+            signer_lists = [{**signer_list, "index": signer_list_index(account)}] if signer_list else []
+            if request.get("api_version", 1) >= 2:
+                result["signer_lists"] = signer_lists
+            else:
+                result["account_data"]["signer_lists"] = signer_lists
+        return result
+
+    def account_objects(self, request, connection):
+        account = self.account_param(request)
+        view, info = self.select_ledger(request, "validated")
+        self.account_root(view, account, info)
+        entry_type = request.get("type")
+        if entry_type is not None and entry_type not in ACCOUNT_OBJECT_TYPES:
+            raise RpcError("invalidParams", "Invalid field 'type'.")
+        indexes = sorted(
+            index for index in view.owned(account)
+            if entry_type is None or view.get(index)["LedgerEntryType"] == ACCOUNT_OBJECT_TYPES[entry_type]
+        )
+        chunk, limit, marker = page(indexes, request, 200, 400)
+        result = {
+            "account": account,
+            "account_objects": [{**view.get(index), "index": index} for index in chunk],
+            "limit": limit,
+            **info,
+        }
+        if marker:
+            result["marker"] = marker
+        return result
+
+    def account_lines(self, request, connection):
+        account = self.account_param(request)
+        view, info = self.select_ledger(request, "validated")
+        self.account_root(view, account, info)
+        lines = []
+        for index in sorted(view.owned(account)):
+            line = view.get(index)
+            if line["LedgerEntryType"] != "RippleState":
+                continue
+            side = line_side(line, account)
+            peer = (line["HighLimit"] if side == 0 else line["LowLimit"])["issuer"]
+            if request.get("peer") not in (None, peer):
+                continue
+            formatted = {
+                "account": peer,
+                "balance": format_value(line_balance(line, account)),
+                "currency": line["Balance"]["currency"],
+                "limit": format_value(line_limit(line, account)),
+                "limit_peer": format_value(line_limit(line, peer)),
+                "quality_in": 0,
+                "quality_out": 0,
+            }
+            for field, flags, flag_side in (
+                ("no_ripple", LSF_NO_RIPPLE, side), ("no_ripple_peer", LSF_NO_RIPPLE, 1 - side),
+                ("freeze", LSF_FREEZE, side), ("freeze_peer", LSF_FREEZE, 1 - side),
+            ):
+                if line["Flags"] & flags[flag_side]:
+                    formatted[field] = True
+            lines.append((index, formatted))
+        chunk, limit, marker = page(lines, request, 200, 400, key=lambda item: item[0])
+        result = {"account": account, "lines": [formatted for _, formatted in chunk], "limit": limit, **info}
+        if marker:
+            result["marker"] = marker
+        return result
+
+    def account_nfts(self, request, connection):
+        account = self.account_param(request)
+        view, info = self.select_ledger(request, "validated")
+        self.account_root(view, account, info)
+        tokens = [
+            {**decode_nftoken_id(token["NFToken"]["NFTokenID"]),
+             **({"URI": token["NFToken"]["URI"]} if "URI" in token["NFToken"] else {})}
+            for index in sorted(view.owned(account))
+            if view.get(index)["LedgerEntryType"] == "NFTokenPage"
+            for token in view.get(index)["NFTokens"]
+        ]
+        # Tokens are already in page order, which is the order markers follow
+        positions = {token["NFTokenID"]: i for i, token in enumerate(tokens)}
+        chunk, limit, marker = page(tokens, request, 100, 400, key=lambda token: positions[token["NFTokenID"]])
+        result = {"account": account, "account_nfts": chunk, "limit": limit, **info}
+        if marker is not None:
+            result["marker"] = marker
+        return result
+
+    def account_tx(self, request, connection):
+        account = self.account_param(request)
+        ledger = self.ledger
+        oldest, newest = ledger.oldest_ledger(), ledger.closed["ledger_index"]
+        if "ledger_index" in request or "ledger_hash" in request:
+            _, info = self.select_ledger(request, "validated")
+            low = high = info.get("ledger_index", newest)
+        else:
+            low = request.get("ledger_index_min", -1)
+            high = request.get("ledger_index_max", -1)
+            low = oldest if low == -1 else max(low, oldest)
+            high = newest if high == -1 else min(high, newest)
+
+        records = [
+            record for record in map(ledger.transactions.get, ledger.account_transactions.get(account, ()))
+            if low <= record["ledger_index"] <= high
+        ]
+        if not request.get("forward"):
+            records.reverse()
+        keys = [(record["ledger_index"], record["meta"]["TransactionIndex"]) for record in records]
+        start = 0
+        if request.get("marker"):
+            start = keys.index((request["marker"]["ledger"], request["marker"]["seq"]))
+        limit = min(max(int(request.get("limit", 200)), 1), 400)
+        chunk = records[start:start + limit]
+
+        api_version = request.get("api_version", 1)
+        if api_version >= 2:
+            transactions = [format_transaction(record, api_version) for record in chunk]
+        else:
+            transactions = [
+                {"meta": record["meta"], "tx": {**record["tx_json"], "hash": record["hash"],
+                 "ledger_index": record["ledger_index"], "date": record["date"]}, "validated": True}
+                for record in chunk
+            ]
+        result = {
+            "account": account,
+            "ledger_index_min": low,
+            "ledger_index_max": high,
+            "limit": limit,
+            "transactions": transactions,
+            "validated": True,
+        }
+        if start + limit < len(records):
+            next_ledger, next_seq = keys[start + limit]
+            result["marker"] = {"ledger": next_ledger, "seq": next_seq}
+        return result
+
+    # Ledgers ----------------------
+    def ledger_command(self, request, connection):
+        ledger = self.ledger
+        view, info = self.select_ledger(request, "validated")
+        api_version = request.get("api_version", 1)
+        if not info["validated"]:
+            return {
+                "ledger": {"closed": False, "ledger_index": str(ledger.open_seq),
+                           "parent_hash": ledger.closed["ledger_hash"]},
+                **info,
+            }
+        header = ledger.ledgers[info["ledger_index"]]["header"]
+        formatted = {
+            **{key: value for key, value in header.items() if key != "transactions"},
+            "closed": True,
+            "close_time_resolution": 10,
+            "ledger_index": header["ledger_index"] if api_version >= 2 else str(header["ledger_index"]),
+        }
+        if request.get("transactions"):
+            if request.get("expand"):
+                formatted["transactions"] = [
+                    format_transaction(ledger.transactions[tx_hash], api_version)
+                    for tx_hash in header["transactions"]
+                ]
+            else:
+                formatted["transactions"] = list(header["transactions"])
+        return {"ledger": formatted, **info}
+
+    def ledger_entry(self, request, connection):
+        view, info = self.select_ledger(request, "validated")
+        if "index" in request:
+            index = request["index"]
+        elif "account_root" in request:
+            index = account_index(request["account_root"])
+        elif "ripple_state" in request:
+            accounts = request["ripple_state"]["accounts"]
+            index = line_index(accounts[0], accounts[1], request["ripple_state"]["currency"])
+        else:
+            for field, space, owner_fields, sequence_fields in (
+                ("offer", "006F", ("account",), ("seq",)),
+                ("ticket", "0054", ("account", "owner"), ("ticket_seq", "ticket_sequence")),
+                ("escrow", "0075", ("owner",), ("seq",)),
+                ("check", "0043", ("account",), ("seq",)),
+                ("nft_page", None, (), ()),
+            ):
+                if field not in request:
+                    continue
+                value = request[field]
+                if isinstance(value, str):
+                    index = value
+                else:
+                    owner = next(value[key] for key in owner_fields if key in value)
+                    sequence = next(value[key] for key in sequence_fields if key in value)
+                    index = sequenced_index(space, owner, sequence)
+                break
+            else:
+                raise RpcError("invalidParams", "No ledger_entry type this stand-in supports.")
+        entry = view.get(index.upper())
+        if entry is None:
+            raise RpcError("entryNotFound", "Entry not found.", **info)
+        return {"index": index.upper(), "node": {**entry, "index": index.upper()}, **info}
+
+    def ledger_data(self, request, connection):
+        view, info = self.select_ledger(request, "validated")
+        entry_type = request.get("type")
+        indexes = view.indexes()
+        if entry_type is not None:
+            wanted = ACCOUNT_OBJECT_TYPES.get(entry_type, "AccountRoot" if entry_type == "account" else entry_type)
+            indexes = [index for index in indexes if view.get(index)["LedgerEntryType"] == wanted]
+        chunk, limit, marker = page(indexes, request, 256, 2048)
+        result = {"state": [{**view.get(index), "index": index} for index in chunk], **info}
+        if marker:
+            result["marker"] = marker
+        return result
+
+    def book_offers(self, request, connection):
+        view, info = self.select_ledger(request)
+
+        def side_key(side):
+            return "XRP" if side["currency"] == "XRP" else f"{side['currency']}/{side['issuer']}"
+
+        offers = sorted(
+            (view.get(index) | {"index": index}
+             for index in view.book(side_key(request["taker_gets"]), side_key(request["taker_pays"]))),
+            key=lambda offer: (offer["BookDirectory"], offer["Sequence"]),
+        )
+        limit = min(max(int(request.get("limit", 200)), 1), 400)
+        return {
+            "offers": [
+                {**offer, "quality": str(amount_value(offer["TakerPays"]) / amount_value(offer["TakerGets"]))}
+                for offer in offers[:limit]
+            ],
+            **info,
+        }
+
+    def ledger_accept(self, request, connection):
+        self.close_ledger()
+        return {"ledger_current_index": self.ledger.open_seq}
+
+    def ledger_closed(self, request, connection):
+        return {"ledger_hash": self.ledger.closed["ledger_hash"], "ledger_index": self.ledger.closed["ledger_index"]}
+
+    def ledger_current(self, request, connection):
+        return {"ledger_current_index": self.ledger.open_seq}
+
+    # Server ----------------------
+    def complete_ledgers(self):
+        return f"{self.ledger.oldest_ledger()}-{self.ledger.closed['ledger_index']}"
+
+    def server_info(self, request, connection):
+        closed = self.ledger.closed
+        info = {
+            "build_version": "ledger-stand-in",
+            "complete_ledgers": self.complete_ledgers(),
+            "load_factor": 1,
+            "peers": 0,
+            "server_state": "full",
+            "uptime": int(time.time() - self.started),
+            "validated_ledger": {
+                "age": max(ripple_time(time.time()) - closed["close_time"], 0),
+                "base_fee_xrp": BASE_FEE / 1_000_000,
+                "hash": closed["ledger_hash"],
+                "reserve_base_xrp": RESERVE_BASE / 1_000_000,
+                "reserve_inc_xrp": RESERVE_INC / 1_000_000,
+                "seq": closed["ledger_index"],
+            },
+        }
+        if self.network_id is not None:
+            info["network_id"] = self.network_id
+        return {"info": info}
+
+    def server_state(self, request, connection):
+        closed = self.ledger.closed
+        return {"state": {
+            "build_version": "ledger-stand-in",
+            "complete_ledgers": self.complete_ledgers(),
+            "load_base": 256,
+            "load_factor": 256,
+            "server_state": "full",
+            "validated_ledger": {
+                "base_fee": BASE_FEE,
+                "close_time": closed["close_time"],
+                "hash": closed["ledger_hash"],
+                "reserve_base": RESERVE_BASE,
+                "reserve_inc": RESERVE_INC,
+                "seq": closed["ledger_index"],
+            },
+        }}
+
+    def fee(self, request, connection):
+        return {
+            "current_ledger_size": str(len(self.ledger.open_transactions)),
+            "current_queue_size": "0",
+            "drops": {
+                "base_fee": str(BASE_FEE),
+                "median_fee": str(BASE_FEE * 500),
+                "minimum_fee": str(BASE_FEE),
+                "open_ledger_fee": str(BASE_FEE),
+            },
+            "expected_ledger_size": "1000",
+            "ledger_current_index": self.ledger.open_seq,
+            "levels": {
+                "median_level": "128000",
+                "minimum_level": "256",
+                "open_ledger_level": "256",
+                "reference_level": "256",
+            },
+            "max_queue_size": "20000",
+        }
+
+    # Transactions ----------------------
+    def submit(self, request, connection):
+        if "tx_blob" not in request:
+            raise RpcError("invalidParams", "Missing field 'tx_blob'.")
+        return self.submit_blob(request["tx_blob"])
+
+    def submit_multisigned(self, request, connection):
+        if "tx_json" not in request:
+            raise RpcError("invalidParams", "Missing field 'tx_json'.")
+        return self.submit_blob(encode(request["tx_json"]))
+
+    def submit_blob(self, tx_blob, verify=None):
+        try:
+            result, tx, tx_hash = self.ledger.submit(tx_blob, self.verify if verify is None else verify)
+        except ValueError as e:
+            raise RpcError("invalidTransaction", f"fails local checks: {e}")
+        code, message = RESULT_CODES[result]
+        applied = result == "tesSUCCESS" or result.startswith("tec")
+        return {
+            "accepted": applied,
+            "applied": applied,
+            "broadcast": applied,
+            "engine_result": result,
+            "engine_result_code": code,
+            "engine_result_message": message,
+            "kept": applied or result == "terPRE_SEQ",
+            "open_ledger_cost": str(BASE_FEE),
+            "queued": False,
+            "tx_blob": tx_blob,
+            "tx_json": {**tx, "hash": tx_hash},
+            "validated_ledger_index": self.ledger.closed["ledger_index"],
+        }
+
+    def tx(self, request, connection):
+        tx_hash = str(request.get("transaction", "")).upper()
+        api_version = request.get("api_version", 1)
+        record = self.ledger.transactions.get(tx_hash)
+        if record is not None:
+            return format_transaction(record, api_version)
+        if tx_hash in self.ledger.open_hashes:
+            record = next(record for record in self.ledger.open_transactions if record["hash"] == tx_hash)
+            return format_transaction(record, api_version, validated=False)
+        raise RpcError("txnNotFound", "Transaction not found.")
+
+    # Faucet ----------------------
+    def fund(self, destination, xrp):
+        genesis = self.ledger.open_view().get(account_index(GENESIS_ADDRESS))
+        payment = sign(Payment(
+            account=GENESIS_ADDRESS,
+            destination=destination,
+            amount=xrp_to_drops(xrp),
+            sequence=genesis["Sequence"],
+            fee=str(BASE_FEE),
+        ), self.genesis)
+        return self.submit_blob(payment.blob(), verify=False)
+
+    def faucet(self, body):
+        destination = body.get("destination")
+        seed = None
+        if not destination:
+            wallet = Wallet.create()
+            destination, seed = wallet.address, wallet.seed
+        elif not is_valid_classic_address(destination):
+            raise RpcError("actMalformed", "Account malformed.")
+        submitted = self.fund(destination, self.faucet_xrp)
+        if submitted["engine_result"] != "tesSUCCESS":
+            raise RpcError("internal", submitted["engine_result_message"])
+        account = {"address": destination, "classicAddress": destination}
+        if seed:
+            account.update(seed=seed, secret=seed)
+        return {"account": account, "amount": self.faucet_xrp, "transactionHash": submitted["tx_json"]["hash"]}
+
+    # Subscriptions ----------------------
+    def subscribe(self, request, connection):
+        if connection is None:
+            raise RpcError("notSupported", "Subscriptions need a WebSocket connection.")
+        streams = request.get("streams", [])
+        accounts = request.get("accounts", [])
+        if any(stream not in self.stream_subscribers for stream in streams):
+            raise RpcError("malformedStream", "Stream malformed.")
+        if not all(isinstance(account, str) and is_valid_classic_address(account) for account in accounts):
+            raise RpcError("actMalformed", "Account malformed.")
+        self.api_versions[connection] = request.get("api_version", 1)
+        for stream in streams:
+            self.stream_subscribers[stream].add(connection)
+        for account in accounts:
+            self.account_subscribers[account].add(connection)
+        if "ledger" not in streams:
+            return {}
+        return {key: value for key, value in self.ledger_message().items() if key not in ("type", "txn_count")}
+
+    def unsubscribe(self, request, connection):
+        for stream in request.get("streams", []):
+            self.stream_subscribers.get(stream, set()).discard(connection)
+        for account in request.get("accounts", []):
+            self.account_subscribers.get(account, set()).discard(connection)
+        return {}
+
+    def forget(self, connection):
+        for subscribers in self.stream_subscribers.values():
+            subscribers.discard(connection)
+        for account in [account for account, subscribers in self.account_subscribers.items() if connection in subscribers]:
+            self.account_subscribers[account].discard(connection)
+            if not self.account_subscribers[account]:
+                del self.account_subscribers[account]
+        self.api_versions.pop(connection, None)
+
+    # Closing ledgers ----------------------
+    def ledger_message(self):
+        closed = self.ledger.closed
+        return {
+            "type": "ledgerClosed",
+            "fee_base": BASE_FEE,
+            "ledger_hash": closed["ledger_hash"],
+            "ledger_index": closed["ledger_index"],
+            "ledger_time": closed["close_time"],
+            "reserve_base": RESERVE_BASE,
+            "reserve_inc": RESERVE_INC,
+            "txn_count": len(closed["transactions"]),
+            "validated_ledgers": self.complete_ledgers(),
+        }
+
+    def close_ledger(self):
+        header, records = self.ledger.close()
+        # broadcast() never waits on a slow client, so one stuck connection
+        # can't hold up everyone else's stream.
+        broadcast(self.stream_subscribers["ledger"], json.dumps(self.ledger_message()))
+        for record in records:
+            recipients = set(self.stream_subscribers["transactions"])
+            for account in record["accounts"]:
+                recipients |= self.account_subscribers.get(account, set())
+            by_version = defaultdict(list)
+            for connection in recipients:
+                by_version[self.api_versions.get(connection, 1)].append(connection)
+            for api_version, connections in by_version.items():
+                broadcast(connections, json.dumps(stream_message(record, api_version)))
+
+    async def close_on_timer(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            self.close_ledger()
+
+    # Transports ----------------------
+    def respond_websocket(self, request, connection):
+        response = {"id": request.get("id"), "type": "response"}
+        if "api_version" in request:
+            response["api_version"] = request["api_version"]
+        try:
+            response.update(status="success", result=self.handle(request, connection))
+        except RpcError as e:
+            response.update(status="error", request=request, **e.fields)
+        return response
+
+    async def handle_websocket(self, connection):
+        try:
+            async for message in connection:
+                try:
+                    request = json.loads(message)
+                except ValueError:
+                    await connection.send(json.dumps({"type": "response", "status": "error", "error": "invalid_json"}))
+                    continue
+                await connection.send(json.dumps(self.respond_websocket(request, connection)))
+        except ConnectionClosed:
+            pass
+        finally:
+            self.forget(connection)
+
+    def respond_http(self, method, path, body):
+        if method != "POST":
+            return "405 Method Not Allowed", {"error": "Use POST"}
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return "400 Bad Request", {"error": "invalid_json"}
+        if path.rstrip("/") == "/accounts":
+            try:
+                return "200 OK", self.faucet(payload)
+            except RpcError as e:
+                return "400 Bad Request", e.fields
+        params = (payload.get("params") or [{}])[0]
+        request = {**params, "command": payload.get("method")}
+        try:
+            return "200 OK", {"result": {**self.handle(request), "status": "success"}}
+        except RpcError as e:
+            return "200 OK", {"result": {**e.fields, "status": "error", "request": request}}
+
+    async def handle_http(self, reader, writer):
+        # A minimal HTTP/1.1 server with keep-alive, enough for JSON-RPC clients
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = self.respond_http(method, path, body)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def main(args):
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else None
+    stand_in = StandIn(
+        Ledger(history=args.history),
+        faucet_xrp=args.faucet_xrp,
+        verify=not args.no_verify,
+        fixtures=fixtures,
+        network_id=args.network_id,
+    )
+    http_server = await asyncio.start_server(stand_in.handle_http, args.host, args.rpc_port, backlog=4096)
+    async with serve(stand_in.handle_websocket, args.host, args.ws_port, compression=None,
+                     max_size=None, backlog=4096), http_server:
+        print(f"JSON-RPC and faucet: http://{args.host}:{args.rpc_port}")
+        print(f"WebSocket:           ws://{args.host}:{args.ws_port}")
+        print(f"Genesis account:     {GENESIS_ADDRESS} (seed {GENESIS_SEED})")
+        if args.close_interval > 0:
+            await stand_in.close_on_timer(args.close_interval)
+        else:
+            print("Ledgers only close on ledger_accept.")
+            await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for a rippled server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--rpc-port", type=int, default=5005)
+    parser.add_argument("--ws-port", type=int, default=6006)
+    parser.add_argument("--close-interval", type=float, default=1.0,
+                        help="Seconds between ledger closes; 0 closes only on ledger_accept")
+    parser.add_argument("--history", type=int, default=256,
+                        help="How many closed ledgers (and their transactions) to keep")
+    parser.add_argument("--faucet-xrp", type=int, default=1000)
+    parser.add_argument("--network-id", type=int, default=None)
+    parser.add_argument("--no-verify", action="store_true",
+                        help="Skip signature checks, for load tests that are CPU bound")
+    parser.add_argument("--fixtures", help="JSON file of recorded responses to replay")
+    parser.add_argument("--record", metavar="URL",
+                        help="Instead of serving, send --requests to URL and save the responses to --fixtures")
+    parser.add_argument("--requests", help="JSON list of requests to record")
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record_fixtures(args.record, args.requests, args.fixtures))
+    else:
+        asyncio.run(main(args))
@@ -1,10 +1,17 @@
 # Setup script for lending protocol tutorials
+#
+# Setup steps run as a dependency graph: each step starts as soon as the steps
+# it needs are done, and progress is saved after every step so a failed run
+# resumes where it left off. Run with --help for options such as pointing the
+# setup at a local standalone server.
 
 import asyncio
-import json
+import os
+import sys
 
-from xrpl.asyncio.clients import AsyncWebsocketClient
-from xrpl.asyncio.wallet import generate_faucet_wallet
+# The step runner is shared with the vault tutorials' setup
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "vaults", "py"))
+from fixture_builder import FixtureBuilder, parse_args
 from xrpl.asyncio.transaction import submit_and_wait, autofill, sign
 from xrpl.transaction import sign_loan_set_by_counterparty
 from xrpl.models import (
@@ -31,270 +38,258 @@ from xrpl.models.transactions.deposit_preauth import Credential
 from xrpl.utils import encode_mptoken_metadata, str_to_hex
 
 
-async def main():
-    async with AsyncWebsocketClient("wss://s.devnet.rippletest.net:51233") as client:
-
-        print("Setting up tutorial: 0/6", end="\r")
-
-        # Create and fund wallets
-        loan_broker, borrower, depositor, credential_issuer = await asyncio.gather(
-            generate_faucet_wallet(client),
-            generate_faucet_wallet(client),
-            generate_faucet_wallet(client),
-            generate_faucet_wallet(client),
+DEVNET_URL = "wss://s.devnet.rippletest.net:51233"
+
+credential_type = str_to_hex("KYC-Verified")
+
+mpt_data = {
+    "ticker": "TSTUSD",
+    "name": "Test USD MPT",
+    "desc": "A sample non-yield-bearing stablecoin backed by U.S. Treasuries.",
+    "icon": "https://example.org/tstusd-icon.png",
+    "asset_class": "rwa",
+    "asset_subclass": "stablecoin",
+    "issuer_name": "Example Treasury Reserve Co.",
+    "uris": [
+        {
+            "uri": "https://exampletreasury.com/tstusd",
+            "category": "website",
+            "title": "Product Page",
+        },
+        {
+            "uri": "https://exampletreasury.com/tstusd/reserve",
+            "category": "docs",
+            "title": "Reserve Attestation",
+        },
+    ],
+    "additional_info": {
+        "reserve_type": "U.S. Treasury Bills",
+        "custody_provider": "Example Custodian Bank",
+        "audit_frequency": "Monthly",
+        "last_audit_date": "2026-01-15",
+        "pegged_currency": "USD",
+    },
+}
+
+
+def created_index(response, entry_type):
+    return next(
+        node["CreatedNode"]["LedgerIndex"]
+        for node in response.result["meta"]["AffectedNodes"]
+        if node.get("CreatedNode", {}).get("LedgerEntryType") == entry_type
+    )
+
+
+def define_steps(builder):
+    # Each step lists the steps whose outputs it uses, and the accounts it
+    # sends transactions from so no two running steps share a Sequence.
+
+    # Create and fund wallets
+    @builder.step("wallets")
+    async def wallets(b):
+        return await b.fund_wallets(["loan_broker", "borrower", "depositor", "credential_issuer"])
+
+    # Create tickets for later use with loan_broker
+    @builder.step("tickets", after=["wallets"], accounts=["loan_broker"])
+    async def tickets(b):
+        loan_broker = b.wallet("loan_broker")
+        response = await submit_and_wait(
+            TicketCreate(account=loan_broker.address, ticket_count=2), b.client, loan_broker
         )
-
-        print("Setting up tutorial: 1/6", end="\r")
-
-        # Issue MPT with depositor
-        # Create tickets for later use with loan_broker
-        # Set up credentials and domain with credential_issuer
-        credential_type = str_to_hex("KYC-Verified")
-
-        mpt_data = {
-            "ticker": "TSTUSD",
-            "name": "Test USD MPT",
-            "desc": "A sample non-yield-bearing stablecoin backed by U.S. Treasuries.",
-            "icon": "https://example.org/tstusd-icon.png",
-            "asset_class": "rwa",
-            "asset_subclass": "stablecoin",
-            "issuer_name": "Example Treasury Reserve Co.",
-            "uris": [
-                {
-                    "uri": "https://exampletreasury.com/tstusd",
-                    "category": "website",
-                    "title": "Product Page",
-                },
-                {
-                    "uri": "https://exampletreasury.com/tstusd/reserve",
-                    "category": "docs",
-                    "title": "Reserve Attestation",
-                },
-            ],
-            "additional_info": {
-                "reserve_type": "U.S. Treasury Bills",
-                "custody_provider": "Example Custodian Bank",
-                "audit_frequency": "Monthly",
-                "last_audit_date": "2026-01-15",
-                "pegged_currency": "USD",
-            },
-        }
-
-        ticket_create_response, mpt_issuance_response, _ = await asyncio.gather(
-            submit_and_wait(
-                TicketCreate(
-                    account=loan_broker.address,
-                    ticket_count=2,
+        return {"tickets": [
+            node["CreatedNode"]["NewFields"]["TicketSequence"]
+            for node in response.result["meta"]["AffectedNodes"]
+            if node.get("CreatedNode", {}).get("LedgerEntryType") == "Ticket"
+        ]}
+
+    # Issue MPT with depositor
+    @builder.step("mpt", after=["wallets"], accounts=["depositor"])
+    async def mpt(b):
+        depositor = b.wallet("depositor")
+        response = await submit_and_wait(
+            MPTokenIssuanceCreate(
+                account=depositor.address,
+                maximum_amount="100000000",
+                transfer_fee=0,
+                flags=(
+                    MPTokenIssuanceCreateFlag.TF_MPT_CAN_TRANSFER
+                    | MPTokenIssuanceCreateFlag.TF_MPT_CAN_CLAWBACK
+                    | MPTokenIssuanceCreateFlag.TF_MPT_CAN_TRADE
                 ),
-                client,
-                loan_broker,
+                mptoken_metadata=encode_mptoken_metadata(mpt_data),
             ),
-            submit_and_wait(
-                MPTokenIssuanceCreate(
-                    account=depositor.address,
-                    maximum_amount="100000000",
-                    transfer_fee=0,
-                    flags=(
-                        MPTokenIssuanceCreateFlag.TF_MPT_CAN_TRANSFER
-                        | MPTokenIssuanceCreateFlag.TF_MPT_CAN_CLAWBACK
-                        | MPTokenIssuanceCreateFlag.TF_MPT_CAN_TRADE
+            b.client,
+            depositor,
+        )
+        return {"mpt_id": response.result["meta"]["mpt_issuance_id"]}
+
+    # Issue every credential and create the domain in one Batch
+    @builder.step("credentials", after=["wallets"], accounts=["credential_issuer"])
+    async def credentials(b):
+        credential_issuer = b.wallet("credential_issuer")
+        await submit_and_wait(
+            Batch(
+                account=credential_issuer.address,
+                flags=BatchFlag.TF_ALL_OR_NOTHING,
+                raw_transactions=[
+                    CredentialCreate(
+                        account=credential_issuer.address,
+                        subject=b.data[name]["address"],
+                        credential_type=credential_type,
+                    )
+                    for name in ("loan_broker", "borrower", "depositor")
+                ] + [
+                    PermissionedDomainSet(
+                        account=credential_issuer.address,
+                        accepted_credentials=[
+                            Credential(
+                                issuer=credential_issuer.address,
+                                credential_type=credential_type,
+                            ),
+                        ],
                     ),
-                    mptoken_metadata=encode_mptoken_metadata(mpt_data),
-                ),
-                client,
-                depositor,
-            ),
-            submit_and_wait(
-                Batch(
-                    account=credential_issuer.address,
-                    flags=BatchFlag.TF_ALL_OR_NOTHING,
-                    raw_transactions=[
-                        CredentialCreate(
-                            account=credential_issuer.address,
-                            subject=loan_broker.address,
-                            credential_type=credential_type,
-                        ),
-                        CredentialCreate(
-                            account=credential_issuer.address,
-                            subject=borrower.address,
-                            credential_type=credential_type,
-                        ),
-                        CredentialCreate(
-                            account=credential_issuer.address,
-                            subject=depositor.address,
-                            credential_type=credential_type,
-                        ),
-                        PermissionedDomainSet(
-                            account=credential_issuer.address,
-                            accepted_credentials=[
-                                Credential(
-                                    issuer=credential_issuer.address,
-                                    credential_type=credential_type,
-                                ),
-                            ],
-                        ),
-                    ],
-                ),
-                client,
-                credential_issuer,
+                ],
             ),
+            b.client,
+            credential_issuer,
         )
 
-        # Extract ticket sequence numbers
-        tickets = [
-            node["CreatedNode"]["NewFields"]["TicketSequence"]
-            for node in ticket_create_response.result["meta"]["AffectedNodes"]
-            if node.get("CreatedNode", {}).get("LedgerEntryType") == "Ticket"
-        ]
-
-        # Extract MPT issuance ID
-        mpt_id = mpt_issuance_response.result["meta"]["mpt_issuance_id"]
-
         # Get domain ID
-        credential_issuer_objects = await client.request(AccountObjects(
+        credential_issuer_objects = await b.client.request(AccountObjects(
             account=credential_issuer.address,
             ledger_index="validated",
         ))
-        domain_id = next(
+        return {"domain_id": next(
             node["index"]
             for node in credential_issuer_objects.result["account_objects"]
             if node["LedgerEntryType"] == "PermissionedDomain"
-        )
+        )}
 
-        print("Setting up tutorial: 2/6", end="\r")
+    # Accept credentials and authorize MPT for each account
+    @builder.step("authorize", after=["mpt", "credentials"],
+                  accounts=["loan_broker", "borrower", "depositor"])
+    async def authorize(b):
+        credential_issuer = b.data["credential_issuer"]["address"]
 
-        # Accept credentials and authorize MPT for each account
-        await asyncio.gather(
-            submit_and_wait(
-                Batch(
-                    account=loan_broker.address,
-                    flags=BatchFlag.TF_ALL_OR_NOTHING,
-                    raw_transactions=[
-                        CredentialAccept(
-                            account=loan_broker.address,
-                            issuer=credential_issuer.address,
-                            credential_type=credential_type,
-                        ),
-                        MPTokenAuthorize(
-                            account=loan_broker.address,
-                            mptoken_issuance_id=mpt_id,
-                        ),
-                    ],
-                ),
-                client,
-                loan_broker,
-            ),
-            submit_and_wait(
+        def accept_and_authorize(wallet):
+            return submit_and_wait(
                 Batch(
-                    account=borrower.address,
+                    account=wallet.address,
                     flags=BatchFlag.TF_ALL_OR_NOTHING,
                     raw_transactions=[
                         CredentialAccept(
-                            account=borrower.address,
-                            issuer=credential_issuer.address,
+                            account=wallet.address,
+                            issuer=credential_issuer,
                             credential_type=credential_type,
                         ),
                         MPTokenAuthorize(
-                            account=borrower.address,
-                            mptoken_issuance_id=mpt_id,
+                            account=wallet.address,
+                            mptoken_issuance_id=b.data["mpt_id"],
                         ),
                     ],
                 ),
-                client,
-                borrower,
-            ),
+                b.client,
+                wallet,
+            )
+
+        depositor = b.wallet("depositor")
+        await asyncio.gather(
+            accept_and_authorize(b.wallet("loan_broker")),
+            accept_and_authorize(b.wallet("borrower")),
             submit_and_wait(
                 CredentialAccept(
                     account=depositor.address,
-                    issuer=credential_issuer.address,
+                    issuer=credential_issuer,
                     credential_type=credential_type,
                 ),
-                client,
+                b.client,
                 depositor,
             ),
         )
-
-        print("Setting up tutorial: 3/6", end="\r")
-
-        # Create private vault and distribute MPT to accounts
-        vault_create_response, _ = await asyncio.gather(
-            submit_and_wait(
-                VaultCreate(
-                    account=loan_broker.address,
-                    asset=MPTCurrency(mpt_issuance_id=mpt_id),
-                    flags=VaultCreateFlag.TF_VAULT_PRIVATE,
-                    domain_id=domain_id,
-                ),
-                client,
-                loan_broker,
+        return {}
+
+    # Create private vault
+    @builder.step("vault", after=["authorize"], accounts=["loan_broker"])
+    async def vault(b):
+        loan_broker = b.wallet("loan_broker")
+        response = await submit_and_wait(
+            VaultCreate(
+                account=loan_broker.address,
+                asset=MPTCurrency(mpt_issuance_id=b.data["mpt_id"]),
+                flags=VaultCreateFlag.TF_VAULT_PRIVATE,
+                domain_id=b.data["domain_id"],
             ),
-            submit_and_wait(
-                Batch(
-                    account=depositor.address,
-                    flags=BatchFlag.TF_ALL_OR_NOTHING,
-                    raw_transactions=[
-                        Payment(
-                            account=depositor.address,
-                            destination=loan_broker.address,
-                            amount=MPTAmount(mpt_issuance_id=mpt_id, value="5000"),
-                        ),
-                        Payment(
-                            account=depositor.address,
-                            destination=borrower.address,
-                            amount=MPTAmount(mpt_issuance_id=mpt_id, value="2500"),
-                        ),
-                    ],
-                ),
-                client,
-                depositor,
+            b.client,
+            loan_broker,
+        )
+        return {"vault_id": created_index(response, "Vault")}
+
+    # Distribute MPT to accounts
+    @builder.step("distribute", after=["authorize"], accounts=["depositor"])
+    async def distribute(b):
+        depositor = b.wallet("depositor")
+        mpt_id = b.data["mpt_id"]
+        await submit_and_wait(
+            Batch(
+                account=depositor.address,
+                flags=BatchFlag.TF_ALL_OR_NOTHING,
+                raw_transactions=[
+                    Payment(
+                        account=depositor.address,
+                        destination=b.data["loan_broker"]["address"],
+                        amount=MPTAmount(mpt_issuance_id=mpt_id, value="5000"),
+                    ),
+                    Payment(
+                        account=depositor.address,
+                        destination=b.data["borrower"]["address"],
+                        amount=MPTAmount(mpt_issuance_id=mpt_id, value="2500"),
+                    ),
+                ],
             ),
+            b.client,
+            depositor,
         )
-
-        vault_id = next(
-            node["CreatedNode"]["LedgerIndex"]
-            for node in vault_create_response.result["meta"]["AffectedNodes"]
-            if node.get("CreatedNode", {}).get("LedgerEntryType") == "Vault"
+        return {}
+
+    # Create LoanBroker
+    @builder.step("loan_broker", after=["vault"], accounts=["loan_broker"])
+    async def loan_broker(b):
+        loan_broker = b.wallet("loan_broker")
+        response = await submit_and_wait(
+            LoanBrokerSet(account=loan_broker.address, vault_id=b.data["vault_id"]),
+            b.client,
+            loan_broker,
         )
-
-        print("Setting up tutorial: 4/6", end="\r")
-
-        # Create LoanBroker and deposit MPT into vault
-        loan_broker_set_response, _ = await asyncio.gather(
-            submit_and_wait(
-                LoanBrokerSet(
-                    account=loan_broker.address,
-                    vault_id=vault_id,
-                ),
-                client,
-                loan_broker,
-            ),
-            submit_and_wait(
-                VaultDeposit(
-                    account=depositor.address,
-                    vault_id=vault_id,
-                    amount=MPTAmount(mpt_issuance_id=mpt_id, value="50000000"),
-                ),
-                client,
-                depositor,
+        return {"loan_broker_id": created_index(response, "LoanBroker")}
+
+    # Deposit MPT into vault
+    @builder.step("vault_deposit", after=["vault"], accounts=["depositor"])
+    async def vault_deposit(b):
+        depositor = b.wallet("depositor")
+        await submit_and_wait(
+            VaultDeposit(
+                account=depositor.address,
+                vault_id=b.data["vault_id"],
+                amount=MPTAmount(mpt_issuance_id=b.data["mpt_id"], value="50000000"),
             ),
+            b.client,
+            depositor,
         )
+        return {}
 
-        loan_broker_id = next(
-            node["CreatedNode"]["LedgerIndex"]
-            for node in loan_broker_set_response.result["meta"]["AffectedNodes"]
-            if node.get("CreatedNode", {}).get("LedgerEntryType") == "LoanBroker"
-        )
-
-        print("Setting up tutorial: 5/6", end="\r")
+    # Create 2 identical loans with complete repayment due in 30 days. They use
+    # the loan broker's tickets, so they don't need to lock its Sequence.
+    @builder.step("loans", after=["tickets", "loan_broker", "vault_deposit"])
+    async def loans(b):
+        loan_broker = b.wallet("loan_broker")
+        borrower = b.wallet("borrower")
 
-        # Create 2 identical loans with complete repayment due in 30 days
-        
         # Helper function to create, sign, and submit a LoanSet transaction
         async def create_loan(ticket_sequence):
             loan_set_tx = await autofill(LoanSet(
                 account=loan_broker.address,
                 counterparty=borrower.address,
-                loan_broker_id=loan_broker_id,
+                loan_broker_id=b.data["loan_broker_id"],
                 principal_requested="1000",
                 interest_rate=500,
                 payment_total=1,
@@ -303,64 +298,32 @@ async def main():
                 loan_service_fee="10",
                 sequence=0,
                 ticket_sequence=ticket_sequence,
-            ), client)
+            ), b.client)
 
             loan_broker_signed = sign(loan_set_tx, loan_broker)
             fully_signed = sign_loan_set_by_counterparty(borrower, loan_broker_signed)
-            submit_response = await submit_and_wait(fully_signed.tx, client)
-
-            return submit_response
+            return await submit_and_wait(fully_signed.tx, b.client)
 
         submit_response_1, submit_response_2 = await asyncio.gather(
-            create_loan(tickets[0]),
-            create_loan(tickets[1]),
+            create_loan(b.data["tickets"][0]),
+            create_loan(b.data["tickets"][1]),
         )
-
-        loan_id_1 = next(
-            node["CreatedNode"]["LedgerIndex"]
-            for node in submit_response_1.result["meta"]["AffectedNodes"]
-            if node.get("CreatedNode", {}).get("LedgerEntryType") == "Loan"
-        )
-
-        loan_id_2 = next(
-            node["CreatedNode"]["LedgerIndex"]
-            for node in submit_response_2.result["meta"]["AffectedNodes"]
-            if node.get("CreatedNode", {}).get("LedgerEntryType") == "Loan"
-        )
-
-        print("Setting up tutorial: 6/6", end="\r")
-
-        # Write setup data to JSON file
-        setup_data = {
-            "description": "This file is auto-generated by lending_setup.py. It stores XRPL account info for use in lending protocol tutorials.",
-            "loan_broker": {
-                "address": loan_broker.address,
-                "seed": loan_broker.seed,
-            },
-            "borrower": {
-                "address": borrower.address,
-                "seed": borrower.seed,
-            },
-            "depositor": {
-                "address": depositor.address,
-                "seed": depositor.seed,
-            },
-            "credential_issuer": {
-                "address": credential_issuer.address,
-                "seed": credential_issuer.seed,
-            },
-            "domain_id": domain_id,
-            "mpt_id": mpt_id,
-            "vault_id": vault_id,
-            "loan_broker_id": loan_broker_id,
-            "loan_id_1": loan_id_1,
-            "loan_id_2": loan_id_2,
+        return {
+            "loan_id_1": created_index(submit_response_1, "Loan"),
+            "loan_id_2": created_index(submit_response_2, "Loan"),
         }
 
-        with open("lending_setup.json", "w") as f:
-            json.dump(setup_data, f, indent=2)
 
-        print("Setting up tutorial: Complete!")
+async def main(url=DEVNET_URL, faucet_host=None, standalone=False, restart=False):
+    builder = FixtureBuilder("lending_setup.json", url, faucet_host, standalone, restart)
+    builder.data.setdefault(
+        "description",
+        "This file is auto-generated by lending_setup.py. It stores XRPL account info for use in lending protocol tutorials.",
+    )
+    define_steps(builder)
+    await builder.build()
 
 
-asyncio.run(main())
+if __name__ == "__main__":
+    args = parse_args("Set up accounts and ledger objects for the lending protocol tutorials.", DEVNET_URL)
+    asyncio.run(main(args.url, args.faucet_host, args.standalone, args.restart))
@@ -0,0 +1,280 @@
+# Services every loan under a loan broker in one pass: loads all Loans, works
+# out what is due, overdue, or ready to impair or default, then submits the
+# LoanPay and LoanManage transactions for the whole set concurrently.
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.asyncio.transaction import autofill, submit_and_wait
+from xrpl.models import (
+    AccountObjects,
+    LedgerEntry,
+    LoanManage,
+    LoanPay,
+    MPTAmount,
+    TicketCreate,
+)
+from xrpl.models.requests.account_objects import AccountObjectType
+from xrpl.models.transactions.loan_manage import LoanManageFlag
+from xrpl.transaction import sign
+from xrpl.utils import posix_to_ripple_time
+from xrpl.wallet import Wallet
+
+# Loan ledger entry flags
+LSF_LOAN_DEFAULT = 0x00010000
+LSF_LOAN_IMPAIRED = 0x00020000
+
+# An account can own at most 250 Tickets at a time
+MAX_TICKETS = 250
+
+
+# Load every loan ----------------------
+async def load_loans(client, loan_broker_id):
+    """
+    Returns every Loan under a loan broker, read from one validated ledger.
+    Loans are linked into the loan broker pseudo-account's owner directory.
+    """
+    broker = await client.request(LedgerEntry(index=loan_broker_id, ledger_index="validated"))
+    pseudo_account = broker.result["node"]["Account"]
+    ledger_index = broker.result["ledger_index"]
+
+    loans = []
+    marker = None
+    while True:
+        response = await client.request(AccountObjects(
+            account=pseudo_account,
+            type=AccountObjectType.LOAN,
+            ledger_index=ledger_index,
+            marker=marker,
+        ))
+        loans += [
+            loan for loan in response.result["account_objects"]
+            if loan["LoanBrokerID"] == loan_broker_id
+        ]
+        marker = response.result.get("marker")
+        if marker is None:
+            return loans
+
+
+# Work out what every loan needs ----------------------
+def assess_loans(loans, now, horizon=0):
+    """
+    Computes, for all loans at once, the amount due and whether each loan is
+    due within horizon seconds, overdue, ready to impair, or ready to default.
+    """
+    def column(field, default=0):
+        return np.array([float(loan.get(field, default)) for loan in loans])
+
+    flags = np.array([loan.get("Flags", 0) for loan in loans], dtype=np.int64)
+    due_date = column("NextPaymentDueDate")
+    grace_period = column("GracePeriod")
+    outstanding = column("TotalValueOutstanding")
+    periodic_payment = column("PeriodicPayment")
+    service_fee = column("LoanServiceFee")
+    late_fee = column("LatePaymentFee")
+    payments_remaining = column("PaymentRemaining", 1)
+
+    defaulted = (flags & LSF_LOAN_DEFAULT) != 0
+    impaired = (flags & LSF_LOAN_IMPAIRED) != 0
+    active = ~defaulted & (outstanding > 0)
+    overdue = active & (now > due_date)
+
+    # The last payment clears whatever is left, not just one periodic payment
+    installment = np.where(payments_remaining <= 1, outstanding,
+                           np.minimum(periodic_payment, outstanding))
+    amount_due = installment + service_fee + np.where(overdue, late_fee, 0)
+
+    return {
+        "amount_due": amount_due,
+        "due": active & (due_date <= now + horizon),
+        "overdue": overdue,
+        "impair": overdue & ~impaired,
+        "default": active & (now > due_date + grace_period),
+    }
+
+
+def format_amount(value):
+    # MPT amounts are whole numbers; round up so a payment never falls short
+    return str(int(np.ceil(value)))
+
+
+# Submit everything concurrently ----------------------
+async def create_tickets(client, wallet, count):
+    response = await submit_and_wait(
+        TicketCreate(account=wallet.address, ticket_count=count), client, wallet
+    )
+    return [
+        node["CreatedNode"]["NewFields"]["TicketSequence"]
+        for node in response.result["meta"]["AffectedNodes"]
+        if node.get("CreatedNode", {}).get("LedgerEntryType") == "Ticket"
+    ]
+
+
+async def submit_signed(client, tx, wallet):
+    try:
+        response = await submit_and_wait(sign(tx, wallet), client)
+    except Exception as e:
+        return {"result": f"Submit failed: {e}"}
+    meta = response.result["meta"]
+    outcome = {"result": meta["TransactionResult"], "hash": response.result["hash"]}
+    # Read the loan's new state from the metadata instead of asking again
+    for node in meta["AffectedNodes"]:
+        entry = node.get("ModifiedNode") or node.get("DeletedNode")
+        if entry and entry["LedgerEntryType"] == "Loan":
+            final_fields = entry["FinalFields"]
+            outcome["outstanding"] = final_fields.get("TotalValueOutstanding", "0")
+            outcome["flags"] = final_fields.get("Flags", 0)
+    return outcome
+
+
+async def manage_loans(client, loan_broker, actions):
+    """
+    Submits one LoanManage per (loan ID, flag) pair. They all come from the
+    loan broker, so each one uses its own Ticket instead of waiting for the
+    previous Sequence.
+    """
+    outcomes = {}
+    for start in range(0, len(actions), MAX_TICKETS):
+        chunk = actions[start:start + MAX_TICKETS]
+        tickets = await create_tickets(client, loan_broker, len(chunk))
+        template = await autofill(
+            LoanManage(account=loan_broker.address, loan_id=chunk[0][0], flags=chunk[0][1],
+                       sequence=0, ticket_sequence=tickets[0]),
+            client,
+        )
+        txs = [
+            LoanManage(
+                account=loan_broker.address,
+                loan_id=loan_id,
+                flags=flag,
+                sequence=0,
+                ticket_sequence=ticket,
+                fee=template.fee,
+                last_ledger_sequence=template.last_ledger_sequence,
+            )
+            for (loan_id, flag), ticket in zip(chunk, tickets)
+        ]
+        results = await asyncio.gather(*[submit_signed(client, tx, loan_broker) for tx in txs])
+        outcomes.update((loan_id, result) for (loan_id, _), result in zip(chunk, results))
+    return outcomes
+
+
+async def pay_loans(client, borrowers, payments, mpt_id):
+    """
+    Submits one LoanPay per loan for every borrower whose wallet we hold.
+    A borrower with several loans gets consecutive Sequence numbers, so their
+    payments can be submitted at the same time as well.
+    """
+    by_borrower = {}
+    for loan, amount in payments:
+        if loan["Borrower"] in borrowers:
+            by_borrower.setdefault(loan["Borrower"], []).append((loan, amount))
+
+    async def pay_all(address, loan_payments):
+        wallet = borrowers[address]
+        template = await autofill(
+            LoanPay(account=address, loan_id=loan_payments[0][0]["index"],
+                    amount=MPTAmount(mpt_issuance_id=mpt_id, value="0")),
+            client,
+        )
+        txs = [
+            LoanPay(
+                account=address,
+                loan_id=loan["index"],
+                amount=MPTAmount(mpt_issuance_id=mpt_id, value=format_amount(amount)),
+                sequence=template.sequence + i,
+                fee=template.fee,
+                last_ledger_sequence=template.last_ledger_sequence + len(loan_payments),
+            )
+            for i, (loan, amount) in enumerate(loan_payments)
+        ]
+        results = await asyncio.gather(*[submit_signed(client, tx, wallet) for tx in txs])
+        return [(loan["index"], result) for (loan, _), result in zip(loan_payments, results)]
+
+    grouped = await asyncio.gather(*[
+        pay_all(address, loan_payments) for address, loan_payments in by_borrower.items()
+    ])
+    return {loan_id: result for group in grouped for loan_id, result in group}
+
+
+async def service_loans(client, loan_broker, loan_broker_id, borrowers, mpt_id, horizon=0):
+    loans = await load_loans(client, loan_broker_id)
+    now = posix_to_ripple_time(int(time.time()))
+    assessment = assess_loans(loans, now, horizon)
+    print(f"Loaded {len(loans)} loan(s): {int(assessment['due'].sum())} due, "
+          f"{int(assessment['overdue'].sum())} overdue, "
+          f"{int(assessment['impair'].sum())} to impair, "
+          f"{int(assessment['default'].sum())} to default")
+
+    loan_ids = np.array([loan["index"] for loan in loans], dtype=object)
+    to_default = list(loan_ids[assessment["default"]])
+    to_pay = [
+        (loan, amount)
+        for loan, amount, due, default in zip(
+            loans, assessment["amount_due"], assessment["due"], assessment["default"]
+        )
+        if due and not default and loan["Borrower"] in borrowers
+    ]
+    # A loan being defaulted doesn't need to be impaired first, and a loan
+    # being paid now is left for the next run to impair if it's still late.
+    paying = {loan["index"] for loan, _ in to_pay}
+    to_impair = [
+        loan_id for loan_id in loan_ids[assessment["impair"] & ~assessment["default"]]
+        if loan_id not in paying
+    ]
+
+    # All LoanManage transactions share one batch of Tickets, since two
+    # TicketCreates from the broker at once would compete for its Sequence.
+    managed, paid = await asyncio.gather(
+        manage_loans(client, loan_broker,
+                     [(loan_id, LoanManageFlag.TF_LOAN_DEFAULT) for loan_id in to_default]
+                     + [(loan_id, LoanManageFlag.TF_LOAN_IMPAIR) for loan_id in to_impair]),
+        pay_loans(client, borrowers, to_pay, mpt_id),
+    )
+    return {
+        "default": {loan_id: managed[loan_id] for loan_id in to_default},
+        "impair": {loan_id: managed[loan_id] for loan_id in to_impair},
+        "pay": paid,
+    }
+
+
+async def main():
+    # This step checks for the necessary setup data to run the lending protocol tutorials.
+    # If missing, lending_setup.py will generate the data.
+    if not os.path.exists("lending_setup.json"):
+        print("\n=== Lending tutorial data doesn't exist. Running setup script... ===\n")
+        subprocess.run([sys.executable, "lending_setup.py"], check=True)
+
+    with open("lending_setup.json") as f:
+        setup_data = json.load(f)
+
+    loan_broker = Wallet.from_seed(setup_data["loan_broker"]["seed"])
+    borrower = Wallet.from_seed(setup_data["borrower"]["seed"])
+
+    async with AsyncWebsocketClient("wss://s.devnet.rippletest.net:51233") as client:
+        print("\n=== Servicing loans ===\n")
+        # Pay everything due in the next 31 days for the borrowers we service
+        outcomes = await service_loans(
+            client,
+            loan_broker,
+            setup_data["loan_broker_id"],
+            {borrower.address: borrower},
+            setup_data["mpt_id"],
+            horizon=31 * 24 * 60 * 60,
+        )
+
+    print("\n=== Results ===\n")
+    for action, results in outcomes.items():
+        for loan_id, outcome in results.items():
+            print(f"{action:>8} {loan_id}: {outcome['result']}"
+                  f" (outstanding: {outcome.get('outstanding', '-')})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,180 @@
+"""
+Example of how to collect multisignatures for many transactions at once.
+multisigning.py calls sign(..., multisign=True) once per signer, and each call
+serializes the whole transaction again. This coordinator serializes the signing
+fields of each transaction once, sends the same data to every signer
+concurrently, and submits as soon as enough signer weight has come back.
+Reference: https://xrpl.org/multi-signing.html
+"""
+import asyncio
+import random
+import time
+
+from xrpl.asyncio.clients import AsyncJsonRpcClient
+from xrpl.asyncio.transaction import autofill, autofill_and_sign, submit_and_wait
+from xrpl.asyncio.wallet import generate_faucet_wallet
+from xrpl.core import keypairs
+from xrpl.core.addresscodec import decode_classic_address
+from xrpl.core.binarycodec import encode_for_signing
+from xrpl.models.requests import SubmitMultisigned
+from xrpl.models.transactions import AccountSet, SignerEntry, SignerListSet
+from xrpl.models.transactions.transaction import Signer, Transaction
+from xrpl.utils import str_to_hex
+from xrpl.wallet import Wallet
+
+# Signing data for multisignatures starts with this prefix ("SMT\0"), where
+# single signatures start with "STX\0".
+MULTISIGN_PREFIX = "534D5400"
+
+
+def multisigning_prefix(transaction):
+    """
+    Serializes the signing fields of a transaction once. The data each signer
+    signs is this prefix followed by their own AccountID.
+    """
+    tx_json = transaction.to_xrpl()
+    tx_json["SigningPubKey"] = ""
+    return MULTISIGN_PREFIX + encode_for_signing(tx_json)[8:]
+
+
+class LocalSigner:
+    """
+    Stands in for a remote key holder. In a real deployment, sign() would send
+    the signing data to another machine and wait for the signature to come back.
+    """
+
+    def __init__(self, wallet, max_delay=0.5):
+        self.wallet = wallet
+        self.account_id = decode_classic_address(wallet.address).hex().upper()
+        self.max_delay = max_delay
+
+    async def sign(self, prefix):
+        # Simulate the round trip to a remote signer
+        await asyncio.sleep(random.uniform(0, self.max_delay))
+        signature = await asyncio.to_thread(
+            keypairs.sign, prefix + self.account_id, self.wallet.private_key
+        )
+        return Signer(
+            account=self.wallet.address,
+            txn_signature=signature,
+            signing_pub_key=self.wallet.public_key,
+        )
+
+
+class MultisignCoordinator:
+    def __init__(self, client, signers, weights, quorum):
+        self.client = client
+        self.signers = signers
+        self.weights = weights
+        self.quorum = quorum
+        self.latencies = {}
+
+    async def collect(self, transaction):
+        """
+        Asks every signer concurrently and returns the transaction with its
+        Signers as soon as their combined weight reaches the quorum. A signer
+        that fails is skipped, as long as the others can still reach it.
+        """
+        prefix = multisigning_prefix(transaction)
+        pending = [asyncio.create_task(signer.sign(prefix)) for signer in self.signers]
+        collected = []
+        weight = 0
+        try:
+            for next_signature in asyncio.as_completed(pending):
+                try:
+                    signer = await next_signature
+                except Exception as e:
+                    print(f"Sequence {transaction.sequence}: a signer failed: {e!r}")
+                    continue
+                collected.append(signer)
+                weight += self.weights[signer.account]
+                if weight >= self.quorum:
+                    break
+            else:
+                raise RuntimeError(f"Only got {weight} of {self.quorum} signer weight")
+        finally:
+            # Signatures beyond the quorum would only make the transaction bigger
+            for task in pending:
+                task.cancel()
+
+        # Signers must be sorted by AccountID
+        collected.sort(key=lambda signer: decode_classic_address(signer.account))
+        tx_dict = transaction.to_dict()
+        tx_dict["signing_pub_key"] = ""
+        tx_dict["signers"] = collected
+        return Transaction.from_dict(tx_dict)
+
+    async def process(self, transaction):
+        started = time.perf_counter()
+        multisigned_tx = await self.collect(transaction)
+        quorum_reached = time.perf_counter()
+        response = await self.client.request(SubmitMultisigned(tx_json=multisigned_tx.to_xrpl()))
+        self.latencies[transaction.sequence] = {
+            "to_quorum": quorum_reached - started,
+            "to_submit": time.perf_counter() - started,
+            "signers": len(multisigned_tx.signers),
+            "engine_result": response.result.get("engine_result"),
+        }
+        return response
+
+    async def process_all(self, transactions):
+        return await asyncio.gather(*[self.process(tx) for tx in transactions])
+
+
+async def main():
+    client = AsyncJsonRpcClient("https://s.altnet.rippletest.net:51234")
+
+    # Only the account being multisigned for needs to be funded. Signers don't
+    # need accounts of their own on the ledger.
+    master_wallet = await generate_faucet_wallet(client, debug=True)
+    signer_wallets = [Wallet.create() for _ in range(12)]
+    quorum = 8
+
+    signer_entries = [
+        SignerEntry(account=wallet.address, signer_weight=1) for wallet in signer_wallets
+    ]
+    signer_list_set_tx = SignerListSet(
+        account=master_wallet.address,
+        signer_quorum=quorum,
+        signer_entries=signer_entries,
+    )
+    print("Submitting an 8-of-12 SignerListSet...")
+    signed_tx = await autofill_and_sign(signer_list_set_tx, client, master_wallet)
+    await submit_and_wait(signed_tx, client)
+
+    # Prepare a batch of transactions with consecutive sequence numbers, so
+    # they can all be signed and submitted at the same time.
+    first_tx = await autofill(
+        AccountSet(account=master_wallet.address, domain=str_to_hex("example.com")),
+        client,
+        quorum,
+    )
+    transactions = [
+        AccountSet(
+            account=master_wallet.address,
+            domain=str_to_hex(f"{i}.example.com"),
+            sequence=first_tx.sequence + i,
+            fee=first_tx.fee,
+            last_ledger_sequence=first_tx.last_ledger_sequence + 20,
+        )
+        for i in range(20)
+    ]
+
+    coordinator = MultisignCoordinator(
+        client,
+        [LocalSigner(wallet) for wallet in signer_wallets],
+        {entry.account: entry.signer_weight for entry in signer_entries},
+        quorum,
+    )
+    await coordinator.process_all(transactions)
+
+    for sequence, latency in sorted(coordinator.latencies.items()):
+        print(
+            f"Sequence {sequence}: {latency['engine_result']} with {latency['signers']} "
+            f"signatures, quorum after {latency['to_quorum'] * 1000:.0f} ms, "
+            f"submitted after {latency['to_submit'] * 1000:.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,305 @@
+"""Find and broker every crossable pair of NFT buy and sell offers"""
+import argparse
+import asyncio
+import bisect
+from decimal import Decimal
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.asyncio.ledger import get_fee
+from xrpl.asyncio.transaction import submit
+from xrpl.models import IssuedCurrencyAmount, NFTokenAcceptOffer
+from xrpl.models.requests import AccountInfo, Subscribe
+from xrpl.transaction import sign
+from xrpl.wallet import Wallet
+
+from nft_offer_aggregator import JSON_RPC_URL, SELL_FLAG, WS_URL, OfferAggregator
+
+# References
+# - https://xrpl.org/nftokenacceptoffer.html#brokered-mode
+# - https://xrpl.org/nftokenoffer.html#nftokenoffer
+
+# mod5.broker_sale in the quickstart brokers one sell and buy offer picked by
+# hand. This sample keeps a live book of every buy and sell offer for a set of
+# NFTs and brokers each pair where the buyer pays at least the seller's price
+# plus the broker's minimum fee. The broker keeps the whole difference.
+#
+# Offers are kept sorted by price per (NFT, currency, side), so checking what a
+# new or removed offer does to its NFT is a binary search, not a rescan of the
+# book. After the initial load, offers are added and removed straight from the
+# NFTokenOffer entries in each transaction's metadata. Once per ledger, the best
+# pair of each crossed NFT is ranked by broker profit and the top ones are
+# submitted together as brokered NFTokenAcceptOffer transactions.
+
+
+def asset_key(amount):
+    """Amounts in the same asset can be matched. Returns (asset, value)."""
+    if isinstance(amount, str):
+        return "XRP", int(amount)
+    return f"{amount['currency']}/{amount['issuer']}", Decimal(amount["value"])
+
+
+def asset_amount(asset, value):
+    """The inverse of asset_key, as a transaction field"""
+    if asset == "XRP":
+        return str(value)
+    currency, issuer = asset.split("/")
+    return IssuedCurrencyAmount(currency=currency, issuer=issuer, value=str(value))
+
+
+class OfferBook:
+    def __init__(self, broker):
+        self.broker = broker
+        self.offers = {}
+        # (nft_id, asset, side) -> sorted list of (sort key, offer index).
+        # Sells sort by price and buys by minus price, so the best offer on
+        # either side is always first.
+        self.books = {}
+        # nft_id -> the (asset, side) books it has offers in
+        self.by_nft = {}
+
+    def add(self, offer_index, nft_id, side, amount, owner, destination=None, expiration=None):
+        """Adds an offer if a broker can ever accept it. Returns its NFT if it was added."""
+        # Offers with a Destination can only be accepted by that account
+        if offer_index in self.offers or destination not in (None, self.broker):
+            return None
+        asset, value = asset_key(amount)
+        self.offers[offer_index] = {
+            "index": offer_index, "nft_id": nft_id, "side": side, "asset": asset,
+            "value": value, "owner": owner, "expiration": expiration,
+        }
+        key = (value if side == "sell" else -value, offer_index)
+        bisect.insort(self.books.setdefault((nft_id, asset, side), []), key)
+        self.by_nft.setdefault(nft_id, set()).add((asset, side))
+        return nft_id
+
+    def remove(self, offer_index):
+        """Removes an offer. Returns its NFT if it was in the book."""
+        offer = self.offers.pop(offer_index, None)
+        if offer is None:
+            return None
+        book_key = (offer["nft_id"], offer["asset"], offer["side"])
+        book = self.books[book_key]
+        key = (offer["value"] if offer["side"] == "sell" else -offer["value"], offer_index)
+        del book[bisect.bisect_left(book, key)]
+        if not book:
+            del self.books[book_key]
+            self.by_nft[offer["nft_id"]].discard((offer["asset"], offer["side"]))
+            if not self.by_nft[offer["nft_id"]]:
+                del self.by_nft[offer["nft_id"]]
+        return offer["nft_id"]
+
+    def usable(self, side_book, close_time, depth):
+        """The first few offers of a book that haven't expired. Expired ones are dropped."""
+        usable = []
+        position = 0
+        while position < len(side_book) and len(usable) < depth:
+            offer = self.offers[side_book[position][1]]
+            if offer["expiration"] is not None and offer["expiration"] <= close_time:
+                # Removing it from the book moves the next offer to this position
+                self.remove(offer["index"])
+                continue
+            usable.append(offer)
+            position += 1
+        return usable
+
+    def best_pair(self, nft_id, asset, close_time, min_fee, depth=3):
+        """The most profitable (profit, sell, buy) for an NFT in one asset, or None"""
+        sells = self.usable(self.books.get((nft_id, asset, "sell"), []), close_time, depth)
+        buys = self.usable(self.books.get((nft_id, asset, "buy"), []), close_time, depth)
+        best = None
+        for sell in sells:
+            for buy in buys:
+                profit = buy["value"] - sell["value"]
+                if profit < min_fee:
+                    break
+                # The seller can't buy their own NFT
+                if buy["owner"] != sell["owner"] and (best is None or profit > best[0]):
+                    best = (profit, sell, buy)
+        return best
+
+    def assets(self, nft_id):
+        return {asset for asset, side in self.by_nft.get(nft_id, ())}
+
+
+class Broker:
+    def __init__(self, wallet, rpc_url, ws_url, min_fees=None, rates=None, max_batch=50):
+        self.wallet = wallet
+        self.ws_url = ws_url
+        self.aggregator = OfferAggregator(rpc_url, ws_url)
+        self.book = OfferBook(wallet.address)
+        # Smallest fee worth brokering for, per asset. XRP is in drops.
+        self.min_fees = {"XRP": 1, **(min_fees or {})}
+        # Value of one unit of each asset in drops, to rank profits in
+        # different assets against each other. Assets without a rate are
+        # never brokered.
+        self.rates = {"XRP": 1, **(rates or {})}
+        self.max_batch = max_batch
+        self.dirty = set()
+        self.crossed = {}
+        # tx hash -> (sell offer, buy offer, NFT, last ledger)
+        self.in_flight = {}
+        self.failed = set()
+        self.next_sequence = None
+
+    # Keeping the book -------------------------------------------------------
+
+    async def load(self, accounts):
+        await self.aggregator.load(accounts)
+        for row in self.aggregator.db.execute("SELECT * FROM nft_offers"):
+            offer_index, nft_id, side, currency, issuer, value, owner, destination, expiration = row
+            amount = value if currency == "XRP" else {"currency": currency, "issuer": issuer, "value": value}
+            self.dirty.add(self.book.add(offer_index, nft_id, side, amount, owner, destination, expiration))
+        self.dirty.discard(None)
+        print(f"Loaded {len(self.book.offers)} brokerable offer(s).")
+
+    def apply_transaction(self, message):
+        tx_json = message.get("tx_json") or message.get("transaction", {})
+        tx_hash = message.get("hash") or tx_json.get("hash")
+        pair = self.in_flight.pop(tx_hash, None)
+        if pair is not None and message["meta"]["TransactionResult"] != "tesSUCCESS":
+            sell_index, buy_index, nft_id, _ = pair
+            print(f"  Brokering {sell_index} / {buy_index} failed: {message['meta']['TransactionResult']}")
+            self.failed.add((sell_index, buy_index))
+            self.dirty.add(nft_id)
+        for node in message["meta"].get("AffectedNodes", []):
+            kind, entry = next(iter(node.items()))
+            if entry["LedgerEntryType"] != "NFTokenOffer":
+                continue
+            if kind == "CreatedNode":
+                fields = entry["NewFields"]
+                if not self.aggregator.tracked(fields["NFTokenID"]):
+                    continue
+                side = "sell" if fields.get("Flags", 0) & SELL_FLAG else "buy"
+                self.dirty.add(self.book.add(
+                    entry["LedgerIndex"], fields["NFTokenID"], side, fields["Amount"],
+                    fields["Owner"], fields.get("Destination"), fields.get("Expiration")))
+            elif kind == "DeletedNode":
+                self.dirty.add(self.book.remove(entry["LedgerIndex"]))
+        self.dirty.discard(None)
+
+    def update_crossed(self, close_time):
+        """Finds the best pair again for NFTs whose offers changed"""
+        for nft_id in self.dirty:
+            best = None
+            for asset in self.book.assets(nft_id):
+                if asset not in self.rates:
+                    continue
+                pair = self.book.best_pair(nft_id, asset, close_time, self.min_fees.get(asset, 0))
+                if pair is not None and (best is None or pair[0] * self.rates[asset] > best[0] * self.rates[best[1]["asset"]]):
+                    best = pair
+            if best is None:
+                self.crossed.pop(nft_id, None)
+            else:
+                self.crossed[nft_id] = best
+        self.dirty = set()
+
+    def candidates(self, close_time):
+        """Crossed pairs still worth brokering, most profitable first"""
+        ranked = []
+        busy = {nft_id for _, _, nft_id, _ in self.in_flight.values()}
+        for nft_id, (profit, sell, buy) in list(self.crossed.items()):
+            expired = [offer for offer in (sell, buy)
+                       if offer["expiration"] is not None and offer["expiration"] <= close_time]
+            if expired:
+                # Look for the next best pair of this NFT on the next ledger
+                for offer in expired:
+                    self.book.remove(offer["index"])
+                self.dirty.add(nft_id)
+                continue
+            if (sell["index"], buy["index"]) in self.failed:
+                continue
+            if nft_id in busy:
+                continue
+            ranked.append((profit * self.rates[sell["asset"]], nft_id, sell, buy, profit))
+        ranked.sort(key=lambda candidate: candidate[0], reverse=True)
+        return ranked[:self.max_batch]
+
+    # Brokering ---------------------------------------------------------------
+
+    def expire(self, ledger_index):
+        """Forgets transactions that can no longer be validated, so their NFTs are tried again"""
+        for tx_hash, (_, _, nft_id, last_ledger) in list(self.in_flight.items()):
+            if last_ledger < ledger_index:
+                del self.in_flight[tx_hash]
+                self.dirty.add(nft_id)
+                # Its sequence was never used
+                self.next_sequence = None
+
+    async def broker(self, client, ledger_index, close_time):
+        self.update_crossed(close_time)
+        batch = self.candidates(close_time)
+        if not batch:
+            return
+        if self.next_sequence is None:
+            account_info = await client.request(AccountInfo(
+                account=self.wallet.address, ledger_index="current"
+            ))
+            self.next_sequence = account_info.result["account_data"]["Sequence"]
+        fee = await get_fee(client)
+
+        signed = []
+        for _, nft_id, sell, buy, profit in batch:
+            tx = NFTokenAcceptOffer(
+                account=self.wallet.address,
+                nftoken_sell_offer=sell["index"],
+                nftoken_buy_offer=buy["index"],
+                nftoken_broker_fee=asset_amount(sell["asset"], profit),
+                sequence=self.next_sequence,
+                fee=fee,
+                last_ledger_sequence=ledger_index + 4,
+            )
+            self.next_sequence += 1
+            signed_tx = sign(tx, self.wallet)
+            signed.append(signed_tx)
+            self.in_flight[signed_tx.get_hash()] = (sell["index"], buy["index"], nft_id, tx.last_ledger_sequence)
+        print(f"Ledger {ledger_index}: brokering {len(signed)} sale(s), "
+              f"best profit {batch[0][4]} {batch[0][2]['asset']}.")
+
+        responses = await asyncio.gather(*[submit(tx, client) for tx in signed], return_exceptions=True)
+        for tx, response in zip(signed, responses):
+            if isinstance(response, Exception):
+                result = type(response).__name__
+            else:
+                result = response.result.get("engine_result", response.result.get("error", "unknown"))
+            if result in ("tesSUCCESS", "terQUEUED") or result.startswith("tec"):
+                # tec results still go into the ledger and show up in the stream
+                continue
+            print(f"  {tx.nftoken_sell_offer} / {tx.nftoken_buy_offer}: {result}")
+            sell_index, buy_index, nft_id, _ = self.in_flight.pop(tx.get_hash())
+            if result.startswith(("tem", "tef")) and result != "tefPAST_SEQ":
+                self.failed.add((sell_index, buy_index))
+            else:
+                # Sequence errors (every transaction after one that failed
+                # gets terPRE_SEQ) and other tel and ter results can succeed
+                # on a later ledger.
+                self.dirty.add(nft_id)
+            # Resync the sequence, since this one was never used
+            self.next_sequence = None
+
+    async def run(self, accounts=(), nft_ids=(), issuers=()):
+        self.aggregator.track(nft_ids, issuers)
+        async with AsyncWebsocketClient(self.ws_url) as client:
+            # Subscribe first so no offer placed while loading is missed
+            await client.request(Subscribe(streams=["ledger", "transactions"]))
+            await self.load(accounts)
+            async for message in client:
+                if message.get("type") == "transaction" and message.get("validated"):
+                    if message["ledger_index"] > self.aggregator.loaded_ledger:
+                        self.apply_transaction(message)
+                elif message.get("type") == "ledgerClosed":
+                    self.expire(message["ledger_index"])
+                    await self.broker(client, message["ledger_index"], message["ledger_time"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("seed", help="Seed of the broker account, which pays fees and collects broker fees")
+    parser.add_argument("accounts", nargs="*", help="Broker every NFT these accounts hold")
+    parser.add_argument("--issuer", action="append", default=[], help="Broker every NFT from this issuer")
+    parser.add_argument("--min-fee", type=int, default=1000, help="Smallest XRP broker fee to take, in drops")
+    parser.add_argument("--rpc-url", default=JSON_RPC_URL)
+    parser.add_argument("--ws-url", default=WS_URL)
+    args = parser.parse_args()
+
+    broker = Broker(Wallet.from_seed(args.seed), args.rpc_url, args.ws_url, min_fees={"XRP": args.min_fee})
+    asyncio.run(broker.run(args.accounts, issuers=args.issuer))
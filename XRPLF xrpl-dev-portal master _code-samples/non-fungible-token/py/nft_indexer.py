@@ -0,0 +1,291 @@
+"""Keep a local SQLite index of NFTs by issuer, taxon, owner, flags and transfer fee"""
+import argparse
+import asyncio
+import sqlite3
+import time
+
+from xrpl.asyncio.clients import AsyncJsonRpcClient, AsyncWebsocketClient
+from xrpl.core.addresscodec import encode_classic_address
+from xrpl.models.requests import GenericRequest, Ledger, Subscribe
+from xrpl.utils import parse_nftoken_id
+
+# References
+# - https://xrpl.org/nftokenpage.html#nftokenpage
+# - https://xrpl.org/ledger_data.html#ledger_data
+# - https://xrpl.org/subscribe.html#transaction-streams
+
+# list-nft-pages-and-offers.py walks AccountNFTs for one account at a time, so
+# a question like "who holds taxon 7 of this collection" means walking every
+# holder again. This sample loads every NFTokenPage from one pinned ledger into
+# SQLite once, then keeps the index current from the metadata of each validated
+# transaction. Queries are then plain indexed lookups.
+#
+# Every change of ownership shows up in metadata as NFTokens being added to or
+# removed from NFTokenPage entries, and the owner of a page is the first 20
+# bytes of its ledger entry ID. Diffing those pages covers NFTokenMint,
+# NFTokenBurn, NFTokenAcceptOffer and NFTokenModify alike, as well as page
+# splits and merges.
+
+JSON_RPC_URL = "https://s.altnet.rippletest.net:51234"
+WS_URL = "wss://s.altnet.rippletest.net:51233"
+# If the index is further behind than this, load it again instead of replaying
+# every ledger in between.
+MAX_CATCH_UP = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nfts (
+    nft_id TEXT PRIMARY KEY,
+    issuer TEXT NOT NULL,
+    taxon INTEGER NOT NULL,
+    serial INTEGER NOT NULL,
+    flags INTEGER NOT NULL,
+    transfer_fee INTEGER NOT NULL,
+    owner TEXT NOT NULL,
+    uri TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS nfts_by_collection ON nfts (issuer, taxon, owner);
+CREATE INDEX IF NOT EXISTS nfts_by_owner ON nfts (owner, issuer, taxon);
+CREATE INDEX IF NOT EXISTS nfts_by_transfer_fee ON nfts (issuer, transfer_fee);
+CREATE TABLE IF NOT EXISTS sync (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    ledger_index INTEGER NOT NULL
+);
+"""
+
+
+def page_owner(page_id):
+    """The account that owns an NFTokenPage: the first 160 bits of its ID"""
+    return encode_classic_address(bytes.fromhex(page_id[:40]))
+
+
+def page_tokens(fields):
+    """NFTokenID -> URI for the tokens listed in an NFTokenPage's fields"""
+    return {
+        token["NFToken"]["NFTokenID"]: token["NFToken"].get("URI")
+        for token in fields.get("NFTokens", [])
+    }
+
+
+def token_changes(meta):
+    """token_changes
+
+    Which tokens a transaction moved, from its metadata. Returns a dict of
+    NFTokenID -> (owner, URI) for tokens that were added to a page or changed,
+    and a set of tokens that were removed from a page and not added to another.
+    """
+    added = {}
+    removed = set()
+    for node in meta.get("AffectedNodes", []):
+        kind, entry = next(iter(node.items()))
+        if entry["LedgerEntryType"] != "NFTokenPage":
+            continue
+        if kind == "CreatedNode":
+            before, after = {}, page_tokens(entry["NewFields"])
+        elif kind == "DeletedNode":
+            before, after = page_tokens(entry.get("FinalFields", {})), {}
+        elif "NFTokens" in entry.get("PreviousFields", {}):
+            before, after = page_tokens(entry["PreviousFields"]), page_tokens(entry["FinalFields"])
+        else:
+            continue
+        owner = page_owner(entry["LedgerIndex"])
+        for nft_id, uri in after.items():
+            if before.get(nft_id, ()) != uri:
+                added[nft_id] = (owner, uri)
+        removed.update(before.keys() - after.keys())
+    return added, removed - added.keys()
+
+
+class NFTIndex:
+    def __init__(self, path, issuers=None):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        # Only tokens from these issuers are kept, if given
+        self.issuers = set(issuers) if issuers else None
+
+    @property
+    def synced_ledger(self):
+        row = self.db.execute("SELECT ledger_index FROM sync").fetchone()
+        return row[0] if row else None
+
+    def mark_synced(self, ledger_index):
+        self.db.execute("INSERT OR REPLACE INTO sync (id, ledger_index) VALUES (0, ?)", (ledger_index,))
+        self.db.commit()
+
+    def clear(self):
+        self.db.execute("DELETE FROM nfts")
+        self.db.execute("DELETE FROM sync")
+
+    def put(self, tokens):
+        """Adds or updates (nft_id, owner, uri) tuples"""
+        rows = []
+        for nft_id, owner, uri in tokens:
+            token = parse_nftoken_id(nft_id)
+            if self.issuers is not None and token["issuer"] not in self.issuers:
+                continue
+            rows.append((nft_id, token["issuer"], token["taxon"], token["sequence"],
+                         token["flags"], token["transfer_fee"], owner, uri))
+        self.db.executemany("INSERT OR REPLACE INTO nfts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def delete(self, nft_ids):
+        self.db.executemany("DELETE FROM nfts WHERE nft_id = ?", [(nft_id,) for nft_id in nft_ids])
+
+    def apply(self, meta):
+        if meta.get("TransactionResult") != "tesSUCCESS":
+            return
+        added, removed = token_changes(meta)
+        self.put((nft_id, owner, uri) for nft_id, (owner, uri) in added.items())
+        self.delete(removed)
+
+    # Queries -----------------------------------------------------------------
+
+    def holders(self, issuer, taxon=None):
+        """Owner -> number of tokens, for a collection or a whole issuer"""
+        if taxon is None:
+            rows = self.db.execute(
+                "SELECT owner, COUNT(*) FROM nfts WHERE issuer = ? GROUP BY owner ORDER BY 2 DESC",
+                (issuer,))
+        else:
+            rows = self.db.execute(
+                "SELECT owner, COUNT(*) FROM nfts WHERE issuer = ? AND taxon = ? GROUP BY owner ORDER BY 2 DESC",
+                (issuer, taxon))
+        return dict(rows.fetchall())
+
+    def tokens(self, issuer=None, taxon=None, owner=None, flags=None, transfer_fee=None, limit=None):
+        """Tokens matching every filter given. flags matches tokens with all of those flags set."""
+        where, params = [], []
+        for column, value in (("issuer", issuer), ("taxon", taxon), ("owner", owner),
+                              ("transfer_fee", transfer_fee)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if flags is not None:
+            where.append("flags & ? = ?")
+            params += [flags, flags]
+        sql = "SELECT nft_id, issuer, taxon, serial, flags, transfer_fee, owner, uri FROM nfts"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY issuer, taxon, serial"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        columns = ("nft_id", "issuer", "taxon", "serial", "flags", "transfer_fee", "owner", "uri")
+        return [dict(zip(columns, row)) for row in self.db.execute(sql, params)]
+
+    def collections(self, issuer):
+        """Taxon -> (tokens, holders) for every collection of an issuer"""
+        rows = self.db.execute(
+            "SELECT taxon, COUNT(*), COUNT(DISTINCT owner) FROM nfts WHERE issuer = ? GROUP BY taxon",
+            (issuer,))
+        return {taxon: (count, holders) for taxon, count, holders in rows}
+
+
+class NFTIndexer:
+    def __init__(self, url, rpc_url, index):
+        self.url = url
+        self.rpc_url = rpc_url
+        self.index = index
+
+    async def bootstrap(self, ledger_index):
+        """Loads every NFTokenPage in one validated ledger"""
+        started = time.perf_counter()
+        self.index.clear()
+        # LedgerData doesn't accept the nft_page type filter yet, and the
+        # WebSocket client turns every request back into its model, so this
+        # goes over JSON-RPC as a GenericRequest.
+        client = AsyncJsonRpcClient(self.rpc_url)
+        marker = None
+        pages = 0
+        while True:
+            response = await client.request(GenericRequest(
+                method="ledger_data",
+                ledger_index=ledger_index,
+                type="nft_page",
+                limit=2048,
+                marker=marker
+            ))
+            for page in response.result["state"]:
+                owner = page_owner(page["index"])
+                self.index.put((nft_id, owner, uri) for nft_id, uri in page_tokens(page).items())
+                pages += 1
+            marker = response.result.get("marker")
+            if marker is None:
+                break
+        self.index.mark_synced(ledger_index)
+        print(f"Loaded {pages} NFT page(s) from ledger {ledger_index} "
+              f"in {time.perf_counter() - started:.1f}s.")
+
+    async def catch_up(self, client, synced, validated):
+        """Replays the ledgers since the index was last synced. False if the server doesn't have them."""
+        for ledger_index in range(synced + 1, validated + 1):
+            response = await client.request(Ledger(ledger_index=ledger_index, transactions=True, expand=True))
+            if not response.is_successful():
+                return False
+            transactions = response.result["ledger"].get("transactions", [])
+            for tx in sorted(transactions, key=lambda tx: self.meta(tx)["TransactionIndex"]):
+                self.index.apply(self.meta(tx))
+            self.index.mark_synced(ledger_index)
+        print(f"Caught up from ledger {synced} to {validated}.")
+        return True
+
+    @staticmethod
+    def meta(tx):
+        return tx.get("meta") or tx.get("metaData")
+
+    async def run(self):
+        async with AsyncWebsocketClient(self.url) as client:
+            # Subscribe first so nothing validated while loading is missed
+            await client.request(Subscribe(streams=["ledger", "transactions"]))
+            response = await client.request(Ledger(ledger_index="validated"))
+            validated = int(response.result["ledger_index"])
+            synced = self.index.synced_ledger
+            if synced is None or validated - synced > MAX_CATCH_UP \
+                    or not await self.catch_up(client, synced, validated):
+                await self.bootstrap(validated)
+
+            async for message in client:
+                if message.get("type") == "transaction" and message.get("validated"):
+                    if message["ledger_index"] > validated:
+                        self.index.apply(message["meta"])
+                elif message.get("type") == "ledgerClosed" and message["ledger_index"] > validated:
+                    # The ledger stream reports a ledger before its
+                    # transactions, so the one before it is complete.
+                    self.index.mark_synced(message["ledger_index"] - 1)
+
+
+def timed(label, query, *args, **kwargs):
+    started = time.perf_counter()
+    result = query(*args, **kwargs)
+    print(f"{label}: {len(result)} row(s) in {(time.perf_counter() - started) * 1000:.2f} ms")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", default="nfts.sqlite")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    sync = subcommands.add_parser("sync", help="Load the index and keep it current")
+    sync.add_argument("--url", default=WS_URL)
+    sync.add_argument("--rpc-url", default=JSON_RPC_URL, help="JSON-RPC URL of the same server, for the initial load")
+    sync.add_argument("--issuer", action="append", help="Only index this issuer's NFTs (repeatable)")
+    query = subcommands.add_parser("query", help="Look up NFTs in the index")
+    query.add_argument("--issuer")
+    query.add_argument("--taxon", type=int)
+    query.add_argument("--owner")
+    query.add_argument("--flags", type=int)
+    query.add_argument("--transfer-fee", type=int)
+    query.add_argument("--holders", action="store_true", help="Count tokens per owner instead of listing them")
+    query.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "sync":
+        index = NFTIndex(args.db, args.issuer)
+        asyncio.run(NFTIndexer(args.url, args.rpc_url, index).run())
+    else:
+        index = NFTIndex(args.db)
+        print(f"Index synced to ledger {index.synced_ledger}")
+        if args.holders:
+            for owner, count in timed("Holders", index.holders, args.issuer, args.taxon).items():
+                print(f"  {owner}: {count}")
+        else:
+            for token in timed("Tokens", index.tokens, args.issuer, args.taxon, args.owner,
+                               args.flags, args.transfer_fee, args.limit):
+                print(f"  {token['nft_id']} taxon {token['taxon']} owned by {token['owner']}")
@@ -0,0 +1,245 @@
+"""Collect the buy and sell offers for many NFTs into one table and keep it current"""
+import argparse
+import asyncio
+import sqlite3
+import time
+
+import httpx
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.models.requests import Subscribe
+from xrpl.utils import parse_nftoken_id
+
+# References
+# - https://xrpl.org/nft_buy_offers.html#nft_buy_offers
+# - https://xrpl.org/nft_sell_offers.html#nft_sell_offers
+# - https://xrpl.org/nftokenoffer.html#nftokenoffer
+
+# list-nft-pages-and-offers.py asks for one NFT's buy offers at a time, and only
+# reads the first page of them. This sample sends the nft_buy_offers and
+# nft_sell_offers requests for many NFTs at once over a small pool of keep-alive
+# connections, follows every marker, and stores the offers in one SQLite table.
+# After that, only NFTs touched by a new NFTokenCreateOffer, NFTokenCancelOffer
+# or NFTokenAcceptOffer are asked for again.
+#
+# The requests are sent as raw JSON-RPC because the NFTBuyOffers and
+# NFTSellOffers models in xrpl-py have no limit or marker fields.
+
+JSON_RPC_URL = "https://s.altnet.rippletest.net:51234"
+WS_URL = "wss://s.altnet.rippletest.net:51233"
+OFFER_TRANSACTIONS = {"NFTokenCreateOffer", "NFTokenCancelOffer", "NFTokenAcceptOffer", "NFTokenBurn"}
+# tfSellNFToken, on both the transaction and the NFTokenOffer entry
+SELL_FLAG = 0x00000001
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nft_offers (
+    offer_index TEXT PRIMARY KEY,
+    nft_id TEXT NOT NULL,
+    side TEXT NOT NULL CHECK (side IN ('buy', 'sell')),
+    currency TEXT NOT NULL,
+    issuer TEXT,
+    value TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    destination TEXT,
+    expiration INTEGER
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS nft_offers_by_nft ON nft_offers (nft_id, side);
+CREATE INDEX IF NOT EXISTS nft_offers_by_owner ON nft_offers (owner);
+"""
+
+
+def normalize(nft_id, side, offer):
+    """One row of the offers table, from an nft_buy_offers or nft_sell_offers entry"""
+    amount = offer["amount"]
+    if isinstance(amount, str):
+        currency, issuer, value = "XRP", None, amount
+    else:
+        currency, issuer, value = amount["currency"], amount["issuer"], amount["value"]
+    return (offer["nft_offer_index"], nft_id, side, currency, issuer, value,
+            offer["owner"], offer.get("destination"), offer.get("expiration"))
+
+
+def touched_nfts(message):
+    """NFTokenIDs whose offers a validated transaction may have changed"""
+    tx_json = message.get("tx_json") or message.get("transaction", {})
+    if tx_json.get("TransactionType") not in OFFER_TRANSACTIONS:
+        return set()
+    nft_ids = {tx_json["NFTokenID"]} if "NFTokenID" in tx_json else set()
+    for node in message["meta"].get("AffectedNodes", []):
+        kind, entry = next(iter(node.items()))
+        if entry["LedgerEntryType"] == "NFTokenOffer":
+            fields = entry.get("NewFields") or entry.get("FinalFields", {})
+            if "NFTokenID" in fields:
+                nft_ids.add(fields["NFTokenID"])
+    return nft_ids
+
+
+# The same as RpcPool in ../../partial-payment/py/partial_payment_scanner.py; keep the two in step.
+class RpcPool:
+    """
+    A bounded number of JSON-RPC requests in flight, over a bounded number of
+    keep-alive connections. Errors are returned in the result, not raised.
+    """
+
+    def __init__(self, url, max_connections=8, max_in_flight=32):
+        self.url = url
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.http = httpx.AsyncClient(limits=limits, timeout=60)
+        self.limit = asyncio.Semaphore(max_in_flight)
+        self.requests = 0
+
+    async def request(self, method, **params):
+        async with self.limit:
+            self.requests += 1
+            response = await self.http.post(self.url, json={
+                "method": method, "params": [{"api_version": 2, **params}]
+            })
+            return response.json()["result"]
+
+    async def close(self):
+        await self.http.aclose()
+
+
+class OfferAggregator:
+    def __init__(self, rpc_url, ws_url, path=":memory:", max_connections=8, max_in_flight=32):
+        self.pool = RpcPool(rpc_url, max_connections, max_in_flight)
+        self.ws_url = ws_url
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self.nft_ids = set()
+        self.loaded_ledger = None
+        # NFTs minted later by these issuers are tracked too
+        self.issuers = set()
+
+    def track(self, nft_ids=(), issuers=()):
+        self.nft_ids.update(nft_ids)
+        self.issuers.update(issuers)
+
+    def tracked(self, nft_id):
+        return nft_id in self.nft_ids or parse_nftoken_id(nft_id)["issuer"] in self.issuers
+
+    # Fetching ----------------------------------------------------------------
+
+    async def fetch_side(self, nft_id, side, ledger_index):
+        rows = []
+        marker = None
+        while True:
+            params = {"nft_id": nft_id, "limit": 500, "ledger_index": ledger_index}
+            if marker is not None:
+                params["marker"] = marker
+            result = await self.pool.request(f"nft_{side}_offers", **params)
+            if result.get("error") == "objectNotFound":
+                # The NFT has no offers on this side
+                return rows
+            if "error" in result:
+                raise RuntimeError(f"nft_{side}_offers {nft_id}: {result['error']}")
+            rows += [normalize(nft_id, side, offer) for offer in result["offers"]]
+            marker = result.get("marker")
+            if marker is None:
+                return rows
+
+    async def refresh(self, nft_ids, ledger_index="validated"):
+        """Replaces the stored offers of these NFTs with fresh ones"""
+        nft_ids = list(nft_ids)
+        sides = await asyncio.gather(*[
+            self.fetch_side(nft_id, side, ledger_index)
+            for nft_id in nft_ids for side in ("buy", "sell")
+        ])
+        with self.db:
+            self.db.executemany("DELETE FROM nft_offers WHERE nft_id = ?", [(nft_id,) for nft_id in nft_ids])
+            for rows in sides:
+                # Keyed by offer index, so an offer seen twice is stored once
+                self.db.executemany("INSERT OR REPLACE INTO nft_offers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    async def account_nfts(self, account, ledger_index):
+        nft_ids = []
+        marker = None
+        while True:
+            params = {"account": account, "limit": 400, "ledger_index": ledger_index}
+            if marker is not None:
+                params["marker"] = marker
+            result = await self.pool.request("account_nfts", **params)
+            nft_ids += [nft["NFTokenID"] for nft in result["account_nfts"]]
+            marker = result.get("marker")
+            if marker is None:
+                return nft_ids
+
+    # Following the ledger ----------------------------------------------------
+
+    async def load(self, accounts=()):
+        """Loads the offers of every tracked NFT, and of the NFTs these accounts hold, from one ledger"""
+        self.loaded_ledger = int((await self.pool.request("ledger", ledger_index="validated"))["ledger_index"])
+        for nft_ids in await asyncio.gather(*[
+            self.account_nfts(account, self.loaded_ledger) for account in accounts
+        ]):
+            self.track(nft_ids)
+
+        started = time.perf_counter()
+        await self.refresh(self.nft_ids, self.loaded_ledger)
+        print(f"Loaded {self.count()} offer(s) for {len(self.nft_ids)} NFT(s) in "
+              f"{time.perf_counter() - started:.1f}s using {self.pool.requests} request(s).")
+
+    async def run(self, accounts=()):
+        async with AsyncWebsocketClient(self.ws_url) as client:
+            # Subscribe first so no offer placed while loading is missed
+            await client.request(Subscribe(streams=["ledger", "transactions"]))
+            await self.load(accounts)
+
+            touched = set()
+            async for message in client:
+                if message.get("type") == "transaction" and message.get("validated"):
+                    if message["ledger_index"] > self.loaded_ledger:
+                        touched.update(nft_id for nft_id in touched_nfts(message) if self.tracked(nft_id))
+                elif message.get("type") == "ledgerClosed" and touched:
+                    # Transactions arrive one by one; refresh once per ledger
+                    # for everything they touched.
+                    nft_ids, touched = touched, set()
+                    self.nft_ids.update(nft_ids)
+                    await self.refresh(nft_ids)
+                    print(f"Ledger {message['ledger_index']}: refreshed {len(nft_ids)} NFT(s), "
+                          f"{self.count()} offer(s) in total.")
+        await self.pool.close()
+
+    # Queries -----------------------------------------------------------------
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM nft_offers").fetchone()[0]
+
+    def offers(self, nft_id, side=None):
+        sql = "SELECT * FROM nft_offers WHERE nft_id = ?"
+        params = [nft_id]
+        if side is not None:
+            sql += " AND side = ?"
+            params.append(side)
+        columns = ("offer_index", "nft_id", "side", "currency", "issuer", "value",
+                   "owner", "destination", "expiration")
+        return [dict(zip(columns, row)) for row in self.db.execute(sql, params)]
+
+    def xrp_spread(self):
+        """Best XRP bid and ask per NFT, in drops"""
+        rows = self.db.execute("""
+            SELECT nft_id,
+                   MAX(CASE WHEN side = 'buy' THEN CAST(value AS INTEGER) END),
+                   MIN(CASE WHEN side = 'sell' THEN CAST(value AS INTEGER) END)
+            FROM nft_offers WHERE currency = 'XRP' GROUP BY nft_id
+        """)
+        return {nft_id: (bid, ask) for nft_id, bid, ask in rows}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("accounts", nargs="*", help="Track every NFT these accounts hold")
+    parser.add_argument("--nft-ids", help="File with one NFTokenID per line to track")
+    parser.add_argument("--issuer", action="append", default=[], help="Track every NFT from this issuer that gets an offer")
+    parser.add_argument("--rpc-url", default=JSON_RPC_URL)
+    parser.add_argument("--ws-url", default=WS_URL)
+    parser.add_argument("--db", default=":memory:")
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--in-flight", type=int, default=32)
+    args = parser.parse_args()
+
+    aggregator = OfferAggregator(args.rpc_url, args.ws_url, args.db, args.connections, args.in_flight)
+    if args.nft_ids:
+        with open(args.nft_ids) as nft_file:
+            aggregator.track(line.strip() for line in nft_file if line.strip())
+    aggregator.track(issuers=args.issuer)
+    asyncio.run(aggregator.run(args.accounts))
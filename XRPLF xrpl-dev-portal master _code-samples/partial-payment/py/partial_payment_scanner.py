@@ -0,0 +1,324 @@
+"""Audit past incoming payments for partial payments that were credited at face value"""
+import argparse
+import asyncio
+import csv
+import sqlite3
+import sys
+from decimal import Decimal
+
+import httpx
+
+# References
+# - https://xrpl.org/partial-payments.html#partial-payments-exploit
+# - https://xrpl.org/account_tx.html#account_tx
+# - https://xrpl.org/transaction-metadata.html#delivered_amount
+
+# partial-payment.py shows a payment with tfPartialPayment delivering less than
+# its Amount. A deposit system that credits Amount (DeliverMax in API v2)
+# instead of delivered_amount can be drained this way. This sample walks the
+# history of a set of accounts, or of a range of ledgers, and reports every
+# incoming payment where the partial flag is set or delivered_amount differs
+# from the amount sent. Each one is compared with the amount that was actually
+# credited, taken from an exported credit ledger.
+#
+# Transactions flow through a chain of async generators with a bounded queue
+# between the fetchers and the checks, so memory stays flat however much
+# history is scanned. The credit ledger is loaded into an on-disk SQLite table
+# instead of a dict for the same reason.
+
+JSON_RPC_URL = "https://s.altnet.rippletest.net:51234"
+PARTIAL_PAYMENT = 0x00020000
+DROPS_PER_XRP = Decimal(1000000)
+
+OVERCREDITED = "overcredited"
+CREDITED_OK = "credited correctly"
+NOT_CREDITED = "not credited"
+NO_CREDIT_LEDGER = "not checked"
+
+
+# The same as RpcPool in ../../non-fungible-token/py/nft_offer_aggregator.py; keep the two in step.
+class RpcPool:
+    """
+    A bounded number of JSON-RPC requests in flight, over a bounded number of
+    keep-alive connections. Errors are returned in the result, not raised.
+    """
+
+    def __init__(self, url, max_connections=8, max_in_flight=32):
+        self.url = url
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.http = httpx.AsyncClient(limits=limits, timeout=60)
+        self.limit = asyncio.Semaphore(max_in_flight)
+        self.requests = 0
+
+    async def request(self, method, **params):
+        async with self.limit:
+            self.requests += 1
+            response = await self.http.post(self.url, json={
+                "method": method, "params": [{"api_version": 2, **params}]
+            })
+            return response.json()["result"]
+
+    async def close(self):
+        await self.http.aclose()
+
+
+async def checked(pool, method, **params):
+    result = await pool.request(method, **params)
+    if "error" in result:
+        raise RuntimeError(f"{method}: {result['error']} {result.get('error_message', '')}")
+    return result
+
+
+def amount_parts(amount):
+    """(currency, issuer, value) of an amount; XRP is in drops"""
+    if isinstance(amount, str):
+        return "XRP", "", Decimal(amount)
+    return amount["currency"], amount["issuer"], Decimal(amount["value"])
+
+
+# Sources ---------------------------------------------------------------------
+
+async def validated_range(pool):
+    """The lowest and highest ledger the server has a continuous history for"""
+    info = (await checked(pool, "server_info"))["info"]
+    last_range = info["complete_ledgers"].split(",")[-1]
+    low, _, high = last_range.partition("-")
+    return int(low), int(high or low)
+
+
+async def account_slice(pool, account, ledger_min, ledger_max):
+    marker = None
+    while True:
+        params = {"account": account, "ledger_index_min": ledger_min,
+                  "ledger_index_max": ledger_max, "forward": True, "limit": 400}
+        if marker is not None:
+            params["marker"] = marker
+        result = await checked(pool, "account_tx", **params)
+        for tx in result["transactions"]:
+            yield tx
+        marker = result.get("marker")
+        if marker is None:
+            return
+
+
+async def ledger_transactions(pool, ledger_index):
+    result = await checked(pool, "ledger", ledger_index=ledger_index, transactions=True, expand=True)
+    for tx in result["ledger"].get("transactions", []):
+        yield {"hash": tx["hash"], "ledger_index": ledger_index,
+               "tx_json": tx["tx_json"], "meta": tx["meta"]}
+
+
+def slices(ledger_min, ledger_max, count):
+    """Splits a ledger range into count nearly equal ranges"""
+    size = max(1, (ledger_max - ledger_min + 1) // count)
+    start = ledger_min
+    while start <= ledger_max:
+        end = ledger_max if start + size * 2 > ledger_max + 1 else start + size - 1
+        yield start, end
+        start = end + 1
+
+
+async def fan_in(sources, queue_size=2000, concurrency=16):
+    """fan_in
+
+    Runs many async generators at once and yields what they produce. Producers
+    wait once the queue is full, and at most concurrency of them run at a time,
+    so memory is bounded however many sources there are.
+    """
+    queue = asyncio.Queue(maxsize=queue_size)
+    done = object()
+    sources = iter(sources)
+    running = set()
+
+    async def drain(source):
+        try:
+            async for item in source:
+                await queue.put(item)
+        except Exception as e:
+            await queue.put(e)
+        await queue.put(done)
+
+    def start_next():
+        source = next(sources, None)
+        if source is not None:
+            task = asyncio.ensure_future(drain(source))
+            running.add(task)
+            task.add_done_callback(running.discard)
+        return source is not None
+
+    for _ in range(concurrency):
+        if not start_next():
+            break
+    active = len(running)
+    try:
+        while active:
+            item = await queue.get()
+            if item is done:
+                active -= 1
+                if start_next():
+                    active += 1
+                continue
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        for task in list(running):
+            task.cancel()
+
+
+# Checks ----------------------------------------------------------------------
+
+async def incoming_payments(transactions, accounts):
+    """Successful payments to one of the accounts, or to anyone if accounts is empty"""
+    async for tx in transactions:
+        tx_json = tx["tx_json"]
+        if tx_json.get("TransactionType") != "Payment":
+            continue
+        if accounts and tx_json["Destination"] not in accounts:
+            continue
+        if tx["meta"]["TransactionResult"] != "tesSUCCESS":
+            continue
+        yield tx
+
+
+async def suspicious(payments):
+    """Payments that set tfPartialPayment or delivered something other than what they sent"""
+    async for tx in payments:
+        tx_json, meta = tx["tx_json"], tx["meta"]
+        sent = tx_json.get("DeliverMax", tx_json.get("Amount"))
+        delivered = meta.get("delivered_amount", "unavailable")
+        reasons = []
+        if tx_json.get("Flags", 0) & PARTIAL_PAYMENT:
+            reasons.append("partial flag")
+        if delivered == "unavailable":
+            # Ledgers before 2014-01-20 don't record it
+            reasons.append("delivered_amount unavailable")
+        elif amount_parts(delivered) != amount_parts(sent):
+            reasons.append("delivered differs from sent")
+        if reasons:
+            yield tx, sent, delivered, reasons
+
+
+class CreditLedger:
+    """An exported credit ledger (CSV with tx_hash and amount columns) indexed on disk
+
+    XRP amounts are read as XRP, or as drops if xrp_in_drops is set.
+    """
+
+    def __init__(self, path, db_path="", xrp_in_drops=False):
+        self.xrp_in_drops = xrp_in_drops
+        # An empty db_path makes SQLite use a temporary file, not memory
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("CREATE TABLE credits (tx_hash TEXT PRIMARY KEY, amount TEXT) WITHOUT ROWID")
+        with open(path, newline="") as credit_file, self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO credits VALUES (?, ?)",
+                ((row["tx_hash"].upper(), row["amount"]) for row in csv.DictReader(credit_file)))
+
+    def credited(self, tx_hash):
+        row = self.db.execute("SELECT amount FROM credits WHERE tx_hash = ?", (tx_hash.upper(),)).fetchone()
+        return None if row is None else Decimal(row[0])
+
+    def comparable(self, amount):
+        """The value of a delivered amount in the unit this ledger credits it in"""
+        currency, _, value = amount_parts(amount)
+        if currency == "XRP" and not self.xrp_in_drops:
+            return value / DROPS_PER_XRP
+        return value
+
+
+async def cross_check(findings, credits):
+    async for tx, sent, delivered, reasons in findings:
+        credited = None
+        if credits is None:
+            verdict = NO_CREDIT_LEDGER
+        else:
+            credited = credits.credited(tx["hash"])
+            if credited is None:
+                verdict = NOT_CREDITED
+            elif delivered == "unavailable" or credited > credits.comparable(delivered):
+                verdict = OVERCREDITED
+            else:
+                verdict = CREDITED_OK
+        yield tx, sent, delivered, reasons, credited, verdict
+
+
+# Running ---------------------------------------------------------------------
+
+async def scan(pool, accounts, ledger_min, ledger_max, per_account_slices, ledger_mode):
+    server_min, server_max = await validated_range(pool)
+    ledger_min = max(ledger_min or server_min, server_min)
+    ledger_max = min(ledger_max or server_max, server_max)
+    if ledger_mode:
+        sources = (ledger_transactions(pool, index) for index in range(ledger_min, ledger_max + 1))
+    else:
+        sources = (account_slice(pool, account, low, high)
+                   for account in accounts
+                   for low, high in slices(ledger_min, ledger_max, per_account_slices))
+    async for tx in fan_in(sources):
+        yield tx
+
+
+async def counted(items, counts, key):
+    async for item in items:
+        counts[key] += 1
+        yield item
+
+
+async def main(args):
+    pool = RpcPool(args.url, args.connections, args.in_flight)
+    credits = CreditLedger(args.credits, xrp_in_drops=args.credits_in_drops) if args.credits else None
+    accounts = set(args.accounts)
+    counts = {"transactions": 0, "incoming": 0, "flagged": 0, OVERCREDITED: 0}
+    out = open(args.output, "w", newline="") if args.output != "-" else sys.stdout
+    writer = csv.writer(out)
+    writer.writerow(["tx_hash", "ledger_index", "destination", "sent", "delivered",
+                     "credited", "verdict", "reasons"])
+
+    # Each stage pulls one transaction at a time from the one before it
+    transactions = counted(scan(pool, accounts, args.ledger_min, args.ledger_max, args.slices, args.ledgers),
+                           counts, "transactions")
+    payments = counted(incoming_payments(transactions, accounts), counts, "incoming")
+    async for tx, sent, delivered, reasons, credited, verdict in cross_check(suspicious(payments), credits):
+        counts["flagged"] += 1
+        if verdict == OVERCREDITED:
+            counts[OVERCREDITED] += 1
+        writer.writerow([tx["hash"], tx["ledger_index"], tx["tx_json"]["Destination"],
+                         format_amount(sent), format_amount(delivered),
+                         "" if credited is None else credited, verdict, "; ".join(reasons)])
+
+    await pool.close()
+    if out is not sys.stdout:
+        out.close()
+    print(f"Scanned {counts['transactions']} transaction(s), {counts['incoming']} incoming payment(s): "
+          f"{counts['flagged']} flagged, {counts[OVERCREDITED]} overcredited.", file=sys.stderr)
+
+
+def format_amount(amount):
+    if amount == "unavailable":
+        return amount
+    currency, issuer, value = amount_parts(amount)
+    return f"{value} drops" if currency == "XRP" else f"{value} {currency}.{issuer}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("accounts", nargs="*", help="Deposit accounts to audit")
+    parser.add_argument("--credits", help="CSV export of credits, with tx_hash and amount columns. "
+                                          "XRP amounts are in XRP unless --credits-in-drops is given")
+    parser.add_argument("--credits-in-drops", action="store_true",
+                        help="The credits CSV records XRP amounts in drops")
+    parser.add_argument("--ledger-min", type=int)
+    parser.add_argument("--ledger-max", type=int)
+    parser.add_argument("--ledgers", action="store_true",
+                        help="Scan every ledger in the range instead of each account's history")
+    parser.add_argument("--slices", type=int, default=8,
+                        help="Split each account's history into this many ranges, fetched at once")
+    parser.add_argument("--url", default=JSON_RPC_URL)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--in-flight", type=int, default=16)
+    parser.add_argument("--output", default="-", help="CSV file for flagged payments (default: stdout)")
+    args = parser.parse_args()
+    if not args.accounts and not args.ledgers:
+        parser.error("give some accounts, or --ledgers to scan a ledger range")
+    asyncio.run(main(args))
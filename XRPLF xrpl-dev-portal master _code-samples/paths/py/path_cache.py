@@ -0,0 +1,387 @@
+"""Cache RipplePathFind results and keep hot routes fresh with path_find"""
+import asyncio
+import math
+import time
+from collections import deque
+from decimal import ROUND_UP, Decimal, localcontext
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.asyncio.transaction import autofill_and_sign
+from xrpl.asyncio.wallet import generate_faucet_wallet
+from xrpl.models.amounts import IssuedCurrencyAmount
+from xrpl.models.currencies.xrp import XRP
+from xrpl.models.requests import PathFind, RipplePathFind, Subscribe
+from xrpl.models.requests.path_find import PathFindSubcommand
+from xrpl.models.transactions import Payment
+
+# References
+# - https://xrpl.org/paths.html#paths
+# - https://xrpl.org/ripple_path_find.html#ripple_path_find
+# - https://xrpl.org/path_find.html#path_find-create
+
+# paths.py runs a fresh RipplePathFind for every payment. This sample keeps the
+# alternatives from earlier searches in a cache and only asks the server again
+# when the ledger moves on, or when an order book or trust line that one of the
+# cached paths goes through is touched by a new transaction.
+
+
+def currency_key(currency):
+    """Turn an XRPL currency (dict, model or "XRP") into a (currency, issuer) tuple"""
+    if isinstance(currency, str):
+        return ("XRP", None)
+    if not isinstance(currency, dict):
+        currency = currency.to_dict()
+    if currency.get("currency", "XRP") == "XRP":
+        return ("XRP", None)
+    return (currency["currency"], currency.get("issuer"))
+
+
+def amount_key(amount):
+    """Return the (currency, issuer) of an amount; drops strings are XRP"""
+    if isinstance(amount, str):
+        return ("XRP", None)
+    if not isinstance(amount, dict):
+        amount = amount.to_dict()
+    return currency_key(amount)
+
+
+def amount_value(amount):
+    """Return the value of an amount (drops string, dict or model) as a Decimal"""
+    if isinstance(amount, str):
+        return Decimal(amount)
+    if isinstance(amount, dict):
+        return Decimal(amount["value"])
+    return Decimal(amount.value)
+
+
+def scale_amount(amount, ratio):
+    """Multiply an amount by ratio, keeping its form; drops are rounded up"""
+    if isinstance(amount, str):
+        return str((Decimal(amount) * ratio).to_integral_value(ROUND_UP))
+    with localcontext() as context:
+        # Token amounts have at most 15 significant digits
+        context.prec = 15
+        value = +(Decimal(amount["value"]) * ratio)
+    return {**amount, "value": format(value, "f")}
+
+
+def amount_bucket(amount, steps_per_decade=4):
+    """Group amounts that are close enough to share a path search
+
+    Paths found for 100 USD are just as good for 110 USD, so amounts are bucketed
+    on a log scale instead of being compared exactly.
+    """
+    value = float(amount_value(amount))
+    if value <= 0:
+        return 0
+    return math.floor(math.log10(value) * steps_per_decade)
+
+
+def book_key(a, b):
+    """An order book is the same resource whichever side you trade from"""
+    return ("book", frozenset((a, b)))
+
+
+def line_key(account, currency):
+    return ("line", account, currency)
+
+
+def path_resources(paths, source, destination):
+    """List the order books and trust lines a set of paths goes through"""
+    resources = set()
+    for path in paths:
+        current = source
+        for step in path:
+            if "account" in step:
+                if current[0] != "XRP":
+                    resources.add(line_key(step["account"], current[0]))
+            if "currency" in step or "issuer" in step:
+                next_currency = (
+                    step.get("currency", current[0]),
+                    step.get("issuer", step.get("account", current[1])),
+                )
+                if next_currency[0] == "XRP":
+                    next_currency = ("XRP", None)
+                resources.add(book_key(current, next_currency))
+                current = next_currency
+        if current != destination:
+            resources.add(book_key(current, destination))
+    # Both ends of the payment ripple through their own trust lines
+    for currency in (source, destination):
+        if currency[0] != "XRP" and currency[1]:
+            resources.add(line_key(currency[1], currency[0]))
+    return resources
+
+
+def touched_resources(meta):
+    """List the order books and trust lines a validated transaction modified"""
+    resources = set()
+    for node in meta.get("AffectedNodes", []):
+        entry = next(iter(node.values()))
+        fields = entry.get("FinalFields") or entry.get("NewFields") or {}
+        if entry.get("LedgerEntryType") == "Offer":
+            if "TakerPays" in fields and "TakerGets" in fields:
+                resources.add(book_key(
+                    amount_key(fields["TakerPays"]),
+                    amount_key(fields["TakerGets"]),
+                ))
+        elif entry.get("LedgerEntryType") == "RippleState":
+            if "HighLimit" in fields and "LowLimit" in fields:
+                currency = fields["HighLimit"]["currency"]
+                resources.add(line_key(fields["HighLimit"]["issuer"], currency))
+                resources.add(line_key(fields["LowLimit"]["issuer"], currency))
+    return resources
+
+
+class PathCacheEntry:
+    def __init__(self, alternatives, ledger_index, resources, subscribed=False,
+                 destination_value=None):
+        self.alternatives = alternatives
+        self.ledger_index = ledger_index
+        self.resources = resources
+        self.subscribed = subscribed
+        # The destination amount the alternatives were found for
+        self.destination_value = destination_value
+        self.updated_at = time.monotonic()
+
+    def alternatives_for(self, destination_amount):
+        """The alternatives, with source_amount scaled to destination_amount
+
+        A hit can be for a different amount in the same bucket. Liquidity isn't
+        linear, so scaled alternatives are marked approximate: the paths are
+        still good, but the real cost may differ.
+        """
+        value = amount_value(destination_amount)
+        if self.destination_value is None or value == self.destination_value:
+            return self.alternatives
+        ratio = value / self.destination_value
+        return [
+            {**alternative,
+             "source_amount": scale_amount(alternative["source_amount"], ratio),
+             "approximate": True}
+            for alternative in self.alternatives
+        ]
+
+
+class PathCache:
+    """Path-finding results keyed by route, invalidated by ledgers and touched state
+
+    Entries that are kept up to date by a path_find subscription survive ledger
+    closes, because the server pushes new alternatives for them on its own.
+    Every other entry lives for at most max_ledger_age ledgers.
+    """
+
+    def __init__(self, max_ledger_age=1):
+        self.max_ledger_age = max_ledger_age
+        self.entries = {}
+        self.by_resource = {}
+        self.ledger_index = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Seconds since the entry was last refreshed, for recent hits only
+        self.hit_ages = deque(maxlen=1000)
+
+    @staticmethod
+    def key(source_account, source_currencies, destination_account, destination_amount):
+        destination = amount_key(destination_amount)
+        sources = tuple(sorted(
+            currency_key(c) for c in source_currencies or [XRP()]
+        ))
+        return (
+            source_account,
+            sources,
+            destination_account,
+            destination[0],
+            destination[1],
+            amount_bucket(destination_amount),
+        )
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.hit_ages.append(time.monotonic() - entry.updated_at)
+        return entry
+
+    def put(self, key, alternatives, ledger_index=None, subscribed=False,
+            destination_amount=None):
+        # Replacing an entry with fresh results is a refresh, not an invalidation
+        self.remove(key)
+        destination = (key[3], key[4])
+        resources = set()
+        for alternative in alternatives:
+            source = amount_key(alternative["source_amount"])
+            resources |= path_resources(
+                alternative.get("paths_computed", []), source, destination
+            )
+        entry = PathCacheEntry(
+            alternatives,
+            ledger_index or self.ledger_index,
+            resources,
+            subscribed,
+            None if destination_amount is None else amount_value(destination_amount),
+        )
+        self.entries[key] = entry
+        for resource in resources:
+            self.by_resource.setdefault(resource, set()).add(key)
+        return entry
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        for resource in entry.resources:
+            keys = self.by_resource.get(resource)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self.by_resource[resource]
+        return entry
+
+    def discard(self, key):
+        if self.remove(key) is not None:
+            self.invalidations += 1
+
+    def on_ledger_closed(self, ledger_index):
+        self.ledger_index = ledger_index
+        expired = [
+            key for key, entry in self.entries.items()
+            if not entry.subscribed
+            and ledger_index - entry.ledger_index >= self.max_ledger_age
+        ]
+        for key in expired:
+            self.discard(key)
+
+    def on_transaction(self, meta):
+        for resource in touched_resources(meta):
+            for key in list(self.by_resource.get(resource, ())):
+                # Subscribed routes get a fresh push from the server instead
+                if not self.entries[key].subscribed:
+                    self.discard(key)
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        ages = sorted(self.hit_ages)
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "staleness_p50_seconds": ages[len(ages) // 2] if ages else 0.0,
+            "staleness_max_seconds": ages[-1] if ages else 0.0,
+        }
+
+
+async def find_paths(client, cache, source_account, destination_account,
+                     destination_amount, source_currencies=None):
+    """Return path alternatives for a route, from the cache when possible"""
+    key = cache.key(source_account, source_currencies,
+                    destination_account, destination_amount)
+    entry = cache.get(key)
+    if entry is not None:
+        return entry.alternatives_for(destination_amount)
+
+    response = await client.request(RipplePathFind(
+        source_account=source_account,
+        source_currencies=source_currencies or [XRP()],
+        destination_account=destination_account,
+        destination_amount=destination_amount,
+    ))
+    alternatives = response.result.get("alternatives", [])
+    # The search ran against the open ledger, which builds on the last closed
+    # one. Entries are aged against closed ledgers, so record that instead.
+    current = response.result.get("ledger_current_index")
+    cache.put(key, alternatives, current - 1 if current else None,
+              destination_amount=destination_amount)
+    return alternatives
+
+
+async def follow_ledger(url, cache):
+    """Invalidate cache entries from the ledger and transaction streams"""
+    async with AsyncWebsocketClient(url) as client:
+        await client.send(Subscribe(streams=["ledger", "transactions"]))
+        async for message in client:
+            if message.get("type") == "ledgerClosed":
+                cache.on_ledger_closed(message["ledger_index"])
+            elif message.get("type") == "transaction" and message.get("validated"):
+                cache.on_transaction(message.get("meta", {}))
+
+
+async def keep_route_hot(url, cache, source_account, destination_account,
+                         destination_amount, source_currencies=None):
+    """Back one hot route with a long-lived path_find subscription
+
+    rippled only allows one open path_find per connection, so each hot route
+    gets its own websocket.
+    """
+    key = cache.key(source_account, source_currencies,
+                    destination_account, destination_amount)
+    async with AsyncWebsocketClient(url) as client:
+        await client.send(PathFind(
+            subcommand=PathFindSubcommand.CREATE,
+            source_account=source_account,
+            source_currencies=source_currencies or [XRP()],
+            destination_account=destination_account,
+            destination_amount=destination_amount,
+        ))
+        try:
+            async for message in client:
+                # The first reply is the response to the create request, later
+                # ones are asynchronous "path_find" updates for the same route.
+                result = message.get("result", message)
+                if "alternatives" in result:
+                    cache.put(key, result["alternatives"], subscribed=True,
+                              destination_amount=destination_amount)
+        finally:
+            cache.remove(key)
+
+
+async def main():
+    url = "wss://s.altnet.rippletest.net:51233"
+    cache = PathCache()
+
+    destination_account = "rKT4JX4cCof6LcDYRz8o3rGRu7qxzZ2Zwj"
+    destination_amount = IssuedCurrencyAmount(
+        value="0.001",
+        currency="USD",
+        issuer="rVnYNK9yuxBz4uP8zC8LEFokM2nqH3poc",
+    )
+
+    async with AsyncWebsocketClient(url) as client:
+        wallet = await generate_faucet_wallet(client, debug=True)
+
+        watchers = [
+            asyncio.create_task(follow_ledger(url, cache)),
+            asyncio.create_task(keep_route_hot(
+                url, cache, wallet.address, destination_account, destination_amount
+            )),
+        ]
+
+        # Several payments along the same route only search for paths once
+        for _ in range(3):
+            alternatives = await find_paths(
+                client, cache, wallet.address, destination_account, destination_amount
+            )
+            if not alternatives:
+                print("No paths found")
+                break
+            payment_tx = Payment(
+                account=wallet.address,
+                amount=destination_amount,
+                destination=destination_account,
+                paths=alternatives[0]["paths_computed"],
+            )
+            print("signed: ", await autofill_and_sign(payment_tx, client, wallet))
+            await asyncio.sleep(2)
+
+        print(cache.metrics())
+        for task in watchers:
+            task.cancel()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,345 @@
+# neccesary imports
+import argparse
+import asyncio
+import csv
+import importlib
+import statistics
+import time
+from collections import deque
+from decimal import Decimal
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.asyncio.ledger import get_fee
+from xrpl.asyncio.transaction import submit, submit_and_wait
+from xrpl.models import AccountObjects, AccountObjectType, OracleSet, Subscribe, TicketCreate
+from xrpl.models.transactions.oracle_set import PriceData
+from xrpl.transaction import sign
+from xrpl.utils import str_to_hex
+from xrpl.wallet import Wallet
+
+# Keeps the prices of many pairs current across several oracle documents.
+#
+# create_price_oracle.py sends one OracleSet with one price and waits for it.
+# This feeder reads prices from local sources every interval, takes the median
+# when several sources report the same pair, and packs the pairs ten to a
+# document (the most an oracle can hold). A document is only updated when one
+# of its prices moved by more than the threshold, or when it hasn't been
+# updated for max_age seconds.
+#
+# An OracleSet removes the price of every pair it leaves out, so when a
+# document is updated all of its pairs go along. The fee is the same however
+# many pairs an OracleSet carries, so the threshold saves whole transactions.
+# A pair no source has reported for max_age seconds is left out, so its price
+# is removed rather than republished with a new LastUpdateTime as if current.
+#
+# Each OracleSet uses its own ticket, so updates to different documents are
+# sent together in the same ledger and one that fails doesn't hold up the
+# rest. At most budget updates are sent per ledger, the largest moves first.
+#
+# A source is a CSV file of base,quote,price rows that something else keeps
+# writing, or "module:name" for any object with an async read() method that
+# returns (base, quote, price) tuples.
+
+WS_URL = "wss://s.altnet.rippletest.net:51233"
+
+# Most PriceData entries in one oracle document
+MAX_PRICE_DATA_SERIES = 10
+MAX_SCALE = 10
+# Most tickets an account can hold
+MAX_TICKETS = 250
+
+
+def asset_field(code):
+    """Three-letter codes are used as they are, longer ones as 40 hex digits"""
+    if len(code) == 3 or len(code) == 40:
+        return code
+    return str_to_hex(code).upper().ljust(40, "0")
+
+
+def encode_price(price):
+    """(AssetPrice, Scale) for a price, with as few decimal places as it needs"""
+    price = Decimal(price).normalize()
+    scale = min(max(-price.as_tuple().exponent, 0), MAX_SCALE)
+    return int(price.scaleb(scale).to_integral_value()), scale
+
+
+def decode_price(price_data):
+    """The price in a PriceData entry of a ledger object, or None if it has none"""
+    if "AssetPrice" not in price_data:
+        return None
+    # The ledger returns AssetPrice as a hex string
+    return Decimal(int(price_data["AssetPrice"], 16)).scaleb(-price_data.get("Scale", 0))
+
+
+# Sources ---------------------------------------------------------------------
+
+class CsvSource:
+    def __init__(self, path):
+        self.path = path
+
+    def read_file(self):
+        with open(self.path, newline="") as price_file:
+            return [(row[0], row[1], Decimal(row[2])) for row in csv.reader(price_file) if len(row) >= 3]
+
+    async def read(self):
+        return await asyncio.to_thread(self.read_file)
+
+
+def load_source(spec):
+    if spec.endswith(".csv"):
+        return CsvSource(spec)
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name)()
+
+
+async def collect(sources):
+    """One price per pair from every source, as the median across sources"""
+    results = await asyncio.gather(*[source.read() for source in sources], return_exceptions=True)
+    reported = {}
+    for source, prices in zip(sources, results):
+        if isinstance(prices, Exception):
+            print(f"source {source!r} failed: {prices}")
+            continue
+        # If a source reports a pair more than once, its last price counts
+        latest = {(asset_field(base), asset_field(quote)): Decimal(price) for base, quote, price in prices}
+        for pair, price in latest.items():
+            reported.setdefault(pair, []).append(price)
+    return {pair: statistics.median(prices) for pair, prices in reported.items()}
+
+
+# Feeding ---------------------------------------------------------------------
+
+class Feeder:
+    def __init__(self, wallet, sources, provider, asset_class, threshold=0.001, max_age=120,
+                 budget=10, interval=5, first_document_id=1):
+        self.wallet = wallet
+        self.sources = sources
+        self.provider = str_to_hex(provider)
+        self.asset_class = str_to_hex(asset_class)
+        self.threshold = Decimal(str(threshold))
+        self.max_age = max_age
+        self.budget = budget
+        self.interval = interval
+        self.first_document_id = first_document_id
+        # document id -> {pair: price last written to the ledger, or None}
+        self.documents = {}
+        self.document_of = {}
+        self.updated = {}
+        self.latest = {}
+        # pair -> time a source last reported it
+        self.observed = {}
+        self.tickets = deque()
+        self.topping_up = None
+        # document id -> time before which it isn't sent again after a malformed update
+        self.held = {}
+        # tx hash -> (document id, ticket, prices sent, last ledger)
+        self.in_flight = {}
+
+    async def account_objects(self, client, object_type):
+        objects, marker = [], None
+        while True:
+            response = await client.request(AccountObjects(
+                account=self.wallet.address, type=object_type, ledger_index="validated", marker=marker
+            ))
+            if not response.is_successful():
+                raise RuntimeError(f"account_objects {object_type.value}: {response.result.get('error')}")
+            objects += response.result["account_objects"]
+            marker = response.result.get("marker")
+            if marker is None:
+                return objects
+
+    async def load(self, client):
+        """Picks up the documents and tickets the account already has"""
+        for oracle in await self.account_objects(client, AccountObjectType.ORACLE):
+            document_id = oracle["OracleDocumentID"]
+            self.documents[document_id] = {}
+            self.updated[document_id] = oracle.get("LastUpdateTime", 0)
+            for entry in oracle.get("PriceDataSeries", []):
+                price_data = entry["PriceData"]
+                pair = (price_data["BaseAsset"], price_data["QuoteAsset"])
+                self.documents[document_id][pair] = decode_price(price_data)
+                self.document_of[pair] = document_id
+        tickets = await self.account_objects(client, AccountObjectType.TICKET)
+        self.tickets.extend(sorted(ticket["TicketSequence"] for ticket in tickets))
+        print(f"Found {len(self.documents)} oracle document(s) and {len(self.tickets)} ticket(s).")
+
+    def place(self, pair):
+        """Puts a new pair in the first document with room, or starts a new one"""
+        for document_id, pairs in self.documents.items():
+            if len(pairs) < MAX_PRICE_DATA_SERIES:
+                break
+        else:
+            document_id = max(self.documents, default=self.first_document_id - 1) + 1
+            self.documents[document_id] = {}
+        self.documents[document_id][pair] = None
+        self.document_of[pair] = document_id
+
+    async def poll(self):
+        while True:
+            prices = await collect(self.sources)
+            for pair in prices.keys() - self.document_of.keys():
+                self.place(pair)
+            self.latest.update(prices)
+            now = int(time.time())
+            self.observed.update((pair, now) for pair in prices)
+            await asyncio.sleep(self.interval)
+
+    def fresh(self, pair, now):
+        return now - self.observed.get(pair, float("-inf")) < self.max_age
+
+    def move(self, document_id, now):
+        """How far the document's prices moved since it was written, or None if it can wait"""
+        pairs = self.documents[document_id]
+        fresh = [pair for pair in pairs if self.fresh(pair, now)]
+        if not fresh:
+            # Nothing current to publish
+            return None
+        largest = Decimal(0)
+        for pair in fresh:
+            sent = pairs[pair]
+            if sent is None or sent == 0:
+                return Decimal("Infinity")
+            largest = max(largest, abs(self.latest[pair] - sent) / sent)
+        if largest >= self.threshold:
+            return largest
+        if len(fresh) < sum(sent is not None for sent in pairs.values()):
+            # A pair went stale; remove its price from the ledger
+            return Decimal(0)
+        if now - self.updated.get(document_id, 0) >= self.max_age:
+            return Decimal(0)
+        return None
+
+    def due(self, now):
+        busy = {document_id for document_id, _, _, _ in self.in_flight.values()}
+        moves = [(self.move(document_id, now), document_id)
+                 for document_id in self.documents
+                 if document_id not in busy and self.held.get(document_id, 0) <= now]
+        moves = [(move, document_id) for move, document_id in moves if move is not None]
+        moves.sort(reverse=True)
+        return [document_id for _, document_id in moves[:self.budget]]
+
+    async def top_up(self, client):
+        """Creates tickets so there are enough for two ledgers' worth of updates"""
+        count = min(self.budget * 2, MAX_TICKETS - len(self.tickets) - len(self.in_flight))
+        if count <= 0:
+            return
+        response = await submit_and_wait(TicketCreate(account=self.wallet.address, ticket_count=count),
+                                         client, self.wallet)
+        for node in response.result["meta"]["AffectedNodes"]:
+            created = node.get("CreatedNode", {})
+            if created.get("LedgerEntryType") == "Ticket":
+                self.tickets.append(created["NewFields"]["TicketSequence"])
+        print(f"Created {count} ticket(s).")
+
+    def topped_up(self, task):
+        # Nothing awaits the task, so report a failure here. The next wave
+        # tries again while tickets are short.
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Creating tickets failed: {task.exception()!r}")
+
+    async def wave(self, client, ledger_index):
+        if len(self.tickets) < self.budget and (self.topping_up is None or self.topping_up.done()):
+            self.topping_up = asyncio.create_task(self.top_up(client))
+            self.topping_up.add_done_callback(self.topped_up)
+        now = int(time.time())
+        documents = self.due(now)[:len(self.tickets)]
+        if not documents:
+            return
+        fee = await get_fee(client)
+
+        signed = []
+        for document_id in documents:
+            # Pairs the sources stopped reporting are left out, which removes
+            # their price from the document
+            prices = {pair: self.latest[pair] for pair in self.documents[document_id] if self.fresh(pair, now)}
+            series = []
+            for (base, quote), price in prices.items():
+                asset_price, scale = encode_price(price)
+                series.append(PriceData(base_asset=base, quote_asset=quote, asset_price=asset_price, scale=scale))
+            ticket = self.tickets.popleft()
+            new = document_id not in self.updated
+            tx = sign(OracleSet(
+                account=self.wallet.address,
+                oracle_document_id=document_id,
+                # Provider and AssetClass are only needed when the document is created
+                provider=self.provider if new else None,
+                asset_class=self.asset_class if new else None,
+                last_update_time=now,
+                price_data_series=series,
+                sequence=0,
+                ticket_sequence=ticket,
+                fee=fee,
+                last_ledger_sequence=ledger_index + 4,
+            ), self.wallet)
+            signed.append(tx)
+            self.in_flight[tx.get_hash()] = (document_id, ticket, prices, ledger_index + 4)
+
+        responses = await asyncio.gather(*[submit(tx, client) for tx in signed], return_exceptions=True)
+        for tx, response in zip(signed, responses):
+            result = response if isinstance(response, Exception) else response.result.get("engine_result")
+            if result in ("tesSUCCESS", "terQUEUED") or str(result).startswith("tec"):
+                continue
+            document_id, ticket, _, _ = self.in_flight.pop(tx.get_hash())
+            print(f"  document {document_id}: {result}")
+            # A rejected transaction doesn't use its ticket
+            if result != "tefNO_TICKET":
+                self.tickets.append(ticket)
+            if str(result).startswith("tem"):
+                # Sending the same document again would fail the same way
+                self.held[document_id] = now + self.max_age
+        print(f"Ledger {ledger_index}: updating {len(signed)} document(s), {len(self.tickets)} ticket(s) left.")
+
+    def settle(self, tx_hash, meta):
+        document_id, _, prices, _ = self.in_flight.pop(tx_hash)
+        result = meta["TransactionResult"]
+        if result != "tesSUCCESS":
+            print(f"  document {document_id}: {result}")
+            return
+        # Pairs left out of the update no longer have a price on the ledger
+        self.documents[document_id] = {pair: prices.get(pair) for pair in self.documents[document_id]}
+        self.updated[document_id] = int(time.time())
+
+    def expire(self, ledger_index):
+        for tx_hash, (document_id, ticket, _, last_ledger) in list(self.in_flight.items()):
+            if last_ledger < ledger_index:
+                # It never made it into a ledger, so the ticket is still unused
+                del self.in_flight[tx_hash]
+                self.tickets.append(ticket)
+
+    async def run(self, url):
+        async with AsyncWebsocketClient(url) as client:
+            await client.request(Subscribe(streams=["ledger"], accounts=[self.wallet.address]))
+            await self.load(client)
+            poller = asyncio.create_task(self.poll())
+            try:
+                async for message in client:
+                    if message.get("type") == "transaction" and message.get("validated"):
+                        tx_hash = message.get("hash") or message["transaction"]["hash"]
+                        if tx_hash in self.in_flight:
+                            self.settle(tx_hash, message["meta"])
+                    elif message.get("type") == "ledgerClosed":
+                        self.expire(message["ledger_index"])
+                        await self.wave(client, message["ledger_index"])
+            finally:
+                poller.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feed prices from local sources into price oracles")
+    parser.add_argument("sources", nargs="+", help="CSV files of base,quote,price rows, or module:name")
+    parser.add_argument("--provider", default="provider")
+    parser.add_argument("--asset-class", default="currency")
+    parser.add_argument("--threshold", type=float, default=0.001, help="Relative move that triggers an update")
+    parser.add_argument("--max-age", type=int, default=120, help="Seconds before a document is updated anyway, and before a pair no source reports is dropped")
+    parser.add_argument("--budget", type=int, default=10, help="Most OracleSet transactions per ledger")
+    parser.add_argument("--interval", type=float, default=5, help="Seconds between reads of the sources")
+    parser.add_argument("--first-document-id", type=int, default=1)
+    parser.add_argument("--url", default=WS_URL)
+    args = parser.parse_args()
+
+    # input the seed of the account that owns the oracles
+    seed = input("enter the seed of the oracle account: ")
+    feeder = Feeder(Wallet.from_seed(seed), [load_source(spec) for spec in args.sources], args.provider,
+                    args.asset_class, args.threshold, args.max_age, args.budget, args.interval,
+                    args.first_document_id)
+    asyncio.run(feeder.run(args.url))
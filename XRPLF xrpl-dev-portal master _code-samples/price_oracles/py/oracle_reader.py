@@ -0,0 +1,102 @@
+# neccesary imports
+import argparse
+import asyncio
+import statistics
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.models import AccountObjects, AccountObjectType
+
+from oracle_feeder import WS_URL, decode_price
+
+# Reads the latest prices of many oracles in one pass and aggregates them.
+#
+# get_aggregate_price answers for one pair at a time and reads every oracle
+# again for each pair. This reader fetches every oracle document of a set of
+# accounts at once, then computes the same statistics (mean, median, trimmed
+# mean and standard deviation) for every pair locally.
+#
+# Unlike get_aggregate_price, a pair whose price was removed from the latest
+# version of a document is left out rather than looked up in older versions.
+
+async def account_oracles(client, account):
+    oracles, marker = [], None
+    while True:
+        response = await client.request(AccountObjects(
+            account=account, type=AccountObjectType.ORACLE, ledger_index="validated", marker=marker
+        ))
+        if not response.is_successful():
+            raise RuntimeError(f"account_objects {account}: {response.result.get('error')}")
+        oracles += response.result["account_objects"]
+        marker = response.result.get("marker")
+        if marker is None:
+            return oracles
+
+
+async def read_prices(url, accounts):
+    """(base, quote) -> list of (price, last update time, account, document id), from every oracle at once"""
+    async with AsyncWebsocketClient(url) as client:
+        results = await asyncio.gather(*[account_oracles(client, account) for account in accounts])
+    prices = {}
+    for oracles in results:
+        for oracle in oracles:
+            for entry in oracle.get("PriceDataSeries", []):
+                price_data = entry["PriceData"]
+                price = decode_price(price_data)
+                if price is None:
+                    continue
+                prices.setdefault((price_data["BaseAsset"], price_data["QuoteAsset"]), []).append(
+                    (price, oracle["LastUpdateTime"], oracle["Owner"], oracle["OracleDocumentID"]))
+    return prices
+
+
+def summarize(values):
+    return {
+        "mean": statistics.mean(values) if len(values) else None,
+        "size": len(values),
+        "standard_deviation": statistics.stdev(values) if len(values) > 1 else 0,
+    }
+
+
+def aggregate(entries, trim=None, time_threshold=None):
+    """
+    The same statistics get_aggregate_price returns, from read_prices entries.
+    trim is the percentage of prices (1-25) dropped from each end for the
+    trimmed set, and time_threshold drops prices older than that many seconds
+    before the most recent one.
+    """
+    if trim and not 1 <= trim <= 25:
+        raise ValueError(f"trim must be between 1 and 25, not {trim}")
+    if not entries:
+        return None
+    latest = max(updated for _, updated, _, _ in entries)
+    if time_threshold is not None:
+        entries = [entry for entry in entries if latest - entry[1] <= time_threshold]
+    values = sorted(price for price, _, _, _ in entries)
+    result = {
+        "entire_set": summarize(values),
+        "median": statistics.median(values),
+        "time": latest,
+    }
+    if trim:
+        cut = len(values) * trim // 100
+        result["trimmed_set"] = summarize(values[cut:len(values) - cut])
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate the latest prices of many oracles at once")
+    parser.add_argument("accounts", nargs="+", help="Accounts that own oracles")
+    parser.add_argument("--trim", type=int, default=20,
+                        help="Percentage of prices (1-25) dropped from each end for the trimmed mean")
+    parser.add_argument("--time-threshold", type=int)
+    parser.add_argument("--url", default=WS_URL)
+    args = parser.parse_args()
+    if not 1 <= args.trim <= 25:
+        parser.error("--trim must be between 1 and 25")
+
+    prices = asyncio.run(read_prices(args.url, args.accounts))
+    for (base, quote), entries in sorted(prices.items()):
+        result = aggregate(entries, args.trim, args.time_threshold)
+        trimmed = result.get("trimmed_set", result["entire_set"])
+        print(f"{base}/{quote}: median {result['median']}, mean {result['entire_set']['mean']:.10g}, "
+              f"trimmed mean {trimmed['mean']:.10g}, from {result['entire_set']['size']} oracle(s)")
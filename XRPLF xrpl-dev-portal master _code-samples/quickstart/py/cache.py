@@ -0,0 +1,171 @@
+import asyncio
+import copy
+import json
+from collections import OrderedDict
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.asyncio.clients.utils import request_to_json_rpc
+from xrpl.core.addresscodec import is_valid_classic_address
+from xrpl.core.binarycodec import decode
+from xrpl.models.requests import StreamParameter, Subscribe
+
+# Reads of the validated ledger that can be answered from the cache until the
+# next ledger is validated.
+CACHED_COMMANDS = {
+    "account_currencies", "account_info", "account_lines", "account_nfts",
+    "account_objects", "account_offers", "gateway_balances",
+}
+SUBMIT_COMMANDS = {"submit", "submit_multisigned"}
+# Seconds to wait before reconnecting a dropped ledger stream
+RECONNECT_DELAY = 2
+# Answers kept per network; the least recently used are dropped first
+MAX_ENTRIES = 1000
+
+
+def touched_accounts(value, accounts=None):
+    """touched_accounts
+
+    Every classic address anywhere in a transaction or its metadata.
+    """
+    if accounts is None:
+        accounts = set()
+    if isinstance(value, dict):
+        for item in value.values():
+            touched_accounts(item, accounts)
+    elif isinstance(value, list):
+        for item in value:
+            touched_accounts(item, accounts)
+    elif isinstance(value, str) and value.startswith("r") and is_valid_classic_address(value):
+        accounts.add(value)
+    return accounts
+
+
+class LedgerWatcher:
+    """
+    Follows the ledger stream on one WebSocket connection and remembers the
+    latest validated ledger index. The index is None until the stream is up,
+    and again whenever the connection drops.
+    """
+
+    def __init__(self, ws_url):
+        self.ws_url = ws_url
+        self.validated_index = None
+        self.task = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.ensure_future(self.watch())
+
+    async def watch(self):
+        while True:
+            try:
+                async with AsyncWebsocketClient(self.ws_url) as client:
+                    response = await client.request(Subscribe(streams=[StreamParameter.LEDGER]))
+                    self.validated_index = response.result.get("ledger_index")
+                    async for message in client:
+                        if message.get("type") == "ledgerClosed":
+                            self.validated_index = message["ledger_index"]
+            except Exception as e:
+                print(f"Ledger stream {self.ws_url} lost: {e!r}")
+            self.validated_index = None
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+class ReadCache:
+    """
+    Read-through cache for reads of the validated ledger, keyed by command,
+    parameters and ledger index. An answer stays good until the ledger stream
+    reports a newer validated ledger, or until a transaction sent through the
+    same client touches one of the accounts it is about.
+
+    Must only be used from one event loop (the connection pool's).
+    """
+
+    def __init__(self, ws_url, max_entries=MAX_ENTRIES):
+        self.watcher = LedgerWatcher(ws_url)
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.invalidations = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "validated_ledger": self.watcher.validated_index,
+        }
+
+    def invalidate(self, accounts):
+        for key, entry in self.entries.items():
+            if entry["account"] in accounts and not entry["invalid"]:
+                entry["invalid"] = True
+                self.invalidations += 1
+        self.generation += 1
+
+    async def request(self, request, fetch):
+        """
+        Answers request from the cache if it can, or else calls fetch() for a
+        fresh response.
+        """
+        self.watcher.start()
+        payload = request_to_json_rpc(request)
+        method = payload["method"]
+        params = payload["params"][0] if payload["params"] else {}
+
+        if method in SUBMIT_COMMANDS:
+            self.invalidate(self.submitted_accounts(params))
+            response = await fetch()
+            # The transaction may have been applied by the time the answer
+            # comes back, so drop anything read in the meantime too.
+            self.invalidate(self.submitted_accounts(params))
+            return response
+
+        if method not in CACHED_COMMANDS or params.get("ledger_index") != "validated":
+            response = await fetch()
+            if method == "tx" and response.is_successful() and response.result.get("validated"):
+                self.invalidate(touched_accounts(response.result))
+            return response
+
+        current = self.watcher.validated_index
+        key = json.dumps({"method": method, **params}, sort_keys=True)
+        entry = self.entries.get(key)
+        if entry is not None and current is not None:
+            if not entry["invalid"] and entry["ledger_index"] >= current:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return copy.deepcopy(entry["response"])
+            self.stale += 1
+        self.misses += 1
+
+        generation = self.generation
+        response = await fetch()
+        ledger_index = response.result.get("ledger_index", current)
+        # Don't keep an answer if a transaction touched anything while it was
+        # being fetched: it may be from before the transaction.
+        if response.is_successful() and ledger_index is not None and generation == self.generation:
+            self.entries[key] = {
+                "response": copy.deepcopy(response),
+                "ledger_index": ledger_index,
+                "account": params.get("account"),
+                "invalid": False,
+            }
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return response
+
+    def submitted_accounts(self, params):
+        if "tx_blob" in params:
+            try:
+                return touched_accounts(decode(params["tx_blob"]))
+            except Exception:
+                return {entry["account"] for entry in self.entries.values()}
+        return touched_accounts(params.get("tx_json", {}))
@@ -0,0 +1,182 @@
+import asyncio
+import copy
+import json
+import threading
+from json import JSONDecodeError
+
+import httpx
+from xrpl.asyncio.clients.client import REQUEST_TIMEOUT
+from xrpl.asyncio.clients.exceptions import XRPLRequestFailureException
+from xrpl.asyncio.clients.utils import json_to_response, request_to_json_rpc
+from xrpl.clients import JsonRpcClient
+
+from cache import ReadCache
+
+# Settings for each network the modules talk to. A network can be looked up
+# by name or by its public URL, so pointing a network at another server with
+# configure_network() moves every module that uses it. Reads of the validated
+# ledger are cached when the network has a WebSocket URL to follow the ledger
+# stream on.
+NETWORKS = {
+    "devnet": {"url": "https://s.devnet.rippletest.net:51234", "ws_url": "wss://s.devnet.rippletest.net:51233",
+               "max_connections": 20, "coalesce": True, "cache": True},
+    "testnet": {"url": "https://s.altnet.rippletest.net:51234", "ws_url": "wss://s.altnet.rippletest.net:51233",
+                "max_connections": 20, "coalesce": True, "cache": True},
+}
+DEFAULT_SETTINGS = {"ws_url": None, "max_connections": 20, "coalesce": True, "cache": True}
+PUBLIC_URLS = {settings["url"]: name for name, settings in NETWORKS.items()}
+
+# Requests that change something or return something new every time, so two
+# identical ones must both reach the server.
+NOT_COALESCED = {
+    "channel_authorize", "ledger_accept", "random", "sign", "sign_for",
+    "submit", "submit_multisigned", "wallet_propose",
+}
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP connections for every network, owned by one event loop
+    running in a background thread. Sync callers (each running their own
+    short-lived event loop) and async callers on any loop all send their
+    requests through it, so connections and TLS sessions outlive the call that
+    opened them.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.http_clients = {}
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(target=self.loop.run_forever, name="xrpl-connection-pool", daemon=True).start()
+        return self.loop
+
+    async def send(self, settings, request, timeout, coalesce):
+        url = settings["url"]
+        if url not in self.http_clients:
+            limits = httpx.Limits(max_connections=settings["max_connections"],
+                                  max_keepalive_connections=settings["max_connections"])
+            self.http_clients[url] = httpx.AsyncClient(limits=limits)
+        payload = request_to_json_rpc(request)
+        if not coalesce or payload["method"] in NOT_COALESCED:
+            return await self.post(url, payload, timeout)
+
+        # Identical reads that overlap share one round trip. Each caller gets
+        # its own copy of the result, so one can't change another's.
+        key = (url, json.dumps(payload, sort_keys=True))
+        shared = self.in_flight.get(key)
+        if shared is None:
+            shared = asyncio.ensure_future(self.post(url, payload, timeout))
+            self.in_flight[key] = shared
+            shared.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        response = await asyncio.shield(shared)
+        return copy.deepcopy(response)
+
+    async def post(self, url, payload, timeout):
+        response = await self.http_clients[url].post(url, json=payload, timeout=timeout)
+        try:
+            return json_to_response(response.json())
+        except JSONDecodeError:
+            raise XRPLRequestFailureException({
+                "error": response.status_code,
+                "error_message": response.text,
+            })
+
+
+pool = ConnectionPool()
+clients = {}
+
+
+class PooledJsonRpcClient(JsonRpcClient):
+    """
+    A JsonRpcClient that sends its requests over the shared connection pool.
+    Use request() from sync code, and request_async() or any xrpl.asyncio
+    helper from async code.
+    """
+
+    def __init__(self, settings):
+        super().__init__(settings["url"])
+        self.settings = settings
+        self.cache = None
+        if settings["cache"] and settings["ws_url"]:
+            self.cache = ReadCache(settings["ws_url"])
+
+    async def _request_impl(self, request, *, timeout=REQUEST_TIMEOUT):
+        future = asyncio.run_coroutine_threadsafe(self.send(request, timeout), pool.start())
+        return await asyncio.wrap_future(future)
+
+    async def send(self, request, timeout):
+        def fetch():
+            return pool.send(self.settings, request, timeout, self.settings["coalesce"])
+        if self.cache is None:
+            return await fetch()
+        return await self.cache.request(request, fetch)
+
+    async def request_async(self, request):
+        return await self._request_impl(request)
+
+
+def network_name(network):
+    if network in NETWORKS:
+        return network
+    url = network.rstrip("/")
+    if url in PUBLIC_URLS:
+        return PUBLIC_URLS[url]
+    # Any other URL is a network of its own, with the default settings
+    NETWORKS.setdefault(url, {**DEFAULT_SETTINGS, "url": url})
+    return url
+
+
+def configure_network(name, url=None, max_connections=None, coalesce=None, ws_url=None, cache=None):
+    """configure_network
+
+    Adds a network or changes its settings. Clients handed out before the
+    change keep the old settings.
+    """
+    settings = dict(NETWORKS.get(name, {**DEFAULT_SETTINGS, "url": url}))
+    if url is not None:
+        settings["url"] = url.rstrip("/")
+    if ws_url is not None:
+        settings["ws_url"] = ws_url
+    elif url is not None and name in NETWORKS:
+        # The public stream says nothing about another server's ledgers
+        settings["ws_url"] = None
+    if max_connections is not None:
+        settings["max_connections"] = max_connections
+    if coalesce is not None:
+        settings["coalesce"] = coalesce
+    if cache is not None:
+        settings["cache"] = cache
+    with pool.lock:
+        NETWORKS[name] = settings
+        clients.pop(name, None)
+    return settings
+
+
+def get_client(network):
+    """get_client
+
+    Returns the process-wide client for a network name or URL.
+    """
+    name = network_name(network)
+    with pool.lock:
+        if name not in clients:
+            clients[name] = PooledJsonRpcClient(NETWORKS[name])
+        return clients[name]
+
+
+def cache_stats(network):
+    """cache_stats
+
+    Hit, miss and staleness counters for a network's read cache, or None if
+    its reads aren't cached.
+    """
+    client = get_client(network)
+    if client.cache is None:
+        return None
+    return client.cache.stats()
@@ -2,7 +2,8 @@ import tkinter as tk
 import xrpl
 import json
 
-from mod1 import get_account, get_account_info, send_xrp
+from mod1 import get_account_async, get_account_info_async, send_xrp_async
+from tasks import TaskRunner
 
 #############################################
 ## Handlers #################################
@@ -11,58 +12,76 @@ from mod1 import get_account, get_account_info, send_xrp
 # sb seed: snk7pMfHPZoUpwMQuFApo3XTLRJhn
 # op seed: spmiHeaCDMFX56SNZVsCbi34WEE52
 
+# Each handler hands its network calls to the task runner and returns at once,
+# so the window keeps responding. The on_done callbacks run back on the Tk
+# thread once the results arrive. Transactions from the same account share a
+# key, so they run one at a time; the two accounts run side by side.
+
+def show_error(error):
+    text_standby_results.delete("1.0", tk.END)
+    text_standby_results.insert("1.0", f"{type(error).__name__}: {error}")
+
+
 def get_standby_account():
-    new_wallet = get_account(ent_standby_seed.get())
-    ent_standby_account.delete(0, tk.END)
-    ent_standby_seed.delete(0, tk.END)
-    ent_standby_account.insert(0, new_wallet.classic_address)
-    ent_standby_seed.insert(0, new_wallet.seed)
+    def finished(new_wallet):
+        ent_standby_account.delete(0, tk.END)
+        ent_standby_seed.delete(0, tk.END)
+        ent_standby_account.insert(0, new_wallet.classic_address)
+        ent_standby_seed.insert(0, new_wallet.seed)
+    runner.run(get_account_async(ent_standby_seed.get()), on_done=finished, key="standby")
 
 
 def get_standby_account_info():
-    accountInfo = get_account_info(ent_standby_account.get())
-    ent_standby_balance.delete(0, tk.END)
-    ent_standby_balance.insert(0,accountInfo['Balance'])
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0",json.dumps(accountInfo, indent=4))
+    def finished(accountInfo):
+        ent_standby_balance.delete(0, tk.END)
+        ent_standby_balance.insert(0,accountInfo['Balance'])
+        text_standby_results.delete("1.0", tk.END)
+        text_standby_results.insert("1.0",json.dumps(accountInfo, indent=4))
+    runner.run(get_account_info_async(ent_standby_account.get()), on_done=finished)
 
 
 def standby_send_xrp():
-    response = send_xrp(ent_standby_seed.get(),ent_standby_amount.get(),
-                       ent_standby_destination.get())
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0",json.dumps(response.result, indent=4))
-    get_standby_account_info()
-    get_operational_account_info()
+    def finished(response):
+        text_standby_results.delete("1.0", tk.END)
+        text_standby_results.insert("1.0",response if isinstance(response, str) else json.dumps(response.result, indent=4))
+        get_standby_account_info()
+        get_operational_account_info()
+    runner.run(send_xrp_async(ent_standby_seed.get(),ent_standby_amount.get(),
+                       ent_standby_destination.get()), on_done=finished, key="standby")
 
 
 def get_operational_account():
-    new_wallet = get_account(ent_operational_seed.get())
-    ent_operational_account.delete(0, tk.END)
-    ent_operational_account.insert(0, new_wallet.classic_address)
-    ent_operational_seed.delete(0, tk.END)
-    ent_operational_seed.insert(0, new_wallet.seed)
+    def finished(new_wallet):
+        ent_operational_account.delete(0, tk.END)
+        ent_operational_account.insert(0, new_wallet.classic_address)
+        ent_operational_seed.delete(0, tk.END)
+        ent_operational_seed.insert(0, new_wallet.seed)
+    runner.run(get_account_async(ent_operational_seed.get()), on_done=finished, key="operational")
 
 
 def get_operational_account_info():
-    accountInfo = get_account_info(ent_operational_account.get())
-    ent_operational_balance.delete(0, tk.END)
-    ent_operational_balance.insert(0,accountInfo['Balance'])
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0",json.dumps(accountInfo, indent=4))
+    def finished(accountInfo):
+        ent_operational_balance.delete(0, tk.END)
+        ent_operational_balance.insert(0,accountInfo['Balance'])
+        text_operational_results.delete("1.0", tk.END)
+        text_operational_results.insert("1.0",json.dumps(accountInfo, indent=4))
+    runner.run(get_account_info_async(ent_operational_account.get()), on_done=finished)
 
 
 def operational_send_xrp():
-    response = send_xrp(ent_operational_seed.get(),ent_operational_amount.get(), ent_operational_destination.get())
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0",json.dumps(response.result,indent=4))
-    get_standby_account_info()
-    get_operational_account_info()
+    def finished(response):
+        text_operational_results.delete("1.0", tk.END)
+        text_operational_results.insert("1.0",response if isinstance(response, str) else json.dumps(response.result,indent=4))
+        get_standby_account_info()
+        get_operational_account_info()
+    runner.run(send_xrp_async(ent_operational_seed.get(),ent_operational_amount.get(),
+                       ent_operational_destination.get()), on_done=finished, key="operational")
 
 
 # Create a new window with the title "Send and Receive XRP"
 window = tk.Tk()
 window.title("Send and Receive XRP")
+runner = TaskRunner(window, on_error=show_error)
 
 # Form frame
 frm_form = tk.Frame(relief=tk.SUNKEN, borderwidth=3)
@@ -2,170 +2,220 @@ import tkinter as tk
 import xrpl
 import json
 
-from mod1 import get_account, get_account_info, send_xrp
-from mod2 import get_balance
-from mod10 import send_check, cash_check, cancel_check, get_checks
+from mod1 import get_account_async, get_account_info_async, send_xrp_async
+from mod2 import get_balance_async
+from mod8 import get_transaction_async
+from mod10 import send_check_async, cash_check_async, cancel_check_async, get_checks_async
+from tasks import TaskRunner
 
 #############################################
 ## Handlers #################################
 #############################################
 
+# Each handler hands its network calls to the task runner and returns at once,
+# so the window keeps responding. The on_done callbacks run back on the Tk
+# thread once the results arrive. Transactions from the same account share a
+# key, so they run one at a time; the two accounts run side by side.
+
+def show_standby_results(results):
+    text_standby_results.delete("1.0", tk.END)
+    text_standby_results.insert("1.0", json.dumps(results, indent=4))
+
+
+def show_operational_results(results):
+    text_operational_results.delete("1.0", tk.END)
+    text_operational_results.insert("1.0", json.dumps(results, indent=4))
+
+
+def show_error(error):
+    text_standby_results.delete("1.0", tk.END)
+    text_standby_results.insert("1.0", f"{type(error).__name__}: {error}")
+
+
 ## Mod 10 Handlers
 
 def standby_send_check():
-    results=send_check(
-        ent_standby_seed.get(),
-        ent_standby_amount.get(),
-        ent_standby_destination.get(),
-        ent_standby_currency.get(),
-        ent_standby_issuer.get()
+    runner.run(
+        send_check_async(
+            ent_standby_seed.get(),
+            ent_standby_amount.get(),
+            ent_standby_destination.get(),
+            ent_standby_currency.get(),
+            ent_standby_issuer.get()
+        ),
+        on_done=show_standby_results,
+        key="standby"
     )
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0", json.dumps(results, indent=4))
 
 def standby_cash_check():
-    results=cash_check(
-        ent_standby_seed.get(),
-        ent_standby_amount.get(),
-        ent_standby_check_id.get(),
-        ent_standby_currency.get(),
-        ent_standby_issuer.get()
+    runner.run(
+        cash_check_async(
+            ent_standby_seed.get(),
+            ent_standby_amount.get(),
+            ent_standby_check_id.get(),
+            ent_standby_currency.get(),
+            ent_standby_issuer.get()
+        ),
+        on_done=show_standby_results,
+        key="standby"
     )
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0", json.dumps(results, indent=4))
 
 def standby_cancel_check():
-    results=cancel_check(
-        ent_standby_seed.get(),
-        ent_standby_check_id.get()
+    runner.run(
+        cancel_check_async(
+            ent_standby_seed.get(),
+            ent_standby_check_id.get()
+        ),
+        on_done=show_standby_results,
+        key="standby"
     )
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0", json.dumps(results, indent=4))
 
 def standby_get_checks():
-    results=get_checks(
-        ent_standby_account.get(),
+    runner.run(
+        get_checks_async(
+            ent_standby_account.get(),
+        ),
+        on_done=show_standby_results
     )
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0", json.dumps(results, indent=4))
 
 def standby_get_balance():
-    results=get_balance(
-        ent_standby_seed.get(),
-        ent_operational_seed.get()
+    runner.run(
+        get_balance_async(
+            ent_standby_seed.get(),
+            ent_operational_seed.get()
+        ),
+        on_done=show_standby_results
     )
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0", json.dumps(results, indent=4))
 
 def operational_send_check():
-    results=send_check(
-        ent_operational_seed.get(),
-        ent_operational_amount.get(),
-        ent_operational_destination.get(),
-        ent_operational_currency.get(),
-        ent_operational_issuer.get()
+    runner.run(
+        send_check_async(
+            ent_operational_seed.get(),
+            ent_operational_amount.get(),
+            ent_operational_destination.get(),
+            ent_operational_currency.get(),
+            ent_operational_issuer.get()
+        ),
+        on_done=show_operational_results,
+        key="operational"
     )
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0", json.dumps(results, indent=4))
 
 def operational_cash_check():
-    results=cash_check(
-        ent_operational_seed.get(),
-        ent_operational_amount.get(),
-        ent_operational_check_id.get(),
-        ent_operational_currency.get(),
-        ent_operational_issuer.get()
+    runner.run(
+        cash_check_async(
+            ent_operational_seed.get(),
+            ent_operational_amount.get(),
+            ent_operational_check_id.get(),
+            ent_operational_currency.get(),
+            ent_operational_issuer.get()
+        ),
+        on_done=show_operational_results,
+        key="operational"
     )
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0", json.dumps(results, indent=4))
 
 def operational_cancel_check():
-    results=cancel_check(
-        ent_operational_seed.get(),
-        ent_operational_check_id.get()
+    runner.run(
+        cancel_check_async(
+            ent_operational_seed.get(),
+            ent_operational_check_id.get()
+        ),
+        on_done=show_operational_results,
+        key="operational"
     )
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0", json.dumps(results, indent=4))
 
 def operational_get_checks():
-    results=get_checks(
-        ent_operational_account.get(),
+    runner.run(
+        get_checks_async(
+            ent_operational_account.get(),
+        ),
+        on_done=show_operational_results
     )
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0", json.dumps(results, indent=4))
 
 def operational_get_balance():
-    results=get_balance(
-        ent_operational_seed.get(),
-        ent_standby_seed.get()
+    runner.run(
+        get_balance_async(
+            ent_operational_seed.get(),
+            ent_standby_seed.get()
+        ),
+        on_done=show_operational_results
     )
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0", json.dumps(results, indent=4))
 
 
 ## Mod 8 Handlers
     
 def operational_get_transaction():
-    results=get_transaction(ent_operational_account.get(),
-                              ent_operational_look_up.get())
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0", json.dumps(results, indent=4))    
+    runner.run(get_transaction_async(ent_operational_account.get(),
+                              ent_operational_look_up.get()),
+        on_done=show_operational_results)
 
 ## Mod 1 Handlers
 
 def get_standby_account():
-    new_wallet=get_account(ent_standby_seed.get())
-    ent_standby_account.delete(0, tk.END)
-    ent_standby_seed.delete(0, tk.END)
-    ent_standby_account.insert(0, new_wallet.classic_address)
-    ent_standby_seed.insert(0, new_wallet.seed)
+    def finished(new_wallet):
+        ent_standby_account.delete(0, tk.END)
+        ent_standby_seed.delete(0, tk.END)
+        ent_standby_account.insert(0, new_wallet.classic_address)
+        ent_standby_seed.insert(0, new_wallet.seed)
+    runner.run(get_account_async(ent_standby_seed.get()),
+        on_done=finished, key="standby")
 
 
 def get_standby_account_info():
-    accountInfo=get_account_info(ent_standby_account.get())
-    ent_standby_balance.delete(0, tk.END)
-    ent_standby_balance.insert(0,accountInfo['Balance'])
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0",json.dumps(accountInfo, indent=4))
+    def finished(accountInfo):
+        ent_standby_balance.delete(0, tk.END)
+        ent_standby_balance.insert(0,accountInfo['Balance'])
+        text_standby_results.delete("1.0", tk.END)
+        text_standby_results.insert("1.0",json.dumps(accountInfo, indent=4))
+    runner.run(get_account_info_async(ent_standby_account.get()),
+        on_done=finished)
 
 
 def standby_send_xrp():
-    response=send_xrp(ent_standby_seed.get(),ent_standby_amount.get(),
-                       ent_standby_destination.get())
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0",json.dumps(response.result, indent=4))
-    get_standby_account_info()
-    get_operational_account_info()
+    def finished(response):
+        text_standby_results.delete("1.0", tk.END)
+        text_standby_results.insert("1.0",response if isinstance(response, str) else json.dumps(response.result, indent=4))
+        get_standby_account_info()
+        get_operational_account_info()
+    runner.run(send_xrp_async(ent_standby_seed.get(),ent_standby_amount.get(),
+                       ent_standby_destination.get()),
+        on_done=finished, key="standby")
 
 
 def get_operational_account():
-    new_wallet=get_account(ent_operational_seed.get())
-    ent_operational_account.delete(0, tk.END)
-    ent_operational_account.insert(0, new_wallet.classic_address)
-    ent_operational_seed.delete(0, tk.END)
-    ent_operational_seed.insert(0, new_wallet.seed)
+    def finished(new_wallet):
+        ent_operational_account.delete(0, tk.END)
+        ent_operational_account.insert(0, new_wallet.classic_address)
+        ent_operational_seed.delete(0, tk.END)
+        ent_operational_seed.insert(0, new_wallet.seed)
+    runner.run(get_account_async(ent_operational_seed.get()),
+        on_done=finished, key="operational")
 
 
 def get_operational_account_info():
-    accountInfo=get_account_info(ent_operational_account.get())
-    ent_operational_balance.delete(0, tk.END)
-    ent_operational_balance.insert(0,accountInfo['Balance'])
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0",json.dumps(accountInfo, indent=4))
+    def finished(accountInfo):
+        ent_operational_balance.delete(0, tk.END)
+        ent_operational_balance.insert(0,accountInfo['Balance'])
+        text_operational_results.delete("1.0", tk.END)
+        text_operational_results.insert("1.0",json.dumps(accountInfo, indent=4))
+    runner.run(get_account_info_async(ent_operational_account.get()),
+        on_done=finished)
 
 
 def operational_send_xrp():
-    response=send_xrp(ent_operational_seed.get(),ent_operational_amount.get(),
-                        ent_operational_destination.get())
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0",json.dumps(response.result,indent=4))
-    get_standby_account_info()
-    get_operational_account_info()
+    def finished(response):
+        text_operational_results.delete("1.0", tk.END)
+        text_operational_results.insert("1.0",response if isinstance(response, str) else json.dumps(response.result,indent=4))
+        get_standby_account_info()
+        get_operational_account_info()
+    runner.run(send_xrp_async(ent_operational_seed.get(),ent_operational_amount.get(),
+                        ent_operational_destination.get()),
+        on_done=finished, key="operational")
 
 
 # Create a new window with the title "Conditional Escrow Example"
 window=tk.Tk()
 window.title("Check Example")
+runner = TaskRunner(window, on_error=show_error)
 
 # Form frame
 frm_form=tk.Frame(relief=tk.SUNKEN, borderwidth=3)
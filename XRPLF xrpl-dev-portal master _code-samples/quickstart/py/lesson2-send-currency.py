@@ -2,133 +2,152 @@ import tkinter as tk
 import xrpl
 import json
 
-from mod1 import get_account, get_account_info, send_xrp
+from mod1 import get_account_async, get_account_info_async, send_xrp_async
 from mod2 import (
-    create_trust_line,
-    send_currency,
-    get_balance,
-    configure_account,
+    create_trust_line_async,
+    send_currency_async,
+    get_balance_async,
+    configure_account_async,
 )
+from tasks import TaskRunner
 
 #############################################
 ## Handlers #################################
 #############################################
 
+# Each handler hands its network calls to the task runner and returns at once,
+# so the window keeps responding. The on_done callbacks run back on the Tk
+# thread once the results arrive. Transactions from the same account share a
+# key, so they run one at a time; the two accounts run side by side.
+
+def show_standby_results(results):
+    text_standby_results.delete("1.0", tk.END)
+    text_standby_results.insert("1.0", json.dumps(results, indent=4))
+
+
+def show_operational_results(results):
+    text_operational_results.delete("1.0", tk.END)
+    text_operational_results.insert("1.0", json.dumps(results, indent=4))
+
+
+def show_error(error):
+    text_standby_results.delete("1.0", tk.END)
+    text_standby_results.insert("1.0", f"{type(error).__name__}: {error}")
+
+
 # Module 2 Handlers
 def standby_create_trust_line():
-    results = create_trust_line(ent_standby_seed.get(),
+    runner.run(create_trust_line_async(ent_standby_seed.get(),
         ent_standby_destination.get(),
         ent_standby_currency.get(),
-        ent_standby_amount.get())
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0", json.dumps(results, indent=4))
+        ent_standby_amount.get()),
+        on_done=show_standby_results, key="standby")
 
 
 def standby_send_currency():
-    results = send_currency(ent_standby_seed.get(),
+    runner.run(send_currency_async(ent_standby_seed.get(),
         ent_standby_destination.get(),
         ent_standby_currency.get(),
-        ent_standby_amount.get())
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0", json.dumps(results, indent=4))
+        ent_standby_amount.get()),
+        on_done=show_standby_results, key="standby")
 
 
 def standby_configure_account():
-    results = configure_account(
+    runner.run(configure_account_async(
         ent_standby_seed.get(),
-        standbyRippling)
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0", json.dumps(results, indent=4))
+        standbyRippling),
+        on_done=show_standby_results, key="standby")
 
 
 def operational_create_trust_line():
-    results = create_trust_line(ent_operational_seed.get(),
+    runner.run(create_trust_line_async(ent_operational_seed.get(),
         ent_operational_destination.get(),
         ent_operational_currency.get(),
-        ent_operational_amount.get())
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0", json.dumps(results, indent=4))
+        ent_operational_amount.get()),
+        on_done=show_operational_results, key="operational")
 
 
 def operational_send_currency():
-    results = send_currency(ent_operational_seed.get(),
+    runner.run(send_currency_async(ent_operational_seed.get(),
         ent_operational_destination.get(),
         ent_operational_currency.get(),
-        ent_operational_amount.get())
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0", json.dumps(results, indent=4))
+        ent_operational_amount.get()),
+        on_done=show_operational_results, key="operational")
 
 
 def operational_configure_account():
-    results = configure_account(
+    runner.run(configure_account_async(
         ent_operational_seed.get(),
-        operationalRippling)
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0", json.dumps(results, indent=4))
+        operationalRippling),
+        on_done=show_operational_results, key="operational")
 
 
 def get_balances():
-    results = get_balance(ent_operational_seed.get(), ent_standby_seed.get())
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0", json.dumps(results, indent=4))
-    results = get_balance(ent_standby_seed.get(), ent_operational_seed.get())
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0", json.dumps(results, indent=4))
+    # The two reads don't depend on each other, so they run at the same time.
+    runner.run(get_balance_async(ent_operational_seed.get(), ent_standby_seed.get()),
+        on_done=show_standby_results)
+    runner.run(get_balance_async(ent_standby_seed.get(), ent_operational_seed.get()),
+        on_done=show_operational_results)
 
 
 # Module 1 Handlers
 def get_standby_account():
-    new_wallet = get_account(ent_standby_seed.get())
-    ent_standby_account.delete(0, tk.END)
-    ent_standby_seed.delete(0, tk.END)
-    ent_standby_account.insert(0, new_wallet.classic_address)
-    ent_standby_seed.insert(0, new_wallet.seed)
+    def finished(new_wallet):
+        ent_standby_account.delete(0, tk.END)
+        ent_standby_seed.delete(0, tk.END)
+        ent_standby_account.insert(0, new_wallet.classic_address)
+        ent_standby_seed.insert(0, new_wallet.seed)
+    runner.run(get_account_async(ent_standby_seed.get()), on_done=finished, key="standby")
 
 
 def get_standby_account_info():
-    accountInfo = get_account_info(ent_standby_account.get())
-    ent_standby_balance.delete(0, tk.END)
-    ent_standby_balance.insert(0,accountInfo['Balance'])
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0",json.dumps(accountInfo, indent=4))
+    def finished(accountInfo):
+        ent_standby_balance.delete(0, tk.END)
+        ent_standby_balance.insert(0,accountInfo['Balance'])
+        show_standby_results(accountInfo)
+    runner.run(get_account_info_async(ent_standby_account.get()), on_done=finished)
 
 
 def standby_send_xrp():
-    response = send_xrp(ent_standby_seed.get(),ent_standby_amount.get(),
-                       ent_standby_destination.get())
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0",json.dumps(response.result, indent=4))
-    get_standby_account_info()
-    get_operational_account_info()
+    def finished(response):
+        # send_xrp_async returns a message instead when the submit fails
+        show_standby_results(response if isinstance(response, str) else response.result)
+        get_standby_account_info()
+        get_operational_account_info()
+    runner.run(send_xrp_async(ent_standby_seed.get(),ent_standby_amount.get(),
+                       ent_standby_destination.get()), on_done=finished, key="standby")
 
 
 def get_operational_account():
-    new_wallet = get_account(ent_operational_seed.get())
-    ent_operational_account.delete(0, tk.END)
-    ent_operational_account.insert(0, new_wallet.classic_address)
-    ent_operational_seed.delete(0, tk.END)
-    ent_operational_seed.insert(0, new_wallet.seed)
+    def finished(new_wallet):
+        ent_operational_account.delete(0, tk.END)
+        ent_operational_account.insert(0, new_wallet.classic_address)
+        ent_operational_seed.delete(0, tk.END)
+        ent_operational_seed.insert(0, new_wallet.seed)
+    runner.run(get_account_async(ent_operational_seed.get()), on_done=finished, key="operational")
 
 
 def get_operational_account_info():
-    accountInfo = get_account_info(ent_operational_account.get())
-    ent_operational_balance.delete(0, tk.END)
-    ent_operational_balance.insert(0,accountInfo['Balance'])
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0",json.dumps(accountInfo, indent=4))
+    def finished(accountInfo):
+        ent_operational_balance.delete(0, tk.END)
+        ent_operational_balance.insert(0,accountInfo['Balance'])
+        show_operational_results(accountInfo)
+    runner.run(get_account_info_async(ent_operational_account.get()), on_done=finished)
 
 
 def operational_send_xrp():
-    response = send_xrp(ent_operational_seed.get(),ent_operational_amount.get(), ent_operational_destination.get())
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0",json.dumps(response.result,indent=4))
-    get_standby_account_info()
-    get_operational_account_info()
+    def finished(response):
+        show_operational_results(response if isinstance(response, str) else response.result)
+        get_standby_account_info()
+        get_operational_account_info()
+    runner.run(send_xrp_async(ent_operational_seed.get(),ent_operational_amount.get(),
+                       ent_operational_destination.get()), on_done=finished, key="operational")
 
 
 # Create a new window with the title "Quickstart Module 2"
 window = tk.Tk()
 window.title("Quickstart Module 2")
+runner = TaskRunner(window, on_error=show_error)
 
 
 standbyRippling = tk.BooleanVar()
@@ -2,55 +2,97 @@ import tkinter as tk
 import xrpl
 import json
 
-from mod1 import get_account, get_account_info
-from mod7 import batch_mint, get_batch
+from mod1 import get_account_async, get_account_info_async
+from mod7 import batch_mint_async, get_batch_async
+from tasks import TaskRunner, report_progress
 
 #############################################
 ## Handlers #################################
 #############################################
 
+# Each handler hands its network calls to the task runner and returns at once,
+# so the window keeps responding. The on_done callbacks run back on the Tk
+# thread once the results arrive.
+
+def show_standby_results(results):
+    text_standby_results.delete("1.0", tk.END)
+    text_standby_results.insert("1.0", json.dumps(results, indent=4))
+
+
+def show_error(error):
+    text_standby_results.delete("1.0", tk.END)
+    text_standby_results.insert("1.0", f"{type(error).__name__}: {error}")
+
 # Module 7 Handlers
 
+batch_mint_task = None
+
 def standby_batch_mint():
-    results = batch_mint(
-        ent_standby_seed.get(),
-        ent_standby_uri.get(),
-        ent_standby_flags.get(),
-        ent_standby_transfer_fee.get(),
-        ent_standby_taxon.get(),
-        ent_standby_nft_count.get()
+    global batch_mint_task
+    lbl_standby_progress.config(text="Minting...")
+
+    def show_progress(done, total, message):
+        lbl_standby_progress.config(text=message)
+
+    def finished(results):
+        lbl_standby_progress.config(text="")
+        show_standby_results(results)
+
+    def cancelled():
+        lbl_standby_progress.config(text="Cancelled")
+
+    batch_mint_task = runner.run(
+        batch_mint_async(
+            ent_standby_seed.get(),
+            ent_standby_uri.get(),
+            ent_standby_flags.get(),
+            ent_standby_transfer_fee.get(),
+            ent_standby_taxon.get(),
+            ent_standby_nft_count.get(),
+            progress=report_progress
+        ),
+        on_done=finished,
+        on_progress=show_progress,
+        on_cancel=cancelled,
+        key="standby"
     )
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0", json.dumps(results, indent=4))
+
+def standby_cancel_batch_mint():
+    # Mints already submitted can still be validated after cancelling.
+    if batch_mint_task is not None and not batch_mint_task.done():
+        batch_mint_task.cancel()
 
 def standby_get_batch_nfts():
-    results = get_batch(
-        ent_standby_seed.get(),
-        ent_standby_account.get()
+    runner.run(
+        get_batch_async(
+            ent_standby_seed.get(),
+            ent_standby_account.get()
+        ),
+        on_done=show_standby_results
     )
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0", json.dumps(results, indent=4))
 
 # Module 1 Handlers
 def get_standby_account():
-    new_wallet = get_account(ent_standby_seed.get())
-    ent_standby_account.delete(0, tk.END)
-    ent_standby_seed.delete(0, tk.END)
-    ent_standby_account.insert(0, new_wallet.classic_address)
-    ent_standby_seed.insert(0, new_wallet.seed)
+    def finished(new_wallet):
+        ent_standby_account.delete(0, tk.END)
+        ent_standby_seed.delete(0, tk.END)
+        ent_standby_account.insert(0, new_wallet.classic_address)
+        ent_standby_seed.insert(0, new_wallet.seed)
+    runner.run(get_account_async(ent_standby_seed.get()), on_done=finished, key="standby")
 
 
 def get_standby_account_info():
-    accountInfo = get_account_info(ent_standby_account.get())
-    ent_standby_balance.delete(0, tk.END)
-    ent_standby_balance.insert(0,accountInfo['Balance'])
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0",json.dumps(accountInfo, indent=4))
+    def finished(accountInfo):
+        ent_standby_balance.delete(0, tk.END)
+        ent_standby_balance.insert(0,accountInfo['Balance'])
+        show_standby_results(accountInfo)
+    runner.run(get_account_info_async(ent_standby_account.get()), on_done=finished)
 
 
 # Create a new window with the title "Python Module - Batch Minting"
 window = tk.Tk()
 window.title("Python Module - Batch Minting")
+runner = TaskRunner(window, on_error=show_error)
 
 # Form frame
 frm_form = tk.Frame(relief=tk.SUNKEN, borderwidth=3)
@@ -77,6 +119,7 @@ lbl_standby_nft_offer_index = tk.Label(master=frm_form, text="NFT Offer Index")
 ent_standby_nft_offer_index = tk.Entry(master=frm_form, width="50")
 lbl_standby_nft_count = tk.Label(master=frm_form, text="NFT Count")
 ent_standby_nft_count = tk.Entry(master=frm_form, width="50")
+lbl_standby_progress = tk.Label(master=frm_form, text="")
 lbl_standby_results = tk.Label(master=frm_form,text="Results")
 text_standby_results = tk.Text(master=frm_form, height = 20, width = 65)
 
@@ -99,6 +142,7 @@ lbl_standby_taxon.grid(row=11, column=0, sticky="e")
 ent_standby_taxon.grid(row=11, column=1, sticky="w")
 lbl_standby_nft_count.grid(row=12, column=0, sticky="e")
 ent_standby_nft_count.grid(row=12, column=1, sticky="w")
+lbl_standby_progress.grid(row=12, column=2, sticky="w")
 lbl_standby_results.grid(row=13, column=1, sticky="ne")
 text_standby_results.grid(row=13, column=2, sticky="nw")
 
@@ -118,6 +162,10 @@ btn_standby_batch_mint = tk.Button(master=frm_form,
                                          text="Batch Mint NFTs",
                                          command = standby_batch_mint)
 btn_standby_batch_mint.grid(row=5, column=2, sticky = "nsew")
+btn_standby_cancel_batch_mint = tk.Button(master=frm_form,
+                                         text="Cancel Batch Mint",
+                                         command = standby_cancel_batch_mint)
+btn_standby_cancel_batch_mint.grid(row=6, column=2, sticky = "nsew")
 btn_standby_get_batch_nfts = tk.Button(master=frm_form,
                                          text="Get Batch NFTs",
                                          command = standby_get_batch_nfts)
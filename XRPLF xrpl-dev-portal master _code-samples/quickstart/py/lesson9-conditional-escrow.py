@@ -2,15 +2,36 @@ import tkinter as tk
 import xrpl
 import json
 
-from mod1 import get_account, get_account_info, send_xrp
-from mod8 import get_escrows, cancel_time_escrow, get_transaction
-from mod9 import create_conditional_escrow, finish_conditional_escrow, generate_condition
+from mod1 import get_account_async, get_account_info_async, send_xrp_async
+from mod8 import get_escrows_async, cancel_time_escrow_async, get_transaction_async
+from mod9 import create_conditional_escrow_async, finish_conditional_escrow_async, generate_condition
+from tasks import TaskRunner
 
 
 #############################################
 ## Handlers #################################
 #############################################
 
+# Each handler hands its network calls to the task runner and returns at once,
+# so the window keeps responding. The on_done callbacks run back on the Tk
+# thread once the results arrive. Transactions from the same account share a
+# key, so they run one at a time; the two accounts run side by side.
+
+def show_standby_results(results):
+    text_standby_results.delete("1.0", tk.END)
+    text_standby_results.insert("1.0", json.dumps(results, indent=4))
+
+
+def show_operational_results(results):
+    text_operational_results.delete("1.0", tk.END)
+    text_operational_results.insert("1.0", json.dumps(results, indent=4))
+
+
+def show_error(error):
+    text_standby_results.delete("1.0", tk.END)
+    text_standby_results.insert("1.0", f"{type(error).__name__}: {error}")
+
+
 ## Mod 9 Handlers
 
 def get_condition():
@@ -21,105 +42,122 @@ def get_condition():
     ent_operational_escrow_fulfillment.insert(0, results[1])
 
 def standby_create_conditional_escrow():
-    results = create_conditional_escrow(
-        ent_standby_seed.get(),
-        ent_standby_amount.get(),
-        ent_standby_destination.get(),
-        ent_standby_escrow_cancel.get(),
-        ent_standby_escrow_condition.get()
+    runner.run(
+        create_conditional_escrow_async(
+            ent_standby_seed.get(),
+            ent_standby_amount.get(),
+            ent_standby_destination.get(),
+            ent_standby_escrow_cancel.get(),
+            ent_standby_escrow_condition.get()
+        ),
+        on_done=show_standby_results,
+        key="standby"
     )
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0", json.dumps(results, indent=4))
 
 def operational_finish_conditional_escrow():
-    results = finish_conditional_escrow(
-        ent_operational_seed.get(),
-        ent_operational_escrow_owner.get(),
-        ent_operational_sequence_number.get(),
-        ent_standby_escrow_condition.get(),
-        ent_operational_escrow_fulfillment.get()
+    runner.run(
+        finish_conditional_escrow_async(
+            ent_operational_seed.get(),
+            ent_operational_escrow_owner.get(),
+            ent_operational_sequence_number.get(),
+            ent_standby_escrow_condition.get(),
+            ent_operational_escrow_fulfillment.get()
+        ),
+        on_done=show_operational_results,
+        key="operational"
     )
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0", json.dumps(results, indent=4))
 
 
 ## Mod 8 Handlers
 
 def operational_get_escrows():
-    results = get_escrows(ent_operational_account.get())
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0", json.dumps(results, indent=4))
+    runner.run(get_escrows_async(ent_operational_account.get()),
+        on_done=show_operational_results)
 
 def standby_cancel_time_escrow():
-    results = cancel_time_escrow(
-        ent_standby_seed.get(),
-        ent_standby_escrow_owner.get(),
-        ent_standby_escrow_sequence_number.get()
+    runner.run(
+        cancel_time_escrow_async(
+            ent_standby_seed.get(),
+            ent_standby_escrow_owner.get(),
+            ent_standby_escrow_sequence_number.get()
+        ),
+        on_done=show_standby_results,
+        key="standby"
     )
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0", json.dumps(results, indent=4))
     
 def operational_get_transaction():
-    results = get_transaction(ent_operational_account.get(),
-                              ent_operational_look_up.get())
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0", json.dumps(results, indent=4))    
+    runner.run(get_transaction_async(ent_operational_account.get(),
+                              ent_operational_look_up.get()),
+        on_done=show_operational_results)
 
 ## Mod 1 Handlers
 
 def get_standby_account():
-    new_wallet = get_account(ent_standby_seed.get())
-    ent_standby_account.delete(0, tk.END)
-    ent_standby_seed.delete(0, tk.END)
-    ent_standby_account.insert(0, new_wallet.classic_address)
-    ent_standby_seed.insert(0, new_wallet.seed)
+    def finished(new_wallet):
+        ent_standby_account.delete(0, tk.END)
+        ent_standby_seed.delete(0, tk.END)
+        ent_standby_account.insert(0, new_wallet.classic_address)
+        ent_standby_seed.insert(0, new_wallet.seed)
+    runner.run(get_account_async(ent_standby_seed.get()),
+        on_done=finished, key="standby")
 
 
 def get_standby_account_info():
-    accountInfo = get_account_info(ent_standby_account.get())
-    ent_standby_balance.delete(0, tk.END)
-    ent_standby_balance.insert(0,accountInfo['Balance'])
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0",json.dumps(accountInfo, indent=4))
+    def finished(accountInfo):
+        ent_standby_balance.delete(0, tk.END)
+        ent_standby_balance.insert(0,accountInfo['Balance'])
+        text_standby_results.delete("1.0", tk.END)
+        text_standby_results.insert("1.0",json.dumps(accountInfo, indent=4))
+    runner.run(get_account_info_async(ent_standby_account.get()),
+        on_done=finished)
 
 
 def standby_send_xrp():
-    response = send_xrp(ent_standby_seed.get(),ent_standby_amount.get(),
-                       ent_standby_destination.get())
-    text_standby_results.delete("1.0", tk.END)
-    text_standby_results.insert("1.0",json.dumps(response.result, indent=4))
-    get_standby_account_info()
-    get_operational_account_info()
+    def finished(response):
+        text_standby_results.delete("1.0", tk.END)
+        text_standby_results.insert("1.0",response if isinstance(response, str) else json.dumps(response.result, indent=4))
+        get_standby_account_info()
+        get_operational_account_info()
+    runner.run(send_xrp_async(ent_standby_seed.get(),ent_standby_amount.get(),
+                       ent_standby_destination.get()),
+        on_done=finished, key="standby")
 
 
 def get_operational_account():
-    new_wallet = get_account(ent_operational_seed.get())
-    ent_operational_account.delete(0, tk.END)
-    ent_operational_account.insert(0, new_wallet.classic_address)
-    ent_operational_seed.delete(0, tk.END)
-    ent_operational_seed.insert(0, new_wallet.seed)
+    def finished(new_wallet):
+        ent_operational_account.delete(0, tk.END)
+        ent_operational_account.insert(0, new_wallet.classic_address)
+        ent_operational_seed.delete(0, tk.END)
+        ent_operational_seed.insert(0, new_wallet.seed)
+    runner.run(get_account_async(ent_operational_seed.get()),
+        on_done=finished, key="operational")
 
 
 def get_operational_account_info():
-    accountInfo = get_account_info(ent_operational_account.get())
-    ent_operational_balance.delete(0, tk.END)
-    ent_operational_balance.insert(0,accountInfo['Balance'])
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0",json.dumps(accountInfo, indent=4))
+    def finished(accountInfo):
+        ent_operational_balance.delete(0, tk.END)
+        ent_operational_balance.insert(0,accountInfo['Balance'])
+        text_operational_results.delete("1.0", tk.END)
+        text_operational_results.insert("1.0",json.dumps(accountInfo, indent=4))
+    runner.run(get_account_info_async(ent_operational_account.get()),
+        on_done=finished)
 
 
 def operational_send_xrp():
-    response = send_xrp(ent_operational_seed.get(),ent_operational_amount.get(),
-                        ent_operational_destination.get())
-    text_operational_results.delete("1.0", tk.END)
-    text_operational_results.insert("1.0",json.dumps(response.result,indent=4))
-    get_standby_account_info()
-    get_operational_account_info()
+    def finished(response):
+        text_operational_results.delete("1.0", tk.END)
+        text_operational_results.insert("1.0",response if isinstance(response, str) else json.dumps(response.result,indent=4))
+        get_standby_account_info()
+        get_operational_account_info()
+    runner.run(send_xrp_async(ent_operational_seed.get(),ent_operational_amount.get(),
+                        ent_operational_destination.get()),
+        on_done=finished, key="operational")
 
 
 # Create a new window with the title "Conditional Escrow Example"
 window = tk.Tk()
 window.title("Conditional Escrow Example")
+runner = TaskRunner(window, on_error=show_error)
 
 # Form frame
 frm_form = tk.Frame(relief=tk.SUNKEN, borderwidth=3)
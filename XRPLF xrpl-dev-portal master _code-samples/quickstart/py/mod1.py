@@ -1,37 +1,54 @@
+import asyncio
 import xrpl
+import xrpl.asyncio.transaction
+import xrpl.asyncio.wallet
+from clients import get_client
 
 testnet_url = "https://s.devnet.rippletest.net:51234/"
 
 def get_account(seed):
     """get_account"""
-    client = xrpl.clients.JsonRpcClient(testnet_url)
+    return asyncio.run(get_account_async(seed))
+
+async def get_account_async(seed):
+    """get_account_async"""
+    client = get_client(testnet_url)
     if (seed == ''):
-        new_wallet = xrpl.wallet.generate_faucet_wallet(client)
+        new_wallet = await xrpl.asyncio.wallet.generate_faucet_wallet(client)
     else:
         new_wallet = xrpl.wallet.Wallet.from_seed(seed)
     return new_wallet
 
 def get_account_info(accountId):
     """get_account_info"""
-    client = xrpl.clients.JsonRpcClient(testnet_url)
+    return asyncio.run(get_account_info_async(accountId))
+
+async def get_account_info_async(accountId):
+    """get_account_info_async"""
+    client = get_client(testnet_url)
     acct_info = xrpl.models.requests.account_info.AccountInfo(
         account=accountId,
         ledger_index="validated"
     )
-    response = client.request(acct_info)
+    response = await client.request_async(acct_info)
     return response.result['account_data']
 
 def send_xrp(seed, amount, destination):
+    """send_xrp"""
+    return asyncio.run(send_xrp_async(seed, amount, destination))
+
+async def send_xrp_async(seed, amount, destination):
+    """send_xrp_async"""
     sending_wallet = xrpl.wallet.Wallet.from_seed(seed)
-    client = xrpl.clients.JsonRpcClient(testnet_url)
+    client = get_client(testnet_url)
     payment = xrpl.models.transactions.Payment(
         account=sending_wallet.address,
         amount=xrpl.utils.xrp_to_drops(int(amount)),
         destination=destination,
     )
-    try:	
-        response = xrpl.transaction.submit_and_wait(payment, client, sending_wallet)	
-    except xrpl.transaction.XRPLReliableSubmissionException as e:	
+    try:
+        response = await xrpl.asyncio.transaction.submit_and_wait(payment, client, sending_wallet)
+    except xrpl.transaction.XRPLReliableSubmissionException as e:
         response = f"Submit failed: {e}"
 
     return response
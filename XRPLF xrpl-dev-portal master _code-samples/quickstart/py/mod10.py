@@ -1,5 +1,7 @@
+import asyncio
 import xrpl
-from xrpl.clients import JsonRpcClient
+import xrpl.asyncio.transaction
+from clients import get_client
 from xrpl.wallet import Wallet
 from datetime import datetime
 from xrpl.models.transactions import CheckCreate, CheckCash, CheckCancel
@@ -9,8 +11,12 @@ testnet_url = "https://s.devnet.rippletest.net:51234"
 
 def send_check(seed, amount, destination, currency, issuer):
     """send_check"""
+    return asyncio.run(send_check_async(seed, amount, destination, currency, issuer))
+
+async def send_check_async(seed, amount, destination, currency, issuer):
+    """send_check_async"""
     wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     if currency != "XRP":
         amount = {"value": amount,
                   "currency": currency,
@@ -24,7 +30,7 @@ def send_check(seed, amount, destination, currency, issuer):
     # Submit the transaction and report the results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(check_tx,client,wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(check_tx,client,wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
@@ -32,8 +38,12 @@ def send_check(seed, amount, destination, currency, issuer):
 
 def cash_check(seed, amount, check_id, currency, issuer):
     """cash_check"""
+    return asyncio.run(cash_check_async(seed, amount, check_id, currency, issuer))
+
+async def cash_check_async(seed, amount, check_id, currency, issuer):
+    """cash_check_async"""
     wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     if currency != "XRP":
         amount = {
             "value": amount,
@@ -48,7 +58,7 @@ def cash_check(seed, amount, check_id, currency, issuer):
     # Submit the transaction and report the results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(finish_tx,client,wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(finish_tx,client,wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
@@ -56,8 +66,12 @@ def cash_check(seed, amount, check_id, currency, issuer):
 
 def cancel_check(seed, check_id):
     """cancel_check"""
+    return asyncio.run(cancel_check_async(seed, check_id))
+
+async def cancel_check_async(seed, check_id):
+    """cancel_check_async"""
     wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     cancel_tx=xrpl.models.transactions.CheckCancel(
         account=wallet.address,
         check_id=check_id
@@ -65,7 +79,7 @@ def cancel_check(seed, check_id):
     # Submit the transaction and report the results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(cancel_tx,client,wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(cancel_tx,client,wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
@@ -73,11 +87,15 @@ def cancel_check(seed, check_id):
 
 def get_checks(account):
     """get_checks"""
-    client=JsonRpcClient(testnet_url)
+    return asyncio.run(get_checks_async(account))
+
+async def get_checks_async(account):
+    """get_checks_async"""
+    client=get_client(testnet_url)
     acct_checks=AccountObjects(
         account=account,
         ledger_index="validated",
         type="check"
     )
-    response=client.request(acct_checks)
+    response=await client.request_async(acct_checks)
     return response.result
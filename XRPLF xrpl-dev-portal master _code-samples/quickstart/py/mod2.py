@@ -1,5 +1,7 @@
+import asyncio
 import xrpl
-from xrpl.clients import JsonRpcClient
+import xrpl.asyncio.transaction
+from clients import get_client
 from xrpl.wallet import Wallet
 
 
@@ -11,9 +13,13 @@ testnet_url = "https://s.devnet.rippletest.net:51234"
 
 def create_trust_line(seed, issuer, currency, amount):
     """create_trust_line"""
+    return asyncio.run(create_trust_line_async(seed, issuer, currency, amount))
+
+async def create_trust_line_async(seed, issuer, currency, amount):
+    """create_trust_line_async"""
 # Get the client
     receiving_wallet = Wallet.from_seed(seed)
-    client = JsonRpcClient(testnet_url)
+    client = get_client(testnet_url)
 # Define the trust line transaction
     trustline_tx=xrpl.models.transactions.TrustSet(
         account=receiving_wallet.address,
@@ -24,7 +30,7 @@ def create_trust_line(seed, issuer, currency, amount):
         )
     )
 
-    response =  xrpl.transaction.submit_and_wait(trustline_tx,
+    response =  await xrpl.asyncio.transaction.submit_and_wait(trustline_tx,
         client, receiving_wallet)
     return response.result
 
@@ -34,9 +40,13 @@ def create_trust_line(seed, issuer, currency, amount):
 
 def send_currency(seed, destination, currency, amount):
     """send_currency"""
+    return asyncio.run(send_currency_async(seed, destination, currency, amount))
+
+async def send_currency_async(seed, destination, currency, amount):
+    """send_currency_async"""
 # Get the client
     sending_wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
 # Define the payment transaction.
     send_currency_tx=xrpl.models.transactions.Payment(
         account=sending_wallet.address,
@@ -47,7 +57,7 @@ def send_currency(seed, destination, currency, amount):
         ),
         destination=destination
     )
-    response=xrpl.transaction.submit_and_wait(send_currency_tx, client, sending_wallet)
+    response=await xrpl.asyncio.transaction.submit_and_wait(send_currency_tx, client, sending_wallet)
     return response.result
 
 ###############
@@ -56,14 +66,18 @@ def send_currency(seed, destination, currency, amount):
 
 def get_balance(sb_account_seed, op_account_seed):
     """get_balance"""
+    return asyncio.run(get_balance_async(sb_account_seed, op_account_seed))
+
+async def get_balance_async(sb_account_seed, op_account_seed):
+    """get_balance_async"""
     wallet = Wallet.from_seed(sb_account_seed)
     opWallet = Wallet.from_seed(op_account_seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     balance=xrpl.models.requests.GatewayBalances(
         account=wallet.address,
         ledger_index="validated"
     )
-    response = client.request(balance)
+    response = await client.request_async(balance)
     return response.result
     
 #####################
@@ -72,9 +86,13 @@ def get_balance(sb_account_seed, op_account_seed):
 
 def configure_account(seed, default_setting):
     """configure_account"""
+    return asyncio.run(configure_account_async(seed, default_setting))
+
+async def configure_account_async(seed, default_setting):
+    """configure_account_async"""
 # Get the client
     wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
 # Create transaction
     if (default_setting):
         setting_tx=xrpl.models.transactions.AccountSet(
@@ -86,5 +104,5 @@ def configure_account(seed, default_setting):
             account=wallet.classic_address,
             clear_flag=xrpl.models.transactions.AccountSetAsfFlag.ASF_DEFAULT_RIPPLE
         )
-    response=xrpl.transaction.submit_and_wait(setting_tx,client,wallet)
-    return response.result    
+    response=await xrpl.asyncio.transaction.submit_and_wait(setting_tx,client,wallet)
+    return response.result
@@ -1,5 +1,7 @@
+import asyncio
 import xrpl
-from xrpl.clients import JsonRpcClient
+import xrpl.asyncio.transaction
+from clients import get_client
 from xrpl.wallet import Wallet
 from xrpl.models.requests import AccountNFTs
 
@@ -7,9 +9,13 @@ testnet_url = "https://s.altnet.rippletest.net:51234"
 
 def mint_token(seed, uri, flags, transfer_fee, taxon):
     """mint_token"""
+    return asyncio.run(mint_token_async(seed, uri, flags, transfer_fee, taxon))
+
+async def mint_token_async(seed, uri, flags, transfer_fee, taxon):
+    """mint_token_async"""
 # Get the client
     minter_wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
 # Define the mint transaction
     mint_tx=xrpl.models.transactions.NFTokenMint(
         account=minter_wallet.address,
@@ -21,7 +27,7 @@ def mint_token(seed, uri, flags, transfer_fee, taxon):
 # Submit the transaction and get results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(mint_tx,client,minter_wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(mint_tx,client,minter_wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
@@ -30,19 +36,29 @@ def mint_token(seed, uri, flags, transfer_fee, taxon):
 
 def get_tokens(account):
     """get_tokens"""
-    client=JsonRpcClient(testnet_url)
+    return asyncio.run(get_tokens_async(account))
+
+
+async def get_tokens_async(account):
+    """get_tokens_async"""
+    client=get_client(testnet_url)
     acct_nfts=AccountNFTs(
         account=account
     )
-    response=client.request(acct_nfts)
+    response=await client.request_async(acct_nfts)
     return response.result
 
 
 def burn_token(seed, nftoken_id):
     """burn_token"""
+    return asyncio.run(burn_token_async(seed, nftoken_id))
+
+
+async def burn_token_async(seed, nftoken_id):
+    """burn_token_async"""
 # Get the client
     owner_wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     burn_tx=xrpl.models.transactions.NFTokenBurn(
         account=owner_wallet.address,
         nftoken_id=nftoken_id    
@@ -50,7 +66,7 @@ def burn_token(seed, nftoken_id):
 # Submit the transaction and get results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(burn_tx,client,owner_wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(burn_tx,client,owner_wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
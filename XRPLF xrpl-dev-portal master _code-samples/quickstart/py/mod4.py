@@ -1,6 +1,8 @@
+import asyncio
 import xrpl
+import xrpl.asyncio.transaction
 import json
-from xrpl.clients import JsonRpcClient
+from clients import get_client
 from xrpl.wallet import Wallet
 from datetime import datetime
 from datetime import timedelta
@@ -11,9 +13,13 @@ testnet_url = "https://s.altnet.rippletest.net:51234"
 
 def create_sell_offer(seed, amount, nftoken_id, expiration, destination):
     """create_sell_offer"""
+    return asyncio.run(create_sell_offer_async(seed, amount, nftoken_id, expiration, destination))
+
+async def create_sell_offer_async(seed, amount, nftoken_id, expiration, destination):
+    """create_sell_offer_async"""
 # Get the client
     owner_wallet = Wallet.from_seed(seed)
-    client = JsonRpcClient(testnet_url)
+    client = get_client(testnet_url)
     expiration_date = datetime.now()
     if expiration != '':
         expiration_date = xrpl.utils.datetime_to_ripple_time(expiration_date)
@@ -30,7 +36,7 @@ def create_sell_offer(seed, amount, nftoken_id, expiration, destination):
 # Submit the transaction and report the results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(sell_offer_tx,client,owner_wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(sell_offer_tx,client,owner_wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
@@ -38,8 +44,12 @@ def create_sell_offer(seed, amount, nftoken_id, expiration, destination):
 
 def accept_sell_offer(seed, offer_index):
     """accept_sell_offer"""
+    return asyncio.run(accept_sell_offer_async(seed, offer_index))
+
+async def accept_sell_offer_async(seed, offer_index):
+    """accept_sell_offer_async"""
     buyer_wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     accept_offer_tx=xrpl.models.transactions.NFTokenAcceptOffer(
        account=buyer_wallet.classic_address,
        nftoken_sell_offer=offer_index
@@ -47,7 +57,7 @@ def accept_sell_offer(seed, offer_index):
 # Submit the transaction and report the results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(accept_offer_tx,client,buyer_wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(accept_offer_tx,client,buyer_wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
@@ -56,9 +66,14 @@ def accept_sell_offer(seed, offer_index):
 
 def create_buy_offer(seed, amount, nft_id, owner, expiration, destination):
     """create_buy_offer"""
+    return asyncio.run(create_buy_offer_async(seed, amount, nft_id, owner, expiration, destination))
+
+
+async def create_buy_offer_async(seed, amount, nft_id, owner, expiration, destination):
+    """create_buy_offer_async"""
 # Get the client
     buyer_wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     expiration_date=datetime.now()
     if (expiration!=''):
         expiration_date=xrpl.utils.datetime_to_ripple_time(expiration_date)
@@ -76,7 +91,7 @@ def create_buy_offer(seed, amount, nft_id, owner, expiration, destination):
 # Submit the transaction and report the results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(buy_offer_tx,client,buyer_wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(buy_offer_tx,client,buyer_wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
@@ -85,8 +100,13 @@ def create_buy_offer(seed, amount, nft_id, owner, expiration, destination):
 
 def accept_buy_offer(seed, offer_index):
     """accept_buy_offer"""
+    return asyncio.run(accept_buy_offer_async(seed, offer_index))
+
+
+async def accept_buy_offer_async(seed, offer_index):
+    """accept_buy_offer_async"""
     buyer_wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     accept_offer_tx=xrpl.models.transactions.NFTokenAcceptOffer(
        account=buyer_wallet.address,
        nftoken_buy_offer=offer_index
@@ -94,7 +114,7 @@ def accept_buy_offer(seed, offer_index):
 # Submit the transaction and report the results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(accept_offer_tx,client,buyer_wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(accept_offer_tx,client,buyer_wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
@@ -102,23 +122,28 @@ def accept_buy_offer(seed, offer_index):
 
 def get_offers(nft_id):
     """get_offers"""
-    client=JsonRpcClient(testnet_url)
-    offers=NFTBuyOffers(
-        nft_id=nft_id
-    )
-    response=client.request(offers)
-    allOffers="Buy Offers:\n"+json.dumps(response.result, indent=4)
-    offers=NFTSellOffers(
-        nft_id=nft_id
+    return asyncio.run(get_offers_async(nft_id))
+
+async def get_offers_async(nft_id):
+    """get_offers_async"""
+    client=get_client(testnet_url)
+    # Both lookups go out at once
+    buy_response, sell_response=await asyncio.gather(
+        client.request_async(NFTBuyOffers(nft_id=nft_id)),
+        client.request_async(NFTSellOffers(nft_id=nft_id))
     )
-    response=client.request(offers)
-    allOffers+="\n\nSell Offers:\n"+json.dumps(response.result, indent=4)
+    allOffers="Buy Offers:\n"+json.dumps(buy_response.result, indent=4)
+    allOffers+="\n\nSell Offers:\n"+json.dumps(sell_response.result, indent=4)
     return allOffers
 
 def cancel_offer(seed, nftoken_offer_ids):
     """cancel_offer"""
+    return asyncio.run(cancel_offer_async(seed, nftoken_offer_ids))
+
+async def cancel_offer_async(seed, nftoken_offer_ids):
+    """cancel_offer_async"""
     owner_wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     tokenOfferIDs=[nftoken_offer_ids]
     nftSellOffers="No sell offers"
     cancel_offer_tx=xrpl.models.transactions.NFTokenCancelOffer(
@@ -127,7 +152,7 @@ def cancel_offer(seed, nftoken_offer_ids):
     )
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(cancel_offer_tx,client,owner_wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(cancel_offer_tx,client,owner_wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
@@ -1,13 +1,20 @@
+import asyncio
 import xrpl
-from xrpl.clients import JsonRpcClient
+import xrpl.asyncio.transaction
+from clients import get_client
 from xrpl.wallet import Wallet
 testnet_url = "https://s.altnet.rippletest.net:51234"
 
 
 def broker_sale(seed, sell_offer_index, buy_offer_index, broker_fee):
     """broker_sale"""
+    return asyncio.run(broker_sale_async(seed, sell_offer_index, buy_offer_index, broker_fee))
+
+
+async def broker_sale_async(seed, sell_offer_index, buy_offer_index, broker_fee):
+    """broker_sale_async"""
     broker_wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     accept_offer_tx=xrpl.models.transactions.NFTokenAcceptOffer(
        account=broker_wallet.classic_address,
        nftoken_sell_offer=sell_offer_index,
@@ -17,7 +24,7 @@ def broker_sale(seed, sell_offer_index, buy_offer_index, broker_fee):
 # Submit the transaction and report the results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(accept_offer_tx,client,broker_wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(accept_offer_tx,client,broker_wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
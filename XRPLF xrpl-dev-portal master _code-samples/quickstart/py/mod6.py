@@ -1,12 +1,18 @@
+import asyncio
 import xrpl
-from xrpl.clients import JsonRpcClient
+import xrpl.asyncio.transaction
+from clients import get_client
 from xrpl.wallet import Wallet
 testnet_url="https://s.altnet.rippletest.net:51234"
 
 def set_minter(seed, minter):
     """set_minter"""
+    return asyncio.run(set_minter_async(seed, minter))
+
+async def set_minter_async(seed, minter):
+    """set_minter_async"""
     granter_wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
 
     set_minter_tx=xrpl.models.transactions.AccountSet(
         account=granter_wallet.address,
@@ -16,7 +22,7 @@ def set_minter(seed, minter):
 # Submit the transaction and report the results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(set_minter_tx,client,
+        response=await xrpl.asyncio.transaction.submit_and_wait(set_minter_tx,client,
             granter_wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
@@ -25,8 +31,12 @@ def set_minter(seed, minter):
 
 def mint_other(seed, uri, flags, transfer_fee, taxon, issuer):
     """mint_other"""
+    return asyncio.run(mint_other_async(seed, uri, flags, transfer_fee, taxon, issuer))
+
+async def mint_other_async(seed, uri, flags, transfer_fee, taxon, issuer):
+    """mint_other_async"""
     minter_wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     mint_other_tx=xrpl.models.transactions.NFTokenMint(
         account=minter_wallet.address,
         uri=xrpl.utils.str_to_hex(uri),
@@ -38,7 +48,7 @@ def mint_other(seed, uri, flags, transfer_fee, taxon, issuer):
 # Submit the transaction and report the results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(mint_other_tx,client,
+        response=await xrpl.asyncio.transaction.submit_and_wait(mint_other_tx,client,
             minter_wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
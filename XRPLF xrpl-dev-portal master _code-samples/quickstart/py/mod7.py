@@ -1,79 +1,207 @@
+import asyncio
 import xrpl
-from xrpl.clients import JsonRpcClient
+import xrpl.asyncio.ledger
+import xrpl.asyncio.transaction
+from xrpl.asyncio.clients import AsyncWebsocketClient
 from xrpl.wallet import Wallet
-from xrpl.models.requests import AccountNFTs
+from xrpl.models.requests import AccountNFTs, SubmitOnly, Subscribe
+from xrpl.utils import get_nftoken_id
+from clients import get_client
 
 testnet_url = "https://s.altnet.rippletest.net:51234"
+testnet_ws_url = "wss://s.altnet.rippletest.net:51233"
 
+# An account can own at most 250 Tickets at once.
+MAX_TICKETS = 250
+# Ledgers a signed mint stays valid for before it is reported as expired.
+LEDGER_WINDOW = 20
+# Submit results that still may make it into a validated ledger.
+PROVISIONAL_RESULTS = {'tesSUCCESS', 'terQUEUED', 'terPRE_TICKET'}
 
-def batch_mint(seed, uri, flags, transfer_fee, taxon, count):
+
+def no_progress(done, total=None, message=None):
+    """no_progress"""
+
+
+def get_tickets(client, account):
+    """get_tickets"""
+    return asyncio.run(get_tickets_async(client, account))
+
+
+async def get_tickets_async(client, account):
+    """get_tickets_async"""
+    tickets=[]
+    marker=None
+    while True:
+        response=await client.request_async(xrpl.models.requests.AccountObjects(
+            account=account,
+            type='ticket',
+            ledger_index='validated',
+            limit=400,
+            marker=marker
+        ))
+        tickets+=[obj['TicketSequence'] for obj in response.result['account_objects']]
+        marker=response.result.get('marker')
+        if marker is None:
+            return sorted(tickets)
+
+
+def batch_mint(seed, uri, flags, transfer_fee, taxon, count, progress=no_progress):
     """batch_mint"""
+    return asyncio.run(batch_mint_async(seed, uri, flags, transfer_fee, taxon, count, progress))
+
+
+async def batch_mint_async(seed, uri, flags, transfer_fee, taxon, count, progress=no_progress):
+    """batch_mint_async
+
+    progress(done, total, message) is called each time a mint is validated.
+    """
     wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
-
-    acct_info = xrpl.models.requests.account_info.AccountInfo(
-        account=wallet.classic_address,
-        ledger_index='validated'
-    )
-    get_seq_request = client.request(acct_info)
-    current_sequence=get_seq_request.result['account_data']['Sequence']
-    ticket_tx=xrpl.models.transactions.TicketCreate(
-        account=wallet.address,
-        ticket_count=int(count),
-        sequence=current_sequence  
-    )
-    
-    response=xrpl.transaction.submit_and_wait(ticket_tx,client,wallet)
-
-    ticket_numbers_req=xrpl.models.requests.AccountObjects(
-        account=wallet.address,
-        type='ticket'
-    )
-    ticket_response=client.request(ticket_numbers_req)
-    
-    tickets=[int(0)] * int(count)
-    acct_objs= ticket_response.result['account_objects']
-    for x in range(int(count)):
-        tickets[x] = acct_objs[x]['TicketSequence']
+    try:
+        results=await mint_pipeline(wallet, uri, flags, transfer_fee,
+            taxon, int(count), progress=progress)
+    except xrpl.transaction.XRPLReliableSubmissionException as e:
+        return f"Submit failed: {e}"
     reply=""
     create_count=0
-    # Define the mint transaction
-    for x in range(int(count)):
+    for result in results:
+        if result['nftoken_id']:
+            create_count+=1
+        else:
+            reply+=f"Mint on ticket {result['ticket']} failed: {result['result']}\n"
+    reply+=str(create_count)+' NFTs generated.'
+    return reply
+
+
+async def mint_pipeline(wallet, uri, flags, transfer_fee, taxon, count, window=50,
+        progress=no_progress):
+    """mint_pipeline
+
+    Mints count NFTs from ticketed NFTokenMint transactions. Every mint is signed
+    locally, submitted with at most window submissions in flight, and confirmed
+    from the account stream as ledgers close instead of one submit_and_wait at a
+    time. Returns one dict per mint with its ticket, hash, result and NFToken ID.
+    """
+    results=[]
+    async with AsyncWebsocketClient(testnet_ws_url) as client:
+        await client.request(Subscribe(accounts=[wallet.address], streams=['ledger']))
+        while len(results) < count:
+            # An account can hold at most 250 Tickets, so bigger collections
+            # are minted in rounds.
+            round_size=min(count - len(results), MAX_TICKETS)
+            tickets=await create_tickets(client, wallet, round_size)
+            results+=await mint_round(client, wallet, tickets[:round_size], uri,
+                flags, transfer_fee, taxon, window, len(results), count, progress)
+    return results
+
+
+async def create_tickets(client, wallet, count):
+    """create_tickets"""
+    existing=await get_tickets_async(get_client(testnet_url), wallet.address)
+    if len(existing) < count:
+        ticket_tx=xrpl.models.transactions.TicketCreate(
+            account=wallet.address,
+            ticket_count=count - len(existing)
+        )
+        await xrpl.asyncio.transaction.submit_and_wait(ticket_tx, client, wallet)
+        existing=await get_tickets_async(get_client(testnet_url), wallet.address)
+    return existing
+
+
+async def mint_round(client, wallet, tickets, uri, flags, transfer_fee, taxon, window,
+        done=0, total=None, progress=no_progress):
+    """mint_round"""
+    total=total or len(tickets)
+    fee=await xrpl.asyncio.ledger.get_fee(client)
+    current=await xrpl.asyncio.ledger.get_latest_validated_ledger_sequence(client)
+    last_ledger=current + LEDGER_WINDOW
+    network_id=client.network_id
+
+    # Sign every mint up front: signing is local and needs no round trips.
+    signed={}
+    for ticket in tickets:
         mint_tx=xrpl.models.transactions.NFTokenMint(
-            account=wallet.classic_address,
+            account=wallet.address,
             uri=xrpl.utils.str_to_hex(uri),
             flags=int(flags),
             transfer_fee=int(transfer_fee),
-            ticket_sequence=tickets[x],
+            ticket_sequence=ticket,
             sequence=0,
-            nftoken_taxon=int(taxon)
+            nftoken_taxon=int(taxon),
+            fee=fee,
+            last_ledger_sequence=last_ledger,
+            network_id=network_id
         )
-        # Submit the transaction and get results
-        try:
-            response=xrpl.transaction.submit_and_wait(mint_tx,client,
-                wallet)
-            create_count+=1 
-        except xrpl.transaction.XRPLReliableSubmissionException as e:
-            reply+=f"Submit failed: {e}\n"
-    reply+=str(create_count)+' NFTs generated.'
-    return reply
+        signed_tx=xrpl.transaction.sign(mint_tx, wallet)
+        signed[signed_tx.get_hash()]={'ticket': ticket, 'tx': signed_tx,
+            'result': None, 'nftoken_id': None}
+
+    limit=asyncio.Semaphore(window)
+
+    async def submit_one(entry):
+        async with limit:
+            response=await client.request(SubmitOnly(
+                tx_blob=xrpl.core.binarycodec.encode(entry['tx'].to_xrpl())
+            ))
+            engine_result=response.result.get('engine_result', str(response.result))
+            if engine_result not in PROVISIONAL_RESULTS:
+                entry['result']=engine_result
+
+    await asyncio.gather(*[submit_one(entry) for entry in signed.values()])
+
+    pending={tx_hash for tx_hash, entry in signed.items() if entry['result'] is None}
+    # Every submit was rejected, so there is nothing to wait for
+    if not pending:
+        return results_of(signed)
+    async for message in client:
+        if message.get('type') == 'transaction' and message.get('validated'):
+            tx_hash=message.get('hash') or message.get('transaction', {}).get('hash')
+            if tx_hash in pending:
+                meta=message['meta']
+                entry=signed[tx_hash]
+                entry['result']=meta['TransactionResult']
+                if entry['result'] == 'tesSUCCESS':
+                    entry['nftoken_id']=meta.get('nftoken_id') or get_nftoken_id(meta)
+                pending.discard(tx_hash)
+                done+=1
+                progress(done, total, f"{done} of {total} mints validated")
+        elif message.get('type') == 'ledgerClosed':
+            if message['ledger_index'] > last_ledger:
+                for tx_hash in pending:
+                    signed[tx_hash]['result']='expired'
+                pending.clear()
+        if not pending:
+            break
+
+    return results_of(signed)
+
+
+def results_of(signed):
+    """results_of"""
+    return [
+        {'ticket': entry['ticket'], 'hash': tx_hash, 'result': entry['result'],
+            'nftoken_id': entry['nftoken_id']}
+        for tx_hash, entry in signed.items()
+    ]
 
 
 def get_batch(seed, account):
     """get_batch"""
-    client=JsonRpcClient(testnet_url)
-    acct_nfts=AccountNFTs(
-        account=account,
-        limit=400
-    )
-    response=client.request(acct_nfts)
-    responses=response.result
-    while(acct_nfts.marker):
-        acct_nfts=AccountNFTs(
+    return asyncio.run(get_batch_async(seed, account))
+
+
+async def get_batch_async(seed, account):
+    """get_batch_async"""
+    client=get_client(testnet_url)
+    nfts=[]
+    marker=None
+    while True:
+        response=await client.request_async(AccountNFTs(
             account=account,
             limit=400,
-            marker=acct_nfts.marker
-        )
-        response=client.request(acct_nfts)
-        responses+=response.result
-    return responses
+            marker=marker
+        ))
+        nfts+=response.result['account_nfts']
+        marker=response.result.get('marker')
+        if marker is None:
+            return {**response.result, 'account_nfts': nfts}
@@ -1,5 +1,7 @@
+import asyncio
 import xrpl
-from xrpl.clients import JsonRpcClient
+import xrpl.asyncio.transaction
+from clients import get_client
 from xrpl.wallet import Wallet
 from datetime import datetime
 from xrpl.models.transactions import EscrowCreate, EscrowFinish
@@ -17,8 +19,12 @@ def add_seconds(numOfSeconds):
 
 
 def create_time_escrow(seed, amount, destination, finish, cancel):
+    return asyncio.run(create_time_escrow_async(seed, amount, destination, finish, cancel))
+
+
+async def create_time_escrow_async(seed, amount, destination, finish, cancel):
     wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     finish_date = add_seconds(finish)
     cancel_date = add_seconds(cancel)
 
@@ -32,15 +38,18 @@ def create_time_escrow(seed, amount, destination, finish, cancel):
     # Submit the transaction and report the results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(escrow_tx,client,wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(escrow_tx,client,wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
     return reply
 
 def finish_time_escrow(seed, owner, sequence):
+    return asyncio.run(finish_time_escrow_async(seed, owner, sequence))
+
+async def finish_time_escrow_async(seed, owner, sequence):
     wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     finish_tx=xrpl.models.transactions.EscrowFinish(
         account=wallet.address,
         owner=owner,
@@ -49,25 +58,31 @@ def finish_time_escrow(seed, owner, sequence):
     # Submit the transaction and report the results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(finish_tx,client,wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(finish_tx,client,wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
     return reply
 
 def get_escrows(account):
-    client=JsonRpcClient(testnet_url)
+    return asyncio.run(get_escrows_async(account))
+
+async def get_escrows_async(account):
+    client=get_client(testnet_url)
     acct_escrows=AccountObjects(
         account=account,
         ledger_index="validated",
         type="escrow"
     )
-    response=client.request(acct_escrows)
+    response=await client.request_async(acct_escrows)
     return response.result
 
 def cancel_time_escrow(seed, owner, sequence):
+    return asyncio.run(cancel_time_escrow_async(seed, owner, sequence))
+
+async def cancel_time_escrow_async(seed, owner, sequence):
     wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     cancel_tx=xrpl.models.transactions.EscrowCancel(
         account=wallet.address,
         owner=owner,
@@ -76,17 +91,20 @@ def cancel_time_escrow(seed, owner, sequence):
     # Submit the transaction and report the results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(cancel_tx,client,wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(cancel_tx,client,wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
     return reply
 
 def get_transaction(account, ledger_index):
-    client=JsonRpcClient(testnet_url)
+    return asyncio.run(get_transaction_async(account, ledger_index))
+
+async def get_transaction_async(account, ledger_index):
+    client=get_client(testnet_url)
     tx_info=AccountTx(
         account=account,
         ledger_index=int(ledger_index)
     )
-    response=client.request(tx_info)
+    response=await client.request_async(tx_info)
     return response.result
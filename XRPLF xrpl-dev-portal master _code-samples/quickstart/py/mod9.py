@@ -1,5 +1,7 @@
+import asyncio
 import xrpl
-from xrpl.clients import JsonRpcClient
+import xrpl.asyncio.transaction
+from clients import get_client
 from xrpl.wallet import Wallet
 from datetime import datetime
 from xrpl.models.transactions import EscrowCreate, EscrowFinish
@@ -23,8 +25,12 @@ def add_seconds(numOfSeconds):
 
 
 def create_conditional_escrow(seed, amount, destination, cancel, condition):
+    return asyncio.run(create_conditional_escrow_async(seed, amount, destination, cancel, condition))
+
+
+async def create_conditional_escrow_async(seed, amount, destination, cancel, condition):
     wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     cancel_date = add_seconds(cancel)
     finish_date = cancel_date - 200
 
@@ -38,15 +44,18 @@ def create_conditional_escrow(seed, amount, destination, cancel, condition):
     # Submit the transaction and report the results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(escrow_tx,client,wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(escrow_tx,client,wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
     return reply
 
 def finish_conditional_escrow(seed, owner, sequence, condition, fulfillment):
+    return asyncio.run(finish_conditional_escrow_async(seed, owner, sequence, condition, fulfillment))
+
+async def finish_conditional_escrow_async(seed, owner, sequence, condition, fulfillment):
     wallet=Wallet.from_seed(seed)
-    client=JsonRpcClient(testnet_url)
+    client=get_client(testnet_url)
     finish_tx=xrpl.models.transactions.EscrowFinish(
         account=wallet.address,
         owner=owner,
@@ -57,7 +66,7 @@ def finish_conditional_escrow(seed, owner, sequence, condition, fulfillment):
     # Submit the transaction and report the results
     reply=""
     try:
-        response=xrpl.transaction.submit_and_wait(finish_tx,client,wallet)
+        response=await xrpl.asyncio.transaction.submit_and_wait(finish_tx,client,wallet)
         reply=response.result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
         reply=f"Submit failed: {e}"
@@ -0,0 +1,116 @@
+import asyncio
+import contextvars
+import queue
+import threading
+import traceback
+
+# The Task whose coroutine is running, so code deep inside it can report
+# progress without being handed a callback.
+current_task = contextvars.ContextVar("current_task", default=None)
+
+
+def report_progress(done, total=None, message=None):
+    """report_progress
+
+    Tells the window how far the current task has got. Does nothing when the
+    code isn't running under a TaskRunner, so module functions can call it
+    unconditionally.
+    """
+    task = current_task.get()
+    if task is not None and task.on_progress is not None:
+        task.runner.post(task.on_progress, done, total, message)
+
+
+class Task:
+    def __init__(self, runner, on_done, on_error, on_progress, on_cancel):
+        self.runner = runner
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancel = on_cancel
+        self.future = None
+
+    def cancel(self):
+        """Cancels the task; its on_cancel callback runs once it has stopped"""
+        self.future.cancel()
+
+    def done(self):
+        return self.future.done()
+
+
+class TaskRunner:
+    """
+    Runs coroutines on an asyncio event loop in a background thread, so the Tk
+    window stays responsive while transactions are submitted and validated.
+
+    Tk widgets may only be touched from the Tk thread, so results, errors and
+    progress are queued and handed to their callbacks from a function that Tk
+    runs every few milliseconds with after().
+    """
+
+    def __init__(self, root, on_error=None, poll_interval=50):
+        self.root = root
+        self.on_error = on_error or (lambda error: traceback.print_exception(error))
+        self.poll_interval = poll_interval
+        self.callbacks = queue.SimpleQueue()
+        self.locks = {}
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="tk-task-runner", daemon=True).start()
+        self.root.after(self.poll_interval, self.poll)
+
+    def run(self, coro, on_done=None, on_error=None, on_progress=None, on_cancel=None, key=None):
+        """
+        Starts a coroutine and returns its Task right away. Tasks with the same
+        key (for example, the account they send from) run one after another, so
+        they don't compete for the account's Sequence; tasks with different keys
+        or no key run at the same time.
+        """
+        task = Task(self, on_done, on_error or self.on_error, on_progress, on_cancel)
+        task.future = asyncio.run_coroutine_threadsafe(self.execute(task, coro, key), self.loop)
+        return task
+
+    async def execute(self, task, coro, key):
+        current_task.set(task)
+        started = False
+        try:
+            if key is None:
+                started = True
+                result = await coro
+            else:
+                async with self.locks.setdefault(key, asyncio.Lock()):
+                    started = True
+                    result = await coro
+        except asyncio.CancelledError:
+            self.post(task.on_cancel)
+            raise
+        except Exception as e:
+            self.post(task.on_error, e)
+            return
+        finally:
+            if not started:
+                # Cancelled while waiting its turn
+                coro.close()
+        self.post(task.on_done, result)
+
+    def post(self, callback, *args):
+        if callback is not None:
+            self.callbacks.put((callback, args))
+
+    def poll(self):
+        try:
+            while True:
+                try:
+                    callback, args = self.callbacks.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    callback(*args)
+                except Exception as e:
+                    # A failing callback mustn't stop the results after it
+                    # from being delivered
+                    if callback is self.on_error:
+                        traceback.print_exception(e)
+                    else:
+                        self.post(self.on_error, e)
+        finally:
+            self.root.after(self.poll_interval, self.poll)
@@ -9,6 +9,7 @@ import json
 import logging
 import re
 import sys
+import time
 
 from address import decode_address
 from xrpl_num import IssuedAmount
@@ -169,7 +170,8 @@ def amount_to_bytes(a):
 
         # Fungible token amount (non-MPT)
         issued_amt = IssuedAmount(a["value"]).to_bytes()
-        logger.debug("Issued amount: %s"%issued_amt.hex())
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Issued amount: %s", issued_amt.hex())
         currency_code = currency_code_to_bytes(a["currency"])
         return issued_amt + currency_code + decode_address(a["issuer"])
     else:
@@ -220,12 +222,13 @@ def currency_code_to_bytes(code_string, xrp_ok=False):
             if xrp_ok:
                 # Rare, but when the currency code "XRP" is serialized, it's
                 # a special-case all zeroes.
-                logger.debug("Currency code(XRP): "+("0"*40))
+                logger.debug("Currency code(XRP): %s", "0"*40)
                 return bytes(20)
             raise ValueError("issued currency can't be XRP")
 
         code_ascii = code_string.encode("ASCII")
-        logger.debug("Currency code ASCII: %s"%code_ascii.hex())
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Currency code ASCII: %s", code_ascii.hex())
         # standard currency codes: https://xrpl.org/currency-formats.html#standard-currency-codes
         # 8 bits type code (0x00)
         # 88 bits reserved (0's)
@@ -316,7 +319,8 @@ def object_to_bytes(obj):
         if (DEFINITIONS["FIELDS"][field_name]["isSerialized"]):
             field_val = inner_obj[field_name]
             field_bytes = field_to_bytes(field_name, field_val)
-            logger.debug("{n}: {h}".format(n=field_name, h=field_bytes.hex()))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s: %s", field_name, field_bytes.hex())
             fields_as_bytes.append(field_bytes)
 
     fields_as_bytes.append(field_id("ObjectEndMarker"))
@@ -339,7 +343,8 @@ def pathset_to_bytes(pathset):
     paths_as_bytes = []
     for n in range(len(pathset)):
         path = path_as_bytes(pathset[n])
-        logger.debug("Path %d:  %s"%(n, path.hex()))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Path %d:  %s", n, path.hex())
         paths_as_bytes.append(path)
         if n + 1 == len(pathset): # last path; add an end byte
             paths_as_bytes.append(bytes.fromhex("00"))
@@ -423,44 +428,53 @@ def vector256_to_bytes(strlist):
 
 # Core serialization logic -----------------------------------------------------
 
+DISPATCH = {
+    # TypeName: function(field): bytes object
+    "AccountID": accountid_to_bytes,
+    "Amount": amount_to_bytes,
+    "Blob": blob_to_bytes,
+    "Currency": currency_to_bytes,
+    "Hash128": hash128_to_bytes, # aka UInt128
+    "Hash160": hash160_to_bytes,
+    "Hash256": hash256_to_bytes,
+    "Issue": issue_to_bytes,
+    "Number": number_to_bytes,
+    "PathSet": pathset_to_bytes,
+    "STArray": array_to_bytes,
+    "STObject": object_to_bytes,
+    "UInt8" : uint8_to_bytes,
+    "UInt16": uint16_to_bytes,
+    "UInt32": uint32_to_bytes,
+    "UInt64": uint64_to_bytes,
+    "UInt192": uint192_to_bytes,
+    "UInt384": uint384_to_bytes,
+    "Vector256": vector256_to_bytes,
+}
+
+SPECIAL_FIELDS = {
+    # TransactionType is written in JSON as a string name but in binary as a
+    # UInt16, so it can't use the UInt16 type's function.
+    "TransactionType": tx_type_to_bytes,
+}
+
 def field_to_bytes(field_name, field_val):
     """
     Returns a bytes object containing the serialized version of a field
     including its field ID prefix.
     """
     field_type = DEFINITIONS["FIELDS"][field_name]["type"]
-    logger.debug("Serializing field {f} of type {t}".format(f=field_name, t=field_type))
-
     id_prefix = field_id(field_name)
-    logger.debug("id_prefix is: %s" % id_prefix.hex())
-
-    if field_name == "TransactionType":
-        # Special case: convert from string to UInt16
-        return b''.join( (id_prefix, tx_type_to_bytes(field_val)) )
-
-    dispatch = {
-        # TypeName: function(field): bytes object
-        "AccountID": accountid_to_bytes,
-        "Amount": amount_to_bytes,
-        "Blob": blob_to_bytes,
-        "Currency": currency_to_bytes,
-        "Hash128": hash128_to_bytes, # aka UInt128
-        "Hash160": hash160_to_bytes,
-        "Hash256": hash256_to_bytes,
-        "Issue": issue_to_bytes,
-        "Number": number_to_bytes,
-        "PathSet": pathset_to_bytes,
-        "STArray": array_to_bytes,
-        "STObject": object_to_bytes,
-        "UInt8" : uint8_to_bytes,
-        "UInt16": uint16_to_bytes,
-        "UInt32": uint32_to_bytes,
-        "UInt64": uint64_to_bytes,
-        "UInt192": uint192_to_bytes,
-        "UInt384": uint384_to_bytes,
-        "Vector256": vector256_to_bytes,
-    }
-    field_binary = dispatch[field_type](field_val)
+    # Debug messages are only formatted (and .hex() only run) when they'll be
+    # shown, since this runs once for every field.
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Serializing field %s of type %s", field_name, field_type)
+        logger.debug("id_prefix is: %s", id_prefix.hex())
+
+    special_case = SPECIAL_FIELDS.get(field_name)
+    if special_case is not None:
+        return b''.join( (id_prefix, special_case(field_val)) )
+
+    field_binary = DISPATCH[field_type](field_val)
     return b''.join( (id_prefix, field_binary) )
 
 def serialize_tx(tx, for_signing=False):
@@ -501,7 +515,7 @@ def serialize_tx(tx, for_signing=False):
         del tx["DeliverMax"]
 
     field_order = sorted(tx.keys(), key=field_sort_key)
-    logger.debug("Canonical field order: %s" % field_order)
+    logger.debug("Canonical field order: %s", field_order)
 
     fields_as_bytes = []
     for field_name in field_order:
@@ -511,13 +525,98 @@ def serialize_tx(tx, for_signing=False):
                 continue
             field_val = tx[field_name]
             field_bytes = field_to_bytes(field_name, field_val)
-            logger.debug("{n}: {h}".format(n=field_name, h=field_bytes.hex()))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s: %s", field_name, field_bytes.hex())
             fields_as_bytes.append(field_bytes)
 
     all_serial = b''.join(fields_as_bytes)
-    logger.debug(all_serial.hex().upper())
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(all_serial.hex().upper())
     return all_serial
 
+# Optional profiling -----------------------------------------------------------
+#    Off by default. enable_profiling() replaces each function in DISPATCH and
+#    SPECIAL_FIELDS with a timed wrapper, and disable_profiling() puts the
+#    plain functions back, so serialization costs nothing extra while it's off.
+
+PLAIN_DISPATCH = dict(DISPATCH)
+PLAIN_SPECIAL_FIELDS = dict(SPECIAL_FIELDS)
+
+class FieldProfile:
+    """
+    Counts calls and cumulative nanoseconds for each field type.
+
+    "total" time includes any fields nested inside (an STObject includes its
+    child fields); "self" time doesn't. Neither covers encoding field IDs or
+    the work field_to_bytes() and serialize_tx() do around each field, so the
+    self times add up to a bit less than the time spent serializing. Any object with the same record() method can be passed
+    to enable_profiling() instead, for example to send timings elsewhere.
+    """
+    def __init__(self):
+        # type_name str: {function: str, calls: int, total_ns: int, self_ns: int}
+        self.stats = {}
+
+    def record(self, type_name, function_name, total_ns, self_ns):
+        entry = self.stats.get(type_name)
+        if entry is None:
+            entry = self.stats[type_name] = {"function": function_name,
+                "calls": 0, "total_ns": 0, "self_ns": 0}
+        entry["calls"] += 1
+        entry["total_ns"] += total_ns
+        entry["self_ns"] += self_ns
+
+    def export(self):
+        """Returns the counters as a dict that can be dumped to JSON"""
+        return {type_name: dict(entry) for (type_name, entry) in self.stats.items()}
+
+    def report(self):
+        """Returns the counters as a table, most self time first"""
+        rows = sorted(self.stats.items(), key=lambda item: item[1]["self_ns"], reverse=True)
+        all_self_ns = sum(entry["self_ns"] for (_, entry) in rows) or 1
+        lines = ["%-16s %-20s %10s %12s %12s %6s" %
+            ("Field type", "Function", "Calls", "Total ms", "Self ms", "Self%")]
+        for type_name, entry in rows:
+            lines.append("%-16s %-20s %10d %12.3f %12.3f %5.1f%%" % (type_name,
+                entry["function"], entry["calls"], entry["total_ns"] / 1e6,
+                entry["self_ns"] / 1e6, 100 * entry["self_ns"] / all_self_ns))
+        return "\n".join(lines)
+
+def timed(type_name, func, profile, nested_ns):
+    """
+    Wraps a field type's function so each call is recorded in profile.
+    nested_ns is a stack shared by all the wrappers, which collects the time
+    spent in fields nested inside the one being timed.
+    """
+    def wrapper(field_val):
+        nested_ns.append(0)
+        start = time.perf_counter_ns()
+        try:
+            return func(field_val)
+        finally:
+            total_ns = time.perf_counter_ns() - start
+            self_ns = total_ns - nested_ns.pop()
+            if nested_ns:
+                nested_ns[-1] += total_ns
+            profile.record(type_name, func.__name__, total_ns, self_ns)
+    return wrapper
+
+def enable_profiling(profile=None):
+    """
+    Starts timing each field type's serialization and returns the profile
+    the timings are recorded in (a new FieldProfile unless one is provided).
+    """
+    if profile is None:
+        profile = FieldProfile()
+    nested_ns = []
+    for (table, plain) in ((DISPATCH, PLAIN_DISPATCH), (SPECIAL_FIELDS, PLAIN_SPECIAL_FIELDS)):
+        for name, func in plain.items():
+            table[name] = timed(name, func, profile, nested_ns)
+    return profile
+
+def disable_profiling():
+    DISPATCH.update(PLAIN_DISPATCH)
+    SPECIAL_FIELDS.update(PLAIN_SPECIAL_FIELDS)
+
 # Startup stuff ----------------------------------------------------------------
 logger.setLevel(logging.WARNING)
 DEFINITIONS = load_defs()
@@ -536,6 +635,12 @@ if __name__ == "__main__":
         help="Read input transaction JSON from standard input (stdin)")
     p.add_argument("-v", "--verbose", action="store_true", default=False,
         help="Display debug messages (such as individual field serializations)")
+    p.add_argument("--profile", action="store_true", default=False,
+        help="Print time spent on each field type to stderr")
+    p.add_argument("--profile-json",
+        help="Write time spent on each field type to this file as JSON")
+    p.add_argument("-n", "--repeat", type=int, default=1,
+        help="Serialize the transaction this many times (for profiling)")
     args = p.parse_args()
 
     if args.verbose:
@@ -550,4 +655,15 @@ if __name__ == "__main__":
         with open(args.filename) as f:
             example_tx = json.load(f)
 
-    print(serialize_tx(example_tx).hex().upper())
+    profile = enable_profiling() if args.profile or args.profile_json else None
+    for _ in range(args.repeat):
+        # serialize_tx() may modify the transaction (DeliverMax), so give it a copy
+        tx_binary = serialize_tx(dict(example_tx))
+    print(tx_binary.hex().upper())
+
+    if profile:
+        if args.profile:
+            print(profile.report(), file=sys.stderr)
+        if args.profile_json:
+            with open(args.profile_json, "w") as f:
+                json.dump(profile.export(), f, indent=2)
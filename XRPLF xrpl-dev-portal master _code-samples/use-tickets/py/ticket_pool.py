@@ -0,0 +1,213 @@
+import asyncio
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.asyncio.ledger import get_fee
+from xrpl.asyncio.transaction import submit, submit_and_wait
+from xrpl.asyncio.wallet import generate_faucet_wallet
+from xrpl.models.requests import LedgerEntry, Subscribe
+from xrpl.models.requests.account_objects import AccountObjects, AccountObjectType
+from xrpl.models.requests.ledger_entry import Ticket
+from xrpl.models.transactions import AccountSet, TicketCreate
+from xrpl.transaction import sign
+
+# This code sample keeps a pool of Tickets ready so that many transactions can
+# be sent from one account at the same time, without waiting for each other's
+# Sequence numbers. The pool tops itself up in the background and reclaims
+# Tickets whose transactions expired without being validated.
+# https://xrpl.org/tickets.html#tickets
+# https://xrpl.org/use-tickets.html
+
+# An account can own at most 250 Tickets at a time
+MAX_TICKETS = 250
+
+
+class TicketPool:
+    def __init__(self, client, wallet, target=50, low_water=15):
+        self.client = client
+        self.wallet = wallet
+        self.target = min(target, MAX_TICKETS)
+        self.low_water = low_water
+        self.available = []
+        # Tickets handed out and not yet known to be used, with the
+        # LastLedgerSequence of the transaction that is using them.
+        self.leased = {}
+        self.changed = asyncio.Condition()
+        self.topping_up = None
+        self.validated_ledger = 0
+
+    async def recover(self):
+        """
+        Rebuilds the pool from the Tickets the account owns on ledger, so a
+        restarted process picks up where the last one left off.
+        """
+        tickets = []
+        marker = None
+        while True:
+            response = await self.client.request(AccountObjects(
+                account=self.wallet.address,
+                type=AccountObjectType.TICKET,
+                ledger_index="validated",
+                marker=marker
+            ))
+            tickets += [obj["TicketSequence"] for obj in response.result["account_objects"]]
+            marker = response.result.get("marker")
+            if marker is None:
+                break
+        self.validated_ledger = response.result["ledger_index"]
+        async with self.changed:
+            self.available = sorted(set(tickets) - set(self.leased))
+            self.changed.notify_all()
+        print(f"Recovered {len(self.available)} Ticket(s).")
+
+    async def acquire(self, ledger_window=20):
+        """
+        Hands out a Ticket, waiting for a top-up if none are left. Returns the
+        Ticket and the LastLedgerSequence the transaction using it must set;
+        the Ticket is reclaimed if it's still unused after that ledger.
+        """
+        async with self.changed:
+            while not self.available:
+                self.maybe_top_up()
+                await self.changed.wait()
+            ticket = self.available.pop(0)
+            last_ledger_sequence = self.validated_ledger + ledger_window
+            self.leased[ticket] = last_ledger_sequence
+        self.maybe_top_up()
+        return ticket, last_ledger_sequence
+
+    def release(self, ticket, used=True):
+        """
+        Reports what happened to a leased Ticket. Pass used=False if the
+        transaction definitely won't be validated, e.g. it was rejected with a
+        tem or tef code, so the Ticket can be handed out again right away.
+        """
+        self.leased.pop(ticket, None)
+        if not used:
+            self.available.append(ticket)
+            asyncio.create_task(self.notify())
+
+    async def notify(self):
+        async with self.changed:
+            self.changed.notify_all()
+
+    def maybe_top_up(self):
+        if len(self.available) < self.low_water and self.topping_up is None:
+            self.topping_up = asyncio.create_task(self.top_up())
+
+    async def top_up(self):
+        try:
+            count = min(
+                self.target - len(self.available),
+                MAX_TICKETS - len(self.available) - len(self.leased),
+            )
+            if count <= 0:
+                return
+            # Only the pool itself uses the account's regular Sequence, so this
+            # never collides with the ticketed transactions.
+            response = await submit_and_wait(
+                TicketCreate(account=self.wallet.address, ticket_count=count),
+                self.client,
+                self.wallet,
+            )
+            created = [
+                node["CreatedNode"]["NewFields"]["TicketSequence"]
+                for node in response.result["meta"]["AffectedNodes"]
+                if node.get("CreatedNode", {}).get("LedgerEntryType") == "Ticket"
+            ]
+            async with self.changed:
+                self.available += created
+                self.changed.notify_all()
+            print(f"Topped up the pool with {len(created)} Ticket(s).")
+        finally:
+            self.topping_up = None
+
+    async def reclaim_expired(self, validated_ledger):
+        """
+        Checks leased Tickets whose transactions can no longer be validated.
+        If the Ticket is still on ledger, its transaction never made it in and
+        the Ticket goes back into the pool.
+        """
+        expired = {
+            ticket: last_ledger for ticket, last_ledger in self.leased.items()
+            if last_ledger < validated_ledger
+        }
+        if not expired:
+            return
+        responses = await asyncio.gather(*[
+            self.client.request(LedgerEntry(
+                ticket=Ticket(owner=self.wallet.address, ticket_sequence=ticket),
+                ledger_index="validated",
+            ))
+            for ticket in expired
+        ])
+        reclaimed = 0
+        for (ticket, last_ledger), response in zip(expired.items(), responses):
+            # Skip Tickets released (and maybe leased again) during the lookups
+            if self.leased.get(ticket) != last_ledger:
+                continue
+            self.leased.pop(ticket)
+            if response.is_successful():
+                self.available.append(ticket)
+                reclaimed += 1
+        if reclaimed:
+            print(f"Reclaimed {reclaimed} unused Ticket(s).")
+            await self.notify()
+
+    async def run(self):
+        """
+        Follows the ledger stream to reclaim expired Tickets. Run this as a
+        background task for as long as the pool is in use.
+        """
+        await self.client.request(Subscribe(streams=["ledger"]))
+        async for message in self.client:
+            if message.get("type") == "ledgerClosed":
+                self.validated_ledger = message["ledger_index"]
+                await self.reclaim_expired(message["ledger_index"])
+                self.maybe_top_up()
+
+
+async def send_with_ticket(pool, client, wallet, transaction_fields, fee):
+    # 20 ledgers is about a minute and a half
+    ticket, last_ledger_sequence = await pool.acquire(ledger_window=20)
+    tx = AccountSet(
+        account=wallet.address,
+        fee=fee,
+        sequence=0,
+        ticket_sequence=ticket,
+        last_ledger_sequence=last_ledger_sequence,
+        **transaction_fields,
+    )
+    response = await submit(sign(tx, wallet), client)
+    result = response.result["engine_result"]
+    if result[:3] in ("tem", "tef"):
+        # The transaction can never consume the Ticket
+        pool.release(ticket, used=False)
+    return ticket, result
+
+
+async def main():
+    async with AsyncWebsocketClient("wss://s.altnet.rippletest.net:51233") as client:
+        # Generate a wallet and request faucet
+        test_wallet = await generate_faucet_wallet(client=client)
+        print(f"Account: {test_wallet.address}")
+
+        pool = TicketPool(client, test_wallet, target=40, low_water=10)
+        await pool.recover()
+        watcher = asyncio.create_task(pool.run())
+
+        fee = await get_fee(client)
+
+        # Send 60 independent transactions at once; the pool tops itself up
+        # while the first ones are being submitted.
+        results = await asyncio.gather(*[
+            send_with_ticket(pool, client, test_wallet, {"transfer_rate": 0}, fee)
+            for _ in range(60)
+        ])
+        for ticket, result in results:
+            print(f"Ticket {ticket}: {result}")
+
+        watcher.cancel()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,180 @@
+# Runs tutorial setup steps as a dependency graph.
+#
+# Each step declares the steps whose outputs it needs and the accounts it
+# submits transactions from. A step starts as soon as its dependencies are done
+# and no running step is using the same accounts (two steps sending from one
+# account at once would compete for its Sequence). Every finished step's
+# outputs are saved to a checkpoint file, so a failed run resumes where it left
+# off instead of starting over.
+
+import argparse
+import asyncio
+import json
+import os
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.asyncio.ledger import get_fee
+from xrpl.asyncio.transaction import submit
+from xrpl.asyncio.wallet import generate_faucet_wallet
+from xrpl.constants import CryptoAlgorithm
+from xrpl.models import AccountInfo, GenericRequest, Payment
+from xrpl.transaction import sign
+from xrpl.utils import xrp_to_drops
+from xrpl.wallet import Wallet
+
+# The genesis account of a fresh standalone rippled holds all the XRP
+GENESIS_SEED = "snoPBrXtMeMyMHUVTgbuqAfg1SUTb"
+
+
+def parse_args(description, default_url):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--url", default=default_url,
+                        help="WebSocket URL of the server to set up against")
+    parser.add_argument("--faucet-host", default=None,
+                        help="Faucet to fund wallets from, if not the network's default")
+    parser.add_argument("--standalone", action="store_true",
+                        help="Fund wallets from the genesis account and close ledgers "
+                             "with ledger_accept, for a local standalone server")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore any checkpoint from an earlier, failed run")
+    return parser.parse_args()
+
+
+class FixtureBuilder:
+    def __init__(self, output_path, url, faucet_host=None, standalone=False, restart=False):
+        self.output_path = output_path
+        self.checkpoint_path = output_path.replace(".json", ".partial.json")
+        self.url = url
+        self.faucet_host = faucet_host
+        self.standalone = standalone
+        self.steps = {}
+        self.data = {}
+        self.completed = []
+        self.client = None
+        if not restart and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            self.completed = checkpoint.pop("completed_steps")
+            self.data = checkpoint
+
+    def step(self, name, after=(), accounts=()):
+        """Registers an async function fn(builder) that returns a dict of outputs"""
+        def register(fn):
+            self.steps[name] = {"fn": fn, "after": set(after), "accounts": sorted(accounts)}
+            return fn
+        return register
+
+    def wallet(self, name):
+        return Wallet.from_seed(self.data[name]["seed"])
+
+    def save_checkpoint(self):
+        # Write to a temporary file first so a crash never leaves half a file
+        with open(self.checkpoint_path + ".tmp", "w") as f:
+            json.dump({**self.data, "completed_steps": self.completed}, f, indent=2)
+        os.replace(self.checkpoint_path + ".tmp", self.checkpoint_path)
+
+    async def fund_wallets(self, names):
+        """Creates and funds one wallet per name, all at once"""
+        if self.standalone:
+            wallets = [Wallet.create() for _ in names]
+            await self.fund_from_genesis(wallets)
+        else:
+            wallets = await asyncio.gather(*[
+                generate_faucet_wallet(self.client, faucet_host=self.faucet_host)
+                for _ in names
+            ])
+        return {
+            name: {"address": wallet.address, "seed": wallet.seed}
+            for name, wallet in zip(names, wallets)
+        }
+
+    async def fund_from_genesis(self, wallets, amount=10000):
+        genesis = Wallet.from_seed(GENESIS_SEED, algorithm=CryptoAlgorithm.SECP256K1)
+        account_info = await self.client.request(AccountInfo(
+            account=genesis.address, ledger_index="current"
+        ))
+        sequence = account_info.result["account_data"]["Sequence"]
+        fee = await get_fee(self.client)
+        await asyncio.gather(*[
+            submit(sign(Payment(
+                account=genesis.address,
+                destination=wallet.address,
+                amount=xrp_to_drops(amount),
+                sequence=sequence + i,
+                fee=fee,
+            ), genesis), self.client)
+            for i, wallet in enumerate(wallets)
+        ])
+        await self.client.request(GenericRequest(method="ledger_accept"))
+
+    async def close_ledgers(self):
+        # A standalone server only closes a ledger when asked to
+        while True:
+            await asyncio.sleep(1)
+            await self.client.request(GenericRequest(method="ledger_accept"))
+
+    async def build(self):
+        async with AsyncWebsocketClient(self.url) as client:
+            self.client = client
+            ledger_closer = asyncio.create_task(self.close_ledgers()) if self.standalone else None
+            try:
+                await self.run_steps()
+            finally:
+                if ledger_closer:
+                    ledger_closer.cancel()
+
+        with open(self.output_path, "w") as f:
+            json.dump(self.data, f, indent=2)
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return self.data
+
+    async def run_steps(self):
+        total = len(self.steps)
+        done = set(self.completed)
+        running = {}
+        busy_accounts = set()
+        print(f"Setting up tutorial: {len(done)}/{total}", end="\r")
+
+        while len(done) < total:
+            for name, step in self.steps.items():
+                ready = (
+                    name not in done
+                    and name not in running
+                    and step["after"] <= done
+                    and busy_accounts.isdisjoint(step["accounts"])
+                )
+                if ready:
+                    busy_accounts.update(step["accounts"])
+                    running[name] = asyncio.create_task(step["fn"](self))
+
+            if not running:
+                raise RuntimeError(f"Setup steps can never run: {sorted(set(self.steps) - done)}")
+
+            finished, _ = await asyncio.wait(running.values(), return_when=asyncio.FIRST_COMPLETED)
+            for name, task in list(running.items()):
+                if task not in finished:
+                    continue
+                del running[name]
+                busy_accounts.difference_update(self.steps[name]["accounts"])
+                if task.exception():
+                    # Let the other running steps finish and save their work
+                    # before giving up, so a rerun has less to redo.
+                    for other in running.values():
+                        try:
+                            await other
+                        except Exception:
+                            pass
+                    for other_name, other in running.items():
+                        if not other.exception():
+                            self.data.update(other.result())
+                            self.completed.append(other_name)
+                    self.save_checkpoint()
+                    raise RuntimeError(f"Setup step '{name}' failed") from task.exception()
+                self.data.update(task.result())
+                self.completed.append(name)
+                done.add(name)
+                self.save_checkpoint()
+                print(f"Setting up tutorial: {len(done)}/{total}", end="\r")
+
+        print("Setting up tutorial: Complete!")
@@ -0,0 +1,271 @@
+# Processes a list of vault deposits and withdrawals concurrently.
+# Vault state is read once per ledger and cached, share <-> asset conversions
+# are computed locally, every depositor's balance is checked in one batched
+# pass, and results come from transaction metadata instead of extra requests.
+
+import asyncio
+import copy
+import json
+import os
+import sys
+from decimal import Decimal, ROUND_DOWN
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.asyncio.ledger import get_latest_validated_ledger_sequence
+from xrpl.asyncio.transaction import autofill, submit_and_wait
+from xrpl.models import VaultDeposit, VaultWithdraw
+from xrpl.models.requests import LedgerEntry, VaultInfo
+from xrpl.transaction import sign
+from xrpl.wallet import Wallet
+
+
+class VaultState:
+    """
+    A vault's totals at one ledger, enough to convert between shares and assets
+    the same way the ledger does.
+    """
+
+    def __init__(self, assets_total, assets_available, loss_unrealized, shares_total,
+                 scale, ledger_index):
+        self.assets_total = Decimal(assets_total)
+        self.assets_available = Decimal(assets_available)
+        self.loss_unrealized = Decimal(loss_unrealized)
+        self.shares_total = Decimal(shares_total)
+        self.scale = scale
+        self.ledger_index = ledger_index
+
+    @classmethod
+    def from_vault_info(cls, result):
+        vault = result["vault"]
+        return cls(
+            assets_total=vault.get("AssetsTotal", "0"),
+            assets_available=vault.get("AssetsAvailable", "0"),
+            loss_unrealized=vault.get("LossUnrealized", "0"),
+            shares_total=vault.get("shares", {}).get("OutstandingAmount", "0"),
+            scale=vault.get("Scale", 0),
+            ledger_index=result["ledger_index"],
+        )
+
+    @property
+    def nav(self):
+        """Assets backing the shares, after unrealized losses"""
+        return self.assets_total - self.loss_unrealized
+
+    def shares_for_assets(self, assets):
+        assets = Decimal(assets)
+        if self.shares_total == 0:
+            # The first deposit sets the exchange rate from the vault's Scale
+            return (assets * (Decimal(10) ** self.scale)).to_integral_value(ROUND_DOWN)
+        return (assets * self.shares_total / self.nav).to_integral_value(ROUND_DOWN)
+
+    def assets_for_shares(self, shares):
+        if self.shares_total == 0:
+            return Decimal(0)
+        return Decimal(shares) * self.nav / self.shares_total
+
+    def apply_metadata(self, meta, vault_id, share_mpt_id):
+        """Updates the totals from a transaction that touched the vault"""
+        for node in meta["AffectedNodes"]:
+            entry = next(iter(node.values()))
+            fields = entry.get("FinalFields") or entry.get("NewFields") or {}
+            if entry["LedgerEntryType"] == "Vault" and entry["LedgerIndex"] == vault_id:
+                self.assets_total = Decimal(fields.get("AssetsTotal", "0"))
+                self.assets_available = Decimal(fields.get("AssetsAvailable", "0"))
+                self.loss_unrealized = Decimal(fields.get("LossUnrealized", "0"))
+            elif entry["LedgerEntryType"] == "MPTokenIssuance" and entry["LedgerIndex"] == share_mpt_id:
+                self.shares_total = Decimal(fields.get("OutstandingAmount", "0"))
+
+
+class VaultClient:
+    def __init__(self, client, vault_id, asset_mpt_id, share_mpt_id):
+        self.client = client
+        self.vault_id = vault_id
+        self.asset_mpt_id = asset_mpt_id
+        self.share_mpt_id = share_mpt_id
+        # VaultState by ledger index; a validated ledger never changes
+        self.states = {}
+
+    async def state(self, ledger_index="validated"):
+        """
+        The vault's state at a validated ledger. Returns a copy, so changing it
+        doesn't change the cached state of that ledger.
+        """
+        if ledger_index == "validated":
+            # Resolve the ledger first so the cache can answer
+            ledger_index = await get_latest_validated_ledger_sequence(self.client)
+        if ledger_index not in self.states:
+            response = await self.client.request(VaultInfo(vault_id=self.vault_id, ledger_index=ledger_index))
+            self.states[ledger_index] = VaultState.from_vault_info(response.result)
+        return copy.copy(self.states[ledger_index])
+
+    async def balances(self, addresses, mpt_id, ledger_index):
+        """Looks up every account's MPT balance at the same ledger, concurrently"""
+        responses = await asyncio.gather(*[
+            self.client.request(LedgerEntry(
+                mptoken={"mpt_issuance_id": mpt_id, "account": address},
+                ledger_index=ledger_index,
+            ))
+            for address in addresses
+        ])
+        return {
+            address: Decimal(response.result["node"].get("MPTAmount", "0"))
+            if response.is_successful() else None
+            for address, response in zip(addresses, responses)
+        }
+
+    async def run(self, instructions):
+        """
+        Processes instructions like {"seed": ..., "action": "deposit", "amount": "10"}.
+        Amounts are always in the vault's asset. Returns one result per
+        instruction plus the vault's state after the whole run.
+        """
+        state = await self.state()
+        wallets = {}
+        for instruction in instructions:
+            wallet = Wallet.from_seed(instruction["seed"])
+            wallets[wallet.address] = wallet
+            instruction["address"] = wallet.address
+
+        addresses = list(wallets)
+        asset_balances, share_balances = await asyncio.gather(
+            self.balances(addresses, self.asset_mpt_id, state.ledger_index),
+            self.balances(addresses, self.share_mpt_id, state.ledger_index),
+        )
+
+        # Pre-check every instruction locally before anything is submitted
+        results = [None] * len(instructions)
+        by_address = {}
+        for i, instruction in enumerate(instructions):
+            address, amount = instruction["address"], Decimal(instruction["amount"])
+            if instruction["action"] == "deposit":
+                held = asset_balances[address]
+                needed = amount
+            else:
+                held = share_balances[address]
+                needed = state.shares_for_assets(amount)
+            if held is None or held < needed:
+                results[i] = {"address": address, "result": f"Insufficient balance: have {held}, need {needed}"}
+                continue
+            # Reserve the balance so a second instruction for the same account
+            # can't spend it again
+            if instruction["action"] == "deposit":
+                asset_balances[address] -= needed
+            else:
+                share_balances[address] -= needed
+            by_address.setdefault(address, []).append(i)
+
+        async def submit_all(address, indexes):
+            wallet = wallets[address]
+            template = await autofill(self.transaction(instructions[indexes[0]]), self.client)
+            txs = [
+                self.transaction(
+                    instructions[index],
+                    sequence=template.sequence + n,
+                    fee=template.fee,
+                    last_ledger_sequence=template.last_ledger_sequence + len(indexes),
+                )
+                for n, index in enumerate(indexes)
+            ]
+            responses = await asyncio.gather(*[
+                submit_and_wait(sign(tx, wallet), self.client) for tx in txs
+            ], return_exceptions=True)
+            return list(zip(indexes, responses))
+
+        submitted = await asyncio.gather(*[
+            submit_all(address, indexes) for address, indexes in by_address.items()
+        ])
+
+        # Apply metadata in ledger order so the final state is the vault's NAV
+        # after the last transaction of the run
+        validated = []
+        for index, response in (pair for group in submitted for pair in group):
+            address = instructions[index]["address"]
+            if isinstance(response, Exception):
+                results[index] = {"address": address, "result": f"Submit failed: {response}"}
+                continue
+            meta = response.result["meta"]
+            results[index] = {"address": address, "result": meta["TransactionResult"], **self.balances_from_metadata(meta, address)}
+            if meta["TransactionResult"] == "tesSUCCESS":
+                validated.append((response.result["ledger_index"], meta["TransactionIndex"], meta))
+
+        for ledger_index, _, meta in sorted(validated, key=lambda item: item[:2]):
+            state.apply_metadata(meta, self.vault_id, self.share_mpt_id)
+            state.ledger_index = ledger_index
+        return results, state
+
+    def transaction(self, instruction, **fields):
+        model = VaultDeposit if instruction["action"] == "deposit" else VaultWithdraw
+        return model(
+            account=instruction["address"],
+            vault_id=self.vault_id,
+            amount={"mpt_issuance_id": self.asset_mpt_id, "value": str(instruction["amount"])},
+            **fields,
+        )
+
+    def balances_from_metadata(self, meta, address):
+        balances = {}
+        for node in meta["AffectedNodes"]:
+            entry = next(iter(node.values()))
+            fields = entry.get("FinalFields") or entry.get("NewFields") or {}
+            if entry["LedgerEntryType"] != "MPToken" or fields.get("Account") != address:
+                continue
+            amount = "0" if "DeletedNode" in node else fields.get("MPTAmount", "0")
+            if fields["MPTokenIssuanceID"] == self.share_mpt_id:
+                balances["shares"] = amount
+            elif fields["MPTokenIssuanceID"] == self.asset_mpt_id:
+                balances["assets"] = amount
+        return balances
+
+
+async def main():
+    # Run the setup in this process if its data doesn't exist yet
+    if not os.path.exists("vault_setup.json"):
+        print("\n=== Vault setup data doesn't exist. Running setup script... ===\n")
+        from vault_setup import main as vault_setup
+        await vault_setup()
+
+    with open("vault_setup.json", "r") as f:
+        setup_data = json.load(f)
+
+    # Each instruction is one deposit or withdrawal, in the vault's asset. You
+    # can load these from a file and list as many depositors as you like.
+    depositor_seed = setup_data["depositor"]["seed"]
+    instructions = [
+        {"seed": depositor_seed, "action": "deposit", "amount": "5"},
+        {"seed": depositor_seed, "action": "deposit", "amount": "3"},
+        {"seed": depositor_seed, "action": "withdraw", "amount": "2"},
+    ]
+
+    async with AsyncWebsocketClient("wss://s.devnet.rippletest.net:51233") as client:
+        vault = VaultClient(
+            client,
+            setup_data["vault_id"],
+            setup_data["mpt_issuance_id"],
+            setup_data["vault_share_mpt_issuance_id"],
+        )
+
+        state = await vault.state()
+        print("=== Vault state before run ===")
+        print(f" - Total vault value: {state.assets_total}")
+        print(f" - Available assets: {state.assets_available}")
+        print(f" - Shares outstanding: {state.shares_total}")
+        print(f" - 1 asset buys {state.shares_for_assets(1)} shares")
+
+        results, state = await vault.run(instructions)
+
+    print("\n=== Results ===")
+    for instruction, result in zip(instructions, results):
+        print(f"{instruction['action']:>8} {instruction['amount']:>6} for {result['address']}: {result['result']}")
+        if "shares" in result:
+            print(f"          shares held: {result['shares']}")
+
+    print("\n=== Vault state after run ===")
+    print(f" - Total vault value: {state.assets_total}")
+    print(f" - Available assets: {state.assets_available}")
+    print(f" - Shares outstanding: {state.shares_total}")
+    if any(result["result"] != "tesSUCCESS" for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
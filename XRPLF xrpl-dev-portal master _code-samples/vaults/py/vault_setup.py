@@ -1,10 +1,15 @@
+# Setup script for vault tutorials
+#
+# Setup steps run as a dependency graph: each step starts as soon as the steps
+# it needs are done, and progress is saved after every step so a failed run
+# resumes where it left off. Run with --help for options such as pointing the
+# setup at a local standalone server.
+
 import asyncio
 import json
-import sys
 
-from xrpl.asyncio.clients import AsyncWebsocketClient
+from fixture_builder import FixtureBuilder, parse_args
 from xrpl.asyncio.transaction import submit_and_wait
-from xrpl.asyncio.wallet import generate_faucet_wallet
 from xrpl.models import (
     Batch, BatchFlag, CredentialAccept, CredentialCreate, MPTokenAuthorize,
     MPTokenIssuanceCreate, MPTokenIssuanceCreateFlag, Payment,
@@ -18,100 +23,109 @@ from xrpl.models.transactions.vault_create import (
 from xrpl.utils import encode_mptoken_metadata, str_to_hex
 
 
-async def main():
-    # Setup script for vault tutorials
-    print("Setting up tutorial: 0/5", end="\r")
+DEVNET_URL = "wss://s.devnet.rippletest.net:51233"
 
-    async with AsyncWebsocketClient("wss://s.devnet.rippletest.net:51233") as client:
-        # Create and fund all wallets concurrently
-        mpt_issuer, domain_owner, depositor, vault_owner = await asyncio.gather(
-            generate_faucet_wallet(client),
-            generate_faucet_wallet(client),
-            generate_faucet_wallet(client),
-            generate_faucet_wallet(client),
-        )
+cred_type = "VaultAccess"
 
-        # Step 1: Create MPT issuance, permissioned domain, and credentials in parallel
-        print("Setting up tutorial: 1/5", end="\r")
 
-        cred_type = "VaultAccess"
-        mpt_create_result, _ = await asyncio.gather(
-            submit_and_wait(
-                MPTokenIssuanceCreate(
-                    account=mpt_issuer.address,
-                    flags=(
-                        MPTokenIssuanceCreateFlag.TF_MPT_CAN_TRANSFER |
-                        MPTokenIssuanceCreateFlag.TF_MPT_CAN_LOCK
-                    ),
-                    asset_scale=2,
-                    transfer_fee=0,
-                    maximum_amount="1000000000000",
-                    mptoken_metadata=encode_mptoken_metadata({
-                        "ticker": "USTST",
-                        "name": "USTST Stablecoin",
-                        "desc": "A test stablecoin token",
-                        "icon": "example.org/ustst-icon.png",
-                        "asset_class": "rwa",
-                        "asset_subclass": "stablecoin",
-                        "issuer_name": "Test Stablecoin Inc",
-                        "uris": [
-                            {
-                                "uri": "example.org/ustst",
-                                "category": "website",
-                                "title": "USTST Official Website",
-                            },
-                            {
-                                "uri": "example.org/ustst/reserves",
-                                "category": "attestation",
-                                "title": "Reserve Attestation Reports",
-                            },
-                            {
-                                "uri": "example.org/ustst/docs",
-                                "category": "docs",
-                                "title": "USTST Documentation",
-                            },
-                        ],
-                        "additional_info": {
-                            "backing": "USD",
-                            "reserve_ratio": "1:1",
-                        },
-                    }),
+def check_result(response, action):
+    result = response.result["meta"]["TransactionResult"]
+    if result != "tesSUCCESS":
+        raise RuntimeError(f"{action} failed: {result}")
+
+
+def define_steps(builder):
+    # Each step lists the steps whose outputs it uses, and the accounts it
+    # sends transactions from so no two running steps share a Sequence.
+
+    # Create and fund all wallets concurrently
+    @builder.step("wallets")
+    async def wallets(b):
+        return await b.fund_wallets(["mpt_issuer", "domain_owner", "depositor", "vault_owner"])
+
+    # Create MPT issuance
+    @builder.step("mpt", after=["wallets"], accounts=["mpt_issuer"])
+    async def mpt(b):
+        mpt_issuer = b.wallet("mpt_issuer")
+        response = await submit_and_wait(
+            MPTokenIssuanceCreate(
+                account=mpt_issuer.address,
+                flags=(
+                    MPTokenIssuanceCreateFlag.TF_MPT_CAN_TRANSFER |
+                    MPTokenIssuanceCreateFlag.TF_MPT_CAN_LOCK
                 ),
-                client,
-                mpt_issuer,
-                autofill=True
-            ),
-            submit_and_wait(
-                Batch(
-                    account=domain_owner.address,
-                    flags=BatchFlag.TF_ALL_OR_NOTHING,
-                    raw_transactions=[
-                        PermissionedDomainSet(
-                            account=domain_owner.address,
-                            accepted_credentials=[
-                                Credential(
-                                    issuer=domain_owner.address,
-                                    credential_type=str_to_hex(cred_type)
-                                )
-                            ],
-                        ),
-                        CredentialCreate(
-                            account=domain_owner.address,
-                            subject=depositor.address,
-                            credential_type=str_to_hex(cred_type),
-                        ),
+                asset_scale=2,
+                transfer_fee=0,
+                maximum_amount="1000000000000",
+                mptoken_metadata=encode_mptoken_metadata({
+                    "ticker": "USTST",
+                    "name": "USTST Stablecoin",
+                    "desc": "A test stablecoin token",
+                    "icon": "example.org/ustst-icon.png",
+                    "asset_class": "rwa",
+                    "asset_subclass": "stablecoin",
+                    "issuer_name": "Test Stablecoin Inc",
+                    "uris": [
+                        {
+                            "uri": "example.org/ustst",
+                            "category": "website",
+                            "title": "USTST Official Website",
+                        },
+                        {
+                            "uri": "example.org/ustst/reserves",
+                            "category": "attestation",
+                            "title": "Reserve Attestation Reports",
+                        },
+                        {
+                            "uri": "example.org/ustst/docs",
+                            "category": "docs",
+                            "title": "USTST Documentation",
+                        },
                     ],
-                ),
-                client,
-                domain_owner,
-                autofill=True
-            )
+                    "additional_info": {
+                        "backing": "USD",
+                        "reserve_ratio": "1:1",
+                    },
+                }),
+            ),
+            b.client,
+            mpt_issuer,
+            autofill=True
         )
+        return {"mpt_issuance_id": response.result["meta"]["mpt_issuance_id"]}
 
-        mpt_issuance_id = mpt_create_result.result["meta"]["mpt_issuance_id"]
+    # Create permissioned domain and credential in one Batch
+    @builder.step("domain", after=["wallets"], accounts=["domain_owner"])
+    async def domain(b):
+        domain_owner = b.wallet("domain_owner")
+        await submit_and_wait(
+            Batch(
+                account=domain_owner.address,
+                flags=BatchFlag.TF_ALL_OR_NOTHING,
+                raw_transactions=[
+                    PermissionedDomainSet(
+                        account=domain_owner.address,
+                        accepted_credentials=[
+                            Credential(
+                                issuer=domain_owner.address,
+                                credential_type=str_to_hex(cred_type)
+                            )
+                        ],
+                    ),
+                    CredentialCreate(
+                        account=domain_owner.address,
+                        subject=b.data["depositor"]["address"],
+                        credential_type=str_to_hex(cred_type),
+                    ),
+                ],
+            ),
+            b.client,
+            domain_owner,
+            autofill=True
+        )
 
         # Get domain ID
-        domain_owner_objects = await client.request(AccountObjects(
+        domain_owner_objects = await b.client.request(AccountObjects(
             account=domain_owner.address,
             ledger_index="validated",
         ))
@@ -120,154 +134,135 @@ async def main():
             for node in domain_owner_objects.result["account_objects"]
             if node["LedgerEntryType"] == "PermissionedDomain"
         )
+        return {"domain_id": domain_id, "credential_type": cred_type}
 
-        # Step 2: Depositor accepts credential, authorizes MPT, and creates vault in parallel
-        print("Setting up tutorial: 2/5", end="\r")
-
-        _, vault_create_result = await asyncio.gather(
-            submit_and_wait(
-                Batch(
-                    account=depositor.address,
-                    flags=BatchFlag.TF_ALL_OR_NOTHING,
-                    raw_transactions=[
-                        CredentialAccept(
-                            account=depositor.address,
-                            issuer=domain_owner.address,
-                            credential_type=str_to_hex(cred_type),
-                        ),
-                        MPTokenAuthorize(
-                            account=depositor.address,
-                            mptoken_issuance_id=mpt_issuance_id,
-                        ),
-                    ],
-                ),
-                client,
-                depositor,
-                autofill=True
+    # Depositor accepts credential and authorizes MPT
+    @builder.step("authorize", after=["mpt", "domain"], accounts=["depositor"])
+    async def authorize(b):
+        depositor = b.wallet("depositor")
+        await submit_and_wait(
+            Batch(
+                account=depositor.address,
+                flags=BatchFlag.TF_ALL_OR_NOTHING,
+                raw_transactions=[
+                    CredentialAccept(
+                        account=depositor.address,
+                        issuer=b.data["domain_owner"]["address"],
+                        credential_type=str_to_hex(cred_type),
+                    ),
+                    MPTokenAuthorize(
+                        account=depositor.address,
+                        mptoken_issuance_id=b.data["mpt_issuance_id"],
+                    ),
+                ],
             ),
-            submit_and_wait(
-                VaultCreate(
-                    account=vault_owner.address,
-                    asset={"mpt_issuance_id": mpt_issuance_id},
-                    flags=VaultCreateFlag.TF_VAULT_PRIVATE,
-                    domain_id=domain_id,
-                    data=str_to_hex(json.dumps(
-                        {"n": "LATAM Fund II", "w": "examplefund.com"}
-                    )),
-                    mptoken_metadata=encode_mptoken_metadata({
-                        "ticker": "SHARE1",
-                        "name": "Vault Shares",
-                        "desc": "Proportional ownership shares of the vault",
-                        "icon": "example.com/vault-shares-icon.png",
-                        "asset_class": "defi",
-                        "issuer_name": "Vault Owner",
-                        "uris": [
-                            {
-                                "uri": "example.com/asset",
-                                "category": "website",
-                                "title": "Asset Website",
-                            },
-                            {
-                                "uri": "example.com/docs",
-                                "category": "docs",
-                                "title": "Docs",
-                            },
-                        ],
-                        "additional_info": {
-                            "example_info": "test",
+            b.client,
+            depositor,
+            autofill=True
+        )
+        return {}
+
+    # Create vault
+    @builder.step("vault", after=["mpt", "domain"], accounts=["vault_owner"])
+    async def vault(b):
+        vault_owner = b.wallet("vault_owner")
+        response = await submit_and_wait(
+            VaultCreate(
+                account=vault_owner.address,
+                asset={"mpt_issuance_id": b.data["mpt_issuance_id"]},
+                flags=VaultCreateFlag.TF_VAULT_PRIVATE,
+                domain_id=b.data["domain_id"],
+                data=str_to_hex(json.dumps(
+                    {"n": "LATAM Fund II", "w": "examplefund.com"}
+                )),
+                mptoken_metadata=encode_mptoken_metadata({
+                    "ticker": "SHARE1",
+                    "name": "Vault Shares",
+                    "desc": "Proportional ownership shares of the vault",
+                    "icon": "example.com/vault-shares-icon.png",
+                    "asset_class": "defi",
+                    "issuer_name": "Vault Owner",
+                    "uris": [
+                        {
+                            "uri": "example.com/asset",
+                            "category": "website",
+                            "title": "Asset Website",
                         },
-                    }),
-                    assets_maximum="0",
-                    withdrawal_policy=WithdrawalPolicy.VAULT_STRATEGY_FIRST_COME_FIRST_SERVE,
-                ),
-                client,
-                vault_owner,
-                autofill=True
+                        {
+                            "uri": "example.com/docs",
+                            "category": "docs",
+                            "title": "Docs",
+                        },
+                    ],
+                    "additional_info": {
+                        "example_info": "test",
+                    },
+                }),
+                assets_maximum="0",
+                withdrawal_policy=WithdrawalPolicy.VAULT_STRATEGY_FIRST_COME_FIRST_SERVE,
             ),
+            b.client,
+            vault_owner,
+            autofill=True
         )
 
         # Extract vault_id and vault_share_mpt_issuance_id
         vault_node = next(
-            node for node in vault_create_result.result["meta"]["AffectedNodes"]
+            node for node in response.result["meta"]["AffectedNodes"]
             if "CreatedNode" in node and node["CreatedNode"].get("LedgerEntryType") == "Vault"
         )
-        vault_id = vault_node["CreatedNode"]["LedgerIndex"]
-        vault_share_mpt_issuance_id = vault_node["CreatedNode"]["NewFields"]["ShareMPTID"]
-
-        # Step 3: Issuer sends payment to depositor
-        print("Setting up tutorial: 3/5", end="\r")
+        return {
+            "vault_id": vault_node["CreatedNode"]["LedgerIndex"],
+            "vault_share_mpt_issuance_id": vault_node["CreatedNode"]["NewFields"]["ShareMPTID"],
+        }
 
-        payment_result = await submit_and_wait(
+    # Issuer sends payment to depositor
+    @builder.step("payment", after=["authorize"], accounts=["mpt_issuer"])
+    async def payment(b):
+        mpt_issuer = b.wallet("mpt_issuer")
+        response = await submit_and_wait(
             Payment(
                 account=mpt_issuer.address,
-                destination=depositor.address,
+                destination=b.data["depositor"]["address"],
                 amount={
-                    "mpt_issuance_id": mpt_issuance_id,
+                    "mpt_issuance_id": b.data["mpt_issuance_id"],
                     "value": "10000",
                 },
             ),
-            client,
+            b.client,
             mpt_issuer,
             autofill=True
         )
+        check_result(response, "Payment")
+        return {}
 
-        if payment_result.result["meta"]["TransactionResult"] != "tesSUCCESS":
-            print(f"\nPayment failed: {payment_result.result['meta']['TransactionResult']}", file=sys.stderr)
-            sys.exit(1)
-
-        # Step 4: Make an initial deposit so withdraw example has shares to work with
-        print("Setting up tutorial: 4/5", end="\r")
-
-        initial_deposit_result = await submit_and_wait(
+    # Make an initial deposit so withdraw example has shares to work with
+    @builder.step("initial_deposit", after=["payment", "vault"], accounts=["depositor"])
+    async def initial_deposit(b):
+        depositor = b.wallet("depositor")
+        response = await submit_and_wait(
             VaultDeposit(
                 account=depositor.address,
-                vault_id=vault_id,
+                vault_id=b.data["vault_id"],
                 amount={
-                    "mpt_issuance_id": mpt_issuance_id,
+                    "mpt_issuance_id": b.data["mpt_issuance_id"],
                     "value": "1000",
                 },
             ),
-            client,
+            b.client,
             depositor,
             autofill=True
         )
+        check_result(response, "Initial deposit")
+        return {}
 
-        if initial_deposit_result.result["meta"]["TransactionResult"] != "tesSUCCESS":
-            print(f"\nInitial deposit failed: {initial_deposit_result.result['meta']['TransactionResult']}", file=sys.stderr)
-            sys.exit(1)
-
-        # Step 5: Save setup data to file
-        print("Setting up tutorial: 5/5", end="\r")
-
-        setup_data = {
-            "mpt_issuer": {
-                "address": mpt_issuer.address,
-                "seed": mpt_issuer.seed,
-            },
-            "mpt_issuance_id": mpt_issuance_id,
-            "domain_owner": {
-                "address": domain_owner.address,
-                "seed": domain_owner.seed,
-            },
-            "domain_id": domain_id,
-            "credential_type": cred_type,
-            "depositor": {
-                "address": depositor.address,
-                "seed": depositor.seed,
-            },
-            "vault_owner": {
-                "address": vault_owner.address,
-                "seed": vault_owner.seed,
-            },
-            "vault_id": vault_id,
-            "vault_share_mpt_issuance_id": vault_share_mpt_issuance_id,
-        }
-
-        with open("vault_setup.json", "w") as f:
-            json.dump(setup_data, f, indent=2)
 
-        print("Setting up tutorial: Complete!")
+async def main(url=DEVNET_URL, faucet_host=None, standalone=False, restart=False):
+    builder = FixtureBuilder("vault_setup.json", url, faucet_host, standalone, restart)
+    define_steps(builder)
+    await builder.build()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args("Set up accounts and ledger objects for the vault tutorials.", DEVNET_URL)
+    asyncio.run(main(args.url, args.faucet_host, args.standalone, args.restart))
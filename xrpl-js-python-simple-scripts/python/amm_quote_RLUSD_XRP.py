@@ -0,0 +1,185 @@
+import numpy as np
+from xrpl.clients import JsonRpcClient
+from xrpl.models.requests import AMMInfo
+
+# RLUSD constants
+CURRENCY_HEX = "524C555344000000000000000000000000000000"  # Hex for "RLUSD"
+ISSUER = "rQhWct2fv4Vc4KRjRgMrxa8xPN9Zx9iLKV"
+
+# AMM trading fees are expressed in units of 1/100,000 (1000 = 1%)
+FEE_DENOMINATOR = 100000
+
+
+class AMMQuoter:
+    """
+    Local constant-product model of an RLUSD/XRP AMM pool
+
+    Seeded from a single amm_info snapshot, then kept current from the metadata
+    of transactions that touch the pool, so quotes never hit the node.
+    Every quote accepts a scalar or an array of sizes and returns the same shape.
+    XRP amounts are in drops, RLUSD amounts are in token units.
+
+    The formulas follow the XLS-30 specification. rippled rounds its results,
+    so expect the last few digits to differ from what the ledger produces.
+    """
+
+    def __init__(self, amm_account, xrp_balance, rlusd_balance, lp_supply, trading_fee):
+        self.amm_account = amm_account
+        self.xrp_balance = float(xrp_balance)
+        self.rlusd_balance = float(rlusd_balance)
+        self.lp_supply = float(lp_supply)
+        self.trading_fee = int(trading_fee)
+
+    @classmethod
+    def from_amm_info(cls, client):
+        """
+        Builds a quoter from one amm_info request for the RLUSD/XRP pool
+        """
+        response = client.request(AMMInfo(
+            asset={"currency": CURRENCY_HEX, "issuer": ISSUER},
+            asset2={"currency": "XRP"},
+            ledger_index="validated"
+        ))
+        return cls.from_amm_info_result(response.result)
+
+    @classmethod
+    def from_amm_info_result(cls, result):
+        amm = result["amm"]
+        xrp, rlusd = amm["amount"], amm["amount2"]
+        if not isinstance(xrp, str):
+            xrp, rlusd = rlusd, xrp
+        return cls(
+            amm_account=amm["account"],
+            xrp_balance=xrp,
+            rlusd_balance=rlusd["value"],
+            lp_supply=amm["lp_token"]["value"],
+            trading_fee=amm["trading_fee"],
+        )
+
+    @property
+    def fee(self):
+        return self.trading_fee / FEE_DENOMINATOR
+
+    def _pool(self, asset):
+        """Returns (balance in, balance out) when asset is paid into the pool"""
+        if asset == "XRP":
+            return self.xrp_balance, self.rlusd_balance
+        if asset == "RLUSD":
+            return self.rlusd_balance, self.xrp_balance
+        raise ValueError(f"Unknown asset {asset}, expected 'XRP' or 'RLUSD'")
+
+    def spot_price(self):
+        """
+        RLUSD paid per drop of XRP at the current pool ratio, before fees
+        """
+        return self.rlusd_balance / self.xrp_balance
+
+    # Swaps
+
+    def swap_out(self, asset_in, amount_in):
+        """
+        Amount of the other asset received for paying amount_in of asset_in
+        """
+        balance_in, balance_out = self._pool(asset_in)
+        effective_in = np.asarray(amount_in, dtype=float) * (1 - self.fee)
+        return balance_out * effective_in / (balance_in + effective_in)
+
+    def swap_in(self, asset_out, amount_out):
+        """
+        Amount of the other asset that must be paid to receive amount_out of asset_out
+        """
+        balance_out, balance_in = self._pool(asset_out)
+        amount_out = np.asarray(amount_out, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            amount_in = balance_in * amount_out / (balance_out - amount_out) / (1 - self.fee)
+        # The pool can never be fully drained
+        return np.where(amount_out < balance_out, amount_in, np.inf)
+
+    # Deposits
+
+    def deposit_two_asset(self, asset, amount):
+        """
+        Returns (LP tokens, amount of the other asset needed) for a proportional
+        deposit of amount of asset. Proportional deposits pay no trading fee.
+        """
+        balance, other_balance = self._pool(asset)
+        ratio = np.asarray(amount, dtype=float) / balance
+        return self.lp_supply * ratio, other_balance * ratio
+
+    def deposit_single_asset(self, asset, amount):
+        """
+        LP tokens received for depositing amount of only one asset
+        """
+        balance, _ = self._pool(asset)
+        amount = np.asarray(amount, dtype=float)
+        # Half of a single-asset deposit is an implicit swap, which pays the fee
+        return self.lp_supply * (np.sqrt(1 + amount * (1 - self.fee / 2) / balance) - 1)
+
+    # Withdrawals
+
+    def withdraw_two_asset(self, lp_tokens):
+        """
+        Returns (XRP drops, RLUSD) received for redeeming lp_tokens proportionally
+        """
+        share = np.asarray(lp_tokens, dtype=float) / self.lp_supply
+        return self.xrp_balance * share, self.rlusd_balance * share
+
+    def withdraw_single_asset(self, asset, lp_tokens):
+        """
+        Amount of asset received for redeeming lp_tokens into only one asset
+        """
+        balance, _ = self._pool(asset)
+        share = np.clip(np.asarray(lp_tokens, dtype=float) / self.lp_supply, 0, 1)
+        return balance * (1 - (1 - share) ** 2) * (1 - self.fee / 2)
+
+    # Incremental refresh
+
+    def apply_metadata(self, meta):
+        """
+        Updates pool balances, LP supply and fee from a validated transaction's
+        metadata. Returns True if the transaction touched this pool.
+        """
+        touched = False
+        for node in meta.get("AffectedNodes", []):
+            entry = next(iter(node.values()))
+            fields = entry.get("FinalFields") or entry.get("NewFields") or {}
+            entry_type = entry.get("LedgerEntryType")
+
+            if entry_type == "AMM" and fields.get("Account") == self.amm_account:
+                self.lp_supply = float(fields["LPTokenBalance"]["value"])
+                self.trading_fee = int(fields.get("TradingFee", 0))
+                touched = True
+            elif entry_type == "AccountRoot" and fields.get("Account") == self.amm_account:
+                self.xrp_balance = float(fields["Balance"])
+                touched = True
+            elif entry_type == "RippleState" and fields.get("Balance", {}).get("currency") == CURRENCY_HEX:
+                high, low = fields["HighLimit"]["issuer"], fields["LowLimit"]["issuer"]
+                if self.amm_account not in (high, low) or ISSUER not in (high, low):
+                    continue
+                # The balance is stored from the low account's point of view
+                balance = float(fields["Balance"]["value"])
+                self.rlusd_balance = balance if low == self.amm_account else -balance
+                touched = True
+        return touched
+
+
+if __name__ == "__main__":
+    client = JsonRpcClient("https://s.altnet.rippletest.net:51234")
+
+    quoter = AMMQuoter.from_amm_info(client)
+    print("\n=== RLUSD/XRP AMM snapshot ===")
+    print(f"XRP: {quoter.xrp_balance / 1_000_000} XRP")
+    print(f"RLUSD: {quoter.rlusd_balance}")
+    print(f"LP tokens: {quoter.lp_supply}")
+    print(f"Trading Fee: {quoter.trading_fee / 1000}%")
+
+    # Thousands of scenarios from one snapshot, without another request
+    sizes = np.linspace(0.1, 10, 5000)
+    lp_single = quoter.deposit_single_asset("RLUSD", sizes)
+    xrp_out = quoter.swap_out("RLUSD", sizes)
+
+    for size in (0.5, 1, 5):
+        i = np.searchsorted(sizes, size)
+        print(f"\n{sizes[i]:.2f} RLUSD:")
+        print(f"  single-asset deposit -> {lp_single[i]:.6f} LP tokens")
+        print(f"  swap -> {xrp_out[i] / 1_000_000:.6f} XRP")
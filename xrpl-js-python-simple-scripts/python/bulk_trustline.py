@@ -0,0 +1,343 @@
+import argparse
+import asyncio
+import csv
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.models.amounts import IssuedCurrencyAmount
+from xrpl.models.requests import AccountInfo, Fee, SubmitOnly, Subscribe, Tx
+from xrpl.models.transactions import TrustSet
+from xrpl.transaction import sign
+from xrpl.wallet import Wallet
+
+# Sets up a trust line to one token from thousands of holder accounts.
+#
+# trustline.py sends one TrustSet and waits for it to be validated before the
+# next one can start. This script signs every TrustSet up front in a pool of
+# worker processes, then sends one wave per ledger, as many as the open ledger
+# has room for at the base fee. Each trust line is confirmed from the
+# metadata of its validated transaction. Transactions that are rejected or
+# expire are signed again with a higher fee and sent in a later wave.
+#
+# Progress is saved to a SQLite checkpoint after every wave, so a run that is
+# stopped picks up where it left off. Seeds and keys are never written to it.
+#
+# The holders file is a CSV with a limit column and either a seed column or
+# public_key and private_key columns. Optional currency and issuer columns
+# override the defaults for that row. An optional account column lets a
+# resumed run skip deriving keys for accounts that are already done.
+
+WS_URL = "wss://s.altnet.rippletest.net:51233"
+ISSUER = "rQhWct2fv4Vc4KRjRgMrxa8xPN9Zx9iLKV"
+CURRENCY = "RLUSD"
+
+# Results that mean the transaction may still be validated
+PENDING_RESULTS = {"tesSUCCESS", "terQUEUED"}
+# Each retry multiplies the fee by this much
+FEE_BUMP = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trust_lines (
+    account TEXT PRIMARY KEY,
+    currency TEXT NOT NULL,
+    issuer TEXT NOT NULL,
+    limit_value TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending' CHECK (state IN ('pending', 'submitted', 'done', 'failed')),
+    sequence INTEGER,
+    fee INTEGER,
+    tx_hash TEXT,
+    last_ledger INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS trust_lines_by_state ON trust_lines (state, attempts);
+"""
+
+
+def text_to_hex(text):
+    """Convert text to hex with proper padding"""
+    if len(text) > 20:
+        raise ValueError("Text must be 20 characters or less")
+    hex_text = text.encode('ascii').hex().upper()
+    return hex_text.ljust(40, '0')
+
+
+def currency_field(code):
+    """Three-letter codes are sent as they are, longer ones as 40 hex digits"""
+    if len(code) == 3 or len(code) == 40:
+        return code
+    return text_to_hex(code)
+
+
+def derive_keys(rows):
+    """(account, public key, private key) for holder rows, from a seed or from the keys"""
+    keys = []
+    for row in rows:
+        if row.get("seed"):
+            wallet = Wallet.from_seed(row["seed"])
+        else:
+            wallet = Wallet(row["public_key"], row["private_key"])
+        keys.append((wallet.address, wallet.public_key, wallet.private_key))
+    return keys
+
+
+def sign_all(jobs):
+    """Signs (public key, private key, TrustSet) jobs, returning (tx_blob, hash) for each"""
+    signed = []
+    for public_key, private_key, tx in jobs:
+        signed_tx = sign(tx, Wallet(public_key, private_key))
+        signed.append((signed_tx.blob(), signed_tx.get_hash()))
+    return signed
+
+
+def chunks(items, count):
+    size = max(1, -(-len(items) // count))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def trust_line_change(meta, account, currency, issuer):
+    """
+    How a validated TrustSet changed the trust line between account and issuer:
+    "created", "updated", or None if its metadata doesn't touch that line.
+    """
+    for node in meta.get("AffectedNodes", []):
+        kind, entry = next(iter(node.items()))
+        if entry["LedgerEntryType"] != "RippleState":
+            continue
+        fields = entry.get("NewFields") or entry.get("FinalFields", {})
+        low, high = fields.get("LowLimit", {}), fields.get("HighLimit", {})
+        if {low.get("issuer"), high.get("issuer")} == {account, issuer} and low.get("currency") == currency:
+            return "created" if kind == "CreatedNode" else "updated"
+    return None
+
+
+class Provisioner:
+    def __init__(self, url, checkpoint, workers=None, max_wave=500, max_fee=1000,
+                 max_attempts=5, ledger_window=4):
+        self.url = url
+        self.db = sqlite3.connect(checkpoint)
+        self.db.executescript(SCHEMA)
+        self.workers = workers
+        self.max_wave = max_wave
+        self.max_fee = max_fee
+        self.max_attempts = max_attempts
+        self.ledger_window = ledger_window
+        # account -> (public key, private key), only ever kept in memory
+        self.keys = {}
+        # tx hash -> account, for transactions sent and not yet validated
+        self.in_flight = {}
+
+    # Loading ------------------------------------------------------------------
+
+    def load(self, path, currency, issuer):
+        """Reads the holders file and adds any new accounts to the checkpoint"""
+        with open(path, newline="") as holders_file:
+            rows = list(csv.DictReader(holders_file))
+        done = {account for account, in self.db.execute(
+            "SELECT account FROM trust_lines WHERE state IN ('done', 'failed')")}
+        rows = [row for row in rows if row.get("account") not in done]
+
+        # Deriving keys from a seed takes tens of milliseconds, so it is
+        # spread over the worker processes too
+        with ProcessPoolExecutor(self.workers) as pool:
+            keys = [key for group in pool.map(derive_keys, chunks(rows, 64)) for key in group]
+        with self.db:
+            for row, (account, public_key, private_key) in zip(rows, keys):
+                self.keys[account] = (public_key, private_key)
+                self.db.execute(
+                    "INSERT OR IGNORE INTO trust_lines (account, currency, issuer, limit_value) VALUES (?, ?, ?, ?)",
+                    (account, currency_field(row.get("currency") or currency),
+                     row.get("issuer") or issuer, row["limit"]))
+        print(f"Loaded {len(keys)} holder(s) to provision.")
+
+    def set_state(self, account, state, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        self.db.execute(
+            f"UPDATE trust_lines SET state = ?{', ' + columns if columns else ''} WHERE account = ?",
+            (state, *fields.values(), account))
+
+    def counts(self):
+        return dict(self.db.execute("SELECT state, COUNT(*) FROM trust_lines GROUP BY state").fetchall())
+
+    # Checking results ---------------------------------------------------------
+
+    def settle(self, tx_hash, meta):
+        """Records the outcome of a validated TrustSet"""
+        account = self.in_flight.pop(tx_hash)
+        result = meta["TransactionResult"]
+        if result != "tesSUCCESS":
+            self.set_state(account, "failed", result=result)
+            return
+        currency, issuer = self.db.execute(
+            "SELECT currency, issuer FROM trust_lines WHERE account = ?", (account,)).fetchone()
+        change = trust_line_change(meta, account, currency, issuer)
+        self.set_state(account, "done", result=change or "unchanged")
+
+    def expire(self, ledger_index):
+        """Sends transactions that can no longer be validated back to be retried"""
+        for tx_hash, account in list(self.in_flight.items()):
+            last_ledger, = self.db.execute(
+                "SELECT last_ledger FROM trust_lines WHERE account = ?", (account,)).fetchone()
+            if last_ledger < ledger_index:
+                del self.in_flight[tx_hash]
+                self.retry_or_fail(account, "expired")
+
+    def retry_or_fail(self, account, result, **fields):
+        attempts, = self.db.execute("SELECT attempts FROM trust_lines WHERE account = ?", (account,)).fetchone()
+        self.set_state(account, "failed" if attempts >= self.max_attempts else "pending", result=result, **fields)
+
+    async def recover(self, client, validated_index):
+        """Finds out what happened to transactions sent before the last run stopped"""
+        rows = self.db.execute("SELECT account, tx_hash, last_ledger FROM trust_lines WHERE state = 'submitted'").fetchall()
+        responses = await asyncio.gather(*[client.request(Tx(transaction=tx_hash)) for _, tx_hash, _ in rows])
+        for (account, tx_hash, last_ledger), response in zip(rows, responses):
+            self.in_flight[tx_hash] = account
+            if response.result.get("validated"):
+                self.settle(tx_hash, response.result["meta"])
+            elif last_ledger < validated_index:
+                del self.in_flight[tx_hash]
+                self.retry_or_fail(account, "expired")
+        self.db.commit()
+        if rows:
+            print(f"Recovered {len(rows)} transaction(s) from the last run.")
+
+    # Sending ------------------------------------------------------------------
+
+    async def sequences(self, client, accounts):
+        responses = await asyncio.gather(*[
+            client.request(AccountInfo(account=account, ledger_index="current")) for account in accounts
+        ])
+        sequences = {}
+        for account, response in zip(accounts, responses):
+            if response.is_successful():
+                sequences[account] = response.result["account_data"]["Sequence"]
+            else:
+                self.set_state(account, "failed", result=response.result.get("error", "unknown"))
+        return sequences
+
+    async def wave(self, client, pool, validated_index):
+        """Signs and sends as many pending TrustSets as the open ledger has room for"""
+        fee = (await client.request(Fee())).result
+        room = int(fee["expected_ledger_size"]) - int(fee["current_ledger_size"])
+        size = min(room, self.max_wave)
+        if size <= 0:
+            return 0
+        # Retries go first, since they have waited longest
+        rows = self.db.execute("""
+            SELECT account, currency, issuer, limit_value, sequence, fee, attempts FROM trust_lines
+            WHERE state = 'pending' ORDER BY attempts DESC LIMIT ?
+        """, (size,)).fetchall()
+        rows = [row for row in rows if row[0] in self.keys]
+        if not rows:
+            return 0
+
+        base_fee = int(fee["drops"]["base_fee"])
+        open_ledger_fee = int(fee["drops"]["open_ledger_fee"])
+        sequences = {row[0]: row[4] for row in rows if row[4] is not None}
+        sequences.update(await self.sequences(client, [row[0] for row in rows if row[4] is None]))
+
+        jobs, planned = [], []
+        for account, currency, issuer, limit_value, _, last_fee, attempts in rows:
+            if account not in sequences:
+                continue
+            tx_fee = base_fee if not attempts else min(max(last_fee * FEE_BUMP, open_ledger_fee), self.max_fee)
+            tx = TrustSet(
+                account=account,
+                limit_amount=IssuedCurrencyAmount(currency=currency, issuer=issuer, value=limit_value),
+                sequence=sequences[account],
+                fee=str(tx_fee),
+                last_ledger_sequence=validated_index + self.ledger_window,
+            )
+            jobs.append((*self.keys[account], tx))
+            planned.append((account, tx, attempts + 1))
+
+        loop = asyncio.get_running_loop()
+        signed = [blob_and_hash for group in await asyncio.gather(*[
+            loop.run_in_executor(pool, sign_all, group) for group in chunks(jobs, self.workers or 8)
+        ]) for blob_and_hash in group]
+
+        # Saved before sending, so a crash mid-wave can be recovered by hash
+        with self.db:
+            for (account, tx, attempts), (_, tx_hash) in zip(planned, signed):
+                self.set_state(account, "submitted", sequence=tx.sequence, fee=int(tx.fee), tx_hash=tx_hash,
+                               last_ledger=tx.last_ledger_sequence, attempts=attempts)
+                self.in_flight[tx_hash] = account
+
+        responses = await asyncio.gather(*[
+            client.request(SubmitOnly(tx_blob=tx_blob)) for tx_blob, _ in signed
+        ], return_exceptions=True)
+        with self.db:
+            for (account, _, _), (_, tx_hash), response in zip(planned, signed, responses):
+                if isinstance(response, Exception):
+                    result = type(response).__name__
+                else:
+                    result = response.result.get("engine_result", response.result.get("error", "unknown"))
+                if result in PENDING_RESULTS or result.startswith("tec"):
+                    # tec results still go into the ledger and show up in the stream
+                    continue
+                self.in_flight.pop(tx_hash, None)
+                if result == "tefPAST_SEQ":
+                    self.retry_or_fail(account, result, sequence=None)
+                elif result.startswith(("tem", "tef")):
+                    self.set_state(account, "failed", result=result)
+                else:
+                    # tel and ter results, such as an open ledger fee too low
+                    self.retry_or_fail(account, result)
+        return len(planned)
+
+    async def run(self):
+        with ProcessPoolExecutor(self.workers) as pool:
+            async with AsyncWebsocketClient(self.url) as client:
+                # Subscribe first so no validation is missed while recovering
+                response = await client.request(Subscribe(streams=["ledger", "transactions"]))
+                await self.recover(client, response.result["ledger_index"])
+                await self.wave(client, pool, response.result["ledger_index"])
+
+                async for message in client:
+                    if message.get("type") == "transaction" and message.get("validated"):
+                        tx_hash = message.get("hash") or message["transaction"]["hash"]
+                        if tx_hash in self.in_flight:
+                            self.settle(tx_hash, message["meta"])
+                    elif message.get("type") == "ledgerClosed":
+                        # The ledger stream reports a ledger before its
+                        # transactions, so anything that expired before it
+                        # has had its chance.
+                        self.expire(message["ledger_index"])
+                        sent = await self.wave(client, pool, message["ledger_index"])
+                        self.db.commit()
+                        counts = self.counts()
+                        print(f"Ledger {message['ledger_index']}: sent {sent}, {len(self.in_flight)} in flight, "
+                              f"{counts.get('pending', 0)} pending, {counts.get('done', 0)} done, "
+                              f"{counts.get('failed', 0)} failed.")
+                        if not self.in_flight and not counts.get("pending"):
+                            break
+        self.db.commit()
+
+
+def report(db):
+    print("\n=== Trust Line Provisioning ===")
+    for state, result, count in db.execute(
+            "SELECT state, result, COUNT(*) FROM trust_lines GROUP BY state, result ORDER BY state"):
+        print(f"{state:10} {result or '':24} {count}")
+    print("==============================\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Set up trust lines for many holder accounts")
+    parser.add_argument("holders", help="CSV of holders: seed (or public_key and private_key) and limit")
+    parser.add_argument("--currency", default=CURRENCY)
+    parser.add_argument("--issuer", default=ISSUER)
+    parser.add_argument("--url", default=WS_URL)
+    parser.add_argument("--checkpoint", default="trustlines.sqlite")
+    parser.add_argument("--workers", type=int, help="Signing processes (default: one per CPU)")
+    parser.add_argument("--max-wave", type=int, default=500, help="Most transactions to send per ledger")
+    parser.add_argument("--max-fee", type=int, default=1000, help="Highest fee to retry with, in drops")
+    parser.add_argument("--max-attempts", type=int, default=5)
+    args = parser.parse_args()
+
+    provisioner = Provisioner(args.url, args.checkpoint, args.workers, args.max_wave,
+                              args.max_fee, args.max_attempts)
+    provisioner.load(args.holders, args.currency, args.issuer)
+    asyncio.run(provisioner.run())
+    report(provisioner.db)